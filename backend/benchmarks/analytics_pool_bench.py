@@ -0,0 +1,88 @@
+"""
+Benchmark: API-process responsiveness while heavy playground pivots run,
+in-process (threadpool, holds the GIL) vs the AnalyticsPool worker processes.
+Run from backend/ directory: python benchmarks/analytics_pool_bench.py [rows] [workers]
+Reports the worst latency of a trivial probe task run alongside the pivots.
+"""
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+N_ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+N_WORKERS = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+os.environ["ANALYTICS_WORKERS"] = str(N_WORKERS)
+os.environ["ANALYTICS_REFRESH_SECONDS"] = "0"
+
+from services.analytical_store import AnalyticalStore  # noqa: E402
+from services.analytics_pool import AnalyticsPool  # noqa: E402
+from services.analytics_service import run_query  # noqa: E402
+
+DIMS = ["policy_number", "industry_type"]
+METRICS = ["claim_amount", "claim_count", "premium", "max_claim"]
+
+
+def make_frame(n: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "policy_number": [f"COMM-{i:07d}" for i in rng.integers(0, n // 4, n)],
+        "industry_type": rng.choice(["Manufacturing", "Retail", "Construction", "Healthcare"], n),
+        "claim_amount": rng.gamma(2.0, 12_000, n).round(2),
+        "premium": rng.gamma(2.0, 25_000, n).round(2),
+    })
+
+
+def probe_latency(stop: threading.Event) -> float:
+    """Worst wall time of a ~1ms pure-Python task, sampled until stop is set."""
+    worst = 0.0
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        sum(range(20_000))
+        worst = max(worst, time.perf_counter() - t0)
+        time.sleep(0.005)
+    return worst
+
+
+def run_concurrently(fn, n: int) -> tuple:
+    stop = threading.Event()
+    result = {}
+    probe = threading.Thread(target=lambda: result.setdefault("worst", probe_latency(stop)))
+    probe.start()
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=fn) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    probe.join()
+    return elapsed, result["worst"]
+
+
+def main() -> int:
+    frame = make_frame(N_ROWS)
+    AnalyticalStore._frame = frame
+    AnalyticalStore._loaded = True
+    AnalyticalStore._version += 1
+    print(f"Frame: {N_ROWS:,} rows, {N_WORKERS} workers, {os.cpu_count()} CPUs")
+
+    AnalyticsPool.start()
+    AnalyticsPool.run(dimensions=DIMS[1:], metrics=METRICS)  # publish + warm the workers
+
+    local_t, local_worst = run_concurrently(lambda: run_query(frame, DIMS, METRICS), N_WORKERS)
+    pool_t, pool_worst = run_concurrently(lambda: AnalyticsPool.run(dimensions=DIMS, metrics=METRICS), N_WORKERS)
+    AnalyticsPool.shutdown()
+
+    print(f"  in-process : {local_t * 1000:9.1f} ms total, worst probe {local_worst * 1000:7.1f} ms")
+    print(f"  pool       : {pool_t * 1000:9.1f} ms total, worst probe {pool_worst * 1000:7.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Benchmark: concurrent chat writes + dashboard reads on SQLite, with the
+untuned engine (rollback journal, synchronous=FULL, NullPool) vs the tuned
+engine from database.connection.build_engine (WAL + pragmas + queue pool).
+Run from backend/ directory: python benchmarks/db_concurrency_bench.py [seconds] [writers] [readers]
+Each run works on a throwaway copy of data/riskmind.db.
+"""
+import asyncio
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine  # noqa: E402
+
+from database.connection import build_engine  # noqa: E402
+
+SRC_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "riskmind.db")
+DURATION = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+WRITERS = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+READERS = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+
+# Same shape as the chat snapshot / dashboard reads
+READ_SQL = [
+    "SELECT * FROM policies ORDER BY policy_number",
+    """SELECT c.*, p.policy_number, p.policyholder_name
+       FROM claims c LEFT JOIN policies p ON p.id = c.policy_id ORDER BY c.claim_date DESC""",
+    "SELECT * FROM decisions ORDER BY created_at DESC",
+    "SELECT * FROM chat_messages ORDER BY id DESC LIMIT 50",
+]
+
+
+async def writer(session_factory, stop_at: float, latencies: list):
+    async with session_factory() as db:
+        now = datetime.utcnow()
+        result = await db.execute(
+            text("INSERT INTO chat_sessions (title, user_email, created_at, updated_at) VALUES ('bench', 'bench@apexuw.com', :n, :n)"),
+            {"n": now},
+        )
+        session_id = result.lastrowid
+        await db.commit()
+    while time.perf_counter() < stop_at:
+        t0 = time.perf_counter()
+        async with session_factory() as db:
+            # Mirrors one chat() transaction: message insert + session touch + commit
+            now = datetime.utcnow()
+            await db.execute(
+                text("INSERT INTO chat_messages (session_id, role, content, created_at) VALUES (:s, 'user', :c, :n)"),
+                {"s": session_id, "c": "benchmark message " * 20, "n": now},
+            )
+            await db.execute(text("UPDATE chat_sessions SET updated_at = :n WHERE id = :s"), {"n": now, "s": session_id})
+            await db.commit()
+        latencies.append(time.perf_counter() - t0)
+
+
+async def reader(session_factory, stop_at: float, latencies: list):
+    while time.perf_counter() < stop_at:
+        t0 = time.perf_counter()
+        async with session_factory() as db:
+            for sql in READ_SQL:
+                (await db.execute(text(sql))).fetchall()
+        latencies.append(time.perf_counter() - t0)
+
+
+async def run(label: str, engine) -> None:
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    writes, reads = [], []
+    stop_at = time.perf_counter() + DURATION
+    tasks = [writer(factory, stop_at, writes) for _ in range(WRITERS)]
+    tasks += [reader(factory, stop_at, reads) for _ in range(READERS)]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    await engine.dispose()
+    errors = [r for r in results if isinstance(r, Exception)]
+
+    def p95(xs):
+        return statistics.quantiles(xs, n=20)[-1] * 1000 if len(xs) >= 20 else float("nan")
+
+    print(
+        f"  {label:8s}: {len(writes) / DURATION:8.1f} writes/s (p95 {p95(writes):7.1f} ms)  "
+        f"{len(reads) / DURATION:8.1f} dashboard reads/s (p95 {p95(reads):7.1f} ms)"
+        + (f"  [{len(errors)} errors: {errors[0]!r}]" if errors else "")
+    )
+
+
+def _copy_db(journal_mode: str) -> str:
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    src = sqlite3.connect(SRC_DB)
+    dst = sqlite3.connect(path)
+    src.backup(dst)
+    src.close()
+    dst.execute(f"PRAGMA journal_mode={journal_mode}")
+    dst.close()
+    return path
+
+
+async def main() -> int:
+    if not os.path.exists(SRC_DB):
+        print(f"[FAIL] {SRC_DB} not found - run seed_data.py first")
+        return 1
+    print(f"{WRITERS} chat writers + {READERS} dashboard readers for {DURATION:.0f}s each")
+
+    before = _copy_db("DELETE")
+    after = _copy_db("WAL")
+    try:
+        await run("before", create_async_engine(f"sqlite+aiosqlite:///{before}", echo=False))
+        await run("after", build_engine(f"sqlite+aiosqlite:///{after}", tuned=True))
+    finally:
+        for path in (before, after):
+            for suffix in ("", "-wal", "-shm", "-journal"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
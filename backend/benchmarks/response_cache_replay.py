@@ -0,0 +1,71 @@
+"""
+Replay: how often the semantic response cache (services/response_cache.py)
+would answer a recorded query log instead of the LLM, and whether any of
+those answers belonged to a different question.
+Run from backend/ directory: python benchmarks/response_cache_replay.py [log.jsonl]
+
+Each log line is {"ts", "user", "data_version", "topic", "message"}: ts in
+seconds (drives the TTL), topic a hand label of what is being asked. A
+hit whose stored topic differs from the query's is a false hit.
+Defaults to benchmarks/query_log_sample.jsonl. Exits non-zero on any false
+hit, or when the sample log's hit rate is below MIN_HIT_RATE.
+"""
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.intent_engine import _route_intent
+from services.response_cache import ENABLED, THRESHOLD, ResponseCache, scope
+
+SAMPLE_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "query_log_sample.jsonl")
+MIN_HIT_RATE = 0.3
+
+
+def main() -> int:
+    path = sys.argv[1] if len(sys.argv) > 1 else SAMPLE_LOG
+    with open(path) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    print(f"Replaying {len(records)} queries from {os.path.basename(path)} "
+          f"(threshold {THRESHOLD}, cache {'enabled' if ENABLED else 'DISABLED'})")
+
+    ResponseCache.clear()
+    false_hits, hits_by_topic = [], Counter()
+    started = time.perf_counter()
+    for r in records:
+        payload = _route_intent(r["message"])
+        key = scope(r.get("user", ""), r.get("data_version"), payload["intent"], payload["entities"])
+        entry = ResponseCache.get(key, r["message"], now=r["ts"])
+        if entry is None:
+            # The stored "response" is the topic, to check what a hit returns
+            ResponseCache.put(key, r["message"], r["topic"], "replay", now=r["ts"])
+        elif entry.response != r["topic"]:
+            false_hits.append((r["message"], entry.response))
+        else:
+            hits_by_topic[r["topic"]] += 1
+    elapsed = time.perf_counter() - started
+
+    stats = ResponseCache.stats()
+    print(f"  lookups    : {stats['hits'] + stats['misses']}")
+    print(f"  hits       : {stats['hits']} ({stats['hit_rate']:.1%})")
+    print(f"  expired    : {stats['expired']}")
+    print(f"  evictions  : {stats['evictions']}")
+    print(f"  per lookup : {elapsed / max(len(records), 1) * 1000:.3f} ms (incl. intent routing)")
+    for topic, n in hits_by_topic.most_common():
+        print(f"    {topic:20} {n}")
+    for message, cached in false_hits:
+        print(f"[FAIL] false hit: {message!r} answered from {cached!r}")
+
+    if false_hits:
+        return 1
+    if path == SAMPLE_LOG and stats["hit_rate"] < MIN_HIT_RATE:
+        print(f"[FAIL] hit rate below {MIN_HIT_RATE:.0%} on the sample log")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
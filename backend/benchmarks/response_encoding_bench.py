@@ -0,0 +1,93 @@
+"""
+Benchmark: encoding a large tabular response the way FastAPI's default
+JSONResponse does (jsonable_encoder + json.dumps) vs routers.responses
+(orjson, row and columnar format), with raw and gzip sizes.
+Run from backend/ directory: python benchmarks/response_encoding_bench.py [rows]
+Exits non-zero if the row-format speedup is below 3x or the columnar body
+is not smaller than the row body.
+"""
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from routers.responses import columnar, dumps, orjson
+
+MIN_SPEEDUP = 3
+
+
+def make_rows(n: int, seed: int = 7):
+    """Claim-like rows, as the dashboard and geo endpoints return them."""
+    rng = np.random.default_rng(seed)
+    base = datetime(2024, 1, 1)
+    amounts = rng.gamma(2.0, 12_000, n).round(2).tolist()
+    days = rng.integers(0, 730, n).tolist()
+    kinds = ["Property Damage", "Liability", "Theft", "Water Damage", "Fire"]
+    return [
+        {
+            "id": i,
+            "claim_number": f"CLM-{i:08d}",
+            "policy_number": f"COMM-{i // 4:07d}",
+            "claim_date": base + timedelta(days=days[i]),
+            "claim_amount": amounts[i],
+            "claim_type": kinds[i % len(kinds)],
+            "status": "Open" if i % 3 else "Closed",
+            "latitude": 40.0 + (i % 1000) / 1000,
+            "longitude": -74.0 - (i % 700) / 1000,
+        }
+        for i in range(n)
+    ]
+
+
+def _timed(fn, repeat: int = 3):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main() -> int:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    payload = {"claims": make_rows(n), "cursor": n, "snapshot": "full"}
+    print(f"Payload: {n:,} rows (orjson {'installed' if orjson else 'NOT installed: stdlib fallback'})")
+
+    t_default, body_default = _timed(lambda: JSONResponse(jsonable_encoder(payload)).body)
+    t_rows, body_rows = _timed(lambda: dumps(payload))
+    t_cols, body_cols = _timed(lambda: dumps(columnar(payload, {"claims"})))
+
+    if json.loads(body_rows) != json.loads(body_default):
+        print("[FAIL] row body differs from the FastAPI default encoding")
+        return 1
+    cols = json.loads(body_cols)["claims"]
+    rebuilt = [dict(zip(cols, values)) for values in zip(*cols.values())]
+    if rebuilt != json.loads(body_default)["claims"]:
+        print("[FAIL] columnar body does not round-trip to the same rows")
+        return 1
+
+    print(f"  {'':16} {'encode':>10} {'raw':>10} {'gzip':>10}")
+    for name, t, body in (
+        ("default", t_default, body_default),
+        ("orjson rows", t_rows, body_rows),
+        ("orjson columns", t_cols, body_cols),
+    ):
+        size = len(gzip.compress(body, compresslevel=6))
+        print(f"  {name:16} {t * 1000:7.1f} ms {len(body) / 1024:7.0f} KB {size / 1024:7.0f} KB")
+
+    speedup = t_default / t_rows if t_rows else float("inf")
+    print(f"  speedup        : {speedup:9.1f}x (target >= {MIN_SPEEDUP}x)")
+    ok = speedup >= MIN_SPEEDUP and len(body_cols) < len(body_rows)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Benchmark: vectorized risk scoring vs the legacy per-policy groupby loop
+that AnalyticsEngine.load used to run.
+Run from backend/ directory: python benchmarks/risk_scoring_bench.py [policies]
+Exits non-zero if the speedup is below 50x.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.risk_scoring import score_book, score_claim_rows
+
+MIN_SPEEDUP = 50
+
+
+def _legacy_risk(claim_count: int, total_amount: float) -> str:
+    if claim_count >= 5 or total_amount >= 100_000:
+        return "HIGH"
+    if claim_count >= 2 or total_amount >= 50_000:
+        return "MEDIUM"
+    return "LOW"
+
+
+def _legacy_loop(df: pd.DataFrame) -> pd.Series:
+    risk_map = {}
+    for pn, grp in df.groupby("policy_number"):
+        risk_map[pn] = _legacy_risk(len(grp), grp["claim_amount"].sum())
+    return df["policy_number"].map(risk_map)
+
+
+def _vectorized(df: pd.DataFrame) -> pd.Series:
+    levels = score_claim_rows(df["policy_number"], df["claim_amount"], labels=("HIGH", "MEDIUM", "LOW"))
+    return pd.Series(levels, index=df.index, name="policy_number", dtype=object)
+
+
+def make_book(n_policies: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    claims_per_policy = rng.poisson(3, n_policies) + 1
+    policy_idx = np.repeat(np.arange(n_policies), claims_per_policy)
+    return pd.DataFrame({
+        "policy_number": [f"COMM-{i:07d}" for i in policy_idx],
+        "claim_amount": rng.gamma(2.0, 12_000, len(policy_idx)).round(2),
+    })
+
+
+def main() -> int:
+    n_policies = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    df = make_book(n_policies)
+    print(f"Book: {n_policies:,} policies, {len(df):,} claim rows")
+
+    t0 = time.perf_counter()
+    legacy = _legacy_loop(df)
+    t_loop = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    fast = _vectorized(df)
+    t_vec = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    score_book(df["policy_number"], df["claim_amount"])
+    t_book = time.perf_counter() - t0
+
+    if not (legacy.astype(object) == fast).all():
+        print("[FAIL] vectorized risk levels differ from the legacy loop")
+        return 1
+
+    speedup = t_loop / t_vec if t_vec else float("inf")
+    print(f"  groupby loop : {t_loop * 1000:9.1f} ms")
+    print(f"  score_rows   : {t_vec * 1000:9.1f} ms")
+    print(f"  score_book   : {t_book * 1000:9.1f} ms (per-policy table incl. max_claim)")
+    print(f"  speedup      : {speedup:9.1f}x (target >= {MIN_SPEEDUP}x)")
+    return 0 if speedup >= MIN_SPEEDUP else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
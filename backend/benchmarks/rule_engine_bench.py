@@ -0,0 +1,98 @@
+"""
+Benchmark: guideline rule engine — one vectorized pass vs a per-policy,
+per-rule Python loop (how alerts / memo / mock analysis checked thresholds).
+Run from backend/ directory: python benchmarks/rule_engine_bench.py [policies] [rules]
+The loop runs on a sample and is extrapolated to the full book.
+Exits non-zero if the matches differ or the speedup is below 20x.
+"""
+import operator
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.rule_engine import Rule, RuleSet
+
+MIN_SPEEDUP = 20
+LOOP_SAMPLE = 5_000
+
+_PY_OPS = {">=": operator.ge, ">": operator.gt, "<=": operator.le, "<": operator.lt, "=": operator.eq}
+
+
+def make_book(n_policies: int, seed: int = 7) -> dict:
+    rng = np.random.default_rng(seed)
+    credit = rng.integers(20, 100, n_policies).astype(float)
+    credit[rng.random(n_policies) < 0.2] = np.nan  # missing enrichment
+    return {
+        "claim_count": rng.poisson(3, n_policies).astype(float),
+        "total_claims": rng.gamma(2.0, 40_000, n_policies).round(2),
+        "max_claim": rng.gamma(2.0, 25_000, n_policies).round(2),
+        "loss_ratio": rng.gamma(2.0, 30, n_policies).round(2),
+        "business_credit_score": credit,
+        "wildfire_risk_score": rng.integers(0, 100, n_policies).astype(float),
+    }
+
+
+def make_rules(n_rules: int, book: dict, seed: int = 11) -> RuleSet:
+    rng = np.random.default_rng(seed)
+    metrics = list(book)
+    rules = []
+    for i in range(n_rules):
+        metric = metrics[i % len(metrics)]
+        op = (">=", ">", "<=", "<")[rng.integers(4)]
+        # Tail thresholds from the metric's own distribution: every rule
+        # matches some rows, as guideline limits do
+        pct = rng.uniform(80, 99.5) if op in (">=", ">") else rng.uniform(0.5, 20)
+        threshold = float(np.nanpercentile(book[metric], pct))
+        rules.append(Rule(
+            section_code=f"9.{i // 10}.{i % 10}", title=f"Synthetic rule {i}", content="",
+            action="review", metric=metric, operator=op, threshold=threshold,
+        ))
+    return RuleSet(rules)
+
+
+def _loop(book: dict, rules: RuleSet, n: int) -> list:
+    pairs = []
+    for row in range(n):
+        for k, rule in enumerate(rules.rules):
+            value = book[rule.metric][row]
+            if value == value and _PY_OPS[rule.operator](value, rule.threshold):  # NaN never matches
+                pairs.append((row, k))
+    return pairs
+
+
+def main() -> int:
+    n_policies = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_rules = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    book = make_book(n_policies)
+    rules = make_rules(n_rules, book)
+    print(f"Book: {n_policies:,} policies x {len(rules)} rules ({len(book)} metrics)")
+
+    t0 = time.perf_counter()
+    rows, rule_idx = rules.evaluate(book)
+    t_vec = time.perf_counter() - t0
+
+    sample = min(LOOP_SAMPLE, n_policies)
+    sample_book = {k: v[:sample].tolist() for k, v in book.items()}
+    t0 = time.perf_counter()
+    expected = _loop(sample_book, rules, sample)
+    t_loop = (time.perf_counter() - t0) * n_policies / sample
+
+    in_sample = rows < sample
+    if sorted(zip(rows[in_sample].tolist(), rule_idx[in_sample].tolist())) != expected:
+        print("[FAIL] vectorized matches differ from the per-policy loop")
+        return 1
+
+    speedup = t_loop / t_vec if t_vec else float("inf")
+    print(f"  matches      : {len(rows):,}")
+    print(f"  python loop  : {t_loop * 1000:9.1f} ms (extrapolated from {sample:,} policies)")
+    print(f"  vectorized   : {t_vec * 1000:9.1f} ms")
+    print(f"  speedup      : {speedup:9.1f}x (target >= {MIN_SPEEDUP}x)")
+    return 0 if speedup >= MIN_SPEEDUP else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+alert_queue — policies whose alerts need re-evaluation.
+
+Triggers on claims, policies and decisions add the affected policy id; the
+alert engine (services/alert_engine.py) drains the queue and re-evaluates
+only those policies. Like policy_stats, the triggers catch every writer,
+including seed_data.py and raw SQL.
+"""
+from typing import List
+
+from sqlalchemy import text
+
+
+def _mark(policy_id: str) -> str:
+    # WHERE keeps NULL ids out (and disambiguates ON CONFLICT for SQLite)
+    return (
+        f"INSERT INTO alert_queue (policy_id) SELECT {policy_id} WHERE {policy_id} IS NOT NULL "
+        f"ON CONFLICT (policy_id) DO NOTHING"
+    )
+
+
+_DECISION_POLICY = "(SELECT id FROM policies WHERE policy_number = NEW.policy_number)"
+
+
+def _sqlite_triggers() -> List[str]:
+    return [
+        f"""CREATE TRIGGER trg_alert_queue_claim_insert AFTER INSERT ON claims
+            BEGIN {_mark("NEW.policy_id")}; END""",
+        f"""CREATE TRIGGER trg_alert_queue_claim_update
+            AFTER UPDATE OF policy_id, claim_amount, status, claim_date ON claims
+            BEGIN {_mark("OLD.policy_id")}; {_mark("NEW.policy_id")}; END""",
+        f"""CREATE TRIGGER trg_alert_queue_claim_delete AFTER DELETE ON claims
+            BEGIN {_mark("OLD.policy_id")}; END""",
+        f"""CREATE TRIGGER trg_alert_queue_policy_insert AFTER INSERT ON policies
+            BEGIN {_mark("NEW.id")}; END""",
+        f"""CREATE TRIGGER trg_alert_queue_policy_update AFTER UPDATE ON policies
+            BEGIN {_mark("NEW.id")}; END""",
+        f"""CREATE TRIGGER trg_alert_queue_policy_delete AFTER DELETE ON policies
+            BEGIN {_mark("OLD.id")}; END""",
+        f"""CREATE TRIGGER trg_alert_queue_decision_insert AFTER INSERT ON decisions
+            BEGIN {_mark(_DECISION_POLICY)}; END""",
+    ]
+
+
+def _postgres_triggers() -> List[str]:
+    return [
+        """CREATE OR REPLACE FUNCTION trg_alert_queue_claims() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.policy_id IS NOT NULL THEN
+                    INSERT INTO alert_queue (policy_id) VALUES (OLD.policy_id) ON CONFLICT DO NOTHING;
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.policy_id IS NOT NULL THEN
+                    INSERT INTO alert_queue (policy_id) VALUES (NEW.policy_id) ON CONFLICT DO NOTHING;
+                END IF;
+                RETURN NULL;
+            END $$ LANGUAGE plpgsql""",
+        """CREATE OR REPLACE FUNCTION trg_alert_queue_policies() RETURNS trigger AS $$
+            BEGIN
+                INSERT INTO alert_queue (policy_id)
+                VALUES (CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END) ON CONFLICT DO NOTHING;
+                RETURN NULL;
+            END $$ LANGUAGE plpgsql""",
+        f"""CREATE OR REPLACE FUNCTION trg_alert_queue_decisions() RETURNS trigger AS $$
+            BEGIN
+                {_mark(_DECISION_POLICY)};
+                RETURN NULL;
+            END $$ LANGUAGE plpgsql""",
+        """CREATE TRIGGER trg_alert_queue_claims
+            AFTER INSERT OR DELETE OR UPDATE OF policy_id, claim_amount, status, claim_date ON claims
+            FOR EACH ROW EXECUTE FUNCTION trg_alert_queue_claims()""",
+        """CREATE TRIGGER trg_alert_queue_policies AFTER INSERT OR UPDATE OR DELETE ON policies
+            FOR EACH ROW EXECUTE FUNCTION trg_alert_queue_policies()""",
+        """CREATE TRIGGER trg_alert_queue_decisions AFTER INSERT ON decisions
+            FOR EACH ROW EXECUTE FUNCTION trg_alert_queue_decisions()""",
+    ]
+
+
+_TRIGGERS = {
+    "sqlite": [
+        "trg_alert_queue_claim_insert", "trg_alert_queue_claim_update", "trg_alert_queue_claim_delete",
+        "trg_alert_queue_policy_insert", "trg_alert_queue_policy_update", "trg_alert_queue_policy_delete",
+        "trg_alert_queue_decision_insert",
+    ],
+    "postgresql": [
+        "trg_alert_queue_claims ON claims", "trg_alert_queue_policies ON policies",
+        "trg_alert_queue_decisions ON decisions",
+    ],
+}
+
+
+async def install(conn):
+    """Create the alert tables and queue triggers, and queue every policy."""
+    from models.schemas import Alert, AlertCounter, AlertQueue
+
+    dialect = conn.dialect.name
+    for model in (Alert, AlertCounter, AlertQueue):
+        await conn.run_sync(lambda c, t=model.__table__: t.create(c, checkfirst=True))
+    # At most one active alert per dedup key
+    await conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_alerts_active_dedup ON alerts (dedup_key) WHERE resolved_at IS NULL"
+    ))
+    for name in _TRIGGERS.get(dialect, []):
+        await conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+    for ddl in _postgres_triggers() if dialect == "postgresql" else _sqlite_triggers():
+        await conn.execute(text(ddl))
+    await conn.execute(text(
+        "INSERT INTO alert_queue (policy_id) SELECT id FROM policies WHERE 1 = 1 ON CONFLICT (policy_id) DO NOTHING"
+    ))
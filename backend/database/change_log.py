@@ -0,0 +1,114 @@
+"""
+row_changes — per-row change log for delta sync of the dashboard tables.
+
+Triggers on the TRACKED tables record every insert, update and delete as
+(table_name, row_id, deleted) under a new, ever-increasing seq; each row
+keeps only its latest entry, so the log never outgrows the tables plus
+their tombstones. install() logs the rows that already exist, so the log
+covers every row. A client holding cursor N asks for the rows with
+seq > N, and MAX(seq) per table is that table's version (ETag input).
+Like policy_stats, the triggers catch every writer, including
+seed_data.py and raw SQL.
+"""
+from typing import Dict, List, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+TRACKED = (
+    "policies", "claims", "guidelines", "decisions", "documents", "chat_sessions", "chat_messages",
+)
+
+
+def _log(table: str, row: str, deleted: int) -> str:
+    # One entry per row: drop the previous one, then append under a new seq
+    return (
+        f"DELETE FROM row_changes WHERE table_name = '{table}' AND row_id = {row}.id; "
+        f"INSERT INTO row_changes (table_name, row_id, deleted) VALUES ('{table}', {row}.id, {deleted})"
+    )
+
+
+def _sqlite_triggers() -> List[str]:
+    ddl = []
+    for t in TRACKED:
+        ddl += [
+            f"CREATE TRIGGER trg_row_changes_{t}_insert AFTER INSERT ON {t} BEGIN {_log(t, 'NEW', 0)}; END",
+            f"CREATE TRIGGER trg_row_changes_{t}_update AFTER UPDATE ON {t} BEGIN {_log(t, 'NEW', 0)}; END",
+            f"CREATE TRIGGER trg_row_changes_{t}_delete AFTER DELETE ON {t} BEGIN {_log(t, 'OLD', 1)}; END",
+        ]
+    return ddl
+
+
+def _postgres_triggers() -> List[str]:
+    return [
+        """CREATE OR REPLACE FUNCTION trg_row_changes() RETURNS trigger AS $$
+            DECLARE rid integer;
+            BEGIN
+                rid := CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END;
+                DELETE FROM row_changes WHERE table_name = TG_TABLE_NAME AND row_id = rid;
+                INSERT INTO row_changes (table_name, row_id, deleted)
+                VALUES (TG_TABLE_NAME, rid, CASE WHEN TG_OP = 'DELETE' THEN 1 ELSE 0 END);
+                RETURN NULL;
+            END $$ LANGUAGE plpgsql""",
+    ] + [
+        f"""CREATE TRIGGER trg_row_changes AFTER INSERT OR UPDATE OR DELETE ON {t}
+            FOR EACH ROW EXECUTE FUNCTION trg_row_changes()"""
+        for t in TRACKED
+    ]
+
+
+_TRIGGERS = {
+    "sqlite": [f"trg_row_changes_{t}_{op}" for t in TRACKED for op in ("insert", "update", "delete")],
+    "postgresql": [f"trg_row_changes ON {t}" for t in TRACKED],
+}
+
+
+async def install(conn):
+    """Create row_changes and the change triggers, and log every existing row
+    once so that cursor 0 covers the whole table."""
+    from models.schemas import RowChange
+
+    dialect = conn.dialect.name
+    await conn.run_sync(lambda c: RowChange.__table__.create(c, checkfirst=True))
+    for name in _TRIGGERS.get(dialect, []):
+        await conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+    for ddl in _postgres_triggers() if dialect == "postgresql" else _sqlite_triggers():
+        await conn.execute(text(ddl))
+    for t in TRACKED:
+        await conn.execute(text(f"""
+            INSERT INTO row_changes (table_name, row_id, deleted)
+            SELECT '{t}', id, 0 FROM {t}
+            WHERE id NOT IN (SELECT row_id FROM row_changes WHERE table_name = '{t}')
+            ORDER BY id
+        """))
+
+
+# One index lookup per table: MAX(seq) over its (table_name, seq) range
+def versions_sql(tables: Sequence[str] = TRACKED) -> str:
+    """(table_name, version) rows for the given tables."""
+    return " UNION ALL ".join(
+        f"SELECT '{t}' AS table_name, (SELECT MAX(seq) FROM row_changes WHERE table_name = '{t}') AS version"
+        for t in tables
+    )
+
+
+_VERSIONS = text(versions_sql())
+
+
+async def current_seq(db: AsyncSession) -> int:
+    """Latest change seq over all tables (0 for an empty log)."""
+    return (await db.execute(text("SELECT MAX(seq) FROM row_changes"))).scalar() or 0
+
+
+async def table_versions(db: AsyncSession, tables: Sequence[str]) -> Dict[str, int]:
+    """Latest change seq per table (0 for a table with no rows logged)."""
+    versions = {r.table_name: r.version for r in (await db.execute(_VERSIONS)).fetchall()}
+    return {t: versions.get(t) or 0 for t in tables}
+
+
+def changed_ids_sql(table: str, since_param: str = "since", deleted: bool = False) -> str:
+    """Subquery of the ids in `table` changed (or deleted) after :since."""
+    return (
+        f"SELECT row_id FROM row_changes WHERE table_name = '{table}' "
+        f"AND seq > :{since_param} AND deleted = {1 if deleted else 0}"
+    )
@@ -1,68 +1,120 @@
 """
 Database connection and initialization
 """
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 import os
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./data/riskmind.db")
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
 
-engine = create_async_engine(DATABASE_URL, echo=False)
+# ── SQLite tuning (applied to every new connection) ────────────
+# WAL lets dashboard reads proceed while a chat commit is writing;
+# synchronous=NORMAL is durable in WAL mode except on power loss.
+SQLITE_TUNING = os.getenv("SQLITE_TUNING", "true").lower() == "true"
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    # Negative cache_size is KiB rather than pages
+    "cache_size": -int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "foreign_keys": os.getenv("SQLITE_FOREIGN_KEYS", "OFF"),
+}
+
+# Pool: the aiosqlite dialect defaults to NullPool (a new connection + thread
+# per session). A small queue pool of long-lived connections keeps the page
+# cache warm and applies the pragmas once per connection.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "-1"))
+
+# PostgreSQL (postgresql+asyncpg://...): DB_POOL_SIZE connections are kept
+# open, up to DB_POOL_SIZE + DB_MAX_OVERFLOW under load. asyncpg caches
+# prepared statements per connection; SQLAlchemy keeps its own LRU on top.
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+DB_PREPARED_STATEMENT_CACHE_SIZE = int(os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", "100"))
+DB_COMMAND_TIMEOUT = float(os.getenv("DB_COMMAND_TIMEOUT", "60"))
+
+
+def _is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def _is_postgres(url: str) -> bool:
+    return make_url(url).get_backend_name() == "postgresql"
+
+
+def _apply_sqlite_pragmas(dbapi_conn, pragmas: dict):
+    cursor = dbapi_conn.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def build_engine(url: str = DATABASE_URL, tuned: bool = SQLITE_TUNING, pragmas: dict = None) -> AsyncEngine:
+    """Create the async engine.
+
+    SQLite file databases get the pragma hook and a sized queue pool;
+    PostgreSQL gets a pre-pinged pool and asyncpg statement caches.
+    """
+    kwargs = {"echo": DB_ECHO}
+    if _is_postgres(url):
+        u = make_url(url)
+        if "prepared_statement_cache_size" not in u.query:
+            u = u.update_query_dict({"prepared_statement_cache_size": str(DB_PREPARED_STATEMENT_CACHE_SIZE)})
+        url = u.render_as_string(hide_password=False)
+        kwargs.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING,
+            connect_args={
+                "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+                "command_timeout": DB_COMMAND_TIMEOUT,
+            },
+        )
+    elif _is_sqlite(url) and ":memory:" not in url:
+        kwargs.update(
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+    eng = create_async_engine(url, **kwargs)
+
+    if _is_sqlite(url) and tuned:
+        active = SQLITE_PRAGMAS if pragmas is None else pragmas
+
+        @event.listens_for(eng.sync_engine, "connect")
+        def _on_connect(dbapi_conn, _record):
+            _apply_sqlite_pragmas(dbapi_conn, active)
+
+    return eng
+
+
+engine = build_engine()
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 class Base(DeclarativeBase):
     pass
 
 async def init_db():
-    """Initialize database tables"""
-    # Import all models to ensure they are registered with Base.metadata
-    from models.schemas import (
-        ClaimRecord, Policy, Guideline, User, Decision,
-        ChatSession, ChatMessage, Document,
-        ZoneThreshold, ZoneAccumulation, DataSource
-    )
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-        # Ensure guidelines.policy_number exists for policy-linked guidelines
-        result = await conn.execute(
-            text("SELECT name FROM pragma_table_info('guidelines') WHERE name='policy_number'")
-        )
-        if result.fetchone() is None:
-            await conn.execute(text("ALTER TABLE guidelines ADD COLUMN policy_number VARCHAR(50)"))
-            await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_guidelines_policy_number ON guidelines (policy_number)"))
+    """Initialize database tables (applies pending schema migrations)"""
+    from database.migrations import migrate
 
-        # Ensure policies.assigned_to exists for user-based filtering
-        result = await conn.execute(
-            text("SELECT name FROM pragma_table_info('policies') WHERE name='assigned_to'")
-        )
-        if result.fetchone() is None:
-            await conn.execute(text("ALTER TABLE policies ADD COLUMN assigned_to VARCHAR(255)"))
-            await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_policies_assigned_to ON policies (assigned_to)"))
-
-        # Ensure documents linking columns exist (policy_number, claim_number, session_id)
-        for col_name, col_type in [("policy_number", "VARCHAR(50)"), ("claim_number", "VARCHAR(50)"), ("session_id", "INTEGER")]:
-            result = await conn.execute(
-                text(f"SELECT name FROM pragma_table_info('documents') WHERE name='{col_name}'")
-            )
-            if result.fetchone() is None:
-                await conn.execute(text(f"ALTER TABLE documents ADD COLUMN {col_name} {col_type}"))
-                await conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_documents_{col_name} ON documents ({col_name})"))
-
-        # Ensure policies.policy_status exists (active/expired/cancelled)
-        result = await conn.execute(
-            text("SELECT name FROM pragma_table_info('policies') WHERE name='policy_status'")
-        )
-        if result.fetchone() is None:
-            await conn.execute(text("ALTER TABLE policies ADD COLUMN policy_status VARCHAR(20) DEFAULT 'active'"))
-            # Auto-compute status for existing rows based on expiration_date
-            await conn.execute(text("""
-                UPDATE policies SET policy_status = CASE
-                    WHEN expiration_date IS NOT NULL AND expiration_date < date('now') THEN 'expired'
-                    ELSE 'active'
-                END
-                WHERE policy_status IS NULL OR policy_status = 'active'
-            """))
+    async with engine.begin() as conn:
+        await migrate(conn)
 
 async def get_db():
     """Dependency for getting database session"""
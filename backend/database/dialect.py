@@ -0,0 +1,149 @@
+"""
+Dialect helpers — keeps SQLite vs PostgreSQL SQL differences in one place.
+
+Routers and services ask this module for dialect-specific SQL fragments and
+schema introspection instead of hard-coding `date('now')` or
+`pragma_table_info`. Engine / pool setup per dialect lives in connection.py.
+"""
+import json
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import make_url
+
+from database.connection import DATABASE_URL
+
+
+def backend_name(url: str = DATABASE_URL) -> str:
+    """'sqlite' or 'postgresql' (SQLAlchemy backend name of the URL)."""
+    return make_url(url).get_backend_name()
+
+
+def is_sqlite(url: str = DATABASE_URL) -> bool:
+    return backend_name(url) == "sqlite"
+
+
+def is_postgres(url: str = DATABASE_URL) -> bool:
+    return backend_name(url) == "postgresql"
+
+
+def display_name(url: str = DATABASE_URL) -> str:
+    return {"sqlite": "SQLite", "postgresql": "PostgreSQL"}.get(backend_name(url), backend_name(url))
+
+
+def database_name(url: str = DATABASE_URL) -> str:
+    """File name for SQLite, database name for server backends."""
+    u = make_url(url)
+    if u.get_backend_name() == "sqlite":
+        return (u.database or ":memory:").replace("\\", "/").rsplit("/", 1)[-1]
+    return u.database or ""
+
+
+def today_sql(dialect_name: Optional[str] = None) -> str:
+    """SQL expression for the current date (dialect of DATABASE_URL by default)."""
+    name = dialect_name or backend_name()
+    return "date('now')" if name == "sqlite" else "CURRENT_DATE"
+
+
+def date_from_today_sql(days: int = 0, months: int = 0, dialect_name: Optional[str] = None) -> str:
+    """SQL expression for today shifted by whole days or months (negative = past)."""
+    name = dialect_name or backend_name()
+    if not days and not months:
+        return today_sql(name)
+    amount, unit = (days, "days") if days else (months, "months")
+    if name == "sqlite":
+        return f"date('now', '{amount:+d} {unit}')"
+    return f"(CURRENT_DATE + INTERVAL '{amount} {unit}')"
+
+
+def days_until_sql(expr: str, dialect_name: Optional[str] = None) -> str:
+    """Whole days from today until the date in expr (negative once past)."""
+    name = dialect_name or backend_name()
+    if name == "sqlite":
+        return f"CAST(julianday({expr}) - julianday('now') AS INTEGER)"
+    return f"(CAST({expr} AS DATE) - CURRENT_DATE)"
+
+
+def year_sql(expr: str, dialect_name: Optional[str] = None) -> str:
+    """'YYYY' text of a date / timestamp expression."""
+    name = dialect_name or backend_name()
+    return f"strftime('%Y', {expr})" if name == "sqlite" else f"to_char({expr}, 'YYYY')"
+
+
+def month_sql(expr: str, dialect_name: Optional[str] = None) -> str:
+    """'YYYY-MM' text of a date / timestamp expression."""
+    name = dialect_name or backend_name()
+    return f"strftime('%Y-%m', {expr})" if name == "sqlite" else f"to_char({expr}, 'YYYY-MM')"
+
+
+def quarter_sql(expr: str, dialect_name: Optional[str] = None) -> str:
+    """'YYYY-Qn' text of a date / timestamp expression."""
+    name = dialect_name or backend_name()
+    if name == "sqlite":
+        return (f"strftime('%Y', {expr}) || '-Q' || "
+                f"((CAST(strftime('%m', {expr}) AS INTEGER) + 2) / 3)")
+    return f"to_char({expr}, 'YYYY-\"Q\"Q')"
+
+
+def weekday_sql(expr: str, dialect_name: Optional[str] = None) -> str:
+    """Day of week as text, '0' (Sunday) to '6' (Saturday)."""
+    name = dialect_name or backend_name()
+    if name == "sqlite":
+        return f"strftime('%w', {expr})"
+    return f"CAST(CAST(EXTRACT(DOW FROM {expr}) AS INTEGER) AS TEXT)"
+
+
+def round_sql(expr: str, digits: int = 2, dialect_name: Optional[str] = None) -> str:
+    """ROUND(expr, digits) as a float. PostgreSQL only rounds NUMERIC to a
+    number of places, so the value goes through NUMERIC and back."""
+    name = dialect_name or backend_name()
+    if name == "sqlite":
+        return f"ROUND({expr}, {digits})"
+    return f"CAST(ROUND(CAST({expr} AS NUMERIC), {digits}) AS DOUBLE PRECISION)"
+
+
+def group_concat_sql(expr: str, distinct: bool = False, dialect_name: Optional[str] = None) -> str:
+    """Comma-separated aggregate of expr (GROUP_CONCAT / STRING_AGG)."""
+    name = dialect_name or backend_name()
+    inner = f"DISTINCT {expr}" if distinct else expr
+    if name == "sqlite":
+        return f"GROUP_CONCAT({inner})"
+    return f"STRING_AGG({inner}, ',')"
+
+
+def json_values_sql(param: str, sql_type: str = "TEXT", dialect_name: Optional[str] = None) -> str:
+    """Subquery over the elements of a JSON array bound to :param, for
+    `col IN (<this>)`. Unlike an expanding IN, the statement text does not
+    depend on the list length, so it is prepared once and cached, and long
+    lists never hit the bind-variable limit. Bind the value with json_list()."""
+    name = dialect_name or backend_name()
+    if name == "sqlite":
+        return f"SELECT value FROM json_each(:{param})"
+    return f"SELECT CAST(value AS {sql_type}) FROM json_array_elements_text(CAST(:{param} AS json)) AS t(value)"
+
+
+def json_list(values: Iterable[Any]) -> str:
+    """Bind value for a json_values_sql() parameter."""
+    return json.dumps(list(values))
+
+
+async def column_names(conn, table: str) -> Set[str]:
+    """Column names of a table on an AsyncConnection (empty if the table is missing)."""
+    def _columns(sync_conn) -> Set[str]:
+        insp = inspect(sync_conn)
+        if not insp.has_table(table):
+            return set()
+        return {c["name"] for c in insp.get_columns(table)}
+    return await conn.run_sync(_columns)
+
+
+async def has_column(conn, table: str, column: str) -> bool:
+    return column in await column_names(conn, table)
+
+
+async def column_counts(conn, tables: List[str]) -> Dict[str, int]:
+    """Number of columns per table, in one inspector pass."""
+    def _counts(sync_conn) -> Dict[str, int]:
+        insp = inspect(sync_conn)
+        return {t: len(insp.get_columns(t)) if insp.has_table(t) else 0 for t in tables}
+    return await conn.run_sync(_counts)
@@ -0,0 +1,248 @@
+"""
+Schema migrations — one ordered list of idempotent steps, applied once.
+
+Applied versions are recorded in `schema_version`. When the recorded version
+is current, `migrate()` is a single query and startup skips every probe.
+Every step checks before it alters, so a database created by an older
+init_db or enrich_sqlite.py is brought up to date without errors.
+
+Used by init_db (app startup), reset_db.py and enrich_sqlite.py. New tables
+and columns are added here as a new step at the end of MIGRATIONS, never
+by editing an applied step.
+"""
+from datetime import datetime
+from typing import Awaitable, Callable, List, NamedTuple, Sequence, Tuple
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+
+from database.dialect import column_names, today_sql
+
+# Kept out of Base.metadata so drop_all / create_all never touch it
+_meta = MetaData()
+schema_version = Table(
+    "schema_version", _meta,
+    Column("version", Integer, primary_key=True),
+    Column("description", String(255)),
+    Column("applied_at", DateTime),
+)
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[..., Awaitable[None]]
+
+
+# ── Step helpers ────────────────────────────────────────────────
+
+def add_columns(table: str, columns: Sequence[Tuple[str, str]], index: bool = False):
+    """Step adding each missing (name, type) column, optionally with an index."""
+    async def _apply(conn):
+        existing = await column_names(conn, table)
+        for name, col_type in columns:
+            if name in existing:
+                continue
+            await conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {col_type}"))
+            if index:
+                await conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_{name} ON {table} ({name})"))
+    return _apply
+
+
+def create_indexes(indexes: Sequence[Tuple[str, str, str]]):
+    """Step creating each (name, table, column list) index if missing."""
+    async def _apply(conn):
+        for name, table, columns in indexes:
+            await conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+    return _apply
+
+
+# ── Steps ───────────────────────────────────────────────────────
+
+async def _create_tables(conn):
+    from database.connection import Base
+    import models.schemas  # noqa: F401 — registers every model on Base.metadata
+    await conn.run_sync(Base.metadata.create_all)
+
+
+async def _policy_stats(conn):
+    from database.policy_stats import install
+    await install(conn)
+
+
+async def _alerts(conn):
+    from database.alert_queue import install
+    await install(conn)
+
+
+async def _guideline_rules(conn):
+    from services.rule_engine import bind_defaults_sql
+    await add_columns("guidelines", [("threshold_metric", "VARCHAR(50)"), ("threshold_operator", "VARCHAR(4)")])(conn)
+    await conn.execute(text(bind_defaults_sql()))
+
+
+async def _alert_sort_keys(conn):
+    from services.alert_engine import severity_rank_sql
+    await add_columns("alerts", [("severity_rank", "INTEGER"), ("sort_total", "FLOAT")])(conn)
+    await conn.execute(text(f"""
+        UPDATE alerts SET severity_rank = {severity_rank_sql()},
+               sort_total = COALESCE((SELECT s.total_claims FROM policy_stats s WHERE s.policy_id = alerts.policy_id), 0)
+    """))
+    # Active-alert listing order, optionally within one type (routers/alerts.py).
+    # They replace the plain resolved_at index, which the planner preferred
+    # over the ordered scan.
+    await conn.execute(text("DROP INDEX IF EXISTS ix_alerts_resolved_at"))
+    for name, columns in (
+        ("ix_alerts_active_order", "severity_rank, sort_total DESC, policy_id, rule_order"),
+        ("ix_alerts_active_type_order", "type, severity_rank, sort_total DESC, policy_id, rule_order"),
+    ):
+        await conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON alerts ({columns}) WHERE resolved_at IS NULL"))
+
+
+async def _alert_events(conn):
+    from models.schemas import AlertEvent
+    await conn.run_sync(lambda c: AlertEvent.__table__.create(c, checkfirst=True))
+
+
+async def _zone_tables(conn):
+    from models.schemas import DataSource, ZoneAccumulation, ZoneThreshold
+    for model in (ZoneThreshold, ZoneAccumulation, DataSource):
+        await conn.run_sync(lambda c, t=model.__table__: t.create(c, checkfirst=True))
+
+
+async def _row_counts(conn):
+    from database.row_counts import install
+    await install(conn)
+
+
+async def _row_counts_tables(conn):
+    from database.row_counts import install_tables
+    await install_tables(conn)
+
+
+async def _row_changes(conn):
+    from database.change_log import install
+    await install(conn)
+
+
+async def _policy_status(conn):
+    if "policy_status" in await column_names(conn, "policies"):
+        return
+    await conn.execute(text("ALTER TABLE policies ADD COLUMN policy_status VARCHAR(20) DEFAULT 'active'"))
+    # Auto-compute status for existing rows based on expiration_date
+    await conn.execute(text(f"""
+        UPDATE policies SET policy_status = CASE
+            WHEN expiration_date IS NOT NULL AND expiration_date < {today_sql(conn.dialect.name)} THEN 'expired'
+            ELSE 'active'
+        END
+        WHERE policy_status IS NULL OR policy_status = 'active'
+    """))
+
+
+# Third-party enrichment columns (flood, cat, property, credit, zone)
+POLICY_ENRICHMENT_COLUMNS = [
+    ("property_address", "TEXT"),
+    ("property_city", "TEXT"),
+    ("property_state", "TEXT"),
+    ("property_zip", "TEXT"),
+    ("fema_flood_zone", "TEXT"),
+    ("flood_risk_score", "INTEGER"),
+    ("flood_zone_change_flag", "TEXT"),
+    ("cat_aal", "REAL"),
+    ("cat_pml_250yr", "REAL"),
+    ("primary_peril", "TEXT"),
+    ("cat_model_version", "TEXT"),
+    ("construction_type", "TEXT"),
+    ("year_built", "INTEGER"),
+    ("stories", "INTEGER"),
+    ("roof_type", "TEXT"),
+    ("replacement_cost", "REAL"),
+    ("protection_class", "INTEGER"),
+    ("crime_index", "INTEGER"),
+    ("property_crime_rate", "REAL"),
+    ("business_credit_score", "INTEGER"),
+    ("financial_stability", "TEXT"),
+    ("cresta_zone", "TEXT"),
+    ("risk_zone", "TEXT"),
+    ("weather_hail_events_5yr", "INTEGER"),
+    ("wildfire_risk_score", "INTEGER"),
+    ("distance_to_fire_station", "REAL"),
+    ("third_party_data_date", "TEXT"),
+    ("insured_value", "REAL"),
+]
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "create tables", _create_tables),
+    Migration(2, "guidelines.policy_number", add_columns("guidelines", [("policy_number", "VARCHAR(50)")], index=True)),
+    Migration(3, "policies.assigned_to", add_columns("policies", [("assigned_to", "VARCHAR(255)")], index=True)),
+    Migration(4, "documents link columns", add_columns(
+        "documents", [("policy_number", "VARCHAR(50)"), ("claim_number", "VARCHAR(50)"), ("session_id", "INTEGER")],
+        index=True,
+    )),
+    Migration(5, "policies.policy_status", _policy_status),
+    Migration(6, "policies third-party enrichment columns", add_columns("policies", POLICY_ENRICHMENT_COLUMNS)),
+    # Checked by tests/test_query_plans.py
+    Migration(7, "hot query indexes", create_indexes([
+        # Covers COUNT / SUM / MAX(claim_amount) per policy in the policy-claims joins
+        ("ix_claims_policy_id_amount", "claims", "policy_id, claim_amount"),
+        ("ix_claims_claim_date", "claims", "claim_date"),
+        ("ix_decisions_created_at", "decisions", "created_at"),
+        ("ix_chat_messages_session_created", "chat_messages", "session_id, created_at"),
+        # Top-N reads: dashboard recent messages / documents, largest policies
+        ("ix_chat_messages_created_at", "chat_messages", "created_at"),
+        ("ix_documents_created_at", "documents", "created_at"),
+        ("ix_policies_premium", "policies", "premium"),
+    ])),
+    Migration(8, "policy_stats table and triggers", _policy_stats),
+    Migration(9, "alerts, alert_counters and alert_queue triggers", _alerts),
+    Migration(10, "guidelines rule binding columns", _guideline_rules),
+    Migration(11, "alerts listing sort keys and indexes", _alert_sort_keys),
+    Migration(12, "alert_events log", _alert_events),
+    Migration(13, "row_counts table and triggers", _row_counts),
+    Migration(14, "row_changes log and triggers", _row_changes),
+    # Counters for the data status tables (routers/data.py)
+    Migration(15, "row_counts for decisions, guidelines, documents, users", _row_counts_tables),
+    # Were created by enrich_sqlite.py itself before it used this list
+    Migration(16, "zone_thresholds, zone_accumulation and data_sources tables", _zone_tables),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+# ── Runner ──────────────────────────────────────────────────────
+
+async def current_version(conn) -> int:
+    """Highest applied version (0 for a database without schema_version)."""
+    exists = await conn.run_sync(lambda c: inspect(c).has_table("schema_version"))
+    if not exists:
+        return 0
+    return (await conn.execute(select(schema_version.c.version).order_by(schema_version.c.version.desc()).limit(1))).scalar() or 0
+
+
+async def migrate(conn) -> int:
+    """Apply pending migrations in order on an AsyncConnection (inside its
+    transaction); returns the number applied."""
+    version = await current_version(conn)
+    if version >= LATEST_VERSION:
+        return 0
+    await conn.run_sync(_meta.create_all)
+    applied = 0
+    for m in MIGRATIONS:
+        if m.version <= version:
+            continue
+        await m.apply(conn)
+        await conn.execute(schema_version.insert().values(
+            version=m.version, description=m.description, applied_at=datetime.utcnow(),
+        ))
+        applied += 1
+    print(f"[OK] Schema migrated to version {LATEST_VERSION} ({applied} step(s) applied)")
+    return applied
+
+
+async def reset(conn) -> int:
+    """Drop every table (including schema_version) and migrate from scratch."""
+    from database.connection import Base
+    import models.schemas  # noqa: F401
+    await conn.run_sync(Base.metadata.drop_all)
+    await conn.run_sync(_meta.drop_all)
+    return await migrate(conn)
@@ -0,0 +1,127 @@
+"""
+policy_stats — materialized per-policy claim aggregates.
+
+One row per policy: claim_count, total_claims, max_claim, open_claims,
+loss_ratio, risk_level (score_policy_risk ladder) and last_claim_date.
+Triggers on claims and policies re-aggregate only the affected policy, so
+every writer (routers, seed_data.py, enrich_sqlite.py, ad-hoc SQL) keeps the
+table current and readers replace `LEFT JOIN claims ... GROUP BY p.id` with
+a primary-key lookup.
+
+The risk thresholds are compiled into the trigger SQL; when they change in
+services/risk_scoring.py, add a migration that calls install() again.
+"""
+from typing import List
+
+from sqlalchemy import text
+
+from services.risk_scoring import policy_risk_sql
+
+OPEN_CLAIM_STATUS = "open"
+
+_COLUMNS = (
+    "policy_id, policy_number, claim_count, total_claims, max_claim, "
+    "open_claims, loss_ratio, risk_level, last_claim_date, updated_at"
+)
+_UPDATES = ", ".join(
+    f"{c} = excluded.{c}" for c in _COLUMNS.split(", ") if c != "policy_id"
+)
+
+
+def _aggregate_sql(where: str) -> str:
+    total = "COALESCE(SUM(c.claim_amount), 0)"
+    ratio = f"CASE WHEN p.premium > 0 THEN {total} * 100.0 / p.premium ELSE 0 END"
+    return f"""
+        SELECT p.id, p.policy_number, COUNT(c.id), {total}, COALESCE(MAX(c.claim_amount), 0),
+               COALESCE(SUM(CASE WHEN c.status = '{OPEN_CLAIM_STATUS}' THEN 1 ELSE 0 END), 0),
+               {ratio},
+               {policy_risk_sql("COUNT(c.id)", "COALESCE(MAX(c.claim_amount), 0)", ratio)},
+               MAX(c.claim_date), CURRENT_TIMESTAMP
+        FROM policies p
+        LEFT JOIN claims c ON c.policy_id = p.id
+        WHERE {where}
+        GROUP BY p.id, p.policy_number, p.premium
+    """
+
+
+def refresh_sql(policy_id: str) -> str:
+    """Upsert the stats row of one policy (policy_id is a SQL expression)."""
+    return (
+        f"INSERT INTO policy_stats ({_COLUMNS}) {_aggregate_sql(f'p.id = {policy_id}')} "
+        f"ON CONFLICT (policy_id) DO UPDATE SET {_UPDATES}"
+    )
+
+
+def _sqlite_triggers() -> List[str]:
+    return [
+        f"""CREATE TRIGGER trg_policy_stats_claim_insert AFTER INSERT ON claims
+            BEGIN {refresh_sql("NEW.policy_id")}; END""",
+        f"""CREATE TRIGGER trg_policy_stats_claim_update
+            AFTER UPDATE OF policy_id, claim_amount, status, claim_date ON claims
+            BEGIN {refresh_sql("OLD.policy_id")}; {refresh_sql("NEW.policy_id")}; END""",
+        f"""CREATE TRIGGER trg_policy_stats_claim_delete AFTER DELETE ON claims
+            BEGIN {refresh_sql("OLD.policy_id")}; END""",
+        f"""CREATE TRIGGER trg_policy_stats_policy_insert AFTER INSERT ON policies
+            BEGIN {refresh_sql("NEW.id")}; END""",
+        f"""CREATE TRIGGER trg_policy_stats_policy_update AFTER UPDATE OF policy_number, premium ON policies
+            BEGIN {refresh_sql("NEW.id")}; END""",
+        """CREATE TRIGGER trg_policy_stats_policy_delete AFTER DELETE ON policies
+            BEGIN DELETE FROM policy_stats WHERE policy_id = OLD.id; END""",
+    ]
+
+
+def _postgres_triggers() -> List[str]:
+    return [
+        f"""CREATE OR REPLACE FUNCTION refresh_policy_stats(pid INTEGER) RETURNS void AS $$
+            {refresh_sql("pid")}
+            $$ LANGUAGE sql""",
+        """CREATE OR REPLACE FUNCTION trg_policy_stats_claims() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN PERFORM refresh_policy_stats(OLD.policy_id); END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN PERFORM refresh_policy_stats(NEW.policy_id); END IF;
+                RETURN NULL;
+            END $$ LANGUAGE plpgsql""",
+        """CREATE OR REPLACE FUNCTION trg_policy_stats_policies() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP = 'DELETE' THEN
+                    DELETE FROM policy_stats WHERE policy_id = OLD.id;
+                ELSE
+                    PERFORM refresh_policy_stats(NEW.id);
+                END IF;
+                RETURN NULL;
+            END $$ LANGUAGE plpgsql""",
+        """CREATE TRIGGER trg_policy_stats_claims
+            AFTER INSERT OR DELETE OR UPDATE OF policy_id, claim_amount, status, claim_date ON claims
+            FOR EACH ROW EXECUTE FUNCTION trg_policy_stats_claims()""",
+        """CREATE TRIGGER trg_policy_stats_policies
+            AFTER INSERT OR DELETE OR UPDATE OF policy_number, premium ON policies
+            FOR EACH ROW EXECUTE FUNCTION trg_policy_stats_policies()""",
+    ]
+
+
+_TRIGGERS = {
+    "sqlite": [
+        "trg_policy_stats_claim_insert", "trg_policy_stats_claim_update", "trg_policy_stats_claim_delete",
+        "trg_policy_stats_policy_insert", "trg_policy_stats_policy_update", "trg_policy_stats_policy_delete",
+    ],
+    "postgresql": ["trg_policy_stats_claims ON claims", "trg_policy_stats_policies ON policies"],
+}
+
+
+async def rebuild(conn):
+    """Recompute every row from scratch."""
+    await conn.execute(text("DELETE FROM policy_stats"))
+    await conn.execute(text(f"INSERT INTO policy_stats ({_COLUMNS}) {_aggregate_sql('1 = 1')}"))
+
+
+async def install(conn):
+    """(Re)create the table, triggers and contents on an AsyncConnection."""
+    from models.schemas import PolicyStats
+
+    dialect = conn.dialect.name
+    await conn.run_sync(lambda c: PolicyStats.__table__.create(c, checkfirst=True))
+    for name in _TRIGGERS.get(dialect, []):
+        await conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+    for ddl in _postgres_triggers() if dialect == "postgresql" else _sqlite_triggers():
+        await conn.execute(text(ddl))
+    await rebuild(conn)
@@ -0,0 +1,179 @@
+"""
+row_counts — maintained row counts for paginated list endpoints.
+
+One row per counter: one per COUNTED table (named after it) and
+`policies.assigned_to:<email>` (a user's book). Triggers apply +1 / -1 per
+row, so list endpoints and the data status tile report totals with a
+primary-key lookup instead of a COUNT(*) over the table on every call.
+Like policy_stats, the triggers catch every writer, including seed_data.py
+and raw SQL.
+
+install() (migration 13) counts policies, claims and the per-user books;
+install_tables() (migration 15) adds the TABLES counters.
+"""
+from typing import Dict, List, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.dialect import json_list, json_values_sql
+
+POLICIES = "policies"
+CLAIMS = "claims"
+# Tables counted by a plain insert / delete trigger pair (policies and claims
+# have their own triggers below)
+TABLES = ("decisions", "guidelines", "documents", "users")
+COUNTED = (POLICIES, CLAIMS) + TABLES
+_ASSIGNED_PREFIX = "policies.assigned_to:"
+
+
+def assigned_key(email: str) -> str:
+    """Counter name for the policies assigned to one user."""
+    return f"{_ASSIGNED_PREFIX}{email}"
+
+
+def _add(name: str, delta) -> str:
+    # WHERE keeps NULL names out (unassigned policies) and disambiguates
+    # ON CONFLICT for SQLite
+    return (
+        f"INSERT INTO row_counts (name, n) SELECT {name}, {delta} WHERE {name} IS NOT NULL "
+        f"ON CONFLICT (name) DO UPDATE SET n = row_counts.n + excluded.n"
+    )
+
+
+def _assigned(row: str) -> str:
+    return f"'{_ASSIGNED_PREFIX}' || {row}.assigned_to"
+
+
+def _sqlite_triggers() -> List[str]:
+    return [
+        f"""CREATE TRIGGER trg_row_counts_policy_insert AFTER INSERT ON policies
+            BEGIN {_add(f"'{POLICIES}'", 1)}; {_add(_assigned("NEW"), 1)}; END""",
+        f"""CREATE TRIGGER trg_row_counts_policy_delete AFTER DELETE ON policies
+            BEGIN {_add(f"'{POLICIES}'", -1)}; {_add(_assigned("OLD"), -1)}; END""",
+        f"""CREATE TRIGGER trg_row_counts_policy_assign AFTER UPDATE OF assigned_to ON policies
+            WHEN OLD.assigned_to IS NOT NEW.assigned_to
+            BEGIN {_add(_assigned("OLD"), -1)}; {_add(_assigned("NEW"), 1)}; END""",
+        f"""CREATE TRIGGER trg_row_counts_claim_insert AFTER INSERT ON claims
+            BEGIN {_add(f"'{CLAIMS}'", 1)}; END""",
+        f"""CREATE TRIGGER trg_row_counts_claim_delete AFTER DELETE ON claims
+            BEGIN {_add(f"'{CLAIMS}'", -1)}; END""",
+    ]
+
+
+def _postgres_triggers() -> List[str]:
+    return [
+        f"""CREATE OR REPLACE FUNCTION trg_row_counts_policies() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP = 'INSERT' THEN
+                    {_add(f"'{POLICIES}'", 1)};
+                    {_add(_assigned("NEW"), 1)};
+                ELSIF TG_OP = 'DELETE' THEN
+                    {_add(f"'{POLICIES}'", -1)};
+                    {_add(_assigned("OLD"), -1)};
+                ELSIF OLD.assigned_to IS DISTINCT FROM NEW.assigned_to THEN
+                    {_add(_assigned("OLD"), -1)};
+                    {_add(_assigned("NEW"), 1)};
+                END IF;
+                RETURN NULL;
+            END $$ LANGUAGE plpgsql""",
+        f"""CREATE OR REPLACE FUNCTION trg_row_counts_claims() RETURNS trigger AS $$
+            BEGIN
+                {_add(f"'{CLAIMS}'", "CASE WHEN TG_OP = 'DELETE' THEN -1 ELSE 1 END")};
+                RETURN NULL;
+            END $$ LANGUAGE plpgsql""",
+        """CREATE TRIGGER trg_row_counts_policies AFTER INSERT OR DELETE OR UPDATE OF assigned_to ON policies
+            FOR EACH ROW EXECUTE FUNCTION trg_row_counts_policies()""",
+        """CREATE TRIGGER trg_row_counts_claims AFTER INSERT OR DELETE ON claims
+            FOR EACH ROW EXECUTE FUNCTION trg_row_counts_claims()""",
+    ]
+
+
+def _sqlite_table_triggers() -> List[str]:
+    return [
+        ddl
+        for t in TABLES
+        for ddl in (
+            f"""CREATE TRIGGER trg_row_counts_{t}_insert AFTER INSERT ON {t}
+            BEGIN {_add(f"'{t}'", 1)}; END""",
+            f"""CREATE TRIGGER trg_row_counts_{t}_delete AFTER DELETE ON {t}
+            BEGIN {_add(f"'{t}'", -1)}; END""",
+        )
+    ]
+
+
+def _postgres_table_triggers() -> List[str]:
+    return [
+        f"""CREATE OR REPLACE FUNCTION trg_row_counts_table() RETURNS trigger AS $$
+            BEGIN
+                {_add("TG_TABLE_NAME", "CASE WHEN TG_OP = 'DELETE' THEN -1 ELSE 1 END")};
+                RETURN NULL;
+            END $$ LANGUAGE plpgsql""",
+    ] + [
+        f"""CREATE TRIGGER trg_row_counts_table AFTER INSERT OR DELETE ON {t}
+            FOR EACH ROW EXECUTE FUNCTION trg_row_counts_table()"""
+        for t in TABLES
+    ]
+
+
+_TRIGGERS = {
+    "sqlite": [
+        "trg_row_counts_policy_insert", "trg_row_counts_policy_delete", "trg_row_counts_policy_assign",
+        "trg_row_counts_claim_insert", "trg_row_counts_claim_delete",
+    ],
+    "postgresql": ["trg_row_counts_policies ON policies", "trg_row_counts_claims ON claims"],
+}
+
+_TABLE_TRIGGERS = {
+    "sqlite": [f"trg_row_counts_{t}_{op}" for t in TABLES for op in ("insert", "delete")],
+    "postgresql": [f"trg_row_counts_table ON {t}" for t in TABLES],
+}
+
+
+async def install(conn):
+    """Create row_counts and its triggers, and recount from the tables."""
+    from models.schemas import RowCount
+
+    dialect = conn.dialect.name
+    await conn.run_sync(lambda c: RowCount.__table__.create(c, checkfirst=True))
+    for name in _TRIGGERS.get(dialect, []):
+        await conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+    for ddl in _postgres_triggers() if dialect == "postgresql" else _sqlite_triggers():
+        await conn.execute(text(ddl))
+    await conn.execute(text("DELETE FROM row_counts"))
+    await conn.execute(text(f"""
+        INSERT INTO row_counts (name, n)
+        SELECT '{POLICIES}', COUNT(*) FROM policies
+        UNION ALL SELECT '{CLAIMS}', COUNT(*) FROM claims
+        UNION ALL SELECT {_assigned("policies")}, COUNT(*) FROM policies
+                  WHERE assigned_to IS NOT NULL GROUP BY assigned_to
+    """))
+
+
+async def install_tables(conn):
+    """Add the TABLES counters and their triggers, counted from the tables."""
+    dialect = conn.dialect.name
+    for name in _TABLE_TRIGGERS.get(dialect, []):
+        await conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+    for ddl in _postgres_table_triggers() if dialect == "postgresql" else _sqlite_table_triggers():
+        await conn.execute(text(ddl))
+    names = ", ".join(f"'{t}'" for t in TABLES)
+    await conn.execute(text(f"DELETE FROM row_counts WHERE name IN ({names})"))
+    counts = " UNION ALL ".join(f"SELECT '{t}', COUNT(*) FROM {t}" for t in TABLES)
+    await conn.execute(text(f"INSERT INTO row_counts (name, n) {counts}"))
+
+
+async def get_count(db: AsyncSession, name: str) -> int:
+    """Current value of a counter (0 when it has never been touched)."""
+    result = await db.execute(text("SELECT n FROM row_counts WHERE name = :name"), {"name": name})
+    return result.scalar() or 0
+
+
+async def get_counts(db: AsyncSession, names: Sequence[str]) -> Dict[str, int]:
+    """Several counters in one query (0 for the ones never touched)."""
+    result = await db.execute(
+        text(f"SELECT name, n FROM row_counts WHERE name IN ({json_values_sql('names')})"),
+        {"names": json_list(names)},
+    )
+    counts = dict(result.fetchall())
+    return {name: counts.get(name) or 0 for name in names}
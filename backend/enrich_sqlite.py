@@ -3,55 +3,40 @@ RiskMind Data Enrichment — SQLite
 Adds third-party data columns, zone tables, decisions, 2023 claims, new guidelines.
 Run from backend/ directory: python enrich_sqlite.py
 """
+import asyncio
 import sqlite3
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database.connection import build_engine  # noqa: E402
+from database.migrations import LATEST_VERSION, migrate  # noqa: E402
+from services.rule_engine import bind_defaults_sql  # noqa: E402
 
 DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "riskmind.db")
 
-def run():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
 
+async def _migrate() -> int:
+    eng = build_engine(f"sqlite+aiosqlite:///{DB_PATH}")
+    try:
+        async with eng.begin() as conn:
+            return await migrate(conn)
+    finally:
+        await eng.dispose()
+
+
+def run():
     # ========================================================================
-    # PART A: ALTER policies table — add third-party enrichment columns
+    # PART A: schema — third-party enrichment columns (migration 6) and the
+    # zone / data source tables (migration 16) come from the shared
+    # migration list (database/migrations.py)
     # ========================================================================
-    new_cols = [
-        ("property_address", "TEXT"),
-        ("property_city", "TEXT"),
-        ("property_state", "TEXT"),
-        ("property_zip", "TEXT"),
-        ("fema_flood_zone", "TEXT"),
-        ("flood_risk_score", "INTEGER"),
-        ("flood_zone_change_flag", "TEXT"),
-        ("cat_aal", "REAL"),
-        ("cat_pml_250yr", "REAL"),
-        ("primary_peril", "TEXT"),
-        ("cat_model_version", "TEXT"),
-        ("construction_type", "TEXT"),
-        ("year_built", "INTEGER"),
-        ("stories", "INTEGER"),
-        ("roof_type", "TEXT"),
-        ("replacement_cost", "REAL"),
-        ("protection_class", "INTEGER"),
-        ("crime_index", "INTEGER"),
-        ("property_crime_rate", "REAL"),
-        ("business_credit_score", "INTEGER"),
-        ("financial_stability", "TEXT"),
-        ("cresta_zone", "TEXT"),
-        ("risk_zone", "TEXT"),
-        ("weather_hail_events_5yr", "INTEGER"),
-        ("wildfire_risk_score", "INTEGER"),
-        ("distance_to_fire_station", "REAL"),
-        ("third_party_data_date", "TEXT"),
-        ("insured_value", "REAL"),
-    ]
+    applied = asyncio.run(_migrate())
+    print(f"  Schema at version {LATEST_VERSION} ({applied} migration(s) applied)")
 
-    existing_cols = {row[1] for row in c.execute("PRAGMA table_info(policies)").fetchall()}
-    for col_name, col_type in new_cols:
-        if col_name not in existing_cols:
-            c.execute(f"ALTER TABLE policies ADD COLUMN {col_name} {col_type}")
-            print(f"  Added column: policies.{col_name}")
-    conn.commit()
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
 
     # ========================================================================
     # PART B: UPDATE all 21 policies with realistic enrichment data
@@ -342,23 +327,8 @@ def run():
     print(f"[OK] Enriched {len(enrichments)} policies with third-party data")
 
     # ========================================================================
-    # PART C: CREATE zone_thresholds table
+    # PART C: zone_thresholds rules
     # ========================================================================
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS zone_thresholds (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            threshold_id TEXT UNIQUE,
-            zone_type TEXT,
-            metric TEXT,
-            limit_value REAL,
-            limit_unit TEXT,
-            action TEXT,
-            set_by TEXT,
-            effective_date TEXT,
-            notes TEXT
-        )
-    """)
-
     thresholds = [
         ("ZT-001", "cresta_zone", "total_tiv", 7000000, "USD", "refer", "CUO", "2024-01-01", "Max TIV per CRESTA zone. Breach requires CUO approval for new business."),
         ("ZT-002", "cresta_zone", "policy_count", 5, "count", "review", "CUO", "2024-01-01", "Max policies per CRESTA zone. Triggers concentration review."),
@@ -377,28 +347,11 @@ def run():
     for t in thresholds:
         c.execute("INSERT OR IGNORE INTO zone_thresholds (threshold_id, zone_type, metric, limit_value, limit_unit, action, set_by, effective_date, notes) VALUES (?,?,?,?,?,?,?,?,?)", t)
     conn.commit()
-    print(f"[OK] Created zone_thresholds with {len(thresholds)} rules")
+    print(f"[OK] Seeded zone_thresholds with {len(thresholds)} rules")
 
     # ========================================================================
-    # PART D: CREATE zone_accumulation table (pre-computed)
+    # PART D: zone_accumulation (pre-computed)
     # ========================================================================
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS zone_accumulation (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            zone_id TEXT,
-            zone_type TEXT,
-            zone_name TEXT,
-            total_tiv REAL,
-            policy_count INTEGER,
-            max_single_loss REAL,
-            pml_250yr REAL,
-            avg_loss_ratio REAL,
-            gross_premium REAL,
-            tiv_qoq_change REAL,
-            computed_date TEXT
-        )
-    """)
-
     # Pre-compute from enrichment data
     from collections import defaultdict
     zone_data = defaultdict(lambda: {"tiv": 0, "count": 0, "pml": 0, "premium": 0, "max_loss": 0, "policies": []})
@@ -449,23 +402,8 @@ def run():
     print(f"[OK] Pre-computed zone_accumulation for {len(zone_data)} zones")
 
     # ========================================================================
-    # PART E: CREATE data_sources registry
+    # PART E: data_sources registry
     # ========================================================================
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS data_sources (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            source_id TEXT UNIQUE,
-            source_name TEXT,
-            provider TEXT,
-            data_type TEXT,
-            update_frequency TEXT,
-            last_updated TEXT,
-            record_count INTEGER,
-            storage TEXT,
-            description TEXT
-        )
-    """)
-
     sources = [
         ("DS-001", "FEMA National Flood Hazard Layer", "FEMA", "flood_zone", "annual", "2025-10-01", 21, "sqlite", "Official FEMA flood zone designations. Maps to fema_flood_zone and flood_risk_score columns."),
         ("DS-002", "First Street Foundation Flood Model", "First Street", "flood_risk", "quarterly", "2025-12-15", 21, "sqlite", "Property-level flood risk scores (0-100) incorporating future climate projections."),
@@ -589,6 +527,7 @@ def run():
 
     for g in new_guidelines:
         c.execute("INSERT OR IGNORE INTO guidelines (section_code, title, content, category, threshold_type, threshold_value, action) VALUES (?,?,?,?,?,?,?)", g)
+    c.execute(bind_defaults_sql())
     conn.commit()
     print(f"[OK] Added {len(new_guidelines)} industry-specific, geographic, and compliance guidelines")
 
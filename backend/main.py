@@ -6,8 +6,10 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from contextlib import asynccontextmanager
+import asyncio
 import os
 from dotenv import load_dotenv
+from sqlalchemy import text
 
 load_dotenv()
 
@@ -29,6 +31,14 @@ async def lifespan(app: FastAPI):
     await init_db()
     print("[OK] Database initialized")
 
+    # Seed a fresh database with the sample book (SEED_EMPTY_DATABASE=false to skip)
+    if os.getenv("SEED_EMPTY_DATABASE", "true").lower() == "true":
+        async with async_session() as session:
+            empty = (await session.execute(text("SELECT COUNT(*) FROM policies"))).scalar() == 0
+        if empty:
+            from seed_data import seed
+            await seed()
+
     # Index guidelines + claims + decisions + documents into ChromaDB
     try:
         from services.vector_store import index_guidelines, index_claims_and_decisions, index_documents
@@ -45,12 +55,39 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"[WARN] ChromaDB indexing skipped: {e}")
 
-    # Pre-warm analytics engine
+    # Pre-warm the shared analytical store (playground, canned answers, chat snapshot)
+    try:
+        from services.analytical_store import AnalyticalStore
+        AnalyticalStore.load()
+    except Exception as e:
+        print(f"[WARN] Analytical store skipped: {e}")
+
+    # Evaluate alerts for policies changed since the last run, then keep
+    # them in sync in the background (alert reads never write)
+    from services.alert_engine import AlertEngine
     try:
-        from services.analytics_service import AnalyticsEngine
-        AnalyticsEngine.load()
+        async with async_session() as session:
+            n = await AlertEngine.sync(session)
+            if n:
+                print(f"[OK] Alerts: {n} policies evaluated")
     except Exception as e:
-        print(f"[WARN] Analytics engine skipped: {e}")
+        print(f"[WARN] Alert sync skipped: {e}")
+    AlertEngine.start()
+
+    # Opt-in analytics worker processes (ANALYTICS_WORKERS > 0)
+    try:
+        from services.analytics_pool import AnalyticsPool
+        AnalyticsPool.start()
+    except Exception as e:
+        print(f"[WARN] Analytics worker pool skipped: {e}")
+
+    # Token encoding for the context budget (may download; off the event loop)
+    from services.context_assembler import load_encoding
+    await asyncio.to_thread(load_encoding)
+
+    # Opt-in write-behind chat persistence (CHAT_WRITE_BEHIND=true)
+    from services.write_behind import WriteBehind
+    WriteBehind.start()
 
     api_key_g = os.getenv("GOOGLE_API_KEY", "")
     api_key_o = os.getenv("OPENAI_API_KEY", "")
@@ -63,6 +100,17 @@ async def lifespan(app: FastAPI):
         print("[LLM] Smart mock (no API key - set GOOGLE_API_KEY for free AI)")
 
     yield
+    await AlertEngine.stop()
+    # Flush queued chat writes before the process exits
+    try:
+        await WriteBehind.stop()
+    except Exception as e:
+        print(f"[WARN] Write-behind drain failed: {e}")
+    try:
+        from services.analytics_pool import AnalyticsPool
+        AnalyticsPool.shutdown()
+    except Exception as e:
+        print(f"[WARN] Analytics worker pool shutdown failed: {e}")
     print("[OK] Shutting down...")
 
 # Ensure upload directory exists
@@ -83,6 +131,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "ETag"],
 )
 
 # Serve uploaded files
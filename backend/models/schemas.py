@@ -1,7 +1,7 @@
 """
 Database models and Pydantic schemas
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index, Text
 from sqlalchemy.orm import relationship
 from pydantic import BaseModel
 from datetime import datetime
@@ -86,6 +86,9 @@ class Guideline(Base):
     policy_number = Column(String(50), nullable=True, index=True)
     threshold_type = Column(String(50))
     threshold_value = Column(Float, nullable=True)
+    # Rule binding: <threshold_metric> <threshold_operator> threshold_value (services/rule_engine.py)
+    threshold_metric = Column(String(50), nullable=True)
+    threshold_operator = Column(String(4), nullable=True)
     action = Column(String(100))
 
 
@@ -121,6 +124,102 @@ class ZoneAccumulation(Base):
     computed_date = Column(String(20))
 
 
+class PolicyStats(Base):
+    """Per-policy claim aggregates, kept current by database triggers
+    (see database/policy_stats.py)."""
+    __tablename__ = "policy_stats"
+
+    policy_id = Column(Integer, ForeignKey("policies.id"), primary_key=True)
+    policy_number = Column(String(50), index=True)
+    claim_count = Column(Integer, default=0)
+    total_claims = Column(Float, default=0)
+    max_claim = Column(Float, default=0)
+    open_claims = Column(Integer, default=0)
+    loss_ratio = Column(Float, default=0)
+    risk_level = Column(String(10), default="low")
+    last_claim_date = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class Alert(Base):
+    """Persisted risk alert; at most one active (unresolved) row per dedup_key."""
+    __tablename__ = "alerts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    dedup_key = Column(String(120), nullable=False, index=True)  # "<type>:<policy_number>"
+    type = Column(String(30), nullable=False)  # high_frequency, severity, loss_ratio, aggregate, renewal
+    severity = Column(String(10), nullable=False)  # critical, warning, info
+    rule_order = Column(Integer, default=0)
+    policy_id = Column(Integer, index=True)
+    policy_number = Column(String(50), index=True)
+    policyholder = Column(String(200))
+    message = Column(Text)
+    guideline_ref = Column(Text, nullable=True)
+    # Listing sort keys: severity order, then the policy's claims total at last evaluation
+    severity_rank = Column(Integer, default=0)
+    sort_total = Column(Float, default=0)
+    first_seen_at = Column(DateTime, default=datetime.utcnow)
+    last_seen_at = Column(DateTime, default=datetime.utcnow)
+    resolved_at = Column(DateTime, nullable=True)
+
+
+class AlertEvent(Base):
+    """Alert lifecycle log read by the alert stream; ids never go backwards."""
+    __tablename__ = "alert_events"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True)
+    alert_id = Column(Integer, index=True)
+    event = Column(String(10), nullable=False)  # created, updated, resolved
+    type = Column(String(30))
+    severity = Column(String(10))
+    policy_number = Column(String(50))
+    policyholder = Column(String(200))
+    message = Column(Text)
+    guideline_ref = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class AlertCounter(Base):
+    """Active alert count per severity, maintained by the alert engine."""
+    __tablename__ = "alert_counters"
+
+    severity = Column(String(10), primary_key=True)
+    active = Column(Integer, default=0)
+
+
+class AlertQueue(Base):
+    """Policies whose alerts need re-evaluation (filled by database triggers)."""
+    __tablename__ = "alert_queue"
+
+    policy_id = Column(Integer, primary_key=True, autoincrement=False)
+
+
+class RowCount(Base):
+    """Row count per table / list filter, kept current by database triggers
+    (see database/row_counts.py)."""
+    __tablename__ = "row_counts"
+
+    name = Column(String(300), primary_key=True)
+    n = Column(Integer, default=0)
+
+
+class RowChange(Base):
+    """Latest change per row of the delta-synced tables, kept current by
+    database triggers (see database/change_log.py)."""
+    __tablename__ = "row_changes"
+    __table_args__ = (
+        Index("ux_row_changes_row", "table_name", "row_id", unique=True),
+        Index("ix_row_changes_table_seq", "table_name", "seq"),
+        {"sqlite_autoincrement": True},
+    )
+
+    seq = Column(Integer, primary_key=True)
+    table_name = Column(String(50), nullable=False)
+    row_id = Column(Integer, nullable=False)
+    deleted = Column(Integer, default=0)  # 1 = tombstone
+
+
 class DataSource(Base):
     __tablename__ = "data_sources"
 
@@ -241,6 +340,7 @@ class AnalysisRequest(BaseModel):
 
 class GlassBoxEvidence(BaseModel):
     sql_query: str
+    sql_params: Optional[dict] = None  # bind values of sql_query
     data_returned: dict
     guideline_citation: Optional[str] = None
     guideline_section: Optional[str] = None
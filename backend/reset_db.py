@@ -6,14 +6,13 @@ import sys
 # Add backend to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from database.connection import engine, Base
-from models.schemas import ClaimRecord, Policy, Guideline, User, Decision, ChatSession, ChatMessage, Document
+from database.connection import engine
+from database.migrations import reset
 
 async def reset_database():
     print("🗑️  Dropping all tables...")
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
-        await conn.run_sync(Base.metadata.create_all)
+        await reset(conn)
     print("✅ Tables recreated successfully.")
 
 if __name__ == "__main__":
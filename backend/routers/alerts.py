@@ -1,17 +1,28 @@
 """
 Alerts Router - Risk alert generation from real database data
 """
-from fastapi import APIRouter, Depends, Query
+import asyncio
+import json
+
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from typing import List, Optional
-from datetime import datetime, timedelta
+from typing import List, Optional, Set
+from datetime import datetime
 
-from database.connection import get_db
+from database.connection import async_session, get_db
+from services.alert_engine import SEVERITY_RANK, UNKNOWN_SEVERITY_RANK, AlertEngine
+from services.alert_feed import AlertFeed
+from routers.pagination import MAX_PAGE_SIZE, decode_cursor, encode_cursor
 
 router = APIRouter()
 
+# Stream: client reconnect delay, and comment lines keeping proxies from timing out
+STREAM_RETRY_MS = 5000
+STREAM_HEARTBEAT_SECONDS = 20
+
 
 class AlertResponse(BaseModel):
     id: int
@@ -21,139 +32,181 @@ class AlertResponse(BaseModel):
     policyholder: str
     message: str
     guideline_ref: Optional[str] = None
-    created_at: str
+    created_at: str                     # first seen
+    last_seen_at: Optional[str] = None
+    resolved_at: Optional[str] = None
 
 
 @router.get("/", response_model=List[AlertResponse])
 async def get_alerts(
+    response: Response,
     type: Optional[str] = Query(None, description="Filter by alert type"),
     severity: Optional[str] = Query(None, description="Filter by severity"),
+    include_resolved: bool = Query(False, description="Include resolved alerts"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size (default: all)"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Scan all policies and claims to generate risk alerts.
-    Alerts are generated in real-time from actual database data.
+    Active risk alerts from the alerts table, as last synced by the alert
+    engine (on writes and in the background; this read never writes).
+    Filters, order and keyset pagination run in SQL on the (type,)
+    severity_rank, sort_total index, so a page costs its own size;
+    X-Next-Cursor is set when more rows follow.
     """
-    alerts = []
-    alert_id = 1
-
-    # Get all policies with claims summary
-    result = await db.execute(text("""
-        SELECT 
-            p.policy_number,
-            p.policyholder_name,
-            p.premium,
-            p.expiration_date,
-            COUNT(c.id) as claim_count,
-            COALESCE(SUM(c.claim_amount), 0) as total_claims,
-            COALESCE(MAX(c.claim_amount), 0) as max_claim
-        FROM policies p
-        LEFT JOIN claims c ON p.id = c.policy_id
-        GROUP BY p.id
-        ORDER BY total_claims DESC
-    """))
-    rows = result.fetchall()
-
-    for row in rows:
-        policy_num, holder, premium, expiration, claim_count, total_claims, max_claim = row
-        loss_ratio = (total_claims / premium * 100) if premium and premium > 0 else 0
-
-        # Rule 1: High frequency (5+ claims)
-        if claim_count >= 5:
-            alerts.append(AlertResponse(
-                id=alert_id,
-                type="high_frequency",
-                severity="critical",
-                policy_number=policy_num,
-                policyholder=holder,
-                message=f"{claim_count} claims filed — exceeds frequency threshold of 5",
-                guideline_ref="Section 3.1.1: Accounts with 5+ claims annually require enhanced review",
-                created_at=datetime.utcnow().isoformat()
-            ))
-            alert_id += 1
-
-        # Rule 2: High severity ($100K+ single claim)
-        if max_claim >= 100000:
-            alerts.append(AlertResponse(
-                id=alert_id,
-                type="severity",
-                severity="critical",
-                policy_number=policy_num,
-                policyholder=holder,
-                message=f"${max_claim:,.0f} claim exceeds $100,000 severity threshold",
-                guideline_ref="Section 4.3.2: Claims exceeding $100K require senior underwriter review",
-                created_at=datetime.utcnow().isoformat()
-            ))
-            alert_id += 1
-
-        # Rule 3: High loss ratio (>65%)
-        if loss_ratio > 65:
-            alerts.append(AlertResponse(
-                id=alert_id,
-                type="loss_ratio",
-                severity="warning",
-                policy_number=policy_num,
-                policyholder=holder,
-                message=f"Loss ratio at {loss_ratio:.0f}% — above 65% threshold",
-                guideline_ref="Section 5.1.3: Loss ratio over 65% requires mandatory rate increase",
-                created_at=datetime.utcnow().isoformat()
-            ))
-            alert_id += 1
-
-        # Rule 4: Aggregate claims > $200K
-        if total_claims >= 200000:
-            alerts.append(AlertResponse(
-                id=alert_id,
-                type="aggregate",
-                severity="critical",
-                policy_number=policy_num,
-                policyholder=holder,
-                message=f"Aggregate claims of ${total_claims:,.0f} exceed $200,000 threshold",
-                guideline_ref="Section 4.2.1: Aggregate claims exceeding $200K require referral",
-                created_at=datetime.utcnow().isoformat()
-            ))
-            alert_id += 1
-
-        # Rule 5: Renewal within 30 days
-        if expiration:
-            try:
-                exp_date = datetime.fromisoformat(str(expiration)) if isinstance(expiration, str) else expiration
-                days_until = (exp_date - datetime.utcnow()).days
-                if 0 <= days_until <= 30:
-                    alerts.append(AlertResponse(
-                        id=alert_id,
-                        type="renewal",
-                        severity="info",
-                        policy_number=policy_num,
-                        policyholder=holder,
-                        message=f"Policy renews in {days_until} days",
-                        guideline_ref=None,
-                        created_at=datetime.utcnow().isoformat()
-                    ))
-                    alert_id += 1
-            except (ValueError, TypeError):
-                pass
-
-    # Apply filters
+    where = [] if include_resolved else ["a.resolved_at IS NULL"]
+    params: dict = {}
     if type:
-        alerts = [a for a in alerts if a.type == type]
+        where.append("a.type = :type")
+        params["type"] = type
     if severity:
-        alerts = [a for a in alerts if a.severity == severity]
-
-    # Sort: critical first, then warning, then info
-    severity_order = {"critical": 0, "warning": 1, "info": 2}
-    alerts.sort(key=lambda a: severity_order.get(a.severity, 3))
+        where.append("a.severity_rank = :severity_rank AND a.severity = :severity")
+        params["severity_rank"] = SEVERITY_RANK.get(severity, UNKNOWN_SEVERITY_RANK)
+        params["severity"] = severity
+    if cursor:
+        where.append("""(
+            a.severity_rank > :c_rank
+            OR (a.severity_rank = :c_rank AND a.sort_total < :c_total)
+            OR (a.severity_rank = :c_rank AND a.sort_total = :c_total
+                AND (a.policy_id, a.rule_order, a.id) > (:c_policy, :c_order, :c_id))
+        )""")
+        params.update(decode_cursor(cursor, _CURSOR_KEYS))
+    where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+    limit_sql = ""
+    if limit:
+        limit_sql = "LIMIT :limit"
+        params["limit"] = limit + 1
+
+    # Critical first, then warning, then info; within a severity the
+    # policies with the largest claims total first
+    result = await db.execute(text(f"""
+        SELECT a.id, a.type, a.severity, a.policy_id, a.rule_order, a.severity_rank, a.sort_total,
+               a.policy_number, a.policyholder, a.message, a.guideline_ref,
+               a.first_seen_at, a.last_seen_at, a.resolved_at
+        FROM alerts a
+        {where_sql}
+        ORDER BY a.severity_rank, a.sort_total DESC, a.policy_id, a.rule_order, a.id
+        {limit_sql}
+    """), params)
+    rows = result.fetchall()
 
-    return alerts
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(
+            [last.severity_rank, last.sort_total, last.policy_id, last.rule_order, last.id]
+        )
+
+    return [
+        AlertResponse(
+            id=r.id,
+            type=r.type,
+            severity=r.severity,
+            policy_number=r.policy_number,
+            policyholder=r.policyholder or "",
+            message=r.message,
+            guideline_ref=r.guideline_ref,
+            created_at=_iso(r.first_seen_at),
+            last_seen_at=_iso(r.last_seen_at),
+            resolved_at=_iso(r.resolved_at) if r.resolved_at else None,
+        )
+        for r in rows
+    ]
 
 
 @router.get("/summary")
 async def get_alerts_summary(db: AsyncSession = Depends(get_db)):
-    """Get a quick count of alerts by severity."""
-    all_alerts = await get_alerts(type=None, severity=None, db=db)
+    """Get a quick count of active alerts by severity (maintained counters)."""
+    return await AlertEngine.summary(db)
+
+
+@router.get("/stream")
+async def stream_alerts(
+    request: Request,
+    cursor: Optional[int] = Query(None, description="Resume after this stream position"),
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    Server-sent events: `created` / `updated` / `resolved` alert events and a
+    `summary` after each batch. The SSE id is the feed's resume position
+    (the alert event id is in `event_id`); reconnecting with Last-Event-ID
+    (EventSource does this) or ?cursor= replays the events after it, which
+    may repeat a few already received. `reset` means the gap can no longer
+    be replayed: reload the list, then keep reading.
+    """
+    after_id = cursor
+    if last_event_id and last_event_id.isdigit():
+        after_id = int(last_event_id)
+    return StreamingResponse(
+        _event_stream(request, after_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _event_stream(request: Request, after_id: Optional[int]):
+    sub = await AlertFeed.subscribe()
+    try:
+        yield f"retry: {STREAM_RETRY_MS}\n\n"
+        # SSE ids are the feed position, not event ids: a reconnect resumes
+        # below any event that was still uncommitted (see AlertFeed)
+        position = AlertFeed.position()
+        replayed: Set[int] = set()
+        if after_id is not None:
+            async with async_session() as db:
+                events, complete = await AlertFeed.replay(db, after_id, AlertFeed.published())
+            if not complete:
+                yield _sse("reset", position, {})
+            for e in events:
+                yield _sse(e["event"], position, _event_payload(e))
+                replayed.add(e["id"])
+
+        while not sub.dropped:
+            if await request.is_disconnected():
+                break
+            try:
+                batch = await asyncio.wait_for(sub.queue.get(), timeout=STREAM_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            for e in batch.events:
+                if e["id"] not in replayed:
+                    yield _sse(e["event"], batch.position, _event_payload(e))
+            yield _sse("summary", batch.position, batch.summary)
+    finally:
+        AlertFeed.unsubscribe(sub)
+
+
+def _sse(event: str, event_id: int, data: dict) -> str:
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _event_payload(e: dict) -> dict:
+    """alert_events row -> AlertResponse-shaped alert plus the event fields."""
     return {
-        "total": len(all_alerts),
-        "critical": sum(1 for a in all_alerts if a.severity == "critical"),
-        "warning": sum(1 for a in all_alerts if a.severity == "warning"),
-        "info": sum(1 for a in all_alerts if a.severity == "info"),
+        "event_id": e["id"],
+        "alert": {
+            "id": e["alert_id"],
+            "type": e["type"],
+            "severity": e["severity"],
+            "policy_number": e["policy_number"],
+            "policyholder": e["policyholder"] or "",
+            "message": e["message"],
+            "guideline_ref": e["guideline_ref"],
+        },
+        "at": _iso(e["created_at"]),
     }
+
+
+def _iso(value) -> str:
+    """ISO timestamp from a DateTime column (SQLite returns it as text)."""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    return value.isoformat()
+
+
+_CURSOR_KEYS = ("c_rank", "c_total", "c_policy", "c_order", "c_id")
+
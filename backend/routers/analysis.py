@@ -8,6 +8,7 @@ from sqlalchemy import select, text
 from database.connection import get_db
 from models.schemas import Policy, ClaimRecord, AnalysisRequest, AnalysisResponse, GlassBoxEvidence
 from services.ai_service import get_ai_analysis
+from services.risk_scoring import compute_risk
 
 router = APIRouter()
 
@@ -23,21 +24,8 @@ async def evaluate_risk(
     """
     policy_number = request.policy_number
     
-    # Step 1: Get claims data (Glass Box - show the SQL)
-    sql_query = f"""
-        SELECT 
-            c.claim_number,
-            c.claim_amount,
-            c.claim_type,
-            c.claim_date,
-            c.status
-        FROM claims c
-        JOIN policies p ON c.policy_id = p.id
-        WHERE p.policy_number = '{policy_number}'
-        ORDER BY c.claim_date DESC
-    """
-    
-    summary_sql = f"""
+    # Step 1: Claims summary (Glass Box - show the SQL and its bound values)
+    summary_sql = """
         SELECT 
             COUNT(*) as claim_count,
             COALESCE(SUM(claim_amount), 0) as total_amount,
@@ -45,12 +33,13 @@ async def evaluate_risk(
             COALESCE(MAX(claim_amount), 0) as max_claim
         FROM claims c
         JOIN policies p ON c.policy_id = p.id
-        WHERE p.policy_number = '{policy_number}'
+        WHERE p.policy_number = :policy_number
     """
+    params = {"policy_number": policy_number}
     
     try:
         # Execute summary query
-        result = await db.execute(text(summary_sql))
+        result = await db.execute(text(summary_sql), params)
         row = result.fetchone()
         
         claim_count = row[0] if row else 0
@@ -71,6 +60,7 @@ async def evaluate_risk(
         # Step 3: Build Glass Box evidence
         evidence = GlassBoxEvidence(
             sql_query=summary_sql.strip(),
+            sql_params=params,
             data_returned=claims_summary,
             guideline_citation=analysis.get("guideline_text"),
             guideline_section=analysis.get("guideline_section")
@@ -94,27 +84,20 @@ async def quick_risk_check(
     db: AsyncSession = Depends(get_db)
 ):
     """Quick risk assessment without full analysis"""
-    sql = f"""
-        SELECT COUNT(*), COALESCE(SUM(claim_amount), 0)
-        FROM claims c
-        JOIN policies p ON c.policy_id = p.id
-        WHERE p.policy_number = '{policy_number}'
+    sql = """
+        SELECT claim_count, total_claims
+        FROM policy_stats
+        WHERE policy_number = :policy_number
     """
     
-    result = await db.execute(text(sql))
+    result = await db.execute(text(sql), {"policy_number": policy_number})
     row = result.fetchone()
     
     count = row[0] if row else 0
     total = row[1] if row else 0
     
-    # Simple rules
-    if count >= 5 or total >= 100000:
-        risk = "high"
-    elif count >= 3 or total >= 50000:
-        risk = "medium"
-    else:
-        risk = "low"
-    
+    risk = compute_risk(count, total)
+
     return {
         "policy_number": policy_number,
         "risk_level": risk,
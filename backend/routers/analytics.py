@@ -1,21 +1,41 @@
 """
-Analytics Playground API — meta / query / filter-values endpoints.
-Uses the pandas-based AnalyticsEngine singleton (no async DB needed).
+Analytics Playground API — meta / query / export / filter-values / canned / trend endpoints.
+Uses the pandas-based AnalyticsEngine and DataCube over the shared
+AnalyticalStore (no async DB needed). With ANALYTICS_WORKERS set, pivots run
+on the AnalyticsPool worker processes.
 """
-from fastapi import APIRouter
-from pydantic import BaseModel
-from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Literal, Optional
+from datetime import date
 
+from routers.responses import compressed_json
+from services.analytical_store import AnalyticalStore
+from services.analytics_pool import (
+    AnalyticsPool, AnalyticsQueryCancelled, AnalyticsQueryTimeout, AnalyticsWorkerError,
+)
 from services.analytics_service import AnalyticsEngine
+from services.data_cube import DataCube
 
 router = APIRouter()
 
+MAX_PAGE_SIZE = 10_000
+
 
 class AnalyticsQueryRequest(BaseModel):
     dimensions: List[str]
     metrics: List[str]
     filters: Optional[List[Dict[str, Any]]] = None
     user_email: Optional[str] = None
+    # Server-side sort + pagination (limit=None returns every row)
+    sort_by: Optional[str] = None
+    sort_dir: Literal["asc", "desc"] = "desc"
+    limit: Optional[int] = Field(None, ge=1, le=MAX_PAGE_SIZE)
+    offset: int = Field(0, ge=0)
+    # Worker pool only: client-chosen id for cancellation, per-query timeout (s)
+    query_id: Optional[str] = None
+    timeout: Optional[float] = None
 
 
 @router.get("/meta")
@@ -24,15 +44,96 @@ def analytics_meta():
 
 
 @router.post("/query")
-def analytics_query(req: AnalyticsQueryRequest):
-    return AnalyticsEngine.query(
+def analytics_query(req: AnalyticsQueryRequest, request: Request, format: Literal["json", "columns"] = "json"):
+    """Aggregated rows; format=columns sends `rows` as {column: values}."""
+    try:
+        result = AnalyticsEngine.query(
+            dimensions=req.dimensions,
+            metrics=req.metrics,
+            filters=req.filters,
+            user_email=req.user_email,
+            sort_by=req.sort_by,
+            sort_dir=req.sort_dir,
+            limit=req.limit,
+            offset=req.offset,
+            timeout=req.timeout,
+            query_id=req.query_id,
+        )
+    except AnalyticsQueryTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except AnalyticsQueryCancelled:
+        raise HTTPException(status_code=409, detail="Query cancelled")
+    except AnalyticsWorkerError as e:
+        raise HTTPException(status_code=500, detail=f"Analytics worker error: {e}")
+    return compressed_json(request, result, columns=("rows",), format=format)
+
+
+@router.post("/export")
+def analytics_export(req: AnalyticsQueryRequest, format: Literal["ndjson", "csv"] = "ndjson"):
+    """Stream the full (unpaged) result set as NDJSON or CSV."""
+    chunks = AnalyticsEngine.export(
+        format,
         dimensions=req.dimensions,
         metrics=req.metrics,
         filters=req.filters,
         user_email=req.user_email,
+        sort_by=req.sort_by,
+        sort_dir=req.sort_dir,
+    )
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="analytics.{format}"'},
     )
 
 
+@router.delete("/query/{query_id}")
+def analytics_cancel(query_id: str):
+    """Cancel a running worker-pool query by the query_id it was submitted with."""
+    if not AnalyticsPool.cancel(query_id):
+        raise HTTPException(status_code=404, detail="Query not running")
+    return {"cancelled": query_id}
+
+
 @router.get("/filter-values/{field}")
 def analytics_filter_values(field: str):
     return AnalyticsEngine.get_filter_values(field)
+
+
+@router.get("/canned")
+def analytics_canned(q: str):
+    """Canned answers (claim trend, claims by type, policies by industry)."""
+    result = DataCube.try_query(q)
+    if result is None:
+        raise HTTPException(status_code=404, detail="No canned answer for this question")
+    return result
+
+
+@router.get("/trend")
+def analytics_trend(
+    granularity: Literal["day", "week", "month", "quarter", "year"] = "month",
+    industry_type: Optional[List[str]] = Query(None),
+    claim_type: Optional[List[str]] = Query(None),
+    status: Optional[List[str]] = Query(None),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+):
+    """Claim count / amount per period from the precomputed trend store."""
+    filters = {"industry_type": industry_type, "claim_type": claim_type, "status": status}
+    return DataCube.trend(
+        granularity,
+        filters={k: v for k, v in filters.items() if v},
+        start=start.isoformat() if start else None,
+        end=end.isoformat() if end else None,
+    )
+
+
+@router.get("/store")
+def analytics_store_stats():
+    """Load state, size and memory budget of the shared analytical store."""
+    AnalyticalStore.load()
+    return {
+        **AnalyticalStore.stats(),
+        "pool": AnalyticsPool.stats(),
+    }
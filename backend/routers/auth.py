@@ -52,7 +52,7 @@ async def login(req: LoginRequest, db: AsyncSession = Depends(get_db)):
     # Update last_login
     await db.execute(
         text("UPDATE users SET last_login = :now WHERE id = :uid"),
-        {"now": datetime.utcnow().isoformat(), "uid": uid},
+        {"now": datetime.utcnow(), "uid": uid},
     )
     await db.commit()
 
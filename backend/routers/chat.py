@@ -3,23 +3,33 @@ Chat Router — Chat-first architecture with LangGraph agent pipeline.
 LangChain unified LLM (Bedrock / Gemini / Claude / OpenAI), ChromaDB RAG,
 Persistent Sessions, File Upload, Vision
 """
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Request
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc, text, delete
-from typing import List, Optional
+from sqlalchemy import select, desc, func, text, delete
+from typing import List, Literal, Optional
 from datetime import datetime, timedelta
 import os
 import json
 import base64
 import uuid
 import time
+import asyncio
 
+import numpy as np
+
+from database.change_log import table_versions
 from database.connection import get_db
 from models.schemas import ChatSession, ChatMessage, Document
+from routers.responses import compressed_json
 from services.agent_graph import run_agent_pipeline
-from services.llm_providers import get_available_providers
+from services.analytical_store import AnalyticalStore
+from services.context_assembler import SUMMARY_MAX_LINES, ConversationSummaries
+from services.llm_providers import HISTORY_WINDOW, get_available_providers
 from services.prompts import SYSTEM_PROMPT
+from services.response_cache import ResponseCache
+from services.risk_scoring import score_risk
+from services.write_behind import WriteBehind
 
 router = APIRouter()
 
@@ -85,29 +95,14 @@ class VisionRequest(BaseModel):
 
 # ──── Cached Dashboard Data (per-user) ────
 
-_dashboard_cache: dict = {}       # keyed by user_email
-_dashboard_cache_times: dict = {} # TTL per user
 _global_cache: Optional[dict] = None   # guidelines + zone tables (org-wide)
 _global_cache_time: float = 0
 
-# Enriched policy SELECT — includes third-party data, flood, cat, property, credit, zone
-_POLICY_SELECT = """
-    SELECT id, policy_number, policyholder_name, industry_type,
-           effective_date, expiration_date, premium, latitude, longitude,
-           policy_status, property_address, property_city, property_state, property_zip,
-           insured_value, fema_flood_zone, flood_risk_score, flood_zone_change_flag,
-           cat_aal, cat_pml_250yr, primary_peril, cat_model_version,
-           construction_type, year_built, stories, roof_type, replacement_cost,
-           protection_class, crime_index, property_crime_rate,
-           business_credit_score, financial_stability,
-           cresta_zone, risk_zone, weather_hail_events_5yr,
-           wildfire_risk_score, distance_to_fire_station
-    FROM policies
-"""
 
 async def _get_cached_dashboard_data(db: AsyncSession, user_email: str = "") -> dict:
-    """Fetch tables scoped to the user's assigned policies, cached 60s per user.
-    Guidelines and zone tables are shared (cached globally)."""
+    """Policies/claims/decisions scoped to the user's assigned policies, served
+    from the shared AnalyticalStore (which owns refresh and per-user caching).
+    Guidelines and zone tables are shared (cached globally for 60s)."""
     global _global_cache, _global_cache_time
     now = time.time()
 
@@ -133,65 +128,22 @@ async def _get_cached_dashboard_data(db: AsyncSession, user_email: str = "") ->
         }
         _global_cache_time = now
 
-    cache_key = user_email or "__all__"
-    if cache_key in _dashboard_cache and (now - _dashboard_cache_times.get(cache_key, 0)) < 60:
-        return _dashboard_cache[cache_key]
-
-    async def _fetch(sql: str, params: dict = None):
-        result = await db.execute(text(sql), params or {})
-        return [dict(row._mapping) for row in result.fetchall()]
-
-    # Filter policies/claims/decisions by assigned_to when user is known
-    if user_email and user_email != "demo@apexuw.com":
-        policies = await _fetch(
-            _POLICY_SELECT + " WHERE assigned_to = :email ORDER BY policy_number",
-            {"email": user_email},
-        )
-        policy_ids = [p["id"] for p in policies]
-        policy_numbers = [p["policy_number"] for p in policies]
-
-        if policy_ids:
-            id_list = ",".join(str(i) for i in policy_ids)
-            claims = await _fetch(f"""
-                SELECT c.id, c.claim_number, c.policy_id, c.claim_date, c.claim_amount,
-                       c.claim_type, c.status, c.description, c.evidence_files, c.created_at,
-                       p.policy_number, p.policyholder_name
-                FROM claims c LEFT JOIN policies p ON p.id = c.policy_id
-                WHERE c.policy_id IN ({id_list})
-                ORDER BY c.claim_date DESC
-            """)
-            pn_list = ",".join(f"'{pn}'" for pn in policy_numbers)
-            decisions = await _fetch(f"""
-                SELECT id, policy_number, decision, reason, risk_level, decided_by, created_at
-                FROM decisions WHERE policy_number IN ({pn_list})
-                ORDER BY created_at DESC
-            """)
-        else:
-            claims, decisions = [], []
-    else:
-        # Demo user or unknown — show everything
-        policies = await _fetch(_POLICY_SELECT + " ORDER BY policy_number")
-        claims = await _fetch("""
-            SELECT c.id, c.claim_number, c.policy_id, c.claim_date, c.claim_amount,
-                   c.claim_type, c.status, c.description, c.evidence_files, c.created_at,
-                   p.policy_number, p.policyholder_name
-            FROM claims c LEFT JOIN policies p ON p.id = c.policy_id
-            ORDER BY c.claim_date DESC
-        """)
-        decisions = await _fetch("""
-            SELECT id, policy_number, decision, reason, risk_level, decided_by, created_at
-            FROM decisions ORDER BY created_at DESC
-        """)
-
-    data = {
-        "policies": policies,
-        "claims": claims,
-        "decisions": decisions,
+    # Store reloads may hit SQLite — keep them off the event loop
+    snapshot = await asyncio.to_thread(AnalyticalStore.snapshot, user_email)
+    return {
+        **snapshot,
         **_global_cache,  # guidelines + zone_thresholds + zone_accumulation
     }
-    _dashboard_cache[cache_key] = data
-    _dashboard_cache_times[cache_key] = now
-    return data
+
+
+# Tables the chat prompt is built from (response cache data version)
+_PROMPT_TABLES = ("policies", "claims", "guidelines", "decisions", "documents")
+
+
+async def _data_version(db: AsyncSession) -> tuple:
+    """Changes when the snapshot reloads or a prompt table is written."""
+    versions = await table_versions(db, _PROMPT_TABLES)
+    return AnalyticalStore.stats()["version"], max(versions.values())
 
 
 # ──── LLM Helpers (vision only) ────
@@ -419,40 +371,42 @@ async def _analyze_pdf(file_path: str) -> str:
 
 
 # ──── Session Management ────
+# The helpers only stage rows; each route commits (WriteBehind.commit) once
+# before its LLM / file analysis call and once after, so a turn costs at most
+# two transactions, or none on the request path with write-behind enabled.
+
+def _session_title(first_message: str) -> str:
+    title = first_message[:80].strip()
+    if len(first_message) > 80:
+        title += "..."
+    return title
+
 
-async def _get_or_create_session(session_id: Optional[int], user_email: str, db: AsyncSession) -> int:
+async def _get_or_create_session(session_id: Optional[int], user_email: str, db: AsyncSession,
+                                 title: Optional[str] = None) -> int:
+    """Id of the existing session, or of a new one (flushed, not committed).
+    `title` names a new session, or an existing one still called "New Chat"."""
     if session_id:
         result = await db.execute(select(ChatSession).where(ChatSession.id == session_id))
         session = result.scalar_one_or_none()
         if session:
+            if title and session.title == "New Chat":
+                session.title = title
             return session.id
 
-    new_session = ChatSession(user_email=user_email, title="New Chat")
+    new_session = ChatSession(user_email=user_email, title=title or "New Chat")
     db.add(new_session)
-    await db.commit()
-    await db.refresh(new_session)
+    await db.flush()
     return new_session.id
 
 
-async def _save_message(session_id: int, role: str, content: str, db: AsyncSession,
-                         file_url: str = None, sources_json: str = None):
-    msg = ChatMessage(
+def _add_message(session_id: int, role: str, content: str, db: AsyncSession,
+                 file_url: str = None, sources_json: str = None):
+    """Stage a chat message (committed by the caller)."""
+    db.add(ChatMessage(
         session_id=session_id, role=role, content=content,
         file_url=file_url, sources=sources_json, created_at=datetime.utcnow()
-    )
-    db.add(msg)
-    await db.commit()
-
-
-async def _update_session_title(session_id: int, first_message: str, db: AsyncSession):
-    title = first_message[:80].strip()
-    if len(first_message) > 80:
-        title += "..."
-    result = await db.execute(select(ChatSession).where(ChatSession.id == session_id))
-    session = result.scalar_one_or_none()
-    if session and session.title == "New Chat":
-        session.title = title
-        await db.commit()
+    ))
 
 
 # ══════════════════════════════════════════════════
@@ -462,16 +416,39 @@ async def _update_session_title(session_id: int, first_message: str, db: AsyncSe
 @router.post("/", response_model=ChatResponse)
 async def chat(request: ChatRequest, db: AsyncSession = Depends(get_db)):
     """Chat-first: LangGraph agent handles intent routing, RAG, LLM call, and guardrails."""
-    sid = await _get_or_create_session(request.session_id, request.user_email, db)
-    await _save_message(sid, "user", request.message, db)
-    await _update_session_title(sid, request.message, db)
+    sid = await _get_or_create_session(
+        request.session_id, request.user_email, db, title=_session_title(request.message),
+    )
 
-    # Load conversation history
+    # Load the history window the LLM sees (earlier messages, once any queued
+    # ones are written), newest first on the (session_id, created_at) index
+    await WriteBehind.settled(sid)
     result = await db.execute(
-        select(ChatMessage).where(ChatMessage.session_id == sid).order_by(ChatMessage.created_at.asc())
+        select(ChatMessage.id, ChatMessage.role, ChatMessage.content)
+        .where(ChatMessage.session_id == sid)
+        .order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc())
+        .limit(HISTORY_WINDOW)
     )
-    db_msgs = result.scalars().all()
-    history = [{"role": m.role, "content": m.content} for m in db_msgs[:-1]]
+    history = [{"id": r.id, "role": r.role, "content": r.content} for r in reversed(result.fetchall())]
+
+    # Messages that left the window since the session's summary last grew
+    # are folded into it (after a restart: the newest SUMMARY_MAX_LINES)
+    if len(history) == HISTORY_WINDOW:
+        summary = ConversationSummaries.get(sid)
+        result = await db.execute(
+            select(ChatMessage.id, ChatMessage.role, ChatMessage.content)
+            .where(ChatMessage.session_id == sid)
+            .where(ChatMessage.id > (summary.through_id if summary else 0))
+            .where(ChatMessage.id < history[0]["id"])
+            .order_by(ChatMessage.id.desc())
+            .limit(SUMMARY_MAX_LINES)
+        )
+        earlier = [{"id": r.id, "role": r.role, "content": r.content} for r in reversed(result.fetchall())]
+        if earlier:
+            ConversationSummaries.fold(sid, earlier)
+
+    _add_message(sid, "user", request.message, db)
+    await WriteBehind.commit(db, sid)
 
     # Load cached data snapshot scoped to this user's assigned policies
     dashboard_data = await _get_cached_dashboard_data(db, request.user_email)
@@ -491,13 +468,17 @@ async def chat(request: ChatRequest, db: AsyncSession = Depends(get_db)):
         dashboard_data = {**dashboard_data, "session_documents": session_docs}
 
     # Run LangGraph agent pipeline (intent → data → RAG → confidence → LLM → guardrails)
-    pipeline = await run_agent_pipeline(request.message, dashboard_data, history)
+    pipeline = await run_agent_pipeline(
+        request.message, dashboard_data, history, session_id=sid,
+        user_email=request.user_email, data_version=await _data_version(db),
+    )
 
     response_text = pipeline.get("response", "")
     sources = pipeline.get("sources", [])
 
-    await _save_message(sid, "assistant", response_text, db,
-                         sources_json=json.dumps(sources) if sources else None)
+    _add_message(sid, "assistant", response_text, db,
+                 sources_json=json.dumps(sources) if sources else None)
+    await WriteBehind.commit(db, sid)
 
     return ChatResponse(
         response=response_text,
@@ -519,12 +500,14 @@ async def chat(request: ChatRequest, db: AsyncSession = Depends(get_db)):
 async def vision_chat(request: VisionRequest, db: AsyncSession = Depends(get_db)):
     """Analyze an image from camera or upload (base64)."""
     sid = await _get_or_create_session(request.session_id, request.user_email, db)
-    await _save_message(sid, "user", f"[Image captured] {request.prompt}", db)
+    _add_message(sid, "user", f"[Image captured] {request.prompt}", db)
+    await WriteBehind.commit(db, sid)
 
     analysis = await _analyze_image(request.image_base64, request.prompt)
     provider = "gemini" if _has_gemini() else "openai" if _has_openai() else "mock"
 
-    await _save_message(sid, "assistant", analysis, db)
+    _add_message(sid, "assistant", analysis, db)
+    await WriteBehind.commit(db, sid)
 
     return ChatResponse(response=analysis, sources=[], provider=provider, session_id=sid)
 
@@ -532,31 +515,34 @@ async def vision_chat(request: VisionRequest, db: AsyncSession = Depends(get_db)
 @router.get("/sessions", response_model=List[SessionOut])
 async def list_sessions(user_email: str = "demo@apexuw.com", db: AsyncSession = Depends(get_db)):
     """List chat sessions (last 2 days)."""
+    await WriteBehind.settled()  # counts and titles include queued writes
     cutoff = datetime.utcnow() - timedelta(days=2)
+    # Message counts in the same query (index-only count per session)
+    msg_count = (
+        select(func.count()).where(ChatMessage.session_id == ChatSession.id)
+        .correlate(ChatSession).scalar_subquery()
+    )
     result = await db.execute(
-        select(ChatSession)
+        select(ChatSession, msg_count.label("message_count"))
         .where(ChatSession.user_email == user_email)
         .where(ChatSession.created_at >= cutoff)
         .order_by(desc(ChatSession.updated_at))
     )
-    sessions = result.scalars().all()
-
-    out = []
-    for s in sessions:
-        msg_result = await db.execute(select(ChatMessage).where(ChatMessage.session_id == s.id))
-        msg_count = len(msg_result.scalars().all())
-        out.append(SessionOut(
+    return [
+        SessionOut(
             id=s.id, title=s.title,
             created_at=s.created_at.isoformat(),
             updated_at=s.updated_at.isoformat() if s.updated_at else s.created_at.isoformat(),
-            message_count=msg_count
-        ))
-    return out
+            message_count=n
+        )
+        for s, n in result.all()
+    ]
 
 
 @router.get("/sessions/{session_id}", response_model=List[MessageOut])
 async def get_session_messages(session_id: int, db: AsyncSession = Depends(get_db)):
     """Get messages for a session."""
+    await WriteBehind.settled(session_id)
     result = await db.execute(
         select(ChatMessage).where(ChatMessage.session_id == session_id).order_by(ChatMessage.created_at.asc())
     )
@@ -570,9 +556,11 @@ async def get_session_messages(session_id: int, db: AsyncSession = Depends(get_d
 @router.delete("/sessions/{session_id}")
 async def delete_session(session_id: int, db: AsyncSession = Depends(get_db)):
     """Delete a session."""
+    await WriteBehind.settled(session_id)
     await db.execute(delete(ChatMessage).where(ChatMessage.session_id == session_id))
     await db.execute(delete(ChatSession).where(ChatSession.id == session_id))
     await db.commit()
+    ConversationSummaries.forget(session_id)
     return {"status": "deleted"}
 
 
@@ -590,9 +578,6 @@ async def upload_file(
     if ext not in allowed:
         raise HTTPException(400, f"Unsupported type: {ext}")
 
-    # Ensure a session exists so the document is linked to the chat
-    sid = await _get_or_create_session(session_id if session_id else None, user_email, db)
-
     unique_name = f"{uuid.uuid4().hex}{ext}"
     file_path = os.path.join(UPLOAD_DIR, unique_name)
     content = await file.read()
@@ -614,21 +599,27 @@ async def upload_file(
     except Exception as e:
         analysis = f"Analysis error: {str(e)}"
 
+    # Session (so the document is linked to the chat) and document in one
+    # transaction, after the analysis so no write lock is held during it
+    sid = await _get_or_create_session(session_id if session_id else None, user_email, db)
     doc = Document(
         filename=file.filename, file_path=file_path, file_type=file_type,
         file_size=len(content), uploaded_by=user_email, analysis_summary=analysis,
         session_id=sid,
     )
     db.add(doc)
-    await db.commit()
 
-    # Index analysis into ChromaDB so RAG can find it later
-    if analysis and not analysis.startswith("Analysis error"):
-        try:
-            from services.vector_store import index_document
-            index_document(doc.id, file.filename, file_type, analysis)
-        except Exception as e:
-            print(f"[Vector Store] document indexing skipped: {e}")
+    # Index analysis into ChromaDB so RAG can find it later (needs doc.id,
+    # so it runs once the row is written)
+    def _index():
+        if analysis and not analysis.startswith("Analysis error"):
+            try:
+                from services.vector_store import index_document
+                index_document(doc.id, file.filename, file_type, analysis)
+            except Exception as e:
+                print(f"[Vector Store] document indexing skipped: {e}")
+
+    await WriteBehind.commit(db, sid, after=_index)
 
     return UploadResponse(
         file_url=f"/api/uploads/{unique_name}", filename=file.filename,
@@ -637,9 +628,15 @@ async def upload_file(
 
 
 @router.get("/geo/policies")
-async def get_geo_policies(user_email: str = "demo@apexuw.com", db: AsyncSession = Depends(get_db)):
+async def get_geo_policies(
+    request: Request,
+    user_email: str = "demo@apexuw.com",
+    format: Literal["json", "columns"] = "json",
+    db: AsyncSession = Depends(get_db),
+):
     """Return policies with lat/lon, computed risk_level, and enriched geo analytics.
-    Respects RBAC: filters by assigned_to for non-demo users."""
+    Respects RBAC: filters by assigned_to for non-demo users.
+    format=columns sends `policies` as {column: values}."""
     # RBAC filter
     rbac_where = ""
     params: dict = {}
@@ -653,26 +650,24 @@ async def get_geo_policies(user_email: str = "demo@apexuw.com", db: AsyncSession
             p.policy_number, p.policyholder_name, p.industry_type,
             p.premium, p.latitude, p.longitude,
             p.effective_date, p.expiration_date,
-            COUNT(c.id) AS claim_count,
-            COALESCE(SUM(c.claim_amount), 0) AS total_claims,
-            COALESCE(MAX(c.claim_amount), 0) AS max_claim,
-            CASE
-                WHEN COUNT(c.id) >= 5 OR COALESCE(SUM(c.claim_amount), 0) >= 100000 THEN 'high'
-                WHEN COUNT(c.id) BETWEEN 2 AND 4 THEN 'medium'
-                ELSE 'low'
-            END AS risk_level,
-            CASE
-                WHEN p.premium > 0 THEN ROUND(COALESCE(SUM(c.claim_amount), 0) * 100.0 / p.premium, 1)
-                ELSE 0
-            END AS loss_ratio
+            COALESCE(s.claim_count, 0) AS claim_count,
+            COALESCE(s.total_claims, 0) AS total_claims,
+            COALESCE(s.max_claim, 0) AS max_claim,
+            COALESCE(s.loss_ratio, 0) AS loss_ratio
         FROM policies p
-        LEFT JOIN claims c ON p.id = c.policy_id
+        LEFT JOIN policy_stats s ON s.policy_id = p.id
         WHERE p.latitude IS NOT NULL AND p.longitude IS NOT NULL {rbac_where}
-        GROUP BY p.id
         ORDER BY total_claims DESC
     """)
     result = await db.execute(sql, params)
     policies = [dict(r._mapping) for r in result.fetchall()]
+    risks = score_risk([p["claim_count"] for p in policies], [p["total_claims"] for p in policies])
+    # Half away from zero, as SQL ROUND() (PostgreSQL has no ROUND(double, int))
+    ratios = np.array([p["loss_ratio"] for p in policies], dtype=float)
+    ratios = np.sign(ratios) * np.floor(np.abs(ratios) * 10 + 0.5) / 10
+    for p, risk, lr in zip(policies, risks.tolist(), ratios.tolist()):
+        p["risk_level"] = risk
+        p["loss_ratio"] = lr
 
     # Claim type breakdown per policy
     ct_sql = text(f"""
@@ -727,7 +722,7 @@ async def get_geo_policies(user_email: str = "demo@apexuw.com", db: AsyncSession
         if len(v["policies"]) >= 2 or v["total_claims"] >= 80000
     ]
 
-    return {
+    return compressed_json(request, {
         "policies": policies,
         "analytics": {
             "total_policies": len(policies),
@@ -751,10 +746,16 @@ async def get_geo_policies(user_email: str = "demo@apexuw.com", db: AsyncSession
                 for p in policies[:5]
             ],
         },
-    }
+    }, columns=("policies",), format=format)
 
 
 @router.get("/provider")
 async def get_provider_info():
     """Get current LLM provider status (LangChain unified)."""
     return get_available_providers()
+
+
+@router.get("/response-cache")
+async def response_cache_stats():
+    """Semantic response cache size and hit rate."""
+    return ResponseCache.stats()
@@ -1,7 +1,9 @@
 """
 Claims Router - API endpoints for claims data
 """
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, UploadFile, File, Form
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, text
 from typing import List, Optional
@@ -13,8 +15,11 @@ from urllib.parse import urlparse
 import httpx
 
 from database.connection import get_db
+from database.row_counts import CLAIMS, get_count
 from models.schemas import ClaimRecord, Policy, ClaimResponse, PolicyResponse, Document
 from routers.chat import _analyze_video, _analyze_image, _analyze_pdf
+from routers.pagination import MAX_PAGE_SIZE, decode_cursor, encode_cursor, parse_fields
+from services.analytical_store import AnalyticalStore
 
 router = APIRouter()
 
@@ -59,17 +64,46 @@ class EvidenceUploadResponse(BaseModel):
     local_path: str
 
 
+_CLAIM_FIELDS = list(ClaimResponse.model_fields)
+
+
 @router.get("/", response_model=List[ClaimResponse])
 async def get_all_claims(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    skip: int = Query(0, ge=0, description="Offset paging (prefer cursor)"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (default: all)"),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get all claims with pagination"""
-    result = await db.execute(
-        select(ClaimRecord).offset(skip).limit(limit)
-    )
-    return result.scalars().all()
+    """
+    Get all claims, ordered by id. Pass the X-Next-Cursor header of a page as
+    cursor= to read the next one (keyset on the primary key, constant cost
+    at any depth). fields= reads only those columns. X-Total-Count comes
+    from row_counts.
+    """
+    selected = parse_fields(fields, _CLAIM_FIELDS)
+    names = selected or _CLAIM_FIELDS
+    # id is the sort key: always read, returned only when asked for
+    columns = names if "id" in names else ["id", *names]
+    query = select(*(getattr(ClaimRecord, c) for c in columns)).order_by(ClaimRecord.id).limit(limit + 1)
+    if cursor:
+        query = query.where(ClaimRecord.id > decode_cursor(cursor, ("c_id",))["c_id"])
+    elif skip:
+        query = query.offset(skip)
+    rows = (await db.execute(query)).fetchall()
+
+    headers = {"X-Total-Count": str(await get_count(db, CLAIMS))}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = encode_cursor([rows[-1].id])
+
+    items = [{n: r._mapping[n] for n in names} for r in rows]
+    if selected:
+        # Partial rows: skip response_model, which would reject them
+        return JSONResponse(jsonable_encoder(items), headers=headers)
+    response.headers.update(headers)
+    return items
 
 
 @router.get("/policy/{policy_number}", response_model=List[ClaimResponse])
@@ -102,7 +136,7 @@ async def get_claims_summary(
     """
     Get claims summary with Glass Box evidence (SQL query shown)
     """
-    sql_query = f"""
+    sql_query = """
         SELECT 
             COUNT(*) as total_claims,
             SUM(claim_amount) as total_amount,
@@ -110,11 +144,12 @@ async def get_claims_summary(
             MAX(claim_amount) as max_claim
         FROM claims c
         JOIN policies p ON c.policy_id = p.id
-        WHERE p.policy_number = '{policy_number}'
+        WHERE p.policy_number = :policy_number
     """
+    params = {"policy_number": policy_number}
     
     try:
-        result = await db.execute(text(sql_query))
+        result = await db.execute(text(sql_query), params)
         row = result.fetchone()
         
         if row and row[0] > 0:
@@ -128,6 +163,7 @@ async def get_claims_summary(
                 },
                 "glass_box": {
                     "sql_query": sql_query.strip(),
+                    "sql_params": params,
                     "source": "riskmind.db"
                 }
             }
@@ -142,6 +178,7 @@ async def get_claims_summary(
                 },
                 "glass_box": {
                     "sql_query": sql_query.strip(),
+                    "sql_params": params,
                     "source": "riskmind.db"
                 }
             }
@@ -331,6 +368,7 @@ async def upload_claim_evidence(
     )
     db.add(doc)
     await db.commit()
+    AnalyticalStore.invalidate()
 
     # Index analysis into ChromaDB so RAG can find it
     if analysis and not analysis.startswith("Analysis error"):
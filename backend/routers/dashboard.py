@@ -1,72 +1,127 @@
 """
 Dashboard Router - aggregate data for interactive dashboards
 """
-from fastapi import APIRouter, Depends
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
+from database.change_log import changed_ids_sql, current_seq, table_versions
 from database.connection import get_db
+from routers.pagination import parse_fields
+from routers.responses import compressed_json, make_etag, not_modified, wants_columns
 
 router = APIRouter()
 
+# Table -> (SELECT ... FROM, rows changed after :since, ORDER BY / LIMIT)
+_TABLES = {
+    "policies": (
+        """SELECT id, policy_number, policyholder_name, industry_type, effective_date, expiration_date,
+                  premium, latitude, longitude, created_at
+           FROM policies""",
+        f"id IN ({changed_ids_sql('policies')})",
+        "ORDER BY policy_number",
+    ),
+    # Carries policy_number / policyholder_name, so a changed policy re-sends its claims
+    "claims": (
+        """SELECT c.id, c.claim_number, c.policy_id, c.claim_date, c.claim_amount, c.claim_type,
+                  c.status, c.description, c.evidence_files, c.created_at,
+                  p.policy_number, p.policyholder_name
+           FROM claims c
+           LEFT JOIN policies p ON p.id = c.policy_id""",
+        f"(c.id IN ({changed_ids_sql('claims')}) OR c.policy_id IN ({changed_ids_sql('policies')}))",
+        "ORDER BY c.claim_date DESC",
+    ),
+    "guidelines": (
+        """SELECT id, section_code, title, content, category, policy_number, threshold_type, threshold_value, action
+           FROM guidelines""",
+        f"id IN ({changed_ids_sql('guidelines')})",
+        "ORDER BY section_code",
+    ),
+    "decisions": (
+        """SELECT id, policy_number, decision, reason, risk_level, decided_by, created_at
+           FROM decisions""",
+        f"id IN ({changed_ids_sql('decisions')})",
+        "ORDER BY created_at DESC",
+    ),
+    "documents": (
+        """SELECT id, filename, file_path, file_type, file_size, uploaded_by, analysis_summary, created_at
+           FROM documents""",
+        f"id IN ({changed_ids_sql('documents')})",
+        "ORDER BY created_at DESC",
+    ),
+    "chat_sessions": (
+        """SELECT id, user_email, title, created_at, updated_at
+           FROM chat_sessions""",
+        f"id IN ({changed_ids_sql('chat_sessions')})",
+        "ORDER BY updated_at DESC",
+    ),
+    "chat_messages": (
+        """SELECT id, session_id, role, content, file_url, sources, created_at
+           FROM chat_messages""",
+        f"id IN ({changed_ids_sql('chat_messages')})",
+        "ORDER BY created_at DESC LIMIT 500",
+    ),
+}
+
+# Table -> other tables its rows carry columns from (their changes change its payload)
+_JOINED = {"claims": ("policies",)}
+
+_DELETED = text("SELECT table_name, row_id FROM row_changes WHERE seq > :since AND deleted = 1")
 
-async def _fetch_rows(db: AsyncSession, sql: str):
-    result = await db.execute(text(sql))
+
+async def _fetch_rows(db: AsyncSession, sql: str, params: Optional[dict] = None):
+    result = await db.execute(text(sql), params or {})
     rows = result.fetchall()
     return [dict(row._mapping) for row in rows]
 
 
 @router.get("/data")
-async def get_dashboard_data(db: AsyncSession = Depends(get_db)):
-    """Return a cached snapshot of all core tables for dashboard use."""
-    policies = await _fetch_rows(db, """
-        SELECT id, policy_number, policyholder_name, industry_type, effective_date, expiration_date,
-               premium, latitude, longitude, created_at
-        FROM policies
-        ORDER BY policy_number
-    """)
-    claims = await _fetch_rows(db, """
-        SELECT c.id, c.claim_number, c.policy_id, c.claim_date, c.claim_amount, c.claim_type,
-               c.status, c.description, c.evidence_files, c.created_at,
-               p.policy_number, p.policyholder_name
-        FROM claims c
-        LEFT JOIN policies p ON p.id = c.policy_id
-        ORDER BY c.claim_date DESC
-    """)
-    guidelines = await _fetch_rows(db, """
-        SELECT id, section_code, title, content, category, policy_number, threshold_type, threshold_value, action
-        FROM guidelines
-        ORDER BY section_code
-    """)
-    decisions = await _fetch_rows(db, """
-        SELECT id, policy_number, decision, reason, risk_level, decided_by, created_at
-        FROM decisions
-        ORDER BY created_at DESC
-    """)
-    documents = await _fetch_rows(db, """
-        SELECT id, filename, file_path, file_type, file_size, uploaded_by, analysis_summary, created_at
-        FROM documents
-        ORDER BY created_at DESC
-    """)
-    chat_sessions = await _fetch_rows(db, """
-        SELECT id, user_email, title, created_at, updated_at
-        FROM chat_sessions
-        ORDER BY updated_at DESC
-    """)
-    chat_messages = await _fetch_rows(db, """
-        SELECT id, session_id, role, content, file_url, sources, created_at
-        FROM chat_messages
-        ORDER BY created_at DESC
-        LIMIT 500
-    """)
+async def get_dashboard_data(
+    request: Request,
+    since: Optional[int] = Query(None, ge=0, description="cursor of a previous response: only rows changed after it"),
+    tables: Optional[str] = Query(None, description="Comma-separated tables (default: all)"),
+    format: Literal["json", "columns"] = Query("json", description="columns: each table as {column: values}"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Snapshot of the core tables for dashboard use.
+
+    The ETag is derived from the per-table change versions (row_changes) of
+    the selected tables and the tables they join: a refresh sending
+    If-None-Match gets a 304 while nothing changed. With
+    since=<cursor from a previous response> only rows inserted or updated
+    after it are returned, plus `deleted` ids per table ("snapshot":
+    "delta"); a cursor the log cannot serve yields a full snapshot.
+    format=columns (or Accept: application/vnd.riskmind.columns+json) sends
+    each table column-wise. Bodies are gzip/brotli-compressed when the
+    client accepts it.
+    """
+    names = parse_fields(tables, list(_TABLES), kind="table") or list(_TABLES)
+    cursor = await current_seq(db)
+    delta = since is not None and since <= cursor
+    columns = wants_columns(request, format)
+    sources = sorted({t for name in names for t in (name, *_JOINED.get(name, ()))})
+    etag = make_etag(names, await table_versions(db, sources), since if delta else None, columns)
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
 
-    return {
-        "policies": policies,
-        "claims": claims,
-        "guidelines": guidelines,
-        "decisions": decisions,
-        "documents": documents,
-        "chat_sessions": chat_sessions,
-        "chat_messages": chat_messages,
-        "snapshot": "cached",
-    }
\ No newline at end of file
+    params = {"since": since} if delta else None
+    payload: dict = {}
+    for name in names:
+        select_sql, changed_sql, order_sql = _TABLES[name]
+        where_sql = f"WHERE {changed_sql}" if delta else ""
+        payload[name] = await _fetch_rows(db, f"{select_sql} {where_sql} {order_sql}", params)
+    if delta:
+        deleted: dict = {name: [] for name in names}
+        for r in (await db.execute(_DELETED, params)).fetchall():
+            if r.table_name in deleted:
+                deleted[r.table_name].append(r.row_id)
+        payload["deleted"] = deleted
+    payload["cursor"] = cursor
+    payload["snapshot"] = "delta" if delta else "full"
+    return compressed_json(
+        request, payload, {"ETag": etag, "Cache-Control": "no-cache"}, columns=names, format=format,
+    )
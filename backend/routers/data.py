@@ -1,48 +1,70 @@
 """
 Data status router — serves the Data Connector tile metadata.
+
+Row counts come from the trigger-maintained row_counts table, column counts
+are cached until the schema version changes (a migration ran), and vector
+store counts are the index's cached state, so a status call is two
+primary-key lookups.
 """
+from typing import Dict, Optional
+
 from fastapi import APIRouter
-from database.connection import async_session
+from sqlalchemy import text
+
+from database.connection import async_session, engine
+from database.dialect import column_counts, database_name, display_name
+from database.row_counts import get_counts
 
 router = APIRouter()
 
+_TABLES = [
+    ("policies", "Policies", "Commercial insurance policies"),
+    ("claims", "Claims", "Filed claims history"),
+    ("decisions", "Decisions", "Underwriting decisions"),
+    ("guidelines", "Guidelines", "Underwriting rule sections"),
+    ("documents", "Documents", "Uploaded files & analysis"),
+    ("users", "Users", "Underwriter accounts"),
+]
+
+# Column counts per table, reloaded when schema_version moves
+_columns: Dict[str, int] = {}
+_columns_version: Optional[int] = None
+
+
+async def _column_counts(version: int) -> Dict[str, int]:
+    global _columns, _columns_version
+    if version != _columns_version:
+        async with engine.connect() as conn:
+            _columns = await column_counts(conn, [t for t, _, _ in _TABLES])
+        _columns_version = version
+    return _columns
+
 
 @router.get("/status")
 async def data_status():
     """Connection status + table metadata for the Data Connector tile."""
-    from sqlalchemy import text as sqtext
-    counts = {}
-    schema_info = []
     try:
         async with async_session() as db:
-            for table, label, desc in [
-                ("policies", "Policies", "Commercial insurance policies"),
-                ("claims", "Claims", "Filed claims history"),
-                ("decisions", "Decisions", "Underwriting decisions"),
-                ("guidelines", "Guidelines", "Underwriting rule sections"),
-                ("documents", "Documents", "Uploaded files & analysis"),
-                ("users", "Users", "Underwriter accounts"),
-            ]:
-                result = await db.execute(sqtext(f"SELECT COUNT(*) FROM {table}"))
-                cnt = result.scalar() or 0
-                counts[table] = cnt
-                schema_info.append({"table": table, "label": label, "description": desc, "rows": cnt})
-
-            # Get column counts per table
-            for item in schema_info:
-                result = await db.execute(sqtext(f"SELECT * FROM pragma_table_info('{item['table']}')"))
-                item["columns"] = len(result.fetchall())
-
+            counts = await get_counts(db, [t for t, _, _ in _TABLES])
+            version = (await db.execute(text("SELECT MAX(version) FROM schema_version"))).scalar() or 0
+        n_columns = await _column_counts(version)
     except Exception as e:
         return {"status": "error", "error": str(e)}
 
-    # ChromaDB status
+    schema_info = [
+        {"table": table, "label": label, "description": desc, "rows": counts[table],
+         "columns": n_columns.get(table, 0)}
+        for table, label, desc in _TABLES
+    ]
+
+    # ChromaDB status (cached by the vector store; never opens a collection)
     chroma_status = {}
     try:
-        from services.vector_store import get_collection, get_knowledge_collection, _ef_name
-        chroma_status["guidelines_indexed"] = get_collection().count()
-        chroma_status["knowledge_indexed"] = get_knowledge_collection().count()
-        chroma_status["embedding_provider"] = _ef_name or "default"
+        from services.vector_store import embedding_provider, indexed_counts
+        indexed = indexed_counts()
+        chroma_status["guidelines_indexed"] = indexed.get("guidelines", 0)
+        chroma_status["knowledge_indexed"] = indexed.get("knowledge", 0)
+        chroma_status["embedding_provider"] = embedding_provider() if indexed else "unavailable"
     except Exception:
         chroma_status["guidelines_indexed"] = 0
         chroma_status["knowledge_indexed"] = 0
@@ -50,8 +72,8 @@ async def data_status():
 
     return {
         "status": "connected",
-        "database": "SQLite",
-        "database_name": "riskmind.db",
+        "database": display_name(),
+        "database_name": database_name(),
         "tables": schema_info,
         "total_records": sum(counts.values()),
         "vector_store": chroma_status,
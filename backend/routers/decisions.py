@@ -9,6 +9,8 @@ from typing import Optional, List
 from datetime import datetime
 from database.connection import get_db
 from models.schemas import Decision
+from services.alert_engine import AlertEngine
+from services.analytical_store import AnalyticalStore
 
 router = APIRouter(tags=["decisions"])
 
@@ -44,8 +46,8 @@ async def record_decision(req: DecisionRequest, db: AsyncSession = Depends(get_d
     db.add(decision)
     await db.commit()
     await db.refresh(decision)
-
-    return DecisionResponse(
+    AnalyticalStore.invalidate()
+    response = DecisionResponse(
         id=decision.id,
         policy_number=decision.policy_number,
         decision=decision.decision,
@@ -54,6 +56,8 @@ async def record_decision(req: DecisionRequest, db: AsyncSession = Depends(get_d
         decided_by=decision.decided_by,
         created_at=decision.created_at.isoformat()
     )
+    await AlertEngine.after_write(db)
+    return response
 
 
 @router.get("/{policy_number}", response_model=List[DecisionResponse])
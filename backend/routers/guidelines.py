@@ -3,13 +3,15 @@ Guidelines Router - Underwriting guidelines endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, text
 from typing import List, Optional
 from pydantic import BaseModel
 
 from database.connection import get_db
 from models.schemas import Guideline
 from services.vector_store import upsert_guideline
+from services.alert_engine import AlertEngine
+from services.rule_engine import METRICS, OPERATORS, RuleEngine, metric_select_sql
 
 router = APIRouter()
 
@@ -22,6 +24,8 @@ class GuidelineCreate(BaseModel):
     policy_number: Optional[str] = None
     threshold_type: Optional[str] = None
     threshold_value: Optional[float] = None
+    threshold_metric: Optional[str] = None
+    threshold_operator: Optional[str] = None
     action: Optional[str] = None
 
 
@@ -89,6 +93,38 @@ async def search_guidelines(
     }
 
 
+@router.get("/rules")
+async def get_rules(
+    policy_number: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Compiled guideline rules; with policy_number, only the rules that policy matches."""
+    rules = await RuleEngine.get(db)
+    if not policy_number:
+        return {"success": True, "count": len(rules), "data": [r.to_dict() for r in rules.rules]}
+
+    result = await db.execute(
+        text(f"""
+            SELECT {metric_select_sql()}
+            FROM policies p LEFT JOIN policy_stats s ON s.policy_id = p.id
+            WHERE p.policy_number = :policy_number
+        """),
+        {"policy_number": policy_number},
+    )
+    row = result.fetchone()
+    if not row:
+        raise HTTPException(status_code=404, detail=f"Policy {policy_number} not found")
+    metrics = dict(row._mapping)
+    matched = rules.match_one(metrics, policy_number)
+    return {
+        "success": True,
+        "policy_number": policy_number,
+        "metrics": metrics,
+        "count": len(matched),
+        "data": [r.to_dict() for r in matched.values()],
+    }
+
+
 @router.get("/{section_code}")
 async def get_guideline(
     section_code: str,
@@ -113,6 +149,8 @@ async def get_guideline(
             "policy_number": guideline.policy_number,
             "threshold_type": guideline.threshold_type,
             "threshold_value": guideline.threshold_value,
+            "threshold_metric": guideline.threshold_metric,
+            "threshold_operator": guideline.threshold_operator,
             "action": guideline.action
         }
     }
@@ -124,6 +162,10 @@ async def create_guideline(
     db: AsyncSession = Depends(get_db)
 ):
     """Create a guideline and index it into the vector store."""
+    if payload.threshold_metric is not None and payload.threshold_metric not in METRICS:
+        raise HTTPException(status_code=400, detail=f"Unknown threshold_metric. Use one of: {', '.join(METRICS)}")
+    if payload.threshold_operator is not None and payload.threshold_operator not in OPERATORS:
+        raise HTTPException(status_code=400, detail=f"Unknown threshold_operator. Use one of: {', '.join(OPERATORS)}")
     guideline = Guideline(
         section_code=payload.section_code,
         title=payload.title,
@@ -132,11 +174,15 @@ async def create_guideline(
         policy_number=payload.policy_number,
         threshold_type=payload.threshold_type,
         threshold_value=payload.threshold_value,
+        threshold_metric=payload.threshold_metric,
+        threshold_operator=payload.threshold_operator,
         action=payload.action,
     )
     db.add(guideline)
     await db.commit()
     await db.refresh(guideline)
+    RuleEngine.invalidate()
+    AlertEngine.request()  # new rules re-evaluate every policy
 
     try:
         await upsert_guideline(guideline)
@@ -154,6 +200,8 @@ async def create_guideline(
             "policy_number": guideline.policy_number,
             "threshold_type": guideline.threshold_type,
             "threshold_value": guideline.threshold_value,
+            "threshold_metric": guideline.threshold_metric,
+            "threshold_operator": guideline.threshold_operator,
             "action": guideline.action
         }
     }
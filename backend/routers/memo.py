@@ -4,11 +4,15 @@ Memo Router - Underwriting memo generation from real data
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text
 from typing import List, Optional
 from datetime import datetime
 
 from database.connection import get_db
+from services.risk_scoring import (
+    ADVERSE_LOSS_RATIO, HIGH_CLAIM_COUNT, MODERATE_LOSS_RATIO, POLICY_MEDIUM_CLAIM_COUNT,
+)
+from services.policy_details import load_policies
+from services.rule_engine import METRICS, RuleEngine
 
 router = APIRouter()
 
@@ -50,77 +54,71 @@ async def generate_memo(
     Generate a structured underwriting memorandum for a policy.
     Built from real database data with guideline citations.
     """
-    # Get policy details
-    result = await db.execute(text(f"""
-        SELECT p.id, p.policyholder_name, p.industry_type, p.premium,
-               p.effective_date, p.expiration_date
-        FROM policies p
-        WHERE p.policy_number = '{policy_number}'
-    """))
-    policy = result.fetchone()
-
-    if not policy:
+    # Policy with its precomputed claims summary and rule metrics
+    records = await load_policies(db, [policy_number], claims=False, decisions=False)
+    if policy_number not in records:
         raise HTTPException(status_code=404, detail=f"Policy {policy_number} not found")
 
-    policy_id, holder, industry, premium, eff_date, exp_date = policy
+    policy = records[policy_number].policy
+    holder, industry, premium = policy["policyholder_name"], policy["industry_type"], policy["premium"]
+    metrics = {name: policy[name] for name in METRICS}
+    claim_count, total_amount = metrics["claim_count"], metrics["total_claims"]
+    max_claim, loss_ratio, base_risk = metrics["max_claim"], metrics["loss_ratio"], policy["risk_level"]
+    avg_claim = total_amount / claim_count if claim_count else 0
 
-    # Get claims summary
-    result = await db.execute(text(f"""
-        SELECT COUNT(*), COALESCE(SUM(claim_amount), 0),
-               COALESCE(AVG(claim_amount), 0), COALESCE(MAX(claim_amount), 0)
-        FROM claims WHERE policy_id = {policy_id}
-    """))
-    row = result.fetchone()
-    claim_count, total_amount, avg_claim, max_claim = row
-
-    loss_ratio = (total_amount / premium * 100) if premium and premium > 0 else 0
+    rules = await RuleEngine.get(db)
+    matched = rules.match_one(metrics, policy_number)
+    frequency = rules.threshold("3.1.1", HIGH_CLAIM_COUNT)
+    moderate = rules.threshold("5.1.1", MODERATE_LOSS_RATIO)
+    adverse = rules.threshold("5.1.3", ADVERSE_LOSS_RATIO)
 
     # Determine risk level and recommendation
     reasons = []
     guideline_refs = []
 
-    if max_claim >= 100000:
+    if "4.3.2" in matched:
+        severity = matched["4.3.2"].threshold
         risk_level = "refer"
         recommendation = "REFER TO SENIOR UNDERWRITER"
         pricing_action = "Hold pending senior review"
-        reasons.append(f"Single claim of ${max_claim:,.2f} exceeds $100,000 severity threshold")
-        guideline_refs.append(GuidelineRef(section="4.3.2", text="Claims exceeding $100,000 require senior underwriter review"))
-    elif claim_count >= 5:
+        reasons.append(f"Single claim of ${max_claim:,.2f} exceeds ${severity:,.0f} severity threshold")
+        guideline_refs.append(GuidelineRef(section="4.3.2", text=f"Claims exceeding ${severity:,.0f} require senior underwriter review"))
+    elif "3.1.1" in matched:
         risk_level = "high"
         recommendation = "REVIEW REQUIRED — HIGH FREQUENCY"
         pricing_action = "Rate increase of 15-25% recommended"
         reasons.append(f"{claim_count} claims filed — exceeds frequency threshold")
-        guideline_refs.append(GuidelineRef(section="3.1.1", text="5+ claims annually require enhanced review and loss control"))
-    elif loss_ratio > 65:
+        guideline_refs.append(GuidelineRef(section="3.1.1", text=f"{frequency:g}+ claims annually require enhanced review and loss control"))
+    elif "5.1.3" in matched:
         risk_level = "high"
         recommendation = "REVIEW REQUIRED — HIGH LOSS RATIO"
         pricing_action = "Rate increase of 10-20% recommended"
-        reasons.append(f"Loss ratio of {loss_ratio:.1f}% exceeds 65% threshold")
-        guideline_refs.append(GuidelineRef(section="5.1.3", text="Loss ratio over 65% requires mandatory rate increase"))
-    elif claim_count >= 3 or loss_ratio > 50:
+        reasons.append(f"Loss ratio of {loss_ratio:.1f}% exceeds {adverse:g}% threshold")
+        guideline_refs.append(GuidelineRef(section="5.1.3", text=f"Loss ratio over {adverse:g}% requires mandatory rate increase"))
+    elif base_risk == "medium":
         risk_level = "medium"
         recommendation = "PROCEED WITH CAUTION"
         pricing_action = "Consider 5-10% rate adjustment"
         reasons.append(f"Moderate claims activity ({claim_count} claims, {loss_ratio:.1f}% loss ratio)")
-        guideline_refs.append(GuidelineRef(section="5.1.2", text="Loss ratio 50-65% requires pricing review"))
+        guideline_refs.append(GuidelineRef(section="5.1.2", text=f"Loss ratio {moderate:g}-{adverse:g}% requires pricing review"))
     else:
         risk_level = "low"
         recommendation = "APPROVE — STANDARD TERMS"
         pricing_action = "No rate change needed"
         reasons.append(f"Loss ratio of {loss_ratio:.1f}% is within acceptable range")
-        guideline_refs.append(GuidelineRef(section="5.1.1", text="Loss ratio under 50% — standard renewal"))
+        guideline_refs.append(GuidelineRef(section="5.1.1", text=f"Loss ratio under {moderate:g}% — standard renewal"))
 
     # Additional reasons
-    if loss_ratio < 50 and claim_count <= 2:
+    if "5.1.1" in matched and claim_count < POLICY_MEDIUM_CLAIM_COUNT:
         reasons.append("Claims history demonstrates favorable risk profile")
     if claim_count == 0:
         reasons.append("No claims filed during review period — excellent performance")
-    if loss_ratio > 50:
-        reasons.append(f"Loss ratio of {loss_ratio:.1f}% exceeds industry benchmark of 50%")
+    if loss_ratio > moderate:
+        reasons.append(f"Loss ratio of {loss_ratio:.1f}% exceeds industry benchmark of {moderate:g}%")
 
     # Add frequency guideline if relevant
-    if claim_count >= 3:
-        guideline_refs.append(GuidelineRef(section="3.1.1", text="Frequency threshold: 5+ claims require enhanced review"))
+    if claim_count >= POLICY_MEDIUM_CLAIM_COUNT:
+        guideline_refs.append(GuidelineRef(section="3.1.1", text=f"Frequency threshold: {frequency:g}+ claims require enhanced review"))
 
     summary = MemoSummary(
         total_claims=claim_count,
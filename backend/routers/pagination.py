@@ -0,0 +1,46 @@
+"""
+Shared helpers for paginated list endpoints.
+
+Keyset pagination: the next page starts after the sort key of the last row
+returned, so a page costs its own size at any depth (OFFSET re-reads every
+skipped row). The key travels as an opaque cursor in the X-Next-Cursor
+response header; the body stays a plain list. `fields=` projection trims
+each row to the requested columns.
+"""
+import base64
+import json
+from typing import Any, List, Optional, Sequence
+
+from fastapi import HTTPException
+
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(key: Sequence[Any]) -> str:
+    """Opaque keyset cursor: the sort key of the last row on the page."""
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode()
+
+
+def decode_cursor(cursor: str, names: Sequence[str]) -> dict:
+    """Cursor -> {name: key value} bind parameters; 400 when malformed."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(key, list) or len(key) != len(names):
+            raise ValueError(cursor)
+        return dict(zip(names, key))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str], kind: str = "field") -> Optional[List[str]]:
+    """`fields=a,b` -> requested names in `allowed` order (None = all); 400 on unknown names."""
+    if not fields:
+        return None
+    requested = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = requested.difference(allowed)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown {kind}(s): {', '.join(sorted(unknown))}. Allowed: {', '.join(allowed)}",
+        )
+    return [f for f in allowed if f in requested] or None
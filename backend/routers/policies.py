@@ -1,13 +1,19 @@
 """
 Policies Router - List and detail view for all policies
 """
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from typing import List, Optional
 
 from database.connection import get_db
+from database.row_counts import POLICIES, assigned_key, get_count
+from routers.decisions import DecisionResponse
+from routers.pagination import MAX_PAGE_SIZE, decode_cursor, encode_cursor, parse_fields
+from services.policy_details import PolicyRecord, load_policies
+from services.risk_scoring import compute_policy_risk, loss_ratio
 
 router = APIRouter()
 
@@ -30,132 +36,143 @@ class PolicyListItem(BaseModel):
 
 class PolicyDetail(PolicyListItem):
     claims: List[dict] = []
+    latest_decision: Optional[DecisionResponse] = None
+
+
+class PolicyBatchRequest(BaseModel):
+    policy_numbers: List[str] = Field(..., min_length=1, max_length=MAX_PAGE_SIZE)
+
+
+# List field -> SQL over policies p ⟕ policy_stats s, in PolicyListItem order
+_LIST_COLUMNS = {
+    "policy_number": "p.policy_number",
+    "policyholder_name": "p.policyholder_name",
+    "industry_type": "p.industry_type",
+    "premium": "p.premium",
+    "effective_date": "p.effective_date",
+    "expiration_date": "p.expiration_date",
+    "policy_status": "p.policy_status",
+    "claim_count": "COALESCE(s.claim_count, 0)",
+    "total_claims": "COALESCE(s.total_claims, 0)",
+    "loss_ratio": "COALESCE(s.loss_ratio, 0)",
+    "risk_level": "COALESCE(s.risk_level, 'low')",
+    "latitude": "p.latitude",
+    "longitude": "p.longitude",
+}
+_STATS_FIELDS = {"claim_count", "total_claims", "loss_ratio", "risk_level"}
+_LIST_FORMAT = {
+    "effective_date": lambda v: str(v) if v else None,
+    "expiration_date": lambda v: str(v) if v else None,
+    "policy_status": lambda v: v or "active",
+    "total_claims": lambda v: round(v, 2),
+    "loss_ratio": lambda v: round(v, 2),
+}
 
 
 @router.get("/", response_model=List[PolicyListItem])
-async def list_policies(user_email: Optional[str] = None, db: AsyncSession = Depends(get_db)):
-    """List policies with summary statistics. Optionally filter by assigned user."""
-    base_sql = """
-        SELECT
-            p.policy_number,
-            p.policyholder_name,
-            p.industry_type,
-            p.premium,
-            p.effective_date,
-            p.expiration_date,
-            p.policy_status,
-            p.latitude,
-            p.longitude,
-            COUNT(c.id) as claim_count,
-            COALESCE(SUM(c.claim_amount), 0) as total_claims,
-            COALESCE(MAX(c.claim_amount), 0) as max_claim
-        FROM policies p
-        LEFT JOIN claims c ON p.id = c.policy_id
+async def list_policies(
+    response: Response,
+    user_email: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size (default: all)"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (default: all)"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    List policies with summary statistics. Optionally filter by assigned user.
+    Ordered by policy_number, which is also the keyset: X-Next-Cursor is set
+    when more rows follow. fields= reads only those columns (policy_stats is
+    joined only for claim fields). X-Total-Count comes from row_counts.
     """
-    params = {}
+    selected = parse_fields(fields, list(_LIST_COLUMNS))
+    names = selected or list(_LIST_COLUMNS)
+    # policy_number is the sort key: always read, returned only when asked for
+    columns = names if "policy_number" in names else ["policy_number", *names]
+    join_sql = "LEFT JOIN policy_stats s ON s.policy_id = p.id" if _STATS_FIELDS.intersection(columns) else ""
+
+    where = []
+    params: dict = {}
     if user_email:
-        base_sql += " WHERE p.assigned_to = :user_email"
+        where.append("p.assigned_to = :user_email")
         params["user_email"] = user_email
-    base_sql += " GROUP BY p.id ORDER BY p.policy_number"
-    result = await db.execute(text(base_sql), params)
+    if cursor:
+        where.append("p.policy_number > :c_policy_number")
+        params.update(decode_cursor(cursor, ("c_policy_number",)))
+    where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+    limit_sql = ""
+    if limit:
+        limit_sql = "LIMIT :limit"
+        params["limit"] = limit + 1
+
+    result = await db.execute(text(f"""
+        SELECT {", ".join(f"{_LIST_COLUMNS[c]} AS {c}" for c in columns)}
+        FROM policies p
+        {join_sql}
+        {where_sql}
+        ORDER BY p.policy_number
+        {limit_sql}
+    """), params)
     rows = result.fetchall()
 
-    policies = []
-    for row in rows:
-        policy_num, holder, industry, premium, eff, exp, pol_status, lat, lon, claim_count, total_claims, max_claim = row
-        loss_ratio = (total_claims / premium * 100) if premium and premium > 0 else 0
-
-        if max_claim >= 100000 or claim_count >= 5:
-            risk = "high"
-        elif claim_count >= 3 or loss_ratio > 50:
-            risk = "medium"
-        else:
-            risk = "low"
-
-        policies.append(PolicyListItem(
-            policy_number=policy_num,
-            policyholder_name=holder,
-            industry_type=industry,
-            premium=premium,
-            effective_date=str(eff) if eff else None,
-            expiration_date=str(exp) if exp else None,
-            policy_status=pol_status or "active",
-            claim_count=claim_count,
-            total_claims=round(total_claims, 2),
-            loss_ratio=round(loss_ratio, 2),
-            risk_level=risk,
-            latitude=lat,
-            longitude=lon
-        ))
-
-    return policies
+    headers = {"X-Total-Count": str(await get_count(db, assigned_key(user_email) if user_email else POLICIES))}
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = encode_cursor([rows[-1].policy_number])
+
+    items = [
+        {n: _LIST_FORMAT[n](r._mapping[n]) if n in _LIST_FORMAT else r._mapping[n] for n in names}
+        for r in rows
+    ]
+    if selected:
+        # Partial rows: skip response_model, which would fill in the defaults
+        return JSONResponse(items, headers=headers)
+    response.headers.update(headers)
+    return [PolicyListItem(**item) for item in items]
+
+
+@router.post("/batch", response_model=List[PolicyDetail])
+async def get_policies_batch(req: PolicyBatchRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Details, claims and latest decision for up to MAX_PAGE_SIZE policies in
+    three queries. Returned in request order; unknown numbers are omitted.
+    """
+    records = await load_policies(db, req.policy_numbers)
+    return [_policy_detail(records[pn]) for pn in dict.fromkeys(req.policy_numbers) if pn in records]
 
 
 @router.get("/{policy_number}", response_model=PolicyDetail)
 async def get_policy(policy_number: str, db: AsyncSession = Depends(get_db)):
     """Get detailed policy information including all claims."""
-    # Get policy
-    result = await db.execute(
-        text("""
-            SELECT p.policy_number, p.policyholder_name, p.industry_type, p.premium,
-                   p.effective_date, p.expiration_date
-            FROM policies p WHERE p.policy_number = :pn
-        """),
-        {"pn": policy_number},
-    )
-    policy = result.fetchone()
-
-    if not policy:
+    records = await load_policies(db, [policy_number])
+    if policy_number not in records:
         raise HTTPException(status_code=404, detail=f"Policy {policy_number} not found")
+    return _policy_detail(records[policy_number])
 
-    pol_num, holder, industry, premium, eff, exp = policy
-
-    # Get claims
-    result = await db.execute(
-        text("""
-            SELECT c.claim_number, c.claim_date, c.claim_amount, c.claim_type, c.status, c.description
-            FROM claims c
-            JOIN policies p ON c.policy_id = p.id
-            WHERE p.policy_number = :pn
-            ORDER BY c.claim_date DESC
-        """),
-        {"pn": policy_number},
-    )
-    claims_rows = result.fetchall()
 
+def _policy_detail(record: PolicyRecord) -> PolicyDetail:
+    p = record.policy
     claims = [
-        {
-            "claim_number": r[0],
-            "claim_date": str(r[1]) if r[1] else None,
-            "claim_amount": r[2],
-            "claim_type": r[3],
-            "status": r[4],
-            "description": r[5]
-        }
-        for r in claims_rows
+        {**c, "claim_date": str(c["claim_date"]) if c["claim_date"] else None}
+        for c in record.claims
     ]
 
     total_claims = sum(c["claim_amount"] for c in claims) if claims else 0
     max_claim = max((c["claim_amount"] for c in claims), default=0)
-    loss_ratio = (total_claims / premium * 100) if premium and premium > 0 else 0
-
-    if max_claim >= 100000 or len(claims) >= 5:
-        risk = "high"
-    elif len(claims) >= 3 or loss_ratio > 50:
-        risk = "medium"
-    else:
-        risk = "low"
+    lr = loss_ratio(total_claims, p["premium"]).item()
+    risk = compute_policy_risk(len(claims), max_claim, lr)
 
+    d = record.latest_decision
     return PolicyDetail(
-        policy_number=pol_num,
-        policyholder_name=holder,
-        industry_type=industry,
-        premium=premium,
-        effective_date=str(eff) if eff else None,
-        expiration_date=str(exp) if exp else None,
+        policy_number=p["policy_number"],
+        policyholder_name=p["policyholder_name"],
+        industry_type=p["industry_type"],
+        premium=p["premium"],
+        effective_date=str(p["effective_date"]) if p["effective_date"] else None,
+        expiration_date=str(p["expiration_date"]) if p["expiration_date"] else None,
         claim_count=len(claims),
         total_claims=round(total_claims, 2),
-        loss_ratio=round(loss_ratio, 2),
+        loss_ratio=round(lr, 2),
         risk_level=risk,
-        claims=claims
+        claims=claims,
+        latest_decision=DecisionResponse(**{**d, "created_at": d["created_at"].isoformat()}) if d else None,
     )
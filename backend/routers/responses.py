@@ -0,0 +1,119 @@
+"""
+Response helpers for large tabular payloads: conditional GET (ETag /
+If-None-Match), a columnar format option, fast encoding and per-response
+compression.
+
+Bodies are encoded with orjson straight from the plain dicts / lists the
+endpoints build (no jsonable_encoder walk). The columnar format
+(`Accept: application/vnd.riskmind.columns+json` or `?format=columns`)
+sends each list of row dicts as {column: [values]}, so keys are written
+once per column instead of once per row.
+
+Compression is applied per endpoint rather than by a global middleware so
+streaming endpoints (alerts SSE) are never buffered. Brotli is used when
+the optional `brotli` package is installed and the client accepts it,
+gzip otherwise. Measured by benchmarks/response_encoding_bench.py.
+"""
+import gzip
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+try:
+    import brotli  # optional: pip install brotli
+except ImportError:
+    brotli = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+COLUMNS_MEDIA_TYPE = "application/vnd.riskmind.columns+json"
+# Smaller bodies are sent as-is (compression would not pay for itself)
+MIN_COMPRESS_BYTES = 1024
+
+
+def dumps(content: Any) -> bytes:
+    """JSON bytes; orjson when installed (NaN becomes null), else the stdlib
+    encoder after jsonable_encoder, as FastAPI's default response does."""
+    if orjson is not None:
+        # Types orjson does not know (Decimal, pydantic models) go through
+        # jsonable_encoder one value at a time
+        return orjson.dumps(
+            content, default=jsonable_encoder, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+        )
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def wants_columns(request: Request, format: Optional[str] = None) -> bool:
+    """Columnar format requested by ?format=columns or the Accept header."""
+    return format == "columns" or COLUMNS_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def to_columns(rows: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """Row dicts -> {column: values}; a key missing from a row gives None."""
+    names: Dict[str, None] = {}
+    for row in rows:
+        for k in row:
+            names.setdefault(k)
+    return {k: [row.get(k) for row in rows] for k in names}
+
+
+def columnar(content: Dict[str, Any], keys: Iterable[str]) -> Dict[str, Any]:
+    """Copy of content with the row lists under `keys` in column form."""
+    out = {k: to_columns(v) if k in keys and isinstance(v, list) else v for k, v in content.items()}
+    out["format"] = "columns"
+    return out
+
+
+def make_etag(*parts: Any) -> str:
+    """Weak ETag over JSON-serializable version data."""
+    digest = hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """304 response when If-None-Match already names this ETag, else None."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    tags = {t.strip() for t in header.split(",")}
+    if etag in tags or "*" in tags:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    return None
+
+
+def compressed_json(
+    request: Request,
+    content: Any,
+    headers: Optional[Dict[str, str]] = None,
+    columns: Iterable[str] = (),
+    format: Optional[str] = None,
+) -> Response:
+    """JSON response, brotli- or gzip-encoded when the client accepts it.
+    The row lists under `columns` are sent column-wise when the client asks
+    for the columnar format (wants_columns)."""
+    media_type = "application/json"
+    if columns and wants_columns(request, format):
+        content, media_type = columnar(content, set(columns)), COLUMNS_MEDIA_TYPE
+    response = Response(dumps(content), media_type=media_type, headers=headers)
+    response.headers["Vary"] = "Accept, Accept-Encoding"
+    if len(response.body) < MIN_COMPRESS_BYTES:
+        return response
+    accepted = {e.split(";")[0].strip() for e in request.headers.get("accept-encoding", "").split(",")}
+    if brotli is not None and "br" in accepted:
+        body, encoding = brotli.compress(response.body, quality=5), "br"
+    elif "gzip" in accepted:
+        body, encoding = gzip.compress(response.body, compresslevel=6), "gzip"
+    else:
+        return response
+    response.body = body
+    response.headers["Content-Encoding"] = encoding
+    response.headers["Content-Length"] = str(len(body))
+    return response
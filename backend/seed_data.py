@@ -5,13 +5,14 @@ import asyncio
 import hashlib
 import os
 import sys
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from sqlalchemy import text
 
 # Add backend to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from database.connection import engine, async_session, init_db
+from services.rule_engine import bind_defaults_sql
 
 
 def hash_password(password: str) -> str:
@@ -81,7 +82,8 @@ async def seed():
             await db.execute(text("""
                 INSERT INTO policies (policy_number, policyholder_name, industry_type, premium, effective_date, expiration_date, latitude, longitude, assigned_to)
                 VALUES (:pn, :name, :industry, :premium, :eff, :exp, :lat, :lon, :assigned)
-            """), {"pn": p[0], "name": p[1], "industry": p[2], "premium": p[3], "eff": p[4], "exp": p[5], "lat": lat, "lon": lon, "assigned": p[8]})
+            """), {"pn": p[0], "name": p[1], "industry": p[2], "premium": p[3],
+               "eff": date.fromisoformat(p[4]), "exp": date.fromisoformat(p[5]), "lat": lat, "lon": lon, "assigned": p[8]})
         await db.commit()
 
         # Get policy IDs
@@ -197,7 +199,7 @@ async def seed():
             await db.execute(text("""
                 INSERT INTO claims (policy_id, claim_number, claim_date, claim_amount, claim_type, status, description, evidence_files)
                 VALUES (:pid, :cn, :cd, :amt, :ct, :st, :desc, :ev)
-            """), {"pid": c[0], "cn": c[1], "cd": c[2], "amt": c[3], "ct": c[4], "st": c[5], "desc": c[6], "ev": c[7] if len(c) > 7 else None})
+            """), {"pid": c[0], "cn": c[1], "cd": date.fromisoformat(c[2]), "amt": c[3], "ct": c[4], "st": c[5], "desc": c[6], "ev": c[7] if len(c) > 7 else None})
         await db.commit()
 
         # ===== GUIDELINES (15) =====
@@ -224,6 +226,7 @@ async def seed():
                 INSERT INTO guidelines (section_code, title, content, category, threshold_type, threshold_value, action)
                 VALUES (:sc, :title, :content, :cat, :tt, :tv, :action)
             """), {"sc": g[0], "title": g[1], "content": g[2], "cat": g[3], "tt": g[4], "tv": g[5], "action": g[6]})
+        await db.execute(text(bind_defaults_sql()))
         await db.commit()
 
         # ===== DOCUMENTS (Local sample PDFs) =====
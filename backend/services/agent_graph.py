@@ -26,6 +26,7 @@ from services.intent_engine import (
 )
 from services.vector_store import search_similar, search_knowledge
 from services.llm_providers import get_all_available, build_messages, build_mock_response
+from services.response_cache import ResponseCache, scope
 from services.prompts import SYSTEM_PROMPT
 
 
@@ -35,6 +36,9 @@ class AgentState(TypedDict, total=False):
     # inputs
     message: str
     history: list
+    session_id: Optional[int]
+    user_email: str
+    data_version: Any
     dashboard_data: dict
     # after route_intent
     intent_payload: dict
@@ -478,6 +482,23 @@ async def reason_node(state: AgentState) -> dict:
         )
         return {"response_text": mock, "provider": "mock"}
 
+    # Same question on unchanged data → stored answer. Uploaded session
+    # documents are outside the data version, so those turns are not cached.
+    cache_key = None
+    dashboard_data = state.get("dashboard_data") or {}
+    if state.get("data_version") is not None and not dashboard_data.get("session_documents"):
+        history = state.get("history") or []
+        cache_key = scope(
+            state.get("user_email", ""),
+            state["data_version"],
+            state["intent_payload"].get("intent", ""),
+            state.get("entities", {}),
+            context=str(history[-1].get("content", "")) if history else "",
+        )
+        cached = ResponseCache.get(cache_key, state["message"])
+        if cached is not None:
+            return {"response_text": cached.response, "provider": cached.provider}
+
     messages = build_messages(
         system_prompt=SYSTEM_PROMPT,
         message=state["message"],
@@ -485,11 +506,14 @@ async def reason_node(state: AgentState) -> dict:
         data_context=state.get("data_context", ""),
         guideline_context=state.get("guideline_context", ""),
         knowledge_context=state.get("knowledge_context", ""),
+        session_id=state.get("session_id"),
     )
 
     for llm, name in providers:
         try:
             result = await llm.ainvoke(messages)
+            if cache_key is not None and result.content:
+                ResponseCache.put(cache_key, state["message"], result.content, name)
             return {"response_text": result.content, "provider": name}
         except Exception as e:
             print(f"[LLM] {name} error: {e}")
@@ -654,11 +678,19 @@ async def run_agent_pipeline(
     message: str,
     dashboard_data: dict,
     history: Optional[List[dict]] = None,
+    session_id: Optional[int] = None,
+    user_email: str = "",
+    data_version: Any = None,
 ) -> dict:
-    """Run the full LangGraph agent and return a ChatResponse-compatible dict."""
+    """Run the full LangGraph agent and return a ChatResponse-compatible dict.
+    session_id keys the rolling summary of older history turns; data_version
+    (None disables it) scopes the response cache together with user_email."""
     initial_state: AgentState = {
         "message": message,
         "history": history or [],
+        "session_id": session_id,
+        "user_email": user_email,
+        "data_version": data_version,
         "dashboard_data": dashboard_data,
         "intent_payload": {},
         "entities": {},
@@ -5,6 +5,8 @@ Supports: mock, openai, bedrock
 import os
 from typing import Dict, Any, List
 
+from services.rule_engine import RuleEngine
+
 LLM_PROVIDER = os.getenv("LLM_PROVIDER", "mock").lower()
 
 
@@ -30,37 +32,46 @@ async def _mock_analysis(claims_summary: Dict[str, Any], policy_number: str) ->
     claim_count = claims_summary.get("claim_count", 0)
     total_amount = claims_summary.get("total_amount", 0)
     max_claim = claims_summary.get("max_claim", 0)
-    
+
+    # Thresholds come from the guideline rules (services/rule_engine.py)
+    rules = await RuleEngine.get()
+    matched = rules.match_one(
+        {"claim_count": claim_count, "total_claims": total_amount, "max_claim": max_claim}, policy_number
+    )
+
     # Rule 1: High severity threshold
-    if max_claim >= 100000:
+    if "4.3.2" in matched:
+        threshold = matched["4.3.2"].threshold
         return {
             "recommendation": "REFER TO SENIOR UNDERWRITER",
             "risk_level": "refer",
-            "reason": f"Single claim of ${max_claim:,.2f} exceeds $100,000 severity threshold",
+            "reason": f"Single claim of ${max_claim:,.2f} exceeds ${threshold:,.0f} severity threshold",
             "guideline_section": "Section 4.3.2",
-            "guideline_text": "Claims exceeding $100,000 require senior underwriter review prior to renewal."
+            "guideline_text": f"Claims exceeding ${threshold:,.0f} require senior underwriter review prior to renewal."
         }
-    
+
     # Rule 2: High frequency
-    if claim_count >= 5:
+    if "3.1.1" in matched:
+        threshold = matched["3.1.1"].threshold
         return {
             "recommendation": "REVIEW REQUIRED - HIGH FREQUENCY",
             "risk_level": "high",
-            "reason": f"{claim_count} claims in review period exceeds frequency threshold of 5",
+            "reason": f"{claim_count} claims in review period exceeds frequency threshold of {threshold:g}",
             "guideline_section": "Section 3.1.1",
-            "guideline_text": "Accounts with 5 or more claims annually require enhanced review and loss control assessment."
+            "guideline_text": f"Accounts with {threshold:g} or more claims annually require enhanced review and loss control assessment."
         }
-    
+
     # Rule 3: High total amount
-    if total_amount >= 200000:
+    if "4.2.1" in matched:
+        threshold = matched["4.2.1"].threshold
         return {
             "recommendation": "REFER TO SENIOR UNDERWRITER",
             "risk_level": "refer",
-            "reason": f"Total claims amount of ${total_amount:,.2f} exceeds $200,000 threshold",
+            "reason": f"Total claims amount of ${total_amount:,.2f} exceeds ${threshold:,.0f} threshold",
             "guideline_section": "Section 4.2.1",
-            "guideline_text": "Aggregate claims exceeding $200,000 require senior underwriter approval."
+            "guideline_text": f"Aggregate claims exceeding ${threshold:,.0f} require senior underwriter approval."
         }
-    
+
     # Rule 4: Medium risk
     if claim_count >= 3 or total_amount >= 75000:
         return {
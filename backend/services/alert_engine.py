@@ -0,0 +1,368 @@
+"""
+Alert engine — incremental evaluation of risk alert rules into the alerts table.
+
+Database triggers queue a policy in alert_queue whenever its claims, the
+policy itself or its decisions change (database/alert_queue.py). sync()
+drains the queue and re-evaluates only those policies against policy_stats:
+  - a rule that now fires and has no active alert  -> new alert (stable id)
+  - a rule that still fires                        -> message refreshed, last_seen_at
+  - an active alert whose rule no longer fires     -> resolved_at set
+Active counts per severity are kept in alert_counters, and every visible
+change is appended to alert_events (created / updated / resolved), in the
+same transaction. The summary is a three-row read; the event log feeds the
+alert stream (services/alert_feed.py).
+
+sync() runs on write paths (right after a decision commits, so the next read
+sees its alerts) and in a background task, woken by request() and otherwise
+every ALERT_SYNC_SECONDS for writers outside this process; the alert reads
+never write.
+
+Rule thresholds are the guideline rules compiled by services/rule_engine.py;
+the batch is matched against all of them in one vectorized pass. Renewal
+alerts depend on today's date rather than on a write, so the first sync of
+each day also re-evaluates policies expiring within the window.
+"""
+import asyncio
+import os
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.connection import async_session
+from database.dialect import json_list, json_values_sql
+from services.rule_engine import Rule, RuleEngine, RuleSet, columns, metric_select_sql
+
+RENEWAL_WINDOW_DAYS = 30
+# alert_events older than this are pruned by the daily sync
+EVENT_RETENTION_DAYS = int(os.getenv("ALERT_EVENT_RETENTION_DAYS", "7"))
+# Background sync interval when not woken by a write in this process
+SYNC_SECONDS = float(os.getenv("ALERT_SYNC_SECONDS", "30"))
+SEVERITIES = ("critical", "warning", "info")
+# Listing order: critical first (alerts.severity_rank)
+SEVERITY_RANK = {s: i for i, s in enumerate(SEVERITIES)}
+UNKNOWN_SEVERITY_RANK = len(SEVERITIES)
+
+
+def severity_rank_sql(column: str = "severity") -> str:
+    """SEVERITY_RANK as a SQL CASE over a severity column."""
+    whens = " ".join(f"WHEN '{s}' THEN {rank}" for s, rank in SEVERITY_RANK.items())
+    return f"CASE {column} {whens} ELSE {UNKNOWN_SEVERITY_RANK} END"
+
+
+# ── Rules ───────────────────────────────────────────────────────
+# Thresholds come from the guideline rules (services/rule_engine.py); this
+# maps a matched guideline section to how its alert is presented.
+
+def _money_k(v: float) -> str:
+    return f"${v / 1000:g}K" if v >= 1000 and v % 1000 == 0 else f"${v:,.0f}"
+
+
+class AlertRule(NamedTuple):
+    order: int
+    type: str
+    severity: str
+    message: Callable[[Dict[str, Any], float], str]
+    guideline_ref: Callable[[float], str]
+
+
+ALERT_RULES: Dict[str, AlertRule] = {
+    # Rule 1: High frequency (5+ claims)
+    "3.1.1": AlertRule(
+        1, "high_frequency", "critical",
+        lambda p, t: f"{p['claim_count']} claims filed — exceeds frequency threshold of {t:g}",
+        lambda t: f"Section 3.1.1: Accounts with {t:g}+ claims annually require enhanced review",
+    ),
+    # Rule 2: High severity ($100K+ single claim)
+    "4.3.2": AlertRule(
+        2, "severity", "critical",
+        lambda p, t: f"${p['max_claim']:,.0f} claim exceeds ${t:,.0f} severity threshold",
+        lambda t: f"Section 4.3.2: Claims exceeding {_money_k(t)} require senior underwriter review",
+    ),
+    # Rule 3: High loss ratio (>65%)
+    "5.1.3": AlertRule(
+        3, "loss_ratio", "warning",
+        lambda p, t: f"Loss ratio at {p['loss_ratio']:.0f}% — above {t:g}% threshold",
+        lambda t: f"Section 5.1.3: Loss ratio over {t:g}% requires mandatory rate increase",
+    ),
+    # Rule 4: Aggregate claims > $200K
+    "4.2.1": AlertRule(
+        4, "aggregate", "critical",
+        lambda p, t: f"Aggregate claims of ${p['total_claims']:,.0f} exceed ${t:,.0f} threshold",
+        lambda t: f"Section 4.2.1: Aggregate claims exceeding {_money_k(t)} require referral",
+    ),
+}
+
+
+def evaluate_policy(p: Dict[str, Any], now: datetime, matched: Iterable[Rule]) -> List[Dict[str, Any]]:
+    """Alerts that currently fire for one policy row (policies ⟕ policy_stats),
+    given the guideline rules it matched."""
+    alerts = []
+
+    def fire(order: int, type_: str, severity: str, message: str, guideline_ref: Optional[str]):
+        alerts.append({
+            "dedup_key": f"{type_}:{p['policy_number']}", "type": type_, "severity": severity,
+            "rule_order": order, "message": message, "guideline_ref": guideline_ref,
+            "severity_rank": SEVERITY_RANK.get(severity, UNKNOWN_SEVERITY_RANK), "sort_total": p["total_claims"],
+        })
+
+    # Rules 1-4: guideline thresholds
+    seen = set()
+    for rule in matched:
+        spec = ALERT_RULES.get(rule.section_code)
+        if spec is None or spec.type in seen:
+            continue
+        seen.add(spec.type)
+        fire(spec.order, spec.type, spec.severity, spec.message(p, rule.threshold), spec.guideline_ref(rule.threshold))
+    alerts.sort(key=lambda a: a["rule_order"])
+
+    # Rule 5: Renewal within 30 days
+    expiration = p["expiration_date"]
+    if expiration:
+        try:
+            exp_date = datetime.fromisoformat(str(expiration)) if isinstance(expiration, str) else expiration
+            days_until = (exp_date - now).days
+            if 0 <= days_until <= RENEWAL_WINDOW_DAYS:
+                fire(5, "renewal", "info", f"Policy renews in {days_until} days", None)
+        except (ValueError, TypeError):
+            pass
+
+    return alerts
+
+
+# ── Engine ──────────────────────────────────────────────────────
+
+_IDS = json_values_sql("ids", "INTEGER")
+
+_POLICY_ROWS = text(f"""
+    SELECT p.id AS policy_id, p.policy_number, p.policyholder_name, p.expiration_date,
+           {metric_select_sql()}
+    FROM policies p
+    LEFT JOIN policy_stats s ON s.policy_id = p.id
+    WHERE p.id IN ({_IDS})
+""")
+
+_ACTIVE_ROWS = text(f"""
+    SELECT id, dedup_key, type, severity, policy_number, message, guideline_ref, policyholder
+    FROM alerts
+    WHERE resolved_at IS NULL AND policy_id IN ({_IDS})
+""")
+
+_DEQUEUE = text(f"DELETE FROM alert_queue WHERE policy_id IN ({_IDS})")
+
+_EVENT_INSERT = text("""
+    INSERT INTO alert_events (alert_id, event, type, severity, policy_number, policyholder,
+                              message, guideline_ref, created_at)
+    VALUES (:alert_id, :event, :type, :severity, :policy_number, :policyholder,
+            :message, :guideline_ref, :now)
+""")
+
+_EVENT_FIELDS = ("type", "severity", "policy_number", "policyholder", "message", "guideline_ref")
+# Changes worth an "updated" event (last_seen_at / sort keys alone are not)
+_VISIBLE_FIELDS = ("severity", "message", "guideline_ref", "policyholder")
+
+_COUNTER_UPSERT = text("""
+    INSERT INTO alert_counters (severity, active) VALUES (:severity, :delta)
+    ON CONFLICT (severity) DO UPDATE SET active = alert_counters.active + excluded.active
+""")
+
+
+class AlertEngine:
+    """Process-wide singleton that keeps the alerts table in sync with the queue."""
+
+    _lock: Optional[asyncio.Lock] = None
+    _renewals_checked_on: Optional[date] = None
+    _rules_version: Optional[str] = None
+    _task: Optional[asyncio.Task] = None
+    _wake: Optional[asyncio.Event] = None
+
+    # ── Background sync ─────────────────────────────────────────
+
+    @classmethod
+    def start(cls):
+        """Start the background sync task."""
+        if cls._task is not None and not cls._task.done():
+            return
+        cls._wake = asyncio.Event()
+        cls._task = asyncio.create_task(cls._run())
+
+    @classmethod
+    async def stop(cls):
+        if cls._task is None:
+            return
+        cls._task.cancel()
+        try:
+            await cls._task
+        except asyncio.CancelledError:
+            pass
+        cls._task = None
+
+    @classmethod
+    def request(cls):
+        """Ask the background task for a sync now (no-op when it is not running)."""
+        if cls._wake is not None:
+            cls._wake.set()
+
+    @classmethod
+    async def after_write(cls, db: AsyncSession):
+        """Sync after a committed write. A failure (e.g. the database is
+        locked) leaves the write alone and hands over to the background task."""
+        try:
+            await cls.sync(db)
+        except Exception as e:
+            await db.rollback()
+            print(f"[WARN] Alert sync after write failed: {e}")
+            cls.request()
+
+    @classmethod
+    async def _run(cls):
+        wake = cls._wake
+        while True:
+            try:
+                await asyncio.wait_for(wake.wait(), timeout=SYNC_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            wake.clear()
+            try:
+                async with async_session() as db:
+                    await cls.sync(db)
+            except Exception as e:
+                print(f"[WARN] Alert sync: {e}")
+
+    # ── Sync ────────────────────────────────────────────────────
+
+    @classmethod
+    async def sync(cls, db: AsyncSession) -> int:
+        """Re-evaluate queued (and, once a day, renewal-window) policies;
+        returns the number of policies evaluated. Every policy is
+        re-evaluated when the guideline rules changed since the last sync."""
+        if cls._lock is None:
+            cls._lock = asyncio.Lock()
+        async with cls._lock:
+            rules = await RuleEngine.get(db)
+            queued = [r[0] for r in (await db.execute(text("SELECT policy_id FROM alert_queue"))).fetchall()]
+            ids = set(queued)
+            today = datetime.utcnow().date()
+            daily = cls._renewals_checked_on != today
+            if daily:
+                ids |= await cls._renewal_candidates(db, today)
+            if cls._rules_version is not None and cls._rules_version != rules.version:
+                ids |= {r[0] for r in (await db.execute(text("SELECT id FROM policies"))).fetchall()}
+            cls._rules_version = rules.version
+            if not ids:
+                return 0
+            try:
+                events = await cls._evaluate(db, sorted(ids), rules)
+                if daily:
+                    await db.execute(
+                        text("DELETE FROM alert_events WHERE created_at < :cutoff"),
+                        {"cutoff": datetime.utcnow() - timedelta(days=EVENT_RETENTION_DAYS)},
+                    )
+                if queued:
+                    await db.execute(_DEQUEUE, {"ids": json_list(queued)})
+                await db.commit()
+            except IntegrityError:
+                # Another process activated the same dedup key first; its
+                # commit covers these policies.
+                await db.rollback()
+                return 0
+            if daily:
+                cls._renewals_checked_on = today
+        if events:
+            from services.alert_feed import AlertFeed
+            AlertFeed.notify()
+        return len(ids)
+
+    @classmethod
+    async def summary(cls, db: AsyncSession) -> Dict[str, int]:
+        """Active alert counts by severity (from alert_counters)."""
+        result = await db.execute(text("SELECT severity, active FROM alert_counters"))
+        counts = {r.severity: r.active for r in result.fetchall()}
+        return {"total": sum(counts.values()), **{s: counts.get(s, 0) for s in SEVERITIES}}
+
+    @classmethod
+    async def _renewal_candidates(cls, db: AsyncSession, today: date) -> set:
+        """Policies that may enter or leave the renewal window today."""
+        result = await db.execute(
+            text("""
+                SELECT id FROM policies WHERE expiration_date >= :lo AND expiration_date < :hi
+                UNION
+                SELECT policy_id FROM alerts WHERE type = 'renewal' AND resolved_at IS NULL
+            """),
+            {"lo": today - timedelta(days=1), "hi": today + timedelta(days=RENEWAL_WINDOW_DAYS + 2)},
+        )
+        return {r[0] for r in result.fetchall() if r[0] is not None}
+
+    @classmethod
+    async def _evaluate(cls, db: AsyncSession, ids: Sequence[int], rules: RuleSet) -> int:
+        """Apply alert changes for these policies; returns the number of events logged."""
+        now = datetime.utcnow()
+        policies = [dict(r._mapping) for r in (await db.execute(_POLICY_ROWS, {"ids": json_list(ids)})).fetchall()]
+        active = {r.dedup_key: dict(r._mapping) for r in (await db.execute(_ACTIVE_ROWS, {"ids": json_list(ids)})).fetchall()}
+        # One vectorized pass over the batch for every guideline rule
+        matched = rules.match(columns(policies), [p["policy_number"] for p in policies])
+
+        firing: Dict[str, Dict[str, Any]] = {}
+        for p, rules_hit in zip(policies, matched):
+            for a in evaluate_policy(p, now, rules_hit):
+                a.update(policy_id=p["policy_id"], policy_number=p["policy_number"], policyholder=p["policyholder_name"])
+                firing[a["dedup_key"]] = a
+
+        events = 0
+
+        async def log(alert_id: int, event: str, alert: Dict[str, Any]):
+            nonlocal events
+            await db.execute(_EVENT_INSERT, {
+                **{k: alert[k] for k in _EVENT_FIELDS}, "alert_id": alert_id, "event": event, "now": now,
+            })
+            events += 1
+
+        deltas = {s: 0 for s in SEVERITIES}
+        for key, old in active.items():
+            new = firing.get(key)
+            if new is None:
+                await db.execute(text("UPDATE alerts SET resolved_at = :now WHERE id = :id"), {"now": now, "id": old["id"]})
+                deltas[old["severity"]] = deltas.get(old["severity"], 0) - 1
+                await log(old["id"], "resolved", old)
+                continue
+            if new["severity"] != old["severity"]:
+                deltas[old["severity"]] = deltas.get(old["severity"], 0) - 1
+                deltas[new["severity"]] = deltas.get(new["severity"], 0) + 1
+            await db.execute(
+                text("""
+                    UPDATE alerts SET severity = :severity, message = :message, guideline_ref = :guideline_ref,
+                           policyholder = :policyholder, severity_rank = :severity_rank, sort_total = :sort_total,
+                           last_seen_at = :now
+                    WHERE id = :id
+                """),
+                {
+                    **{k: new[k] for k in ("severity", "message", "guideline_ref", "policyholder", "severity_rank", "sort_total")},
+                    "now": now, "id": old["id"],
+                },
+            )
+            if any(new[k] != old[k] for k in _VISIBLE_FIELDS):
+                await log(old["id"], "updated", new)
+
+        for key, new in firing.items():
+            if key in active:
+                continue
+            result = await db.execute(
+                text("""
+                    INSERT INTO alerts (dedup_key, type, severity, rule_order, policy_id, policy_number,
+                                        policyholder, message, guideline_ref, severity_rank, sort_total,
+                                        first_seen_at, last_seen_at)
+                    VALUES (:dedup_key, :type, :severity, :rule_order, :policy_id, :policy_number,
+                            :policyholder, :message, :guideline_ref, :severity_rank, :sort_total, :now, :now)
+                    RETURNING id
+                """),
+                {**new, "now": now},
+            )
+            deltas[new["severity"]] = deltas.get(new["severity"], 0) + 1
+            await log(result.scalar_one(), "created", new)
+
+        for severity, delta in deltas.items():
+            if delta:
+                await db.execute(_COUNTER_UPSERT, {"severity": severity, "delta": delta})
+        return events
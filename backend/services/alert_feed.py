@@ -0,0 +1,215 @@
+"""
+Alert feed — pushes alert_events to connected stream clients.
+
+One background task per process serves every subscriber: it runs
+AlertEngine.sync() and reads the new alert_events rows once per change,
+then fans the batch out to each subscriber's queue. The task wakes on
+notify() (alert sync or a write endpoint) and otherwise only every
+ALERT_FEED_POLL_SECONDS, to catch writers outside this process; it exits
+when the last subscriber leaves, so idle dashboards cost nothing.
+
+Ids are not always committed in order: on PostgreSQL a transaction holding
+a lower sequence value can commit after one holding a higher value. Ids
+missing below the newest published event are kept as gaps and re-read on
+every pass, until their row shows up or ALERT_FEED_GAP_SECONDS passes (a
+rolled-back insert never fills its gap).
+
+Clients resume from the feed's position, the id below the oldest open gap:
+published events after it are replayed from the alert_events table (an event
+may arrive twice; applying one is idempotent per alert), later ones arrive
+through the queue.
+"""
+import asyncio
+import os
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.connection import async_session
+from database.dialect import json_list, json_values_sql
+from services.alert_engine import AlertEngine
+
+# Fallback check interval while subscribers are connected
+POLL_SECONDS = float(os.getenv("ALERT_FEED_POLL_SECONDS", "15"))
+# Batches a slow subscriber may fall behind before it is dropped (it then
+# reconnects and replays from the table)
+QUEUE_SIZE = 100
+# Most events replayed on reconnect; further behind gets a reset
+REPLAY_LIMIT = 1000
+# How long a missing id may still commit before it is written off
+GAP_SECONDS = float(os.getenv("ALERT_FEED_GAP_SECONDS", "60"))
+# Most open gaps tracked (oldest written off first)
+GAP_LIMIT = 1000
+
+_EVENT_COLUMNS = """
+    id, alert_id, event, type, severity, policy_number, policyholder,
+    message, guideline_ref, created_at
+"""
+
+
+_GAP_IDS = json_values_sql("gaps", "INTEGER")
+
+
+class Batch(NamedTuple):
+    events: List[Dict[str, Any]]
+    summary: Dict[str, int]
+    position: int  # resume cursor once this batch is delivered
+
+
+class Subscription:
+    def __init__(self):
+        self.queue: "asyncio.Queue[Batch]" = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.dropped = False
+
+
+class AlertFeed:
+    """Process-wide singleton fanning alert events out to subscribers."""
+
+    _subscribers: Set[Subscription] = set()
+    _task: Optional[asyncio.Task] = None
+    _wake: Optional[asyncio.Event] = None
+    _lock: Optional[asyncio.Lock] = None
+    _last_id: int = 0
+    _gaps: Dict[int, float] = {}  # missing id -> monotonic deadline
+
+    # ── Subscribers ─────────────────────────────────────────────
+
+    @classmethod
+    async def subscribe(cls) -> Subscription:
+        """Register a subscriber, starting the feed task if needed."""
+        if cls._lock is None:
+            cls._lock = asyncio.Lock()
+        sub = Subscription()
+        async with cls._lock:
+            cls._subscribers.add(sub)
+            if cls._task is None or cls._task.done():
+                async with async_session() as db:
+                    cls._last_id = await cls.latest_id(db)
+                    # Holes just below the newest id may be uncommitted rows
+                    result = await db.execute(
+                        text("SELECT id FROM alert_events WHERE id > :floor"),
+                        {"floor": cls._last_id - GAP_LIMIT},
+                    )
+                    present = {r[0] for r in result.fetchall()}
+                cls._gaps = {}
+                if present:
+                    cls._track_gaps(min(present) - 1, present, cls._last_id)
+                cls._wake = asyncio.Event()
+                cls._task = asyncio.create_task(cls._run())
+        return sub
+
+    @classmethod
+    def unsubscribe(cls, sub: Subscription):
+        cls._subscribers.discard(sub)
+        if not cls._subscribers and cls._wake is not None:
+            cls._wake.set()  # let the task notice and exit
+
+    @classmethod
+    def notify(cls):
+        """Alert data may have changed; wake the feed task (no-op when idle)."""
+        if cls._wake is not None and cls._subscribers:
+            cls._wake.set()
+
+    @classmethod
+    def position(cls) -> int:
+        """Resume cursor: every event up to this id has been published (or
+        its gap written off)."""
+        return min(cls._gaps) - 1 if cls._gaps else cls._last_id
+
+    @classmethod
+    def published(cls) -> int:
+        """Id of the newest event published to subscribers."""
+        return cls._last_id
+
+    # ── Reads ───────────────────────────────────────────────────
+
+    @classmethod
+    async def latest_id(cls, db: AsyncSession) -> int:
+        return (await db.execute(text("SELECT MAX(id) FROM alert_events"))).scalar() or 0
+
+    @classmethod
+    async def replay(cls, db: AsyncSession, after_id: int, upto_id: int) -> Tuple[List[Dict[str, Any]], bool]:
+        """Events in (after_id, upto_id]; False when they are no longer all
+        available (pruned, or more than REPLAY_LIMIT)."""
+        if after_id == upto_id:
+            return [], True
+        if after_id > upto_id:  # cursor from another database
+            return [], False
+        oldest = (await db.execute(text("SELECT MIN(id) FROM alert_events"))).scalar()
+        if oldest is None or after_id < oldest - 1:
+            return [], False
+        result = await db.execute(
+            text(f"""
+                SELECT {_EVENT_COLUMNS} FROM alert_events
+                WHERE id > :after_id AND id <= :upto_id
+                ORDER BY id
+                LIMIT :limit
+            """),
+            {"after_id": after_id, "upto_id": upto_id, "limit": REPLAY_LIMIT + 1},
+        )
+        events = [dict(r._mapping) for r in result.fetchall()]
+        if len(events) > REPLAY_LIMIT:
+            return [], False
+        return events, True
+
+    # ── Task ────────────────────────────────────────────────────
+
+    @classmethod
+    async def _run(cls):
+        wake = cls._wake
+        while cls._subscribers:
+            try:
+                await asyncio.wait_for(wake.wait(), timeout=POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            wake.clear()
+            if not cls._subscribers:
+                break
+            try:
+                await cls._publish()
+            except Exception as e:
+                print(f"[WARN] Alert feed: {e}")
+
+    @classmethod
+    def _track_gaps(cls, after_id: int, ids: Iterable[int], upto_id: int):
+        """Open a gap for each id in (after_id, upto_id] not in ids."""
+        deadline = time.monotonic() + GAP_SECONDS
+        present = set(ids)
+        for missing in range(max(after_id, upto_id - GAP_LIMIT) + 1, upto_id + 1):
+            if missing not in present:
+                cls._gaps[missing] = deadline
+        for oldest in sorted(cls._gaps)[:max(len(cls._gaps) - GAP_LIMIT, 0)]:
+            del cls._gaps[oldest]
+
+    @classmethod
+    async def _publish(cls):
+        now = time.monotonic()
+        cls._gaps = {i: deadline for i, deadline in cls._gaps.items() if deadline > now}
+        async with async_session() as db:
+            await AlertEngine.sync(db)
+            result = await db.execute(
+                text(f"""
+                    SELECT {_EVENT_COLUMNS} FROM alert_events
+                    WHERE id > :after_id OR id IN ({_GAP_IDS})
+                    ORDER BY id
+                """),
+                {"after_id": cls._last_id, "gaps": json_list(cls._gaps)},
+            )
+            events = [dict(r._mapping) for r in result.fetchall()]
+            if not events:
+                return
+            ids = [e["id"] for e in events]
+            for filled in ids:
+                cls._gaps.pop(filled, None)
+            if ids[-1] > cls._last_id:
+                cls._track_gaps(cls._last_id, ids, ids[-1])
+                cls._last_id = ids[-1]
+            batch = Batch(events, await AlertEngine.summary(db), cls.position())
+        for sub in list(cls._subscribers):
+            try:
+                sub.queue.put_nowait(batch)
+            except asyncio.QueueFull:
+                sub.dropped = True
+                cls._subscribers.discard(sub)
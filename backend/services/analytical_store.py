@@ -0,0 +1,397 @@
+"""
+Analytical store — the single in-memory copy of policies + claims + decisions.
+
+Loaded once from the configured database (DATABASE_URL) and shared by the
+analytics playground (AnalyticsEngine), the canned DataCube answers and the
+chat snapshot builder. One refresh mechanism and one memory budget cover
+every consumer. The store reloads when the row_changes version of its tables
+moves past the one it loaded, whoever wrote (any router, seed / enrich
+scripts, another process). That version is checked at most every
+ANALYTICS_CHANGE_CHECK_SECONDS. It also reloads after REFRESH_SECONDS and on
+an explicit invalidate(). Structures that consumers build from the store
+(the trend series) register their size, so the budget counts them too.
+"""
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from database.change_log import versions_sql
+from database.connection import build_engine
+from services.risk_scoring import score_claim_rows
+
+# Seconds before the next access reloads from the database (0 = only on invalidate)
+REFRESH_SECONDS = float(os.getenv("ANALYTICS_REFRESH_SECONDS", "60"))
+# Seconds between checks of the tables' row_changes version (0 = every access)
+CHANGE_CHECK_SECONDS = float(os.getenv("ANALYTICS_CHANGE_CHECK_SECONDS", "1"))
+# Memory budget across all frames held by the store and the structures built from them
+MEMORY_BUDGET_MB = float(os.getenv("ANALYTICS_MEMORY_BUDGET_MB", "256"))
+
+DEMO_USER = "demo@apexuw.com"
+
+# Free-text columns the analytical frame never needs (kept in the raw tables
+# for the chat snapshot only)
+_TEXT_COLUMNS = ("description", "evidence_files")
+
+# Policy columns exposed to the chat snapshot (third-party, flood, cat,
+# property, credit, zone enrichment)
+SNAPSHOT_POLICY_COLUMNS = [
+    "id", "policy_number", "policyholder_name", "industry_type",
+    "effective_date", "expiration_date", "premium", "latitude", "longitude",
+    "policy_status", "property_address", "property_city", "property_state", "property_zip",
+    "insured_value", "fema_flood_zone", "flood_risk_score", "flood_zone_change_flag",
+    "cat_aal", "cat_pml_250yr", "primary_peril", "cat_model_version",
+    "construction_type", "year_built", "stories", "roof_type", "replacement_cost",
+    "protection_class", "crime_index", "property_crime_rate",
+    "business_credit_score", "financial_stability",
+    "cresta_zone", "risk_zone", "weather_hail_events_5yr",
+    "wildfire_risk_score", "distance_to_fire_station",
+]
+SNAPSHOT_CLAIM_COLUMNS = [
+    "id", "claim_number", "policy_id", "claim_date", "claim_amount",
+    "claim_type", "status", "description", "evidence_files", "created_at",
+    "policy_number", "policyholder_name",
+]
+SNAPSHOT_DECISION_COLUMNS = [
+    "id", "policy_number", "decision", "reason", "risk_level", "decided_by", "created_at",
+]
+
+
+_TABLE_QUERIES = (
+    "SELECT * FROM policies",
+    "SELECT * FROM claims",
+    "SELECT * FROM decisions ORDER BY id",
+)
+_VERSION_QUERY = f"SELECT MAX(version) FROM ({versions_sql(('policies', 'claims', 'decisions'))}) v"
+# Server backends return datetimes; SQLite returns the strings SQLAlchemy stored
+_SQLITE_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+# The app's engine is bound to the server's event loop, and loads run on
+# whichever thread asks first. Reads go through an engine of their own
+# (same URL, pool and SQLite pragmas) on a private loop thread.
+_loader: Optional[Tuple[asyncio.AbstractEventLoop, AsyncEngine]] = None
+_loader_lock = threading.Lock()
+
+
+def _loader_loop() -> Tuple[asyncio.AbstractEventLoop, AsyncEngine]:
+    global _loader
+    with _loader_lock:
+        if _loader is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="analytical-store", daemon=True).start()
+            _loader = (loop, build_engine())
+        return _loader
+
+
+def _read_tables(queries) -> List[pd.DataFrame]:
+    """Run each query into a DataFrame on the configured database."""
+    loop, eng = _loader_loop()
+
+    async def _read():
+        frames = []
+        async with eng.connect() as conn:
+            for q in queries:
+                result = await conn.execute(text(q))
+                frames.append(pd.DataFrame.from_records(
+                    result.fetchall(), columns=list(result.keys()), coerce_float=True
+                ))
+        return frames
+
+    frames = asyncio.run_coroutine_threadsafe(_read(), loop).result()
+    for df in frames:
+        for col in df.columns:
+            if pd.api.types.is_datetime64_any_dtype(df[col]):
+                df[col] = df[col].dt.strftime(_SQLITE_DATETIME_FORMAT).where(df[col].notna(), None)
+    return frames
+
+
+def _read_seq() -> Optional[int]:
+    """Latest row_changes seq over the store's tables (None without the log)."""
+    try:
+        (df,) = _read_tables([_VERSION_QUERY])
+    except Exception:
+        return None
+    value = df.iat[0, 0] if not df.empty else None
+    return None if pd.isna(value) else int(value)
+
+
+def _frame_bytes(df: Optional[pd.DataFrame]) -> int:
+    if df is None or df.empty:
+        return 0
+    return int(df.memory_usage(deep=True).sum())
+
+
+def _compact(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert low-cardinality string columns to categoricals."""
+    if df.empty:
+        return df
+    out = df.copy()
+    for col in out.columns:
+        s = out[col]
+        if (pd.api.types.is_string_dtype(s) or s.dtype == object) and not isinstance(s.dtype, pd.CategoricalDtype):
+            if s.nunique(dropna=True) <= len(s) // 2:
+                out[col] = s.astype("category")
+    return out
+
+
+def _records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """DataFrame -> list of dicts with native Python values and None for NULL."""
+    if df.empty:
+        return []
+    out = df.convert_dtypes().astype(object)
+    return out.where(out.notna(), None).to_dict("records")
+
+
+class AnalyticalStore:
+    """Process-wide singleton holding the raw tables and the joined claim-level frame."""
+
+    _policies: Optional[pd.DataFrame] = None
+    _claims: Optional[pd.DataFrame] = None
+    _decisions: Optional[pd.DataFrame] = None
+    _frame: Optional[pd.DataFrame] = None
+    _loaded = False
+    _stale = False
+    _loaded_at: float = 0.0
+    _seq: Optional[int] = None      # row_changes version the tables were read at
+    _checked_at: float = 0.0
+    _version = 0
+    _bytes = 0
+    _derived: Dict[str, Callable[[], int]] = {}
+    _compacted = False
+    _snapshots: Dict[str, Any] = {}
+    _lock = threading.RLock()
+
+    # ── Lifecycle ───────────────────────────────────────────────
+
+    @classmethod
+    def load(cls):
+        if cls._loaded and not cls._needs_refresh():
+            return
+        with cls._lock:
+            if cls._loaded and not cls._needs_refresh():
+                return
+            cls._load_locked()
+
+    @classmethod
+    def reload(cls):
+        with cls._lock:
+            cls._load_locked()
+
+    @classmethod
+    def invalidate(cls):
+        """Mark the store stale; the next access reloads from the database."""
+        cls._stale = True
+
+    @classmethod
+    def _needs_refresh(cls) -> bool:
+        now = time.time()
+        if not cls._stale and now - cls._checked_at >= CHANGE_CHECK_SECONDS:
+            cls._checked_at = now
+            if _read_seq() != cls._seq:
+                cls._stale = True
+        if cls._stale:
+            return True
+        return REFRESH_SECONDS > 0 and (now - cls._loaded_at) >= REFRESH_SECONDS
+
+    @classmethod
+    def _load_locked(cls):
+        started = time.time()
+        # Read before the tables: a write in between costs a second reload,
+        # never a missed one
+        seq = _read_seq()
+        try:
+            policies, claims, decisions = _read_tables(_TABLE_QUERIES)
+
+            frame = cls._build_frame(policies, claims, decisions)
+
+            frames = (policies, claims, decisions, frame)
+            total = sum(_frame_bytes(f) for f in frames)
+            budget = int(MEMORY_BUDGET_MB * 1024 * 1024)
+            compacted = False
+            if total > budget:
+                policies, claims, decisions, frame = (_compact(f) for f in frames)
+                total = sum(_frame_bytes(f) for f in (policies, claims, decisions, frame))
+                compacted = True
+                if total > budget:
+                    print(
+                        f"[WARN] Analytical store uses {total / 1e6:.1f} MB, "
+                        f"over the {MEMORY_BUDGET_MB:.0f} MB budget after compaction"
+                    )
+
+            cls._policies, cls._claims, cls._decisions, cls._frame = policies, claims, decisions, frame
+            cls._bytes = total
+            cls._compacted = compacted
+            cls._snapshots = {}
+            cls._version += 1
+            print(
+                f"[OK] Analytical store loaded ({len(frame)} claim rows, "
+                f"{len(policies)} policies, {total / 1e6:.1f} MB) "
+                f"in {(time.time() - started) * 1000:.0f} ms"
+            )
+        except Exception as e:
+            print(f"[WARN] Analytical store load failed: {e}")
+            cls._policies = cls._claims = cls._decisions = cls._frame = pd.DataFrame()
+            cls._bytes = 0
+            cls._snapshots = {}
+            cls._version += 1
+        cls._loaded = True
+        cls._stale = False
+        cls._seq = seq
+        cls._loaded_at = cls._checked_at = time.time()
+
+    @staticmethod
+    def _build_frame(policies: pd.DataFrame, claims: pd.DataFrame, decisions: pd.DataFrame) -> pd.DataFrame:
+        """Claim-level frame: claims ⟕ policies ⟕ latest decision + derived columns."""
+        if claims.empty:
+            return pd.DataFrame()
+
+        df = claims.drop(columns=[c for c in _TEXT_COLUMNS if c in claims.columns])
+        if not policies.empty:
+            policies_r = policies.rename(columns={"id": "policy_pk", "created_at": "policy_created_at"})
+            df = df.merge(policies_r, left_on="policy_id", right_on="policy_pk", how="left")
+
+        # Latest decision per policy
+        if not decisions.empty and "policy_number" in df.columns:
+            latest = decisions[["policy_number", "decision"]].drop_duplicates(
+                subset=["policy_number"], keep="last"
+            )
+            df = df.merge(latest, on="policy_number", how="left")
+        else:
+            df["decision"] = None
+
+        df["claim_date"] = pd.to_datetime(df["claim_date"], errors="coerce")
+        df["claim_year"] = df["claim_date"].dt.year.fillna(0).astype(int).astype(str)
+        df["claim_month"] = df["claim_date"].dt.strftime("%Y-%m")
+        if "effective_date" in df.columns:
+            df["effective_date"] = pd.to_datetime(df["effective_date"], errors="coerce")
+
+        # risk_level per row based on policy-level aggregates
+        if "policy_number" in df.columns:
+            df["risk_level"] = score_claim_rows(
+                df["policy_number"],
+                df["claim_amount"],
+                labels=("HIGH", "MEDIUM", "LOW"),
+            )
+        return df
+
+    # ── Accessors ───────────────────────────────────────────────
+
+    @classmethod
+    def frame(cls) -> pd.DataFrame:
+        """Joined claim-level frame used by the playground and canned answers."""
+        cls.load()
+        return cls._frame if cls._frame is not None else pd.DataFrame()
+
+    @classmethod
+    def policies(cls) -> pd.DataFrame:
+        """One row per policy, including policies without claims."""
+        cls.load()
+        return cls._policies if cls._policies is not None else pd.DataFrame()
+
+    @classmethod
+    def version(cls) -> int:
+        cls.load()
+        return cls._version
+
+    # ── Memory ──────────────────────────────────────────────────
+
+    @classmethod
+    def register_derived(cls, name: str, nbytes: Callable[[], int]):
+        """Count a structure built from the store in its memory budget."""
+        cls._derived[name] = nbytes
+
+    @classmethod
+    def memory_bytes(cls) -> int:
+        return cls._bytes + sum(nbytes() for nbytes in cls._derived.values())
+
+    @classmethod
+    def check_budget(cls):
+        """Warn when the frames plus derived structures exceed the budget."""
+        total = cls.memory_bytes()
+        if total > MEMORY_BUDGET_MB * 1024 * 1024:
+            print(
+                f"[WARN] Analytical store uses {total / 1e6:.1f} MB with derived structures, "
+                f"over the {MEMORY_BUDGET_MB:.0f} MB budget"
+            )
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        derived = {name: nbytes() for name, nbytes in cls._derived.items()}
+        return {
+            "loaded": cls._loaded,
+            "version": cls._version,
+            "loaded_at": cls._loaded_at,
+            "change_seq": cls._seq,
+            "claim_rows": len(cls._frame) if cls._frame is not None else 0,
+            "policies": len(cls._policies) if cls._policies is not None else 0,
+            "memory_mb": round((cls._bytes + sum(derived.values())) / 1e6, 2),
+            "frames_mb": round(cls._bytes / 1e6, 2),
+            "derived_mb": {name: round(b / 1e6, 2) for name, b in derived.items()},
+            "budget_mb": MEMORY_BUDGET_MB,
+            "compacted": cls._compacted,
+            "refresh_seconds": REFRESH_SECONDS,
+        }
+
+    # ── Chat snapshot ───────────────────────────────────────────
+
+    @classmethod
+    def snapshot(cls, user_email: str = "") -> Dict[str, List[Dict[str, Any]]]:
+        """Policies / claims / decisions scoped to the user's assigned policies.
+
+        The demo user (or an unknown user) sees the whole book. Results are
+        cached per user until the store reloads; the tables and the cache
+        are read together under the lock, so a concurrent reload can neither
+        mix two versions into one snapshot nor leave an old one cached.
+        """
+        cls.load()
+        key = user_email or "__all__"
+        with cls._lock:
+            cached = cls._snapshots.get(key)
+            if cached is not None:
+                return cached
+            version = cls._version
+            all_policies = cls._policies if cls._policies is not None else pd.DataFrame()
+            claims = cls._claims if cls._claims is not None else pd.DataFrame()
+            decisions = cls._decisions if cls._decisions is not None else pd.DataFrame()
+
+        policies = all_policies
+
+        if user_email and user_email != DEMO_USER and "assigned_to" in policies.columns:
+            policies = policies[policies["assigned_to"] == user_email]
+            if not claims.empty:
+                claims = claims[claims["policy_id"].isin(policies["id"])]
+            if not decisions.empty:
+                decisions = decisions[decisions["policy_number"].isin(policies["policy_number"])]
+
+        if not policies.empty:
+            policies = policies.sort_values("policy_number", kind="stable")
+            policies = policies[[c for c in SNAPSHOT_POLICY_COLUMNS if c in policies.columns]]
+
+        if not claims.empty:
+            if not all_policies.empty:
+                names = all_policies[["id", "policy_number", "policyholder_name"]].rename(
+                    columns={"id": "policy_id"}
+                )
+                claims = claims.merge(names, on="policy_id", how="left")
+            claims = claims.sort_values("claim_date", ascending=False, kind="stable")
+            claims = claims[[c for c in SNAPSHOT_CLAIM_COLUMNS if c in claims.columns]]
+
+        if not decisions.empty:
+            decisions = decisions.sort_values("created_at", ascending=False, kind="stable")
+            decisions = decisions[[c for c in SNAPSHOT_DECISION_COLUMNS if c in decisions.columns]]
+
+        data = {
+            "policies": _records(policies),
+            "claims": _records(claims),
+            "decisions": _records(decisions),
+        }
+        with cls._lock:
+            if cls._version == version:
+                cls._snapshots[key] = data
+        return data
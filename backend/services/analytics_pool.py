@@ -0,0 +1,363 @@
+"""
+Analytics worker pool — opt-in multi-process backend for playground pivots.
+
+Enabled with ANALYTICS_WORKERS=<n>. The AnalyticalStore claim-level frame is
+published once per store version into a multiprocessing.shared_memory
+segment (numeric columns as raw buffers, everything else dictionary-encoded
+as int32 codes), and worker processes map it zero-copy. Each query runs in
+a dedicated worker with a timeout (ANALYTICS_QUERY_TIMEOUT); a timed-out or
+cancelled query has its worker terminated and replaced, so a runaway pivot
+never holds the API process's GIL. A segment superseded by a newer store
+version is unlinked once the last query sent against it has finished.
+"""
+import atexit
+import os
+import pickle
+import queue
+import threading
+import time
+import uuid
+from multiprocessing import get_context, shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.analytical_store import AnalyticalStore
+from services.analytics_service import run_query
+
+WORKERS = int(os.getenv("ANALYTICS_WORKERS", "0"))
+QUERY_TIMEOUT = float(os.getenv("ANALYTICS_QUERY_TIMEOUT", "30"))
+
+_HEADER = 8      # manifest length prefix
+_ALIGN = 64
+
+
+class AnalyticsQueryTimeout(Exception):
+    pass
+
+
+class AnalyticsQueryCancelled(Exception):
+    pass
+
+
+class AnalyticsWorkerError(Exception):
+    pass
+
+
+# ── Shared-memory frame encoding ────────────────────────────────
+
+def _encode_column(s: pd.Series) -> Tuple[Dict[str, Any], np.ndarray]:
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        codes = s.cat.codes.to_numpy().astype(np.int32)
+        return {"kind": "category", "categories": s.cat.categories.tolist()}, codes
+    if isinstance(s.dtype, np.dtype) and s.dtype.kind in "biufM":
+        values = np.ascontiguousarray(s.to_numpy())
+        return {"kind": "numpy", "dtype": values.dtype.str}, values
+    try:
+        codes, uniques = pd.factorize(s, sort=True, use_na_sentinel=True)
+    except TypeError:  # mixed, unorderable values
+        codes, uniques = pd.factorize(s, use_na_sentinel=True)
+    return {"kind": "category", "categories": list(uniques)}, codes.astype(np.int32)
+
+
+def publish_frame(df: pd.DataFrame) -> shared_memory.SharedMemory:
+    """Copy a frame into a new shared-memory segment (caller owns unlink)."""
+    columns, arrays, offset = [], [], 0
+    for name in df.columns:
+        meta, values = _encode_column(df[name])
+        offset = -(-offset // _ALIGN) * _ALIGN
+        meta.update(name=name, offset=offset, length=len(values), dtype=meta.get("dtype", values.dtype.str))
+        columns.append(meta)
+        arrays.append(values)
+        offset += values.nbytes
+
+    manifest = pickle.dumps({"rows": len(df), "columns": columns}, protocol=pickle.HIGHEST_PROTOCOL)
+    data_start = -(-(_HEADER + len(manifest)) // _ALIGN) * _ALIGN
+    shm = shared_memory.SharedMemory(create=True, size=max(data_start + offset, 1))
+    buf = shm.buf
+    buf[:_HEADER] = len(manifest).to_bytes(_HEADER, "little")
+    buf[_HEADER:_HEADER + len(manifest)] = manifest
+    for meta, values in zip(columns, arrays):
+        start = data_start + meta["offset"]
+        buf[start:start + values.nbytes] = values.view(np.uint8).tobytes() if values.nbytes else b""
+    return shm
+
+
+def attach_frame(shm: shared_memory.SharedMemory) -> pd.DataFrame:
+    """Rebuild a DataFrame whose column buffers view the shared segment."""
+    buf = shm.buf
+    size = int.from_bytes(bytes(buf[:_HEADER]), "little")
+    manifest = pickle.loads(bytes(buf[_HEADER:_HEADER + size]))
+    data_start = -(-(_HEADER + size) // _ALIGN) * _ALIGN
+
+    cols = {}
+    for meta in manifest["columns"]:
+        values = np.ndarray(
+            (meta["length"],), dtype=np.dtype(meta["dtype"]), buffer=buf, offset=data_start + meta["offset"]
+        )
+        if meta["kind"] == "category":
+            cols[meta["name"]] = pd.Categorical.from_codes(values, categories=pd.Index(meta["categories"]))
+        else:
+            cols[meta["name"]] = values
+    return pd.DataFrame(cols, copy=False)
+
+
+# ── Worker process ──────────────────────────────────────────────
+
+def _worker_main(conn):
+    current: Optional[Tuple[str, shared_memory.SharedMemory, pd.DataFrame]] = None
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if msg is None:
+            break
+        shm_name, kwargs = msg
+        try:
+            if current is None or current[0] != shm_name:
+                if current is not None:
+                    old_shm = current[1]
+                    current = None
+                    try:
+                        old_shm.close()
+                    except BufferError:
+                        pass  # views still referenced; released with the process
+                shm = shared_memory.SharedMemory(name=shm_name)
+                current = (shm_name, shm, attach_frame(shm))
+            conn.send(("ok", run_query(current[2], cache_token=shm_name, **kwargs)))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+class _Worker:
+    def __init__(self, ctx):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except Exception:
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+
+    def kill(self):
+        self.process.terminate()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+
+# ── Pool ────────────────────────────────────────────────────────
+
+class AnalyticsPool:
+    """Process-wide singleton: N workers, one published frame, per-query timeouts."""
+
+    _ctx = None
+    _idle: Optional[queue.Queue] = None
+    _workers: List[_Worker] = []
+    _running: Dict[str, _Worker] = {}
+    _cancelled: set = set()
+    _shm: Optional[shared_memory.SharedMemory] = None
+    _shm_version = -1
+    # Queries in flight per segment name, and superseded segments they still use
+    _refs: Dict[str, int] = {}
+    _retired: Dict[str, shared_memory.SharedMemory] = {}
+    _lock = threading.Lock()
+    _started = False
+
+    @classmethod
+    def enabled(cls) -> bool:
+        return WORKERS > 0
+
+    @classmethod
+    def start(cls):
+        if not cls.enabled() or cls._started:
+            return
+        with cls._lock:
+            if cls._started:
+                return
+            cls._ctx = get_context("spawn")
+            cls._idle = queue.Queue()
+            cls._workers = []
+            for _ in range(WORKERS):
+                w = _Worker(cls._ctx)
+                cls._workers.append(w)
+                cls._idle.put(w)
+            cls._started = True
+            atexit.register(cls.shutdown)
+        print(f"[OK] Analytics worker pool started ({WORKERS} processes, {QUERY_TIMEOUT:.0f}s timeout)")
+
+    @classmethod
+    def shutdown(cls):
+        with cls._lock:
+            if not cls._started:
+                return
+            for w in cls._workers:
+                w.stop()
+            cls._workers = []
+            cls._running = {}
+            cls._idle = None
+            for shm in list(cls._retired.values()) + ([cls._shm] if cls._shm is not None else []):
+                cls._unlink(shm)
+            cls._retired, cls._refs = {}, {}
+            cls._shm, cls._shm_version = None, -1
+            cls._started = False
+
+    @staticmethod
+    def _unlink(shm: shared_memory.SharedMemory):
+        shm.close()
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    @classmethod
+    def _acquire_segment(cls) -> str:
+        """Name of the current frame segment, published first if the store
+        reloaded since; held until _release_segment()."""
+        version = AnalyticalStore.version()
+        with cls._lock:
+            if cls._shm is None or cls._shm_version != version:
+                shm = publish_frame(AnalyticalStore.frame())
+                if cls._shm is not None:
+                    # Queries already sent still need the old segment; workers
+                    # keep their mapping of it until their next query
+                    if cls._refs.get(cls._shm.name):
+                        cls._retired[cls._shm.name] = cls._shm
+                    else:
+                        cls._unlink(cls._shm)
+                cls._shm, cls._shm_version = shm, version
+            name = cls._shm.name
+            cls._refs[name] = cls._refs.get(name, 0) + 1
+            return name
+
+    @classmethod
+    def _release_segment(cls, name: str):
+        with cls._lock:
+            left = cls._refs.get(name, 1) - 1
+            if left > 0:
+                cls._refs[name] = left
+                return
+            cls._refs.pop(name, None)
+            retired = cls._retired.pop(name, None)
+            if retired is not None:
+                cls._unlink(retired)
+
+    @classmethod
+    def _replace(cls, worker: _Worker):
+        worker.kill()
+        with cls._lock:
+            if worker in cls._workers:
+                cls._workers.remove(worker)
+            if cls._started:
+                fresh = _Worker(cls._ctx)
+                cls._workers.append(fresh)
+                cls._idle.put(fresh)
+
+    @classmethod
+    def run(
+        cls,
+        timeout: Optional[float] = None,
+        query_id: Optional[str] = None,
+        **query,
+    ) -> Dict[str, Any]:
+        """Run run_query(**query) on a worker against the published frame."""
+        cls.start()
+        timeout = min(timeout or QUERY_TIMEOUT, QUERY_TIMEOUT)
+        deadline = time.monotonic() + timeout
+        query_id = query_id or uuid.uuid4().hex
+
+        idle = cls._idle
+        if idle is None:
+            raise AnalyticsWorkerError("Analytics worker pool is not running")
+        try:
+            worker = idle.get(timeout=timeout)
+        except queue.Empty:
+            raise AnalyticsQueryTimeout(f"No analytics worker free within {timeout:g}s")
+
+        with cls._lock:
+            cls._running[query_id] = worker
+        try:
+            segment = cls._acquire_segment()
+        except Exception:
+            if cls._finish(query_id):
+                cls._replace(worker)
+            else:
+                idle.put(worker)
+            raise
+        try:
+            worker.conn.send((segment, query))
+            if not worker.conn.poll(max(deadline - time.monotonic(), 0)):
+                cls._finish(query_id)
+                cls._replace(worker)
+                raise AnalyticsQueryTimeout(f"Analytics query exceeded {timeout:g}s")
+            status, payload = worker.conn.recv()
+        except (EOFError, OSError):
+            # Worker died, or cancel() terminated it
+            cancelled = cls._finish(query_id)
+            cls._replace(worker)
+            if cancelled:
+                raise AnalyticsQueryCancelled(query_id)
+            raise AnalyticsWorkerError("Analytics worker exited unexpectedly")
+        finally:
+            cls._release_segment(segment)
+
+        if cls._finish(query_id):
+            # cancel() landed after the result arrived: its worker is terminated
+            cls._replace(worker)
+            raise AnalyticsQueryCancelled(query_id)
+        with cls._lock:
+            # Back to the pool, unless shutdown() stopped it meanwhile
+            if worker in cls._workers:
+                cls._idle.put(worker)
+        if status != "ok":
+            raise AnalyticsWorkerError(payload)
+        return payload
+
+    @classmethod
+    def _finish(cls, query_id: str) -> bool:
+        """Stop tracking query_id; True if cancel() terminated its worker.
+
+        Once this returns, cancel() can no longer reach the worker, so it is
+        safe to hand back to the idle queue.
+        """
+        with cls._lock:
+            cls._running.pop(query_id, None)
+            if query_id in cls._cancelled:
+                cls._cancelled.discard(query_id)
+                return True
+            return False
+
+    @classmethod
+    def cancel(cls, query_id: str) -> bool:
+        """Terminate the worker running query_id; returns False if it isn't running.
+
+        The waiting run() call sees the pipe close, replaces the worker and
+        raises AnalyticsQueryCancelled.
+        """
+        with cls._lock:
+            worker = cls._running.get(query_id)
+            if worker is None:
+                return False
+            cls._cancelled.add(query_id)
+            worker.process.terminate()
+        return True
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        return {
+            "enabled": cls.enabled(),
+            "workers": len(cls._workers),
+            "idle": cls._idle.qsize() if cls._idle is not None else 0,
+            "running": list(cls._running),
+            "shared_mb": round(cls._shm.size / 1e6, 2) if cls._shm is not None else 0,
+            "frame_version": cls._shm_version,
+            "timeout_seconds": QUERY_TIMEOUT,
+        }
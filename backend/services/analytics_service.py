@@ -2,16 +2,18 @@
 Analytics Playground engine - pandas-based slice & dice over
 policies + claims + decisions data.
 
-Follows the same singleton pattern as data_cube.py.
+Reads the claim-level frame from the shared AnalyticalStore (also used by
+data_cube.py and the chat snapshot), so nothing is loaded twice.
 """
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
 import pandas as pd
-import sqlite3
-import os
-from typing import Any, Dict, List, Optional
 
-DB_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "riskmind.db")
-if not os.path.exists(DB_PATH):
-    DB_PATH = os.path.join(os.path.dirname(__file__), "..", "risk_mind.db")
+from services.analytical_store import AnalyticalStore
 
 # ── Metadata catalog ────────────────────────────────────────────
 
@@ -38,93 +40,16 @@ ANALYTICS_META: Dict[str, Any] = {
 }
 
 
-def _compute_risk(claim_count: int, total_amount: float) -> str:
-    if claim_count >= 5 or total_amount >= 100_000:
-        return "HIGH"
-    if claim_count >= 2 or total_amount >= 50_000:
-        return "MEDIUM"
-    return "LOW"
-
-
 class AnalyticsEngine:
-    _df: Optional[pd.DataFrame] = None
-    _loaded = False
+    """Slice & dice over the shared AnalyticalStore claim-level frame."""
 
     @classmethod
     def load(cls):
-        if cls._loaded:
-            return
-        try:
-            conn = sqlite3.connect(DB_PATH)
-
-            policies = pd.read_sql("SELECT * FROM policies", conn)
-            claims = pd.read_sql("SELECT * FROM claims", conn)
-            decisions = pd.read_sql(
-                "SELECT policy_number, decision FROM decisions", conn
-            )
-            conn.close()
-
-            # Latest decision per policy
-            if not decisions.empty:
-                decisions = decisions.drop_duplicates(
-                    subset=["policy_number"], keep="last"
-                )
-
-            # Join claims -> policies
-            if not policies.empty and not claims.empty:
-                policies_r = policies.rename(columns={"id": "policy_pk"})
-                df = pd.merge(
-                    claims,
-                    policies_r,
-                    left_on="policy_id",
-                    right_on="policy_pk",
-                    how="left",
-                )
-            elif not claims.empty:
-                df = claims.copy()
-            else:
-                df = pd.DataFrame()
-
-            # Left join latest decision
-            if not df.empty and not decisions.empty:
-                df = pd.merge(
-                    df, decisions, on="policy_number", how="left"
-                )
-            elif not df.empty:
-                df["decision"] = None
-
-            # Derived columns
-            if not df.empty:
-                df["claim_date"] = pd.to_datetime(
-                    df["claim_date"], errors="coerce"
-                )
-                df["claim_year"] = (
-                    df["claim_date"].dt.year.fillna(0).astype(int).astype(str)
-                )
-                df["claim_month"] = df["claim_date"].dt.strftime("%Y-%m")
-
-                # risk_level per row based on policy-level aggregates
-                risk_map = {}
-                for pn, grp in df.groupby("policy_number"):
-                    cnt = len(grp)
-                    total = grp["claim_amount"].sum()
-                    risk_map[pn] = _compute_risk(cnt, total)
-                df["risk_level"] = df["policy_number"].map(risk_map)
-
-            cls._df = df
-            cls._loaded = True
-            row_count = len(df) if df is not None else 0
-            print(f"[OK] Analytics engine loaded ({row_count} claim rows)")
-        except Exception as e:
-            print(f"[WARN] Analytics engine load failed: {e}")
-            cls._df = pd.DataFrame()
-            cls._loaded = True
+        AnalyticalStore.load()
 
     @classmethod
     def reload(cls):
-        cls._loaded = False
-        cls._df = None
-        cls.load()
+        AnalyticalStore.reload()
 
     @classmethod
     def get_meta(cls) -> Dict[str, Any]:
@@ -132,10 +57,10 @@ class AnalyticsEngine:
 
     @classmethod
     def get_filter_values(cls, field: str) -> List[str]:
-        cls.load()
-        if cls._df is None or cls._df.empty or field not in cls._df.columns:
+        df = AnalyticalStore.frame()
+        if df.empty or field not in df.columns:
             return []
-        return sorted(cls._df[field].dropna().unique().astype(str).tolist())
+        return sorted(df[field].dropna().astype(str).unique().tolist())
 
     @classmethod
     def query(
@@ -144,137 +69,280 @@ class AnalyticsEngine:
         metrics: List[str],
         filters: Optional[List[Dict[str, Any]]] = None,
         user_email: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        sort_dir: str = "desc",
+        limit: Optional[int] = None,
+        offset: int = 0,
+        timeout: Optional[float] = None,
+        query_id: Optional[str] = None,
     ) -> Dict[str, Any]:
-        cls.load()
-        if cls._df is None or cls._df.empty:
-            return {"columns": [], "rows": [], "totals": {}, "row_count": 0}
-
-        df = cls._df.copy()
-
-        # User scoping
-        if user_email and "assigned_to" in df.columns:
-            df = df[df["assigned_to"] == user_email]
-
-        # Apply filters
-        if filters:
-            for f in filters:
-                field = f.get("field", "")
-                op = f.get("op", "in")
-                values = f.get("values", [])
-                if field not in df.columns or not values:
-                    continue
-                if op == "in":
-                    df = df[df[field].astype(str).isin([str(v) for v in values])]
-                elif op == "not_in":
-                    df = df[~df[field].astype(str).isin([str(v) for v in values])]
-
-        if df.empty:
-            return {"columns": [], "rows": [], "totals": {}, "row_count": 0}
-
-        # Validate dimensions
-        valid_dims = [d for d in dimensions if d in df.columns]
-        if not valid_dims:
-            return {"columns": [], "rows": [], "totals": {}, "row_count": 0}
-
-        # Build aggregations
-        agg_map = {}
-        requested_base = set()
-        for m in metrics:
-            if m == "claim_amount":
+        """Run a pivot in-process, or on the worker pool when ANALYTICS_WORKERS > 0."""
+        from services.analytics_pool import AnalyticsPool
+
+        query = {
+            "dimensions": dimensions,
+            "metrics": metrics,
+            "filters": filters,
+            "user_email": user_email,
+            "sort_by": sort_by,
+            "sort_dir": sort_dir,
+            "limit": limit,
+            "offset": offset,
+        }
+        if AnalyticsPool.enabled():
+            return AnalyticsPool.run(timeout=timeout, query_id=query_id, **query)
+        return run_query(AnalyticalStore.frame(), cache_token=AnalyticalStore.version(), **query)
+
+    @classmethod
+    def export(
+        cls,
+        fmt: str,
+        dimensions: List[str],
+        metrics: List[str],
+        filters: Optional[List[Dict[str, Any]]] = None,
+        user_email: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        sort_dir: str = "desc",
+        chunk_size: int = 5000,
+    ) -> Iterator[str]:
+        """Stream the full result as NDJSON or CSV, chunk by chunk from the frame."""
+        result = cached_result(
+            AnalyticalStore.frame(), AnalyticalStore.version(),
+            dimensions=dimensions, metrics=metrics, filters=filters,
+            user_email=user_email, sort_by=sort_by, sort_dir=sort_dir,
+        )
+        if result is None:
+            return
+        result_df = result[0]
+        for start in range(0, len(result_df), chunk_size):
+            chunk = result_df.iloc[start:start + chunk_size]
+            if fmt == "csv":
+                yield chunk.to_csv(index=False, header=(start == 0))
+            else:
+                yield chunk.to_json(orient="records", lines=True, date_format="iso").rstrip("\n") + "\n"
+
+
+# Full (sorted, unpaged) results by (frame token, query) so paging through a
+# large pivot doesn't regroup the frame for every page
+_RESULT_CACHE: "OrderedDict[Any, Tuple[pd.DataFrame, List[str], Dict[str, Any]]]" = OrderedDict()
+_RESULT_CACHE_SIZE = 8
+_RESULT_CACHE_LOCK = threading.Lock()
+
+EMPTY_RESULT = {"columns": [], "rows": [], "totals": {}, "row_count": 0, "total_rows": 0, "offset": 0, "next_offset": None}
+
+
+def _cache_key(token, dimensions, metrics, filters, user_email, sort_by, sort_dir):
+    return (
+        token,
+        tuple(dimensions),
+        tuple(metrics),
+        json.dumps(filters or [], sort_keys=True, default=str),
+        user_email,
+        sort_by,
+        sort_dir,
+    )
+
+
+def build_result(
+    df: pd.DataFrame,
+    dimensions: List[str],
+    metrics: List[str],
+    filters: Optional[List[Dict[str, Any]]] = None,
+    user_email: Optional[str] = None,
+    sort_by: Optional[str] = None,
+    sort_dir: str = "desc",
+) -> Optional[Tuple[pd.DataFrame, List[str], Dict[str, Any]]]:
+    """Group / aggregate / sort the claim-level frame into the full result.
+
+    Returns (result_df, output_cols, totals) with totals over every group, or
+    None when the query yields nothing.
+    """
+    if df.empty:
+        return None
+
+    # User scoping
+    if user_email and "assigned_to" in df.columns:
+        df = df[df["assigned_to"] == user_email]
+
+    # Apply filters
+    if filters:
+        for f in filters:
+            field = f.get("field", "")
+            op = f.get("op", "in")
+            values = f.get("values", [])
+            if field not in df.columns or not values:
+                continue
+            if op == "in":
+                df = df[df[field].astype(str).isin([str(v) for v in values])]
+            elif op == "not_in":
+                df = df[~df[field].astype(str).isin([str(v) for v in values])]
+
+    if df.empty:
+        return None
+
+    # Validate dimensions
+    valid_dims = [d for d in dimensions if d in df.columns]
+    if not valid_dims:
+        return None
+
+    # Build aggregations
+    agg_map = {}
+    requested_base = set()
+    for m in metrics:
+        if m == "claim_amount":
+            agg_map["claim_amount"] = ("claim_amount", "sum")
+            requested_base.add("claim_amount")
+        elif m == "claim_count":
+            agg_map["claim_count"] = ("claim_amount", "count")
+            requested_base.add("claim_count")
+        elif m == "max_claim":
+            agg_map["max_claim"] = ("claim_amount", "max")
+            requested_base.add("max_claim")
+        elif m in ("premium", "loss_ratio", "avg_claim"):
+            # Need claim_amount sum for derived metrics
+            if "claim_amount" not in agg_map:
                 agg_map["claim_amount"] = ("claim_amount", "sum")
-                requested_base.add("claim_amount")
-            elif m == "claim_count":
+            if "claim_count" not in agg_map:
                 agg_map["claim_count"] = ("claim_amount", "count")
-                requested_base.add("claim_count")
-            elif m == "max_claim":
-                agg_map["max_claim"] = ("claim_amount", "max")
-                requested_base.add("max_claim")
-            elif m in ("premium", "loss_ratio", "avg_claim"):
-                # Need claim_amount sum for derived metrics
-                if "claim_amount" not in agg_map:
-                    agg_map["claim_amount"] = ("claim_amount", "sum")
-                if "claim_count" not in agg_map:
-                    agg_map["claim_count"] = ("claim_amount", "count")
-                requested_base.add(m)
-
-        if not agg_map:
-            return {"columns": [], "rows": [], "totals": {}, "row_count": 0}
-
-        grouped = df.groupby(valid_dims, dropna=False).agg(**agg_map).reset_index()
-
-        # Premium: deduplicate per policy within each group
-        need_premium = "premium" in requested_base or "loss_ratio" in requested_base
-        if need_premium and "premium" in df.columns:
-            prem_df = (
-                df.drop_duplicates(subset=["policy_number"])
-                .groupby(valid_dims, dropna=False)["premium"]
-                .sum()
-                .reset_index()
-                .rename(columns={"premium": "premium"})
-            )
-            grouped = pd.merge(grouped, prem_df, on=valid_dims, how="left")
-            grouped["premium"] = grouped["premium"].fillna(0)
-
-        # Derived metrics
-        if "loss_ratio" in requested_base:
-            grouped["loss_ratio"] = grouped.apply(
-                lambda r: round((r["claim_amount"] / r["premium"]) * 100, 1)
-                if r.get("premium", 0) > 0
-                else 0,
-                axis=1,
-            )
-
-        if "avg_claim" in requested_base:
-            grouped["avg_claim"] = grouped.apply(
-                lambda r: round(r["claim_amount"] / r["claim_count"])
-                if r.get("claim_count", 0) > 0
-                else 0,
-                axis=1,
-            )
-
-        # Select columns to return
-        output_cols = list(valid_dims)
-        metric_cols = []
-        for m in metrics:
-            if m in grouped.columns:
-                metric_cols.append(m)
-        output_cols += metric_cols
-
-        result_df = grouped[output_cols].copy()
-
-        # Sort by first metric descending
-        if metric_cols:
-            result_df = result_df.sort_values(metric_cols[0], ascending=False)
-
-        # Compute totals
-        totals = {}
-        for m in metric_cols:
-            if m == "loss_ratio":
-                total_claims = result_df["claim_amount"].sum() if "claim_amount" in result_df.columns else 0
-                total_prem = result_df["premium"].sum() if "premium" in result_df.columns else 0
-                totals[m] = round((total_claims / total_prem) * 100, 1) if total_prem > 0 else 0
-            elif m == "avg_claim":
-                total_claims = result_df["claim_amount"].sum() if "claim_amount" in result_df.columns else 0
-                total_count = result_df["claim_count"].sum() if "claim_count" in result_df.columns else 0
-                totals[m] = round(total_claims / total_count) if total_count > 0 else 0
-            elif m == "max_claim":
-                totals[m] = float(result_df[m].max()) if not result_df.empty else 0
-            else:
-                totals[m] = float(result_df[m].sum()) if not result_df.empty else 0
-
-        # Convert to records
-        rows = result_df.fillna("").to_dict("records")
-        # Cast numeric types for JSON serialization
-        for row in rows:
-            for k, v in row.items():
-                if isinstance(v, (pd.Timestamp,)):
-                    row[k] = str(v)
-                elif hasattr(v, "item"):  # numpy scalar
-                    row[k] = v.item()
-
-        return {
-            "columns": output_cols,
-            "rows": rows,
-            "totals": totals,
-            "row_count": len(rows),
-        }
+            requested_base.add(m)
+
+    if not agg_map:
+        return None
+
+    grouped = df.groupby(valid_dims, dropna=False, observed=True).agg(**agg_map).reset_index()
+
+    # Premium: deduplicate per policy within each group
+    need_premium = "premium" in requested_base or "loss_ratio" in requested_base
+    if need_premium and "premium" in df.columns:
+        prem_df = (
+            df.drop_duplicates(subset=["policy_number"])
+            .groupby(valid_dims, dropna=False, observed=True)["premium"]
+            .sum()
+            .reset_index()
+        )
+        grouped = pd.merge(grouped, prem_df, on=valid_dims, how="left")
+        grouped["premium"] = grouped["premium"].fillna(0)
+
+    # Derived metrics (vectorized; 0 where the denominator is missing)
+    if "loss_ratio" in requested_base:
+        prem = grouped["premium"].to_numpy(dtype=float) if "premium" in grouped.columns else np.zeros(len(grouped))
+        ratio = np.divide(
+            grouped["claim_amount"].to_numpy(dtype=float) * 100, prem,
+            out=np.zeros(len(grouped)), where=prem > 0,
+        )
+        grouped["loss_ratio"] = ratio.round(1)
+
+    if "avg_claim" in requested_base:
+        count = grouped["claim_count"].to_numpy(dtype=float)
+        avg = np.divide(
+            grouped["claim_amount"].to_numpy(dtype=float), count,
+            out=np.zeros(len(grouped)), where=count > 0,
+        )
+        grouped["avg_claim"] = avg.round().astype("int64")
+
+    # Select columns to return
+    output_cols = list(valid_dims)
+    metric_cols = [m for m in metrics if m in grouped.columns]
+    output_cols += metric_cols
+
+    result_df = grouped[output_cols].copy()
+    # Categorical dims (store compaction) can't take "" in fillna below
+    for d in valid_dims:
+        if isinstance(result_df[d].dtype, pd.CategoricalDtype):
+            result_df[d] = result_df[d].astype(object)
+
+    # Sort (default: first metric descending); dims break ties so pages are stable
+    sort_col = sort_by if sort_by in output_cols else (metric_cols[0] if metric_cols else None)
+    if sort_col:
+        keys = [sort_col] + [d for d in valid_dims if d != sort_col]
+        ascending = [sort_dir == "asc"] + [True] * (len(keys) - 1)
+        result_df = result_df.sort_values(keys, ascending=ascending, kind="stable", na_position="last")
+        result_df = result_df.reset_index(drop=True)
+
+    # Totals over the full result, not just the returned page
+    totals = {}
+    for m in metric_cols:
+        if m == "loss_ratio":
+            total_claims = grouped["claim_amount"].sum()
+            total_prem = grouped["premium"].sum() if "premium" in grouped.columns else 0
+            totals[m] = round((total_claims / total_prem) * 100, 1) if total_prem > 0 else 0
+        elif m == "avg_claim":
+            total_claims = grouped["claim_amount"].sum()
+            total_count = grouped["claim_count"].sum()
+            totals[m] = round(total_claims / total_count) if total_count > 0 else 0
+        elif m == "max_claim":
+            totals[m] = float(result_df[m].max()) if not result_df.empty else 0
+        else:
+            totals[m] = float(result_df[m].sum()) if not result_df.empty else 0
+
+    return result_df, output_cols, totals
+
+
+def cached_result(df: pd.DataFrame, token: Any, **query) -> Optional[Tuple[pd.DataFrame, List[str], Dict[str, Any]]]:
+    """build_result() memoised on a frame token (store version / shm segment)."""
+    if token is None:
+        return build_result(df, **query)
+    key = _cache_key(token, **query)
+    with _RESULT_CACHE_LOCK:
+        hit = _RESULT_CACHE.get(key)
+        if hit is not None:
+            _RESULT_CACHE.move_to_end(key)
+            return hit
+    result = build_result(df, **query)
+    with _RESULT_CACHE_LOCK:
+        _RESULT_CACHE[key] = result
+        while len(_RESULT_CACHE) > _RESULT_CACHE_SIZE:
+            _RESULT_CACHE.popitem(last=False)
+    return result
+
+
+def to_records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    rows = frame.fillna("").to_dict("records")
+    # Cast numeric types for JSON serialization
+    for row in rows:
+        for k, v in row.items():
+            if isinstance(v, (pd.Timestamp,)):
+                row[k] = str(v)
+            elif hasattr(v, "item"):  # numpy scalar
+                row[k] = v.item()
+    return rows
+
+
+def run_query(
+    df: pd.DataFrame,
+    dimensions: List[str],
+    metrics: List[str],
+    filters: Optional[List[Dict[str, Any]]] = None,
+    user_email: Optional[str] = None,
+    sort_by: Optional[str] = None,
+    sort_dir: str = "desc",
+    limit: Optional[int] = None,
+    offset: int = 0,
+    cache_token: Any = None,
+) -> Dict[str, Any]:
+    """Group / aggregate the claim-level frame and return one page of rows.
+    Pure function of its inputs so it runs the same in the API process and in
+    pool workers. limit=None returns every row."""
+    result = cached_result(
+        df, cache_token,
+        dimensions=dimensions, metrics=metrics, filters=filters,
+        user_email=user_email, sort_by=sort_by, sort_dir=sort_dir,
+    )
+    if result is None:
+        return dict(EMPTY_RESULT)
+    result_df, output_cols, totals = result
+
+    total_rows = len(result_df)
+    offset = max(offset or 0, 0)
+    end = total_rows if limit is None else min(offset + max(limit, 0), total_rows)
+    rows = to_records(result_df.iloc[offset:end])
+
+    return {
+        "columns": output_cols,
+        "rows": rows,
+        "totals": totals,
+        "row_count": len(rows),
+        "total_rows": total_rows,
+        "offset": offset,
+        "next_offset": end if end < total_rows else None,
+    }
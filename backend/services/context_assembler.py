@@ -0,0 +1,253 @@
+"""
+Context assembler — fits one LLM call into a token budget.
+
+The system prompt and the current message are always sent whole. What is
+left of CONTEXT_TOKEN_BUDGET is shared between the data snapshot,
+guidelines, similar past cases and conversation history: each gets its
+SHARES slice, and a slice it does not need goes to the others in PRIORITY
+order. A section longer than its grant is cut at a line boundary.
+
+History keeps the newest messages verbatim, as many as fit; older ones are
+folded into a rolling summary, at most SUMMARY_SHARE of the history grant.
+Summaries are extractive (one gist line per message plus every policy /
+claim number mentioned) and cached per chat session. Messages reach the
+summary two ways: routers/chat.py folds those that left the loaded history
+window (ConversationSummaries.fold), and a window too long for its grant
+folds its oldest messages here. A session with a summary always sends it;
+a call without one that fits the budget is sent exactly as before.
+
+Tokens are counted with tiktoken; without it (or without its encoding
+files) they are estimated at CHARS_PER_TOKEN. load_encoding() reads the
+encoding (a download on first use); lifespan runs it in a thread.
+"""
+import os
+import re
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "8000"))
+TIKTOKEN_ENCODING = os.getenv("TIKTOKEN_ENCODING", "cl100k_base")
+CHARS_PER_TOKEN = 4
+# Role / separator tokens per chat message
+MESSAGE_OVERHEAD = 4
+
+SHARES = {"data": 0.40, "history": 0.30, "guidelines": 0.15, "knowledge": 0.15}
+PRIORITY = ("data", "history", "guidelines", "knowledge")
+SUMMARY_SHARE = 0.25
+SUMMARY_MAX_LINES = 40
+GIST_CHARS = 160
+# Sessions whose rolling summary is kept in memory
+SUMMARY_CACHE_SIZE = 1000
+
+_ENTITY = re.compile(r"\b(?:COMM|CLM)-\d{4}-\d{3}\b", re.IGNORECASE)
+_TRUNCATED = "\n…[truncated]"
+# System prompt sections, in prompt order
+_HEADERS = {
+    "guidelines": "\n\nRELEVANT GUIDELINES:\n",
+    "knowledge": "\n\nSIMILAR PAST CASES:\n",
+    "data": "\n\nDATABASE CONTEXT (use this real data in your response):\n",
+    "summary": "\n\nEARLIER IN THIS CONVERSATION (summary):\n",
+}
+
+
+# ── Token counting ──────────────────────────────────────────────
+
+_encoding = None
+_encoding_loaded = False
+
+
+def load_encoding():
+    """Load the tiktoken encoding once (blocking: may download it)."""
+    _get_encoding()
+
+
+def _get_encoding():
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding(TIKTOKEN_ENCODING)
+        except Exception as e:
+            print(f"[WARN] tiktoken unavailable ({type(e).__name__}); estimating {CHARS_PER_TOKEN} chars/token")
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    enc = _get_encoding()
+    if enc is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, limit: int) -> str:
+    """Leading part of text within `limit` tokens, cut at a line break when
+    one is near; the text itself when it fits."""
+    if count_tokens(text) <= limit:
+        return text
+    limit -= count_tokens(_TRUNCATED)
+    if limit <= 0:
+        return ""
+    enc = _get_encoding()
+    if enc is None:
+        head = text[:limit * CHARS_PER_TOKEN]
+    else:
+        head = enc.decode(enc.encode(text, disallowed_special=())[:limit])
+    cut = head.rfind("\n")
+    if cut > len(head) // 2:
+        head = head[:cut]
+    return head + _TRUNCATED
+
+
+# ── Rolling summaries ───────────────────────────────────────────
+
+class Summary(NamedTuple):
+    through_id: int          # newest message id folded in (0 without ids)
+    lines: List[str]
+    entities: List[str]
+
+    def render(self, limit: int) -> str:
+        """Newest gist lines within `limit` tokens, then the entity list."""
+        tail = "Referenced: " + ", ".join(self.entities) if self.entities else ""
+        room = limit - count_tokens(tail)
+        lines: List[str] = []
+        for line in reversed(self.lines):
+            room -= count_tokens(line) + 1
+            if room < 0:
+                break
+            lines.append(line)
+        return truncate_tokens("\n".join(lines[::-1] + ([tail] if tail else [])), limit)
+
+
+def _gist(msg: dict) -> str:
+    content = " ".join(str(msg.get("content", "")).split())
+    if len(content) > GIST_CHARS:
+        content = content[:GIST_CHARS].rstrip() + "…"
+    return f"- {'User' if msg.get('role') == 'user' else 'Assistant'}: {content}"
+
+
+def _fold(summary: Summary, messages: List[dict]) -> Summary:
+    lines = (summary.lines + [_gist(m) for m in messages])[-SUMMARY_MAX_LINES:]
+    entities = list(summary.entities)
+    for m in messages:
+        for e in _ENTITY.findall(str(m.get("content", ""))):
+            if e.upper() not in entities:
+                entities.append(e.upper())
+    through = max([summary.through_id] + [m.get("id") or 0 for m in messages])
+    return Summary(through, lines, entities)
+
+
+class ConversationSummaries:
+    """Per-session rolling summaries (LRU, in memory)."""
+
+    _cache: "OrderedDict[int, Summary]" = OrderedDict()
+
+    @classmethod
+    def fold(cls, session_id: Optional[int], older: List[dict]) -> Summary:
+        """Summary of `older` (messages outside the verbatim window), reusing
+        the session's cached summary for the ones already folded in."""
+        empty = Summary(0, [], [])
+        if session_id is None:
+            return _fold(empty, older)
+        cached = cls._cache.pop(session_id, empty)
+        # Without message ids there is nothing to resume from: summarise
+        # what is loaded
+        if not all(m.get("id") for m in older):
+            summary = _fold(empty, older)
+        else:
+            summary = _fold(cached, [m for m in older if m["id"] > cached.through_id])
+        cls._cache[session_id] = summary
+        while len(cls._cache) > SUMMARY_CACHE_SIZE:
+            cls._cache.popitem(last=False)
+        return summary
+
+    @classmethod
+    def get(cls, session_id: Optional[int]) -> Optional[Summary]:
+        """The session's cached summary, if any."""
+        if session_id is None or session_id not in cls._cache:
+            return None
+        cls._cache.move_to_end(session_id)
+        return cls._cache[session_id]
+
+    @classmethod
+    def forget(cls, session_id: int):
+        cls._cache.pop(session_id, None)
+
+
+# ── Assembly ────────────────────────────────────────────────────
+
+def _allocate(available: int, needs: Dict[str, int]) -> Dict[str, int]:
+    grants = {k: min(needs[k], int(available * SHARES[k])) for k in PRIORITY}
+    spare = available - sum(grants.values())
+    for k in PRIORITY:
+        extra = max(0, min(spare, needs[k] - grants[k]))
+        grants[k] += extra
+        spare -= extra
+    return grants
+
+
+def _history(history: List[dict], grant: int, session_id: Optional[int]) -> Tuple[List[dict], str]:
+    """(verbatim newest messages, summary of the older ones) within grant."""
+    sizes = [count_tokens(str(m.get("content", ""))) + MESSAGE_OVERHEAD for m in history]
+    summary = ConversationSummaries.get(session_id)
+    if sum(sizes) <= grant and summary is None:
+        return history, ""
+    summary_cap = int(grant * SUMMARY_SHARE)
+    room, start = grant - summary_cap, len(history)
+    while start > 0 and sizes[start - 1] <= room:
+        room -= sizes[start - 1]
+        start -= 1
+    if start:
+        summary = ConversationSummaries.fold(session_id, history[:start])
+    limit = summary_cap + room - count_tokens(_HEADERS["summary"])
+    return history[start:], summary.render(limit) if summary and limit > 0 else ""
+
+
+def assemble_messages(
+    system_prompt: str,
+    message: str,
+    history: List[dict],
+    data_context: str = "",
+    guideline_context: str = "",
+    knowledge_context: str = "",
+    session_id: Optional[int] = None,
+    budget: Optional[int] = None,
+) -> Tuple[list, Dict[str, int]]:
+    """LangChain message list within the token budget, and the tokens spent
+    per section."""
+    budget = budget or CONTEXT_TOKEN_BUDGET
+    sections = {"guidelines": guideline_context, "knowledge": knowledge_context, "data": data_context}
+    needs = {k: count_tokens(v) + count_tokens(_HEADERS[k]) if v else 0 for k, v in sections.items()}
+    needs["history"] = sum(count_tokens(str(m.get("content", ""))) + MESSAGE_OVERHEAD for m in history)
+    summary = ConversationSummaries.get(session_id)
+    if summary is not None:
+        needs["history"] += count_tokens(_HEADERS["summary"] + summary.render(budget))
+    fixed = count_tokens(system_prompt) + count_tokens(message) + 2 * MESSAGE_OVERHEAD
+    grants = _allocate(max(0, budget - fixed), needs)
+
+    texts = {
+        k: truncate_tokens(v, grants[k] - count_tokens(_HEADERS[k])) if v else "" for k, v in sections.items()
+    }
+    recent, summary = _history(history, grants["history"], session_id)
+    texts["summary"] = summary
+
+    system = system_prompt + "".join(_HEADERS[k] + v for k, v in texts.items() if v)
+
+    messages = [SystemMessage(content=system)]
+    for msg in recent:
+        if msg["role"] == "user":
+            messages.append(HumanMessage(content=msg["content"]))
+        else:
+            messages.append(AIMessage(content=msg["content"]))
+    messages.append(HumanMessage(content=message))
+
+    usage = {k: count_tokens(_HEADERS[k] + v) if v else 0 for k, v in texts.items() if k != "summary"}
+    usage["history"] = sum(count_tokens(m["content"]) + MESSAGE_OVERHEAD for m in recent)
+    usage["history"] += count_tokens(_HEADERS["summary"] + summary) if summary else 0
+    usage["fixed"] = fixed
+    usage["total"] = sum(usage.values())
+    return messages, usage
@@ -1,54 +1,44 @@
-
-import pandas as pd
-import sqlite3
-import os
+"""
+DataCube - canned answers (claim trends, claims by type, policies by industry)
+served from the shared AnalyticalStore instead of SQL. Trends of any
+granularity come from the precomputed TrendStore.
+"""
 import re
 from typing import Optional, Dict, Any, List
 
-DB_PATH = os.path.join(os.path.dirname(__file__), "..", "risk_mind.db")
-# Fallback to data dir if needed
-if not os.path.exists(DB_PATH):
-    DB_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "riskmind.db")
+from services.analytical_store import AnalyticalStore
+from services.trend_store import DIMENSIONS as TREND_DIMENSIONS, TrendStore
+
+_TREND_WORDS = (
+    "trend", "over time", "daily", "weekly", "monthly", "quarterly", "yearly", "annual",
+    "per day", "per week", "per month", "per quarter", "per year",
+    "by day", "by week", "by month", "by quarter", "by year",
+)
+# First match wins; month is the default
+_GRANULARITY_WORDS = {
+    "day": ("daily", "per day", "by day", "day by day"),
+    "week": ("weekly", "per week", "by week", "week over week"),
+    "quarter": ("quarterly", "per quarter", "by quarter", "quarter over quarter"),
+    "year": ("yearly", "annual", "per year", "by year", "year over year"),
+}
+
+# The question must be about claims: "claim(s)" or "loss(es)" as a word, but
+# not "loss ratio" (premium-relative, not a claims series)
+_TREND_SUBJECT = re.compile(r"\bclaims?\b|\bloss(?:es)?\b(?!\s+ratios?\b)")
+# "from 2023 to 2024", "2023-2024", "between 2023 and 2024"
+_YEAR_RANGE = re.compile(r"\b(20\d{2})\s*(?:-|to|through|until|and)\s*(20\d{2})\b")
+_YEAR_SINCE = re.compile(r"\b(?:since|from|after)\s+(20\d{2})\b")
+
 
 class DataCube:
-    _df: Optional[pd.DataFrame] = None
-    _loaded = False
 
     @classmethod
     def load_data(cls):
-        if cls._loaded:
-            return
-
-        try:
-            conn = sqlite3.connect(DB_PATH)
-            
-            # Load Policies
-            policies = pd.read_sql("SELECT * FROM policies", conn)
-            # Load Claims
-            claims = pd.read_sql("SELECT * FROM claims", conn)
-            
-            # Join (Left Join Policies -> Claims)
-            # Ensure ID columns match. claims.policy_id -> policies.id
-            if not policies.empty and not claims.empty:
-                # Rename id to avoid collision
-                policies = policies.rename(columns={"id": "policy_id_pk"})
-                cls._df = pd.merge(claims, policies, left_on="policy_id", right_on="policy_id_pk", how="left")
-                
-                # Convert dates
-                cls._df['claim_date'] = pd.to_datetime(cls._df['claim_date'], errors='coerce')
-                cls._df['effective_date'] = pd.to_datetime(cls._df['effective_date'], errors='coerce')
-            
-            cls._loaded = True
-            print(f"[DataCube] Loaded {len(cls._df) if cls._df is not None else 0} rows into memory.")
-        except Exception as e:
-            print(f"[DataCube] Error loading data: {e}")
-            cls._df = pd.DataFrame()
+        AnalyticalStore.load()
 
     @classmethod
     def get_df(cls):
-        if not cls._loaded:
-            cls.load_data()
-        return cls._df
+        return AnalyticalStore.frame()
 
     @classmethod
     def try_query(cls, message: str) -> Optional[Dict[str, Any]]:
@@ -62,26 +52,14 @@ class DataCube:
             
         lower = message.lower()
         
-        # 1. Trend of Claims (over time)
-        if 'trend' in lower and 'claim' in lower:
-            # Group by Month
-            # df['month'] = df['claim_date'].dt.to_period('M') # Parsing might be tricky with SQLite strings
-            # Use string slicing for speed if format is YYYY-MM-DD
-            try:
-                # Ensure datetime
-                time_series = df.set_index('claim_date').resample('ME')['claim_amount'].sum().reset_index()
-                time_series['month'] = time_series['claim_date'].dt.strftime('%Y-%m')
-                time_series = time_series.sort_values('month')
-                
-                rows = time_series[['month', 'claim_amount']].rename(columns={'claim_amount': 'total_amount'}).to_dict('records')
-                return cls._build_response(rows, ["month", "total_amount"], "Claim Trend (Cached)")
-            except Exception as e:
-                print(f"[DataCube] Trend error: {e}")
-                return None
+        # 1. Trend of Claims (over time) — any granularity, with filters
+        trend = cls._parse_trend(lower)
+        if trend is not None:
+            return cls.trend(**trend)
 
         # 2. Claims by Type
         if 'claim' in lower and ('type' in lower or 'distribution' in lower):
-            summary = df.groupby('claim_type').agg(
+            summary = df.groupby('claim_type', observed=True).agg(
                 claim_count=('id', 'count'),
                 total_amount=('claim_amount', 'sum')
             ).reset_index().sort_values('total_amount', ascending=False)
@@ -91,10 +69,9 @@ class DataCube:
 
         # 3. Policies by Industry
         if 'polic' in lower and 'industry' in lower:
-            # We need to drop duplicates if we joined claims (as one policy has many claims)
-            # So queries on policies should use the unique policy DF or dedup
-            unique_policies = df.drop_duplicates(subset=['policy_number'])
-            summary = unique_policies.groupby('industry_type').agg(
+            # Policy-level table from the store, so policies without claims count too
+            policies = AnalyticalStore.policies()
+            summary = policies.groupby('industry_type', observed=True).agg(
                 policy_count=('policy_number', 'count'),
                 total_premium=('premium', 'sum')
             ).reset_index().sort_values('total_premium', ascending=False)
@@ -104,6 +81,63 @@ class DataCube:
 
         return None
 
+    @classmethod
+    def trend(
+        cls,
+        granularity: str = "month",
+        filters: Optional[Dict[str, List[str]]] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Claim count / amount trend from the precomputed TrendStore."""
+        rows = TrendStore.series(granularity, filters, start, end)
+        parts = [f"Claim Trend by {granularity.title()}"]
+        for dim, values in (filters or {}).items():
+            if values:
+                parts.append(f"{dim}={', '.join(values)}")
+        if start or end:
+            parts.append(f"{start or '…'} to {end or '…'}")
+        return cls._build_response(
+            rows, [granularity, "claim_count", "total_amount"], " · ".join(parts) + " (Cached)"
+        )
+
+    @staticmethod
+    def _parse_trend(lower: str) -> Optional[Dict[str, Any]]:
+        """Granularity, dimension filters and year range from a trend question."""
+        if not _TREND_SUBJECT.search(lower):
+            return None
+        if not any(w in lower for w in _TREND_WORDS):
+            return None
+
+        granularity = "month"
+        for g, words in _GRANULARITY_WORDS.items():
+            if any(w in lower for w in words):
+                granularity = g
+                break
+
+        filters: Dict[str, List[str]] = {}
+        for dim in TREND_DIMENSIONS:
+            matched = [
+                v for v in TrendStore.values(dim)
+                if re.search(rf"\b{re.escape(v.lower().replace('_', ' '))}\b", lower.replace("_", " "))
+            ]
+            if matched:
+                filters[dim] = matched
+
+        start = end = None
+        span = _YEAR_RANGE.search(lower)
+        since = _YEAR_SINCE.search(lower)
+        years = sorted(set(re.findall(r"\b(20\d{2})\b", lower)))
+        if span:
+            first, last = sorted(span.groups())
+            start, end = f"{first}-01-01", f"{last}-12-31"
+        elif since:
+            start = f"{since.group(1)}-01-01"
+        elif years:
+            start, end = f"{years[0]}-01-01", f"{years[-1]}-12-31"
+
+        return {"granularity": granularity, "filters": filters, "start": start, "end": end}
+
     @staticmethod
     def _build_response(rows: List[Dict[str, Any]], columns: List[str], intent_desc: str) -> Dict[str, Any]:
         return {
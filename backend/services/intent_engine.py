@@ -12,6 +12,8 @@ import json
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 
+from services.risk_scoring import compute_risk, score_risk
+
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 UPLOAD_DIR = os.path.join(BASE_DIR, "data", "uploads")
 
@@ -254,14 +256,6 @@ def _estimate_confidence(intent: str, analysis_object: Dict[str, Any], message:
 
 # ── Data Snapshot Formatting ────────────────────────────────────
 
-def _compute_risk(claim_count: int, total_amount: float) -> str:
-    if claim_count >= 5 or total_amount >= 100000:
-        return "high"
-    if claim_count >= 2 or total_amount >= 50000:
-        return "medium"
-    return "low"
-
-
 def _format_data_snapshot(dashboard_data: dict, intent_payload: dict) -> str:
     """Convert raw dashboard data to compact text context for LLM."""
     policies = dashboard_data.get("policies", [])
@@ -312,7 +306,7 @@ def _format_data_snapshot(dashboard_data: dict, intent_payload: dict) -> str:
             pol_open = sum(1 for c in pol_claims if c.get("status") == "open")
             pol_premium = pol.get("premium", 0) or 0
             pol_lr = round((pol_total / pol_premium) * 100, 1) if pol_premium else 0
-            risk = _compute_risk(len(pol_claims), pol_total)
+            risk = compute_risk(len(pol_claims), pol_total)
 
             lines.append(f"POLICY {pol['policy_number']}:")
             lines.append(f"- Policyholder: {pol.get('policyholder_name', 'N/A')} | Industry: {pol.get('industry_type', 'N/A')}")
@@ -435,12 +429,17 @@ def _format_data_snapshot(dashboard_data: dict, intent_payload: dict) -> str:
         lines.append(f"  - {ct}: {cnt} claims | ${type_amounts.get(ct, 0):,.0f} total")
     lines.append("")
 
+    # Per-policy aggregates, scored in one batch
+    pol_counts = [len(claims_by_policy.get(p.get("policy_number", ""), [])) for p in policies]
+    pol_totals = [
+        sum(c.get("claim_amount", 0) or 0 for c in claims_by_policy.get(p.get("policy_number", ""), []))
+        for p in policies
+    ]
+    pol_risks = score_risk(pol_counts, pol_totals).tolist()
+
     # Risk distribution
     risk_dist = {"high": 0, "medium": 0, "low": 0}
-    for p in policies:
-        pc = claims_by_policy.get(p.get("policy_number", ""), [])
-        ptotal = sum(c.get("claim_amount", 0) or 0 for c in pc)
-        r = _compute_risk(len(pc), ptotal)
+    for r in pol_risks:
         risk_dist[r] += 1
     lines.append(f"RISK DISTRIBUTION: HIGH: {risk_dist['high']} | MEDIUM: {risk_dist['medium']} | LOW: {risk_dist['low']}")
     lines.append("")
@@ -457,13 +456,10 @@ def _format_data_snapshot(dashboard_data: dict, intent_payload: dict) -> str:
 
     # ── Top risk policies
     enriched = []
-    for p in policies:
-        pc = claims_by_policy.get(p.get("policy_number", ""), [])
-        total = sum(c.get("claim_amount", 0) or 0 for c in pc)
+    for p, cnt, total, risk in zip(policies, pol_counts, pol_totals, pol_risks):
         prem = p.get("premium", 0) or 0
         lr = round((total / prem) * 100, 1) if prem else 0
-        risk = _compute_risk(len(pc), total)
-        enriched.append({"pn": p["policy_number"], "name": p.get("policyholder_name", ""), "lr": lr, "risk": risk, "claims": len(pc)})
+        enriched.append({"pn": p["policy_number"], "name": p.get("policyholder_name", ""), "lr": lr, "risk": risk, "claims": cnt})
 
     high_risk = [e for e in enriched if e["risk"] == "high" or e["lr"] > 60]
     if high_risk:
@@ -642,7 +638,7 @@ def _build_lightweight_analysis(dashboard_data: dict, intent_payload: dict) -> D
             dimensions["claim_detail"] = cl
 
     # Risk level
-    risk_level = _compute_risk(metrics.get("claim_count", 0), metrics.get("total_amount", 0))
+    risk_level = compute_risk(metrics.get("claim_count", 0), metrics.get("total_amount", 0))
 
     tables_used = ["policies", "claims"]
     if decisions:
@@ -11,7 +11,8 @@ import os
 from typing import Optional, Tuple, List, Dict
 
 from langchain_core.language_models import BaseChatModel
-from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+
+from services.context_assembler import assemble_messages
 
 
 # ── Helpers ────────────────────────────────────────────────────
@@ -166,6 +167,10 @@ def get_available_providers() -> dict:
 
 # ── Message Building ──────────────────────────────────────────
 
+# Most recent history messages sent to the LLM (routers/chat.py loads no more)
+HISTORY_WINDOW = 20
+
+
 def build_messages(
     system_prompt: str,
     message: str,
@@ -173,23 +178,17 @@ def build_messages(
     data_context: str = "",
     guideline_context: str = "",
     knowledge_context: str = "",
+    session_id: Optional[int] = None,
 ) -> list:
-    """Assemble a LangChain message list from raw inputs."""
-    system = system_prompt
-    if guideline_context:
-        system += f"\n\nRELEVANT GUIDELINES:\n{guideline_context}"
-    if knowledge_context:
-        system += f"\n\nSIMILAR PAST CASES:\n{knowledge_context}"
-    if data_context:
-        system += f"\n\nDATABASE CONTEXT (use this real data in your response):\n{data_context}"
-
-    messages = [SystemMessage(content=system)]
-    for msg in history[-20:]:
-        if msg["role"] == "user":
-            messages.append(HumanMessage(content=msg["content"]))
-        else:
-            messages.append(AIMessage(content=msg["content"]))
-    messages.append(HumanMessage(content=message))
+    """Assemble a LangChain message list from raw inputs, within the context
+    token budget (older turns summarised per session_id)."""
+    messages, _ = assemble_messages(
+        system_prompt, message, history[-HISTORY_WINDOW:],
+        data_context=data_context,
+        guideline_context=guideline_context,
+        knowledge_context=knowledge_context,
+        session_id=session_id,
+    )
     return messages
 
 
@@ -0,0 +1,87 @@
+"""
+Policy details — policies, their claims and latest decisions for a batch of
+policy numbers in a constant number of queries.
+
+load_policies() reads every requested policy with one query over
+policies ⟕ policy_stats (all rule-engine metrics included), then the claims
+and the latest decision of all of them with one query each, whatever the
+batch size. Policy numbers and ids are bound as one JSON array
+(json_values_sql), so each statement is prepared once for any batch size.
+The single-policy endpoints (policies detail, memo) call it with one
+number, so batch and single reads share one code path.
+"""
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import DateTime, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.dialect import json_list, json_values_sql
+from services.rule_engine import metric_select_sql
+
+_POLICIES = text(f"""
+    SELECT p.id, p.policy_number, p.policyholder_name, p.industry_type,
+           p.effective_date, p.expiration_date, p.policy_status, p.latitude, p.longitude,
+           {metric_select_sql()}, COALESCE(s.risk_level, 'low') AS risk_level
+    FROM policies p LEFT JOIN policy_stats s ON s.policy_id = p.id
+    WHERE p.policy_number IN ({json_values_sql("policy_numbers")})
+""")
+
+_CLAIMS = text(f"""
+    SELECT c.policy_id, c.claim_number, c.claim_date, c.claim_amount, c.claim_type,
+           c.status, c.description, c.evidence_files
+    FROM claims c
+    WHERE c.policy_id IN ({json_values_sql("policy_ids", "INTEGER")})
+    ORDER BY c.policy_id, c.claim_date DESC
+""")
+
+# Newest decision per policy (same order as the decisions history endpoint)
+_LATEST_DECISIONS = text(f"""
+    SELECT id, policy_number, decision, reason, risk_level, decided_by, created_at
+    FROM (
+        SELECT d.id, d.policy_number, d.decision, d.reason, d.risk_level, d.decided_by, d.created_at,
+               ROW_NUMBER() OVER (PARTITION BY d.policy_number ORDER BY d.created_at DESC, d.id DESC) AS rn
+        FROM decisions d
+        WHERE d.policy_number IN ({json_values_sql("policy_numbers")})
+    ) latest
+    WHERE rn = 1
+""").columns(created_at=DateTime)
+
+
+class PolicyRecord(NamedTuple):
+    policy: Dict[str, Any]            # policy columns + every METRICS value + risk_level
+    claims: List[Dict[str, Any]]      # newest first
+    latest_decision: Optional[Dict[str, Any]]
+
+
+async def load_policies(
+    db: AsyncSession,
+    policy_numbers: Sequence[str],
+    claims: bool = True,
+    decisions: bool = True,
+) -> Dict[str, PolicyRecord]:
+    """policy_number -> PolicyRecord for the numbers that exist (at most
+    three queries; claims / decisions can be skipped)."""
+    numbers = list(dict.fromkeys(policy_numbers))
+    if not numbers:
+        return {}
+    rows = (await db.execute(_POLICIES, {"policy_numbers": json_list(numbers)})).fetchall()
+    policies = {r.policy_number: dict(r._mapping) for r in rows}
+    if not policies:
+        return {}
+
+    by_policy: Dict[int, List[Dict[str, Any]]] = {p["id"]: [] for p in policies.values()}
+    if claims:
+        result = await db.execute(_CLAIMS, {"policy_ids": json_list(by_policy)})
+        for r in result.fetchall():
+            claim = dict(r._mapping)
+            by_policy[claim.pop("policy_id")].append(claim)
+
+    latest: Dict[str, Dict[str, Any]] = {}
+    if decisions:
+        result = await db.execute(_LATEST_DECISIONS, {"policy_numbers": json_list(policies)})
+        latest = {r.policy_number: dict(r._mapping) for r in result.fetchall()}
+
+    return {
+        pn: PolicyRecord(p, by_policy[p["id"]], latest.get(pn))
+        for pn, p in policies.items()
+    }
@@ -37,6 +37,11 @@ Loss Ratio = (SUM(claim_amount) / premium) * 100
 from typing import Any, Dict, List, Optional, Tuple
 import re
 
+from database.dialect import (
+    date_from_today_sql, days_until_sql, group_concat_sql, month_sql, quarter_sql,
+    round_sql, today_sql, weekday_sql, year_sql,
+)
+
 
 # ---------------------------------------------------------------------------
 # Query Library: 100 Golden Queries
@@ -44,7 +49,10 @@ import re
 # Each entry:
 #   id           : Unique identifier (category-number)
 #   description  : Human-readable description of what this query returns
-#   sql          : SQLite-compatible SELECT statement
+#   sql          : SELECT statement; dialect-specific fragments (dates,
+#                  ROUND, GROUP_CONCAT) come from database.dialect and are
+#                  built for DATABASE_URL at import time, aliases are not
+#                  used in HAVING (PostgreSQL rejects them)
 #                  Use :param_name for parameterized slots
 #   params       : Dict of required parameter names → descriptions
 #   category     : Logical grouping
@@ -91,12 +99,11 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "PF-003": {
         "id": "PF-003",
         "description": "Portfolio-wide loss ratio (claims paid vs premium)",
-        "sql": """
+        "sql": f"""
             SELECT
                 SUM(p.premium)                                     AS total_premium,
                 COALESCE(SUM(c.claim_amount), 0)                   AS total_claims,
-                ROUND(COALESCE(SUM(c.claim_amount), 0)
-                      / NULLIF(SUM(p.premium), 0) * 100, 2)        AS loss_ratio_pct
+                {round_sql("COALESCE(SUM(c.claim_amount), 0) / NULLIF(SUM(p.premium), 0) * 100")} AS loss_ratio_pct
             FROM policies p
             LEFT JOIN claims c ON p.id = c.policy_id
         """,
@@ -113,10 +120,10 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "PF-004": {
         "id": "PF-004",
         "description": "Active policies (expiration date in the future)",
-        "sql": """
+        "sql": f"""
             SELECT COUNT(*) AS active_policies, SUM(premium) AS active_premium
             FROM policies
-            WHERE expiration_date > date('now')
+            WHERE expiration_date > {today_sql()}
         """,
         "params": {},
         "category": "Portfolio Overview",
@@ -131,10 +138,10 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "PF-005": {
         "id": "PF-005",
         "description": "Expired policies",
-        "sql": """
+        "sql": f"""
             SELECT COUNT(*) AS expired_policies, SUM(premium) AS expired_premium
             FROM policies
-            WHERE expiration_date <= date('now')
+            WHERE expiration_date <= {today_sql()}
         """,
         "params": {},
         "category": "Portfolio Overview",
@@ -149,7 +156,7 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "PF-006": {
         "id": "PF-006",
         "description": "Full portfolio exposure summary - all key KPIs in one view",
-        "sql": """
+        "sql": f"""
             SELECT
                 COUNT(DISTINCT p.id)                                        AS policy_count,
                 SUM(p.premium)                                              AS total_premium,
@@ -157,8 +164,7 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
                 COALESCE(SUM(c.claim_amount), 0)                           AS total_claims,
                 COALESCE(AVG(c.claim_amount), 0)                           AS avg_claim,
                 COALESCE(MAX(c.claim_amount), 0)                           AS max_claim,
-                ROUND(COALESCE(SUM(c.claim_amount), 0)
-                      / NULLIF(SUM(p.premium), 0) * 100, 2)                AS loss_ratio_pct,
+                {round_sql("COALESCE(SUM(c.claim_amount), 0) / NULLIF(SUM(p.premium), 0) * 100")} AS loss_ratio_pct,
                 COUNT(DISTINCT p.industry_type)                            AS industry_count
             FROM policies p
             LEFT JOIN claims c ON p.id = c.policy_id
@@ -177,12 +183,12 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "PF-007": {
         "id": "PF-007",
         "description": "Premium breakdown by industry type",
-        "sql": """
+        "sql": f"""
             SELECT
                 industry_type,
                 COUNT(*) AS policy_count,
                 SUM(premium) AS total_premium,
-                ROUND(AVG(premium), 2) AS avg_premium
+                {round_sql("AVG(premium)")} AS avg_premium
             FROM policies
             GROUP BY industry_type
             ORDER BY total_premium DESC
@@ -221,7 +227,7 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "PF-009": {
         "id": "PF-009",
         "description": "Average premium across the portfolio",
-        "sql": "SELECT ROUND(AVG(premium), 2) AS avg_premium FROM policies",
+        "sql": f"SELECT {round_sql('AVG(premium)')} AS avg_premium FROM policies",
         "params": {},
         "category": "Portfolio Overview",
         "triggers": [
@@ -235,10 +241,10 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "PF-010": {
         "id": "PF-010",
         "description": "Policies added this calendar year",
-        "sql": """
+        "sql": f"""
             SELECT COUNT(*) AS new_policies, SUM(premium) AS new_premium
             FROM policies
-            WHERE strftime('%Y', created_at) = strftime('%Y', 'now')
+            WHERE {year_sql("created_at")} = {year_sql(today_sql())}
         """,
         "params": {},
         "category": "Portfolio Overview",
@@ -272,11 +278,11 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "CL-002": {
         "id": "CL-002",
         "description": "Total amount paid out across all claims",
-        "sql": """
+        "sql": f"""
             SELECT
                 SUM(claim_amount) AS total_paid,
                 COUNT(*) AS claim_count,
-                ROUND(AVG(claim_amount), 2) AS avg_paid
+                {round_sql("AVG(claim_amount)")} AS avg_paid
             FROM claims
         """,
         "params": {},
@@ -292,7 +298,7 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "CL-003": {
         "id": "CL-003",
         "description": "Average claim amount",
-        "sql": "SELECT ROUND(AVG(claim_amount), 2) AS avg_claim_amount FROM claims",
+        "sql": f"SELECT {round_sql('AVG(claim_amount)')} AS avg_claim_amount FROM claims",
         "params": {},
         "category": "Claims Analysis",
         "triggers": [
@@ -306,12 +312,12 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "CL-004": {
         "id": "CL-004",
         "description": "Claims breakdown by status (open, settled, denied, pending)",
-        "sql": """
+        "sql": f"""
             SELECT
                 status,
                 COUNT(*) AS claim_count,
                 SUM(claim_amount) AS total_amount,
-                ROUND(AVG(claim_amount), 2) AS avg_amount
+                {round_sql("AVG(claim_amount)")} AS avg_amount
             FROM claims
             GROUP BY status
             ORDER BY claim_count DESC
@@ -329,12 +335,12 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "CL-005": {
         "id": "CL-005",
         "description": "Claims breakdown by claim type",
-        "sql": """
+        "sql": f"""
             SELECT
                 claim_type,
                 COUNT(*) AS claim_count,
                 SUM(claim_amount) AS total_amount,
-                ROUND(AVG(claim_amount), 2) AS avg_amount
+                {round_sql("AVG(claim_amount)")} AS avg_amount
             FROM claims
             GROUP BY claim_type
             ORDER BY total_amount DESC
@@ -374,10 +380,10 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "CL-007": {
         "id": "CL-007",
         "description": "Claims filed in the current calendar year",
-        "sql": """
+        "sql": f"""
             SELECT COUNT(*) AS claims_this_year, SUM(claim_amount) AS amount_this_year
             FROM claims
-            WHERE strftime('%Y', claim_date) = strftime('%Y', 'now')
+            WHERE {year_sql("claim_date")} = {year_sql(today_sql())}
         """,
         "params": {},
         "category": "Claims Analysis",
@@ -392,10 +398,10 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "CL-008": {
         "id": "CL-008",
         "description": "Claims filed in the current calendar month",
-        "sql": """
+        "sql": f"""
             SELECT COUNT(*) AS claims_this_month, SUM(claim_amount) AS amount_this_month
             FROM claims
-            WHERE strftime('%Y-%m', claim_date) = strftime('%Y-%m', 'now')
+            WHERE {month_sql("claim_date")} = {month_sql(today_sql())}
         """,
         "params": {},
         "category": "Claims Analysis",
@@ -410,13 +416,13 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "CL-009": {
         "id": "CL-009",
         "description": "Monthly claims trend for the last 12 months",
-        "sql": """
+        "sql": f"""
             SELECT
-                strftime('%Y-%m', claim_date) AS month,
+                {month_sql("claim_date")} AS month,
                 COUNT(*) AS claim_count,
                 SUM(claim_amount) AS total_amount
             FROM claims
-            WHERE claim_date >= date('now', '-12 months')
+            WHERE claim_date >= {date_from_today_sql(months=-12)}
             GROUP BY month
             ORDER BY month ASC
         """,
@@ -434,15 +440,9 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "CL-010": {
         "id": "CL-010",
         "description": "Quarterly claims trend",
-        "sql": """
+        "sql": f"""
             SELECT
-                strftime('%Y', claim_date) || '-Q' ||
-                    CASE
-                        WHEN strftime('%m', claim_date) <= '03' THEN '1'
-                        WHEN strftime('%m', claim_date) <= '06' THEN '2'
-                        WHEN strftime('%m', claim_date) <= '09' THEN '3'
-                        ELSE '4'
-                    END AS quarter,
+                {quarter_sql("claim_date")} AS quarter,
                 COUNT(*) AS claim_count,
                 SUM(claim_amount) AS total_amount
             FROM claims
@@ -544,13 +544,13 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "CL-015": {
         "id": "CL-015",
         "description": "Claims filed in the last 30 days",
-        "sql": """
+        "sql": f"""
             SELECT
                 c.claim_number, c.claim_date, c.claim_amount, c.claim_type,
                 c.status, p.policy_number, p.policyholder_name
             FROM claims c
             JOIN policies p ON p.id = c.policy_id
-            WHERE c.claim_date >= date('now', '-30 days')
+            WHERE c.claim_date >= {date_from_today_sql(days=-30)}
             ORDER BY c.claim_date DESC
         """,
         "params": {},
@@ -610,11 +610,11 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "CL-018": {
         "id": "CL-018",
         "description": "Average claim amount by claim type",
-        "sql": """
+        "sql": f"""
             SELECT
                 claim_type,
                 COUNT(*) AS count,
-                ROUND(AVG(claim_amount), 2) AS avg_amount,
+                {round_sql("AVG(claim_amount)")} AS avg_amount,
                 SUM(claim_amount) AS total_amount
             FROM claims
             GROUP BY claim_type
@@ -641,7 +641,7 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
             FROM policies p
             LEFT JOIN claims c ON p.id = c.policy_id
             GROUP BY p.id
-            HAVING claim_count > 0
+            HAVING COUNT(c.id) > 0
             ORDER BY claim_count DESC
             LIMIT 20
         """,
@@ -685,18 +685,18 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "RK-001": {
         "id": "RK-001",
         "description": "Policies classified as HIGH risk (5+ claims or total claims >= $100k)",
-        "sql": """
+        "sql": f"""
             SELECT
                 p.policy_number, p.policyholder_name, p.industry_type,
                 p.premium,
                 COUNT(c.id) AS claim_count,
                 COALESCE(SUM(c.claim_amount), 0) AS total_claims,
-                ROUND(COALESCE(SUM(c.claim_amount), 0) / NULLIF(p.premium, 0) * 100, 2) AS loss_ratio_pct,
+                {round_sql("COALESCE(SUM(c.claim_amount), 0) / NULLIF(p.premium, 0) * 100")} AS loss_ratio_pct,
                 'HIGH' AS risk_level
             FROM policies p
             LEFT JOIN claims c ON p.id = c.policy_id
             GROUP BY p.id
-            HAVING claim_count >= 5 OR total_claims >= 100000
+            HAVING COUNT(c.id) >= 5 OR COALESCE(SUM(c.claim_amount), 0) >= 100000
             ORDER BY total_claims DESC
         """,
         "params": {},
@@ -713,19 +713,19 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "RK-002": {
         "id": "RK-002",
         "description": "Policies classified as MEDIUM risk (2-4 claims or $50k-$100k total claims)",
-        "sql": """
+        "sql": f"""
             SELECT
                 p.policy_number, p.policyholder_name, p.industry_type,
                 p.premium,
                 COUNT(c.id) AS claim_count,
                 COALESCE(SUM(c.claim_amount), 0) AS total_claims,
-                ROUND(COALESCE(SUM(c.claim_amount), 0) / NULLIF(p.premium, 0) * 100, 2) AS loss_ratio_pct,
+                {round_sql("COALESCE(SUM(c.claim_amount), 0) / NULLIF(p.premium, 0) * 100")} AS loss_ratio_pct,
                 'MEDIUM' AS risk_level
             FROM policies p
             LEFT JOIN claims c ON p.id = c.policy_id
             GROUP BY p.id
-            HAVING (claim_count BETWEEN 2 AND 4) OR
-                   (total_claims BETWEEN 50000 AND 99999)
+            HAVING (COUNT(c.id) BETWEEN 2 AND 4) OR
+                   (COALESCE(SUM(c.claim_amount), 0) BETWEEN 50000 AND 99999)
             ORDER BY total_claims DESC
         """,
         "params": {},
@@ -751,7 +751,7 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
             FROM policies p
             LEFT JOIN claims c ON p.id = c.policy_id
             GROUP BY p.id
-            HAVING claim_count <= 1 AND total_claims < 50000
+            HAVING COUNT(c.id) <= 1 AND COALESCE(SUM(c.claim_amount), 0) < 50000
             ORDER BY p.premium DESC
         """,
         "params": {},
@@ -776,7 +776,7 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
             FROM policies p
             JOIN claims c ON p.id = c.policy_id
             GROUP BY p.id
-            HAVING claim_count >= 5
+            HAVING COUNT(c.id) >= 5
             ORDER BY claim_count DESC
         """,
         "params": {},
@@ -801,7 +801,7 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
             FROM policies p
             JOIN claims c ON p.id = c.policy_id
             GROUP BY p.id
-            HAVING claim_count >= 3
+            HAVING COUNT(c.id) >= 3
             ORDER BY claim_count DESC
         """,
         "params": {},
@@ -816,16 +816,16 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "RK-006": {
         "id": "RK-006",
         "description": "Policies with loss ratio above 80% (decline territory)",
-        "sql": """
+        "sql": f"""
             SELECT
                 p.policy_number, p.policyholder_name, p.industry_type,
                 p.premium,
                 COALESCE(SUM(c.claim_amount), 0) AS total_claims,
-                ROUND(COALESCE(SUM(c.claim_amount), 0) / NULLIF(p.premium, 0) * 100, 2) AS loss_ratio_pct
+                {round_sql("COALESCE(SUM(c.claim_amount), 0) / NULLIF(p.premium, 0) * 100")} AS loss_ratio_pct
             FROM policies p
             LEFT JOIN claims c ON p.id = c.policy_id
             GROUP BY p.id
-            HAVING loss_ratio_pct > 80
+            HAVING {round_sql("COALESCE(SUM(c.claim_amount), 0) / NULLIF(p.premium, 0) * 100")} > 80
             ORDER BY loss_ratio_pct DESC
         """,
         "params": {},
@@ -842,16 +842,16 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "RK-007": {
         "id": "RK-007",
         "description": "Policies with loss ratio 60-80% (refer for review)",
-        "sql": """
+        "sql": f"""
             SELECT
                 p.policy_number, p.policyholder_name, p.industry_type,
                 p.premium,
                 COALESCE(SUM(c.claim_amount), 0) AS total_claims,
-                ROUND(COALESCE(SUM(c.claim_amount), 0) / NULLIF(p.premium, 0) * 100, 2) AS loss_ratio_pct
+                {round_sql("COALESCE(SUM(c.claim_amount), 0) / NULLIF(p.premium, 0) * 100")} AS loss_ratio_pct
             FROM policies p
             LEFT JOIN claims c ON p.id = c.policy_id
             GROUP BY p.id
-            HAVING loss_ratio_pct BETWEEN 60 AND 80
+            HAVING {round_sql("COALESCE(SUM(c.claim_amount), 0) / NULLIF(p.premium, 0) * 100")} BETWEEN 60 AND 80
             ORDER BY loss_ratio_pct DESC
         """,
         "params": {},
@@ -867,16 +867,16 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "RK-008": {
         "id": "RK-008",
         "description": "Policies with loss ratio below 60% (profitable, accept)",
-        "sql": """
+        "sql": f"""
             SELECT
                 p.policy_number, p.policyholder_name, p.industry_type,
                 p.premium,
                 COALESCE(SUM(c.claim_amount), 0) AS total_claims,
-                ROUND(COALESCE(SUM(c.claim_amount), 0) / NULLIF(p.premium, 0) * 100, 2) AS loss_ratio_pct
+                {round_sql("COALESCE(SUM(c.claim_amount), 0) / NULLIF(p.premium, 0) * 100")} AS loss_ratio_pct
             FROM policies p
             LEFT JOIN claims c ON p.id = c.policy_id
             GROUP BY p.id
-            HAVING loss_ratio_pct < 60 OR total_claims = 0
+            HAVING {round_sql("COALESCE(SUM(c.claim_amount), 0) / NULLIF(p.premium, 0) * 100")} < 60 OR COALESCE(SUM(c.claim_amount), 0) = 0
             ORDER BY loss_ratio_pct ASC
         """,
         "params": {},
@@ -892,13 +892,13 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "RK-009": {
         "id": "RK-009",
         "description": "Policies expiring within the next 30 days",
-        "sql": """
+        "sql": f"""
             SELECT
                 p.policy_number, p.policyholder_name, p.industry_type,
                 p.premium, p.expiration_date,
-                CAST(julianday(p.expiration_date) - julianday('now') AS INTEGER) AS days_to_expiry
+                {days_until_sql("p.expiration_date")} AS days_to_expiry
             FROM policies p
-            WHERE p.expiration_date BETWEEN date('now') AND date('now', '+30 days')
+            WHERE p.expiration_date BETWEEN {today_sql()} AND {date_from_today_sql(days=30)}
             ORDER BY p.expiration_date ASC
         """,
         "params": {},
@@ -915,13 +915,13 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "RK-010": {
         "id": "RK-010",
         "description": "Policies expiring within the next 60 days",
-        "sql": """
+        "sql": f"""
             SELECT
                 p.policy_number, p.policyholder_name, p.industry_type,
                 p.premium, p.expiration_date,
-                CAST(julianday(p.expiration_date) - julianday('now') AS INTEGER) AS days_to_expiry
+                {days_until_sql("p.expiration_date")} AS days_to_expiry
             FROM policies p
-            WHERE p.expiration_date BETWEEN date('now') AND date('now', '+60 days')
+            WHERE p.expiration_date BETWEEN {today_sql()} AND {date_from_today_sql(days=60)}
             ORDER BY p.expiration_date ASC
         """,
         "params": {},
@@ -936,13 +936,13 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "RK-011": {
         "id": "RK-011",
         "description": "Policies expiring within the next 90 days",
-        "sql": """
+        "sql": f"""
             SELECT
                 p.policy_number, p.policyholder_name, p.industry_type,
                 p.premium, p.expiration_date,
-                CAST(julianday(p.expiration_date) - julianday('now') AS INTEGER) AS days_to_expiry
+                {days_until_sql("p.expiration_date")} AS days_to_expiry
             FROM policies p
-            WHERE p.expiration_date BETWEEN date('now') AND date('now', '+90 days')
+            WHERE p.expiration_date BETWEEN {today_sql()} AND {date_from_today_sql(days=90)}
             ORDER BY p.expiration_date ASC
         """,
         "params": {},
@@ -1005,16 +1005,16 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "RK-014": {
         "id": "RK-014",
         "description": "Policies where total claims paid exceed the annual premium",
-        "sql": """
+        "sql": f"""
             SELECT
                 p.policy_number, p.policyholder_name, p.industry_type,
                 p.premium,
                 COALESCE(SUM(c.claim_amount), 0) AS total_claims,
-                ROUND((COALESCE(SUM(c.claim_amount), 0) - p.premium), 2) AS loss_exposure
+                {round_sql("COALESCE(SUM(c.claim_amount), 0) - p.premium")} AS loss_exposure
             FROM policies p
             LEFT JOIN claims c ON p.id = c.policy_id
             GROUP BY p.id
-            HAVING total_claims > p.premium
+            HAVING COALESCE(SUM(c.claim_amount), 0) > p.premium
             ORDER BY loss_exposure DESC
         """,
         "params": {},
@@ -1071,12 +1071,12 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "IN-001": {
         "id": "IN-001",
         "description": "Claim count and total amount by industry type",
-        "sql": """
+        "sql": f"""
             SELECT
                 p.industry_type,
                 COUNT(c.id) AS claim_count,
                 COALESCE(SUM(c.claim_amount), 0) AS total_amount,
-                ROUND(COALESCE(AVG(c.claim_amount), 0), 2) AS avg_amount
+                {round_sql("COALESCE(AVG(c.claim_amount), 0)")} AS avg_amount
             FROM policies p
             LEFT JOIN claims c ON p.id = c.policy_id
             GROUP BY p.industry_type
@@ -1095,13 +1095,13 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "IN-002": {
         "id": "IN-002",
         "description": "Loss ratio by industry type",
-        "sql": """
+        "sql": f"""
             SELECT
                 p.industry_type,
                 COUNT(DISTINCT p.id) AS policy_count,
                 SUM(p.premium) AS total_premium,
                 COALESCE(SUM(c.claim_amount), 0) AS total_claims,
-                ROUND(COALESCE(SUM(c.claim_amount), 0) / NULLIF(SUM(p.premium), 0) * 100, 2) AS loss_ratio_pct
+                {round_sql("COALESCE(SUM(c.claim_amount), 0) / NULLIF(SUM(p.premium), 0) * 100")} AS loss_ratio_pct
             FROM policies p
             LEFT JOIN claims c ON p.id = c.policy_id
             GROUP BY p.industry_type
@@ -1120,12 +1120,12 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "IN-003": {
         "id": "IN-003",
         "description": "Total premium written by industry type",
-        "sql": """
+        "sql": f"""
             SELECT
                 industry_type,
                 COUNT(*) AS policy_count,
                 SUM(premium) AS total_premium,
-                ROUND(SUM(premium) * 100.0 / (SELECT SUM(premium) FROM policies), 2) AS premium_share_pct
+                {round_sql("SUM(premium) * 100.0 / (SELECT SUM(premium) FROM policies)")} AS premium_share_pct
             FROM policies
             GROUP BY industry_type
             ORDER BY total_premium DESC
@@ -1143,11 +1143,11 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "IN-004": {
         "id": "IN-004",
         "description": "Policy count by industry type",
-        "sql": """
+        "sql": f"""
             SELECT
                 industry_type,
                 COUNT(*) AS policy_count,
-                ROUND(AVG(premium), 2) AS avg_premium
+                {round_sql("AVG(premium)")} AS avg_premium
             FROM policies
             GROUP BY industry_type
             ORDER BY policy_count DESC
@@ -1165,11 +1165,11 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "IN-005": {
         "id": "IN-005",
         "description": "Average claim amount by industry type",
-        "sql": """
+        "sql": f"""
             SELECT
                 p.industry_type,
                 COUNT(c.id) AS claim_count,
-                ROUND(AVG(c.claim_amount), 2) AS avg_claim,
+                {round_sql("AVG(c.claim_amount)")} AS avg_claim,
                 MAX(c.claim_amount) AS max_claim
             FROM policies p
             JOIN claims c ON p.id = c.policy_id
@@ -1189,12 +1189,12 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "IN-006": {
         "id": "IN-006",
         "description": "Industries ranked by highest loss ratio (worst performers first)",
-        "sql": """
+        "sql": f"""
             SELECT
                 p.industry_type,
                 SUM(p.premium) AS total_premium,
                 COALESCE(SUM(c.claim_amount), 0) AS total_claims,
-                ROUND(COALESCE(SUM(c.claim_amount), 0) / NULLIF(SUM(p.premium), 0) * 100, 2) AS loss_ratio_pct
+                {round_sql("COALESCE(SUM(c.claim_amount), 0) / NULLIF(SUM(p.premium), 0) * 100")} AS loss_ratio_pct
             FROM policies p
             LEFT JOIN claims c ON p.id = c.policy_id
             GROUP BY p.industry_type
@@ -1280,14 +1280,14 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "IN-010": {
         "id": "IN-010",
         "description": "Full industry risk ranking table",
-        "sql": """
+        "sql": f"""
             SELECT
                 p.industry_type,
                 COUNT(DISTINCT p.id) AS policy_count,
                 SUM(p.premium) AS total_premium,
                 COUNT(c.id) AS claim_count,
                 COALESCE(SUM(c.claim_amount), 0) AS total_claims,
-                ROUND(COALESCE(SUM(c.claim_amount), 0) / NULLIF(SUM(p.premium), 0) * 100, 2) AS loss_ratio_pct,
+                {round_sql("COALESCE(SUM(c.claim_amount), 0) / NULLIF(SUM(p.premium), 0) * 100")} AS loss_ratio_pct,
                 CASE
                     WHEN COALESCE(SUM(c.claim_amount), 0) / NULLIF(SUM(p.premium), 0) > 0.8 THEN 'HIGH'
                     WHEN COALESCE(SUM(c.claim_amount), 0) / NULLIF(SUM(p.premium), 0) > 0.6 THEN 'MEDIUM'
@@ -1366,9 +1366,9 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "FI-004": {
         "id": "FI-004",
         "description": "Overall portfolio loss ratio",
-        "sql": """
+        "sql": f"""
             SELECT
-                ROUND(COALESCE(SUM(c.claim_amount), 0) / NULLIF(SUM(p.premium), 0) * 100, 2) AS loss_ratio_pct
+                {round_sql("COALESCE(SUM(c.claim_amount), 0) / NULLIF(SUM(p.premium), 0) * 100")} AS loss_ratio_pct
             FROM policies p
             LEFT JOIN claims c ON p.id = c.policy_id
         """,
@@ -1385,13 +1385,13 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "FI-005": {
         "id": "FI-005",
         "description": "Monthly premium trend for the last 12 months",
-        "sql": """
+        "sql": f"""
             SELECT
-                strftime('%Y-%m', effective_date) AS month,
+                {month_sql("effective_date")} AS month,
                 COUNT(*) AS new_policies,
                 SUM(premium) AS total_premium
             FROM policies
-            WHERE effective_date >= date('now', '-12 months')
+            WHERE effective_date >= {date_from_today_sql(months=-12)}
             GROUP BY month
             ORDER BY month ASC
         """,
@@ -1408,15 +1408,9 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "FI-006": {
         "id": "FI-006",
         "description": "Quarterly loss ratio trend",
-        "sql": """
+        "sql": f"""
             SELECT
-                strftime('%Y', c.claim_date) || '-Q' ||
-                    CASE
-                        WHEN strftime('%m', c.claim_date) <= '03' THEN '1'
-                        WHEN strftime('%m', c.claim_date) <= '06' THEN '2'
-                        WHEN strftime('%m', c.claim_date) <= '09' THEN '3'
-                        ELSE '4'
-                    END AS quarter,
+                {quarter_sql("c.claim_date")} AS quarter,
                 COUNT(c.id) AS claim_count,
                 SUM(c.claim_amount) AS claims_amount
             FROM claims c
@@ -1436,12 +1430,12 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "FI-007": {
         "id": "FI-007",
         "description": "Year-to-date premium written",
-        "sql": """
+        "sql": f"""
             SELECT
                 COUNT(*) AS ytd_policies,
                 SUM(premium) AS ytd_premium
             FROM policies
-            WHERE strftime('%Y', effective_date) = strftime('%Y', 'now')
+            WHERE {year_sql("effective_date")} = {year_sql(today_sql())}
         """,
         "params": {},
         "category": "Financial Analysis",
@@ -1456,12 +1450,12 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "FI-008": {
         "id": "FI-008",
         "description": "Year-to-date claims paid",
-        "sql": """
+        "sql": f"""
             SELECT
                 COUNT(*) AS ytd_claims,
                 SUM(claim_amount) AS ytd_claims_amount
             FROM claims
-            WHERE strftime('%Y', claim_date) = strftime('%Y', 'now')
+            WHERE {year_sql("claim_date")} = {year_sql(today_sql())}
         """,
         "params": {},
         "category": "Financial Analysis",
@@ -1496,12 +1490,12 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "FI-010": {
         "id": "FI-010",
         "description": "Revenue at risk from policies expiring in the next 90 days",
-        "sql": """
+        "sql": f"""
             SELECT
                 COUNT(*) AS expiring_count,
                 SUM(premium) AS premium_at_risk
             FROM policies
-            WHERE expiration_date BETWEEN date('now') AND date('now', '+90 days')
+            WHERE expiration_date BETWEEN {today_sql()} AND {date_from_today_sql(days=90)}
         """,
         "params": {},
         "category": "Financial Analysis",
@@ -1521,11 +1515,11 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "DE-001": {
         "id": "DE-001",
         "description": "Summary count of all decisions by type (accept/refer/decline)",
-        "sql": """
+        "sql": f"""
             SELECT
                 decision,
                 COUNT(*) AS count,
-                ROUND(COUNT(*) * 100.0 / (SELECT COUNT(*) FROM decisions), 2) AS percentage
+                {round_sql("COUNT(*) * 100.0 / (SELECT COUNT(*) FROM decisions)")} AS percentage
             FROM decisions
             GROUP BY decision
             ORDER BY count DESC
@@ -1612,13 +1606,13 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "DE-005": {
         "id": "DE-005",
         "description": "Decisions made this calendar month",
-        "sql": """
+        "sql": f"""
             SELECT
                 d.policy_number, d.decision, d.risk_level,
                 d.decided_by, d.created_at, p.policyholder_name
             FROM decisions d
             JOIN policies p ON p.policy_number = d.policy_number
-            WHERE strftime('%Y-%m', d.created_at) = strftime('%Y-%m', 'now')
+            WHERE {month_sql("d.created_at")} = {month_sql(today_sql())}
             ORDER BY d.created_at DESC
         """,
         "params": {},
@@ -1634,11 +1628,11 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "DE-006": {
         "id": "DE-006",
         "description": "Decisions grouped by risk level",
-        "sql": """
+        "sql": f"""
             SELECT
                 risk_level,
                 COUNT(*) AS count,
-                GROUP_CONCAT(DISTINCT decision) AS decision_types
+                {group_concat_sql("decision", distinct=True)} AS decision_types
             FROM decisions
             GROUP BY risk_level
             ORDER BY count DESC
@@ -1677,12 +1671,11 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "DE-008": {
         "id": "DE-008",
         "description": "Acceptance rate as a percentage of all decisions",
-        "sql": """
+        "sql": f"""
             SELECT
                 COUNT(*) AS total_decisions,
                 SUM(CASE WHEN LOWER(decision) = 'accept' THEN 1 ELSE 0 END) AS accepted,
-                ROUND(SUM(CASE WHEN LOWER(decision) = 'accept' THEN 1 ELSE 0 END) * 100.0
-                      / COUNT(*), 2) AS acceptance_rate_pct
+                {round_sql("SUM(CASE WHEN LOWER(decision) = 'accept' THEN 1 ELSE 0 END) * 100.0 / COUNT(*)")} AS acceptance_rate_pct
             FROM decisions
         """,
         "params": {},
@@ -1830,7 +1823,7 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
             JOIN claims c ON p.id = c.policy_id
             WHERE p.latitude IS NOT NULL AND p.longitude IS NOT NULL
             GROUP BY p.id
-            HAVING claim_count >= 3 OR total_claims >= 50000
+            HAVING COUNT(c.id) >= 3 OR COALESCE(SUM(c.claim_amount), 0) >= 50000
             ORDER BY total_claims DESC
         """,
         "params": {},
@@ -1873,9 +1866,9 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "TR-001": {
         "id": "TR-001",
         "description": "Claims trend by year",
-        "sql": """
+        "sql": f"""
             SELECT
-                strftime('%Y', claim_date) AS year,
+                {year_sql("claim_date")} AS year,
                 COUNT(*) AS claim_count,
                 SUM(claim_amount) AS total_amount
             FROM claims
@@ -1895,12 +1888,12 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "TR-002": {
         "id": "TR-002",
         "description": "Monthly claim volume for the last 12 months",
-        "sql": """
+        "sql": f"""
             SELECT
-                strftime('%Y-%m', claim_date) AS month,
+                {month_sql("claim_date")} AS month,
                 COUNT(*) AS claim_count
             FROM claims
-            WHERE claim_date >= date('now', '-12 months')
+            WHERE claim_date >= {date_from_today_sql(months=-12)}
             GROUP BY month
             ORDER BY month ASC
         """,
@@ -1916,12 +1909,12 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "TR-003": {
         "id": "TR-003",
         "description": "Monthly claims amount for the last 12 months",
-        "sql": """
+        "sql": f"""
             SELECT
-                strftime('%Y-%m', claim_date) AS month,
+                {month_sql("claim_date")} AS month,
                 SUM(claim_amount) AS total_amount
             FROM claims
-            WHERE claim_date >= date('now', '-12 months')
+            WHERE claim_date >= {date_from_today_sql(months=-12)}
             GROUP BY month
             ORDER BY month ASC
         """,
@@ -1937,15 +1930,9 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "TR-004": {
         "id": "TR-004",
         "description": "Quarterly comparison of premium vs claims",
-        "sql": """
+        "sql": f"""
             SELECT
-                strftime('%Y', claim_date) || '-Q' ||
-                    CASE
-                        WHEN strftime('%m', claim_date) <= '03' THEN '1'
-                        WHEN strftime('%m', claim_date) <= '06' THEN '2'
-                        WHEN strftime('%m', claim_date) <= '09' THEN '3'
-                        ELSE '4'
-                    END AS quarter,
+                {quarter_sql("claim_date")} AS quarter,
                 COUNT(id) AS claims,
                 SUM(claim_amount) AS total_claims
             FROM claims
@@ -1965,13 +1952,13 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "TR-005": {
         "id": "TR-005",
         "description": "New policies added per month this year",
-        "sql": """
+        "sql": f"""
             SELECT
-                strftime('%Y-%m', created_at) AS month,
+                {month_sql("created_at")} AS month,
                 COUNT(*) AS new_policies,
                 SUM(premium) AS new_premium
             FROM policies
-            WHERE strftime('%Y', created_at) = strftime('%Y', 'now')
+            WHERE {year_sql("created_at")} = {year_sql(today_sql())}
             GROUP BY month
             ORDER BY month ASC
         """,
@@ -1988,9 +1975,9 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "TR-006": {
         "id": "TR-006",
         "description": "Claims filed by day of the week (pattern analysis)",
-        "sql": """
+        "sql": f"""
             SELECT
-                CASE strftime('%w', claim_date)
+                CASE {weekday_sql("claim_date")}
                     WHEN '0' THEN 'Sunday'
                     WHEN '1' THEN 'Monday'
                     WHEN '2' THEN 'Tuesday'
@@ -2001,8 +1988,8 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
                 END AS day_of_week,
                 COUNT(*) AS claim_count
             FROM claims
-            GROUP BY strftime('%w', claim_date)
-            ORDER BY strftime('%w', claim_date)
+            GROUP BY {weekday_sql("claim_date")}
+            ORDER BY {weekday_sql("claim_date")}
         """,
         "params": {},
         "category": "Time Trends",
@@ -2017,12 +2004,12 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "TR-007": {
         "id": "TR-007",
         "description": "Year-over-year claim count comparison",
-        "sql": """
+        "sql": f"""
             SELECT
-                strftime('%Y', claim_date) AS year,
+                {year_sql("claim_date")} AS year,
                 COUNT(*) AS claim_count,
                 SUM(claim_amount) AS total_amount,
-                ROUND(AVG(claim_amount), 2) AS avg_amount
+                {round_sql("AVG(claim_amount)")} AS avg_amount
             FROM claims
             GROUP BY year
             ORDER BY year DESC
@@ -2040,15 +2027,9 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "TR-008": {
         "id": "TR-008",
         "description": "Loss ratio trend by quarter",
-        "sql": """
+        "sql": f"""
             SELECT
-                strftime('%Y', c.claim_date) || '-Q' ||
-                    CASE
-                        WHEN strftime('%m', c.claim_date) <= '03' THEN '1'
-                        WHEN strftime('%m', c.claim_date) <= '06' THEN '2'
-                        WHEN strftime('%m', c.claim_date) <= '09' THEN '3'
-                        ELSE '4'
-                    END AS quarter,
+                {quarter_sql("c.claim_date")} AS quarter,
                 SUM(c.claim_amount) AS claims_in_quarter,
                 COUNT(c.id) AS claim_count
             FROM claims c
@@ -2068,20 +2049,20 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "TR-009": {
         "id": "TR-009",
         "description": "YTD metrics compared to full previous year",
-        "sql": """
+        "sql": f"""
             SELECT
                 'Current YTD' AS period,
                 COUNT(*) AS claim_count,
                 SUM(claim_amount) AS total_amount
             FROM claims
-            WHERE strftime('%Y', claim_date) = strftime('%Y', 'now')
+            WHERE {year_sql("claim_date")} = {year_sql(today_sql())}
             UNION ALL
             SELECT
                 'Previous Year' AS period,
                 COUNT(*) AS claim_count,
                 SUM(claim_amount) AS total_amount
             FROM claims
-            WHERE strftime('%Y', claim_date) = CAST(strftime('%Y', 'now') AS INTEGER) - 1
+            WHERE {year_sql("claim_date")} = {year_sql(date_from_today_sql(months=-12))}
         """,
         "params": {},
         "category": "Time Trends",
@@ -2096,9 +2077,9 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "TR-010": {
         "id": "TR-010",
         "description": "Monthly decisions trend",
-        "sql": """
+        "sql": f"""
             SELECT
-                strftime('%Y-%m', created_at) AS month,
+                {month_sql("created_at")} AS month,
                 COUNT(*) AS total_decisions,
                 SUM(CASE WHEN LOWER(decision) = 'accept' THEN 1 ELSE 0 END) AS accepted,
                 SUM(CASE WHEN LOWER(decision) = 'decline' THEN 1 ELSE 0 END) AS declined,
@@ -2125,14 +2106,14 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "EN-001": {
         "id": "EN-001",
         "description": "Full policy detail for a specific policy number",
-        "sql": """
+        "sql": f"""
             SELECT
                 p.policy_number, p.policyholder_name, p.industry_type,
                 p.premium, p.effective_date, p.expiration_date,
                 p.latitude, p.longitude,
                 COUNT(c.id) AS claim_count,
                 COALESCE(SUM(c.claim_amount), 0) AS total_claims,
-                ROUND(COALESCE(SUM(c.claim_amount), 0) / NULLIF(p.premium, 0) * 100, 2) AS loss_ratio_pct
+                {round_sql("COALESCE(SUM(c.claim_amount), 0) / NULLIF(p.premium, 0) * 100")} AS loss_ratio_pct
             FROM policies p
             LEFT JOIN claims c ON p.id = c.policy_id
             WHERE p.policy_number = :policy_number
@@ -2300,18 +2281,20 @@ QUERY_LIBRARY: Dict[str, Dict[str, Any]] = {
     "EN-010": {
         "id": "EN-010",
         "description": "Full join: policies + claims summary + decisions (complete portfolio view)",
-        "sql": """
+        "sql": f"""
             SELECT
                 p.policy_number, p.policyholder_name, p.industry_type,
                 p.premium, p.effective_date, p.expiration_date,
                 COUNT(c.id) AS claim_count,
                 COALESCE(SUM(c.claim_amount), 0) AS total_claims,
-                ROUND(COALESCE(SUM(c.claim_amount), 0) / NULLIF(p.premium, 0) * 100, 2) AS loss_ratio_pct,
+                {round_sql("COALESCE(SUM(c.claim_amount), 0) / NULLIF(p.premium, 0) * 100")} AS loss_ratio_pct,
                 d.decision, d.risk_level, d.decided_by
             FROM policies p
             LEFT JOIN claims c ON p.id = c.policy_id
-            LEFT JOIN decisions d ON p.policy_number = d.policy_number
-            GROUP BY p.id
+            LEFT JOIN decisions d ON d.id = (
+                SELECT MAX(d2.id) FROM decisions d2 WHERE d2.policy_number = p.policy_number
+            )
+            GROUP BY p.id, d.id
             ORDER BY total_claims DESC
         """,
         "params": {},
@@ -0,0 +1,197 @@
+"""
+Semantic response cache for the reason node.
+
+Near-identical questions ("which policies are high risk?", "show high risk
+policies") asked against unchanged data get the stored LLM answer instead
+of a new model call. Entries are grouped by scope (user, data version,
+intent, entities) and matched inside a scope by cosine similarity of the
+normalized message embedding, at RESPONSE_CACHE_THRESHOLD or above. The
+numbers and qualifier words (time, negation, comparison) in the two
+messages must be the same ("top 5" never answers "top 10", "this month"
+never answers "next month"), however similar the rest is.
+
+A new data version (routers/chat.py passes the analytical store version
+and the row_changes version of the tables the prompt is built from) opens
+a new scope, so answers about old data are never served; they age out
+through the per-entry TTL and the LRU bound. Embeddings are hashed word
+and character-trigram features: deterministic, local and tens of
+microseconds per message, so a miss costs nothing measurable next to the
+LLM call.
+
+Replay a query log with benchmarks/response_cache_replay.py.
+"""
+import os
+import re
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+THRESHOLD = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.9"))
+TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "900"))
+MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_SIZE", "1000"))
+
+DIM = 1024
+_TRIGRAM_WEIGHT = 0.5
+# Policy / claim numbers stay whole; other hyphenated words split ("high-risk")
+_WORD = re.compile(r"(?:comm|clm)-\d{4}-\d{3}|[a-z0-9]+")
+# Words that do not change what is being asked
+_STOPWORDS = frozenset("""
+    a about an and are can could display do does find for get give i in is it list me my
+    of on or our please show tell the to us we what which with would you
+""".split())
+# Words that do: two messages only match when they carry the same ones
+_QUALIFIERS = frozenset("""
+    this next last previous current not no without except above below over under more less
+    before after highest lowest top bottom most least
+""".split())
+
+Scope = Tuple[Hashable, ...]
+
+
+# ── Embedding ───────────────────────────────────────────────────
+
+def normalize(message: str) -> str:
+    """Lowercased content words, plural forms folded ("policies" -> "policy")."""
+    words = []
+    for w in _WORD.findall(message.lower()):
+        if w in _STOPWORDS:
+            continue
+        if w in _QUALIFIERS:
+            pass  # kept verbatim ("this" is not a plural)
+        elif len(w) > 4 and w.endswith("ies"):
+            w = w[:-3] + "y"
+        elif len(w) > 3 and w.endswith("s") and not w.endswith("ss"):
+            w = w[:-1]
+        words.append(w)
+    return " ".join(words)
+
+
+def _qualifiers(normalized: str) -> Tuple[str, ...]:
+    """Numbers and qualifier words, which must match exactly."""
+    return tuple(sorted(
+        w for w in normalized.split() if w in _QUALIFIERS or any(c.isdigit() for c in w)
+    ))
+
+
+def embed(normalized: str) -> np.ndarray:
+    """Unit vector of hashed word and character-trigram counts."""
+    vec = np.zeros(DIM, dtype=np.float32)
+    for word in normalized.split():
+        vec[zlib.crc32(word.encode()) % DIM] += 1.0
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            vec[zlib.crc32(padded[i:i + 3].encode()) % DIM] += _TRIGRAM_WEIGHT
+    norm = float(np.linalg.norm(vec))
+    return vec / norm if norm else vec
+
+
+# ── Cache ───────────────────────────────────────────────────────
+
+class Entry(NamedTuple):
+    vector: np.ndarray
+    qualifiers: Tuple[str, ...]
+    response: str
+    provider: str
+    expires_at: float
+
+
+def scope(
+    user: str, data_version: Any, intent: str, entities: Dict[str, Any], context: str = "",
+) -> Scope:
+    """Exact-match part of the cache key. `context` is the conversation turn
+    the message follows ("" for a first question), so a follow-up is only
+    answered from the same exchange."""
+    return (
+        user or "",
+        data_version,
+        intent or "",
+        tuple(sorted((k, v) for k, v in entities.items() if v)),
+        zlib.crc32(context.encode()) if context else 0,
+    )
+
+
+class ResponseCache:
+    """Process-wide LRU of LLM responses, matched by message similarity."""
+
+    _buckets: Dict[Scope, "OrderedDict[str, Entry]"] = {}
+    _lru: "OrderedDict[Tuple[Scope, str], None]" = OrderedDict()
+    _counters: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expired": 0}
+
+    @classmethod
+    def get(cls, key: Scope, message: str, now: Optional[float] = None) -> Optional[Entry]:
+        """Best live entry in the scope at or above THRESHOLD, else None."""
+        if not ENABLED:
+            return None
+        now = time.monotonic() if now is None else now
+        text = normalize(message)
+        vector, qualifiers = embed(text), _qualifiers(text)
+        bucket = cls._buckets.get(key, {})
+        best, best_text, best_score = None, None, THRESHOLD
+        for other, entry in list(bucket.items()):
+            if entry.expires_at <= now:
+                cls._drop(key, other)
+                cls._counters["expired"] += 1
+                continue
+            if entry.qualifiers != qualifiers:
+                continue
+            score = 1.0 if other == text else float(np.dot(entry.vector, vector))
+            if score >= best_score:
+                best, best_text, best_score = entry, other, score
+        if best is None:
+            cls._counters["misses"] += 1
+            return None
+        cls._counters["hits"] += 1
+        cls._lru.move_to_end((key, best_text))
+        return best
+
+    @classmethod
+    def put(
+        cls, key: Scope, message: str, response: str, provider: str, now: Optional[float] = None,
+    ):
+        if not ENABLED:
+            return
+        now = time.monotonic() if now is None else now
+        text = normalize(message)
+        cls._buckets.setdefault(key, OrderedDict())[text] = Entry(
+            embed(text), _qualifiers(text), response, provider, now + TTL_SECONDS,
+        )
+        cls._lru[(key, text)] = None
+        cls._lru.move_to_end((key, text))
+        cls._counters["stores"] += 1
+        while len(cls._lru) > MAX_ENTRIES:
+            (old_key, old_text), _ = cls._lru.popitem(last=False)
+            cls._drop(old_key, old_text)
+            cls._counters["evictions"] += 1
+
+    @classmethod
+    def _drop(cls, key: Scope, text: str):
+        bucket = cls._buckets.get(key)
+        if bucket is not None:
+            bucket.pop(text, None)
+            if not bucket:
+                del cls._buckets[key]
+        cls._lru.pop((key, text), None)
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        lookups = cls._counters["hits"] + cls._counters["misses"]
+        return {
+            "enabled": ENABLED,
+            "entries": len(cls._lru),
+            **cls._counters,
+            "hit_rate": round(cls._counters["hits"] / lookups, 4) if lookups else 0.0,
+            "threshold": THRESHOLD,
+            "ttl_seconds": TTL_SECONDS,
+            "max_entries": MAX_ENTRIES,
+        }
+
+    @classmethod
+    def clear(cls):
+        cls._buckets.clear()
+        cls._lru.clear()
+        for k in cls._counters:
+            cls._counters[k] = 0
@@ -0,0 +1,174 @@
+"""
+Risk scoring — the single source of the HIGH / MEDIUM / LOW risk ladder.
+
+Every consumer (analytics playground, chat snapshot, policies list, memo,
+geo map, quick risk check, alerts) scores through this module so the
+thresholds live in one place. Scoring is vectorized: callers pass arrays of
+per-policy aggregates and get an array of levels back, and score_book()
+aggregates a claim-level book and scores it in one pass.
+"""
+import numpy as np
+import pandas as pd
+from typing import Any, Optional, Sequence, Tuple
+
+# ── Thresholds ──────────────────────────────────────────────────
+# Section 3.1.1: 5+ claims annually require enhanced review
+HIGH_CLAIM_COUNT = 5
+# Section 4.3.2 / 4.1.1: claims exceeding $100K require senior review
+HIGH_TOTAL_CLAIMS = 100_000
+SEVERITY_THRESHOLD = 100_000
+# Section 4.2.1: aggregate claims exceeding $200K require referral
+AGGREGATE_THRESHOLD = 200_000
+MEDIUM_CLAIM_COUNT = 2
+MEDIUM_TOTAL_CLAIMS = 50_000
+# Policy view (policies list, memo) escalates on 3+ claims
+POLICY_MEDIUM_CLAIM_COUNT = 3
+# Section 5.1.x: loss ratio bands (strictly greater than)
+MODERATE_LOSS_RATIO = 50
+ADVERSE_LOSS_RATIO = 65
+
+RISK_LEVELS = ("high", "medium", "low")
+
+
+def _arr(values: Any) -> np.ndarray:
+    return np.nan_to_num(np.asarray(values, dtype=float))
+
+
+def loss_ratio(total_claims: Any, premium: Any) -> np.ndarray:
+    """Loss ratio in percent; 0 where premium is missing or non-positive."""
+    total = _arr(total_claims)
+    prem = _arr(premium)
+    out = np.zeros(np.broadcast(total, prem).shape)
+    np.divide(total * 100.0, prem, out=out, where=prem > 0)
+    return out
+
+
+def score_risk(claim_count: Any, total_claims: Any, labels: Sequence[str] = RISK_LEVELS) -> np.ndarray:
+    """Portfolio risk ladder over arrays of per-policy claim count / total.
+
+    HIGH:   5+ claims or total >= $100K
+    MEDIUM: 2+ claims or total >= $50K
+    LOW:    otherwise
+    """
+    count = _arr(claim_count)
+    total = _arr(total_claims)
+    return np.select(
+        [
+            (count >= HIGH_CLAIM_COUNT) | (total >= HIGH_TOTAL_CLAIMS),
+            (count >= MEDIUM_CLAIM_COUNT) | (total >= MEDIUM_TOTAL_CLAIMS),
+        ],
+        list(labels[:2]),
+        default=labels[2],
+    )
+
+
+def score_policy_risk(claim_count: Any, max_claim: Any, loss_ratio_pct: Any) -> np.ndarray:
+    """Policy-detail risk ladder (policies list / detail, memo).
+
+    HIGH:   single claim >= $100K or 5+ claims
+    MEDIUM: 3+ claims or loss ratio > 50%
+    LOW:    otherwise
+    """
+    count = _arr(claim_count)
+    max_amt = _arr(max_claim)
+    lr = _arr(loss_ratio_pct)
+    return np.select(
+        [
+            (max_amt >= SEVERITY_THRESHOLD) | (count >= HIGH_CLAIM_COUNT),
+            (count >= POLICY_MEDIUM_CLAIM_COUNT) | (lr > MODERATE_LOSS_RATIO),
+        ],
+        RISK_LEVELS[:2],
+        default=RISK_LEVELS[2],
+    )
+
+
+def policy_risk_sql(claim_count: str, max_claim: str, loss_ratio_pct: str) -> str:
+    """score_policy_risk() as a SQL CASE over the given column expressions
+    (for the policy_stats refresh, which runs inside the database)."""
+    high, medium, low = RISK_LEVELS
+    return (
+        f"CASE WHEN {max_claim} >= {SEVERITY_THRESHOLD} OR {claim_count} >= {HIGH_CLAIM_COUNT} THEN '{high}' "
+        f"WHEN {claim_count} >= {POLICY_MEDIUM_CLAIM_COUNT} OR {loss_ratio_pct} > {MODERATE_LOSS_RATIO} THEN '{medium}' "
+        f"ELSE '{low}' END"
+    )
+
+
+def compute_risk(claim_count: float, total_claims: float) -> str:
+    """Scalar convenience wrapper around score_risk()."""
+    return score_risk(claim_count, total_claims).item()
+
+
+def compute_policy_risk(claim_count: float, max_claim: float, loss_ratio_pct: float) -> str:
+    """Scalar convenience wrapper around score_policy_risk()."""
+    return score_policy_risk(claim_count, max_claim, loss_ratio_pct).item()
+
+
+def _factorize(policy_keys: Any, claim_amounts: Any) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Integer-code claim rows by policy; missing keys get code -1."""
+    codes, uniques = pd.factorize(np.asarray(policy_keys, dtype=object), use_na_sentinel=True)
+    return codes, np.asarray(uniques, dtype=object), _arr(claim_amounts)
+
+
+def score_claim_rows(
+    policy_keys: Any,
+    claim_amounts: Any,
+    labels: Sequence[str] = RISK_LEVELS,
+) -> np.ndarray:
+    """Risk level of each claim row's policy, broadcast back onto the rows.
+
+    Equivalent to score_book() + a per-row lookup, without the lookup: the
+    factorized codes index straight into the per-policy level array. Rows
+    with a missing key get None.
+    """
+    codes, uniques, amounts = _factorize(policy_keys, claim_amounts)
+    keep = codes >= 0
+    n = len(uniques)
+    counts = np.bincount(codes[keep], minlength=n)
+    totals = np.bincount(codes[keep], weights=amounts[keep], minlength=n)
+    levels = np.append(score_risk(counts, totals, labels).astype(object), None)
+    return levels[codes]  # code -1 picks the trailing None
+
+
+def score_book(
+    policy_keys: Any,
+    claim_amounts: Any,
+    premiums: Optional[Any] = None,
+) -> pd.DataFrame:
+    """Aggregate a claim-level book per policy and score it in one pass.
+
+    policy_keys / claim_amounts / premiums are claim-aligned arrays (one entry
+    per claim row, premium repeated per claim). Rows with a missing key are
+    ignored. Returns one row per policy, indexed by key, with claim_count,
+    total_claims, max_claim, premium, loss_ratio and risk_level.
+    """
+    codes, uniques, amounts = _factorize(policy_keys, claim_amounts)
+    keep = codes >= 0
+    codes = codes[keep]
+    amounts = amounts[keep]
+    n = len(uniques)
+
+    counts = np.bincount(codes, minlength=n)
+    totals = np.bincount(codes, weights=amounts, minlength=n)
+
+    max_claim = np.zeros(n)
+    if len(codes):
+        order = np.argsort(codes, kind="stable")
+        sorted_codes = codes[order]
+        starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+        max_claim[sorted_codes[starts]] = np.maximum.reduceat(amounts[order], starts)
+
+    prem = np.zeros(n)
+    if premiums is not None:
+        prem[codes] = _arr(premiums)[keep]
+
+    return pd.DataFrame(
+        {
+            "claim_count": counts,
+            "total_claims": totals,
+            "max_claim": max_claim,
+            "premium": prem,
+            "loss_ratio": loss_ratio(totals, prem),
+            "risk_level": score_risk(counts, totals),
+        },
+        index=pd.Index(uniques, name="policy_number"),
+    )
@@ -0,0 +1,255 @@
+"""
+Rule engine — guideline thresholds compiled into vectorized predicates.
+
+A guideline row becomes a rule when it carries a threshold binding:
+`<threshold_metric> <threshold_operator> <threshold_value>`, e.g.
+3.1.1 = `claim_count >= 5`. A guideline with a policy_number applies to that
+policy only. Rules are grouped by (metric, operator) at compile time, and
+RuleSet.evaluate() checks every group against columnar per-policy metrics
+with one broadcast comparison into an (n_rules x n_policies) match matrix,
+so a book of policies is matched against every rule in a single pass.
+Matches come back as (row, rule) index pairs; Rule.citation gives the
+guideline reference.
+
+Metrics are read from policies ⟕ policy_stats (METRICS); a missing value
+(NULL / NaN) never matches. RuleEngine caches the compiled set per process
+(TTL + explicit invalidate() from guideline writes).
+"""
+import hashlib
+import os
+import time
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Seconds before the next access recompiles from the guidelines table
+REFRESH_SECONDS = float(os.getenv("RULES_REFRESH_SECONDS", "60"))
+
+# ── Metrics ─────────────────────────────────────────────────────
+# Metric name -> SQL expression over policies p ⟕ policy_stats s
+METRICS: Dict[str, str] = {
+    "claim_count": "COALESCE(s.claim_count, 0)",
+    "total_claims": "COALESCE(s.total_claims, 0)",
+    "max_claim": "COALESCE(s.max_claim, 0)",
+    "open_claims": "COALESCE(s.open_claims, 0)",
+    "loss_ratio": "COALESCE(s.loss_ratio, 0)",
+    "premium": "p.premium",
+    "insured_value": "p.insured_value",
+    "business_credit_score": "p.business_credit_score",
+    "wildfire_risk_score": "p.wildfire_risk_score",
+    "flood_risk_score": "p.flood_risk_score",
+    # Replacement cost above insured value, in percent of insured value
+    "underinsurance_pct": (
+        "CASE WHEN p.insured_value > 0 "
+        "THEN (p.replacement_cost - p.insured_value) * 100.0 / p.insured_value END"
+    ),
+}
+
+OPERATORS = {
+    ">=": np.greater_equal,
+    ">": np.greater,
+    "<=": np.less_equal,
+    "<": np.less,
+    "=": np.equal,
+}
+
+# Bindings for the shipped guideline sections; applied by migration 10 and
+# after seed_data.py / enrich_sqlite.py insert their guidelines.
+DEFAULT_BINDINGS: Dict[str, Tuple[str, str]] = {
+    "3.1.1": ("claim_count", ">="),
+    "4.1.1": ("max_claim", ">="),
+    "4.2.1": ("total_claims", ">="),
+    "4.3.2": ("max_claim", ">="),
+    "5.1.1": ("loss_ratio", "<"),
+    "5.1.3": ("loss_ratio", ">"),
+    "6.1.1": ("insured_value", ">"),
+    "7.1.1": ("premium", ">"),
+    "8.2.3": ("wildfire_risk_score", ">"),
+    "8.4.1": ("business_credit_score", "<"),
+    "8.4.2": ("underinsurance_pct", ">"),
+    "8.5.1": ("insured_value", ">"),
+}
+
+
+def metric_select_sql() -> str:
+    """SELECT-list fragment with every metric, aliased by name."""
+    return ", ".join(f"{expr} AS {name}" for name, expr in METRICS.items())
+
+
+def bind_defaults_sql() -> str:
+    """UPDATE filling threshold_metric / threshold_operator for known sections
+    that have none yet (plain SQL, usable from sqlite3 and SQLAlchemy)."""
+    metric = " ".join(f"WHEN '{sc}' THEN '{m}'" for sc, (m, _) in DEFAULT_BINDINGS.items())
+    operator = " ".join(f"WHEN '{sc}' THEN '{op}'" for sc, (_, op) in DEFAULT_BINDINGS.items())
+    sections = ", ".join(f"'{sc}'" for sc in DEFAULT_BINDINGS)
+    return (
+        f"UPDATE guidelines SET threshold_metric = CASE section_code {metric} END, "
+        f"threshold_operator = CASE section_code {operator} END "
+        f"WHERE threshold_metric IS NULL AND threshold_value IS NOT NULL AND section_code IN ({sections})"
+    )
+
+
+def columns(rows: Sequence[Mapping[str, Any]], names: Sequence[str] = tuple(METRICS)) -> Dict[str, np.ndarray]:
+    """Row mappings -> columnar float arrays (None becomes NaN)."""
+    return {n: np.array([r[n] for r in rows], dtype=float) for n in names if rows and n in rows[0]}
+
+
+# ── Rules ───────────────────────────────────────────────────────
+
+class Rule(NamedTuple):
+    section_code: str
+    title: str
+    content: str
+    action: Optional[str]
+    metric: str
+    operator: str
+    threshold: float
+    policy_number: Optional[str] = None
+
+    @property
+    def citation(self) -> str:
+        return f"Section {self.section_code}: {self.title}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**self._asdict(), "citation": self.citation}
+
+
+class RuleSet:
+    """Compiled rules; evaluate() matches columnar metrics against all of them."""
+
+    def __init__(self, rules: Sequence[Rule]):
+        self.rules: Tuple[Rule, ...] = tuple(rules)
+        self._by_section: Dict[str, Rule] = {}
+        for r in self.rules:
+            if not r.policy_number:
+                self._by_section.setdefault(r.section_code, r)
+        groups: Dict[Tuple[str, str], List[int]] = {}
+        self._scoped: List[int] = []
+        for i, r in enumerate(self.rules):
+            if r.policy_number:
+                self._scoped.append(i)
+            else:
+                groups.setdefault((r.metric, r.operator), []).append(i)
+        self._groups = [
+            (metric, OPERATORS[op], np.array(idx), np.array([self.rules[i].threshold for i in idx], dtype=float))
+            for (metric, op), idx in groups.items()
+        ]
+        self._metrics = {r.metric for r in self.rules}
+        self.version = hashlib.sha1(repr(self.rules).encode()).hexdigest()[:12]
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def get(self, section_code: str) -> Optional[Rule]:
+        return self._by_section.get(section_code)
+
+    def threshold(self, section_code: str, default: float) -> float:
+        """Threshold of a section's (unscoped) rule, or default when unbound."""
+        rule = self._by_section.get(section_code)
+        return rule.threshold if rule is not None else default
+
+    def evaluate(
+        self,
+        metrics: Mapping[str, Any],
+        policy_numbers: Optional[Sequence[Any]] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """(row, rule) index pairs of every match, ordered by rule then row.
+
+        metrics maps metric name -> per-policy array; rules on a metric that
+        is not supplied never match. policy_numbers (row-aligned) enables
+        policy-scoped rules.
+        """
+        cols = {k: np.asarray(metrics[k], dtype=float) for k in self._metrics if k in metrics}
+        n = len(next(iter(cols.values()))) if cols else 0
+        # Rule-major so each rule's row is one contiguous write
+        hit = np.zeros((len(self.rules), n), dtype=bool)
+        with np.errstate(invalid="ignore"):
+            for metric, op, idx, thresholds in self._groups:
+                values = cols.get(metric)
+                if values is not None:
+                    hit[idx] = op(values[None, :], thresholds[:, None])
+            if self._scoped and policy_numbers is not None:
+                keys = np.asarray(policy_numbers, dtype=object)
+                for i in self._scoped:
+                    rule = self.rules[i]
+                    values = cols.get(rule.metric)
+                    if values is not None:
+                        hit[i] = (keys == rule.policy_number) & OPERATORS[rule.operator](values, rule.threshold)
+        rule_idx, row_idx = np.divmod(np.flatnonzero(hit), max(n, 1))
+        return row_idx, rule_idx
+
+    def match(self, metrics: Mapping[str, Any], policy_numbers: Optional[Sequence[Any]] = None) -> List[List[Rule]]:
+        """Matched rules per row, in rule order."""
+        n = len(next(iter(metrics.values()))) if metrics else 0
+        out: List[List[Rule]] = [[] for _ in range(n)]
+        for r, k in zip(*self.evaluate(metrics, policy_numbers)):
+            out[r].append(self.rules[k])
+        return out
+
+    def match_one(self, metrics: Mapping[str, float], policy_number: Optional[str] = None) -> Dict[str, Rule]:
+        """Matched rules for a single policy, keyed by section code."""
+        matched = self.match({k: [v] for k, v in metrics.items()}, [policy_number])
+        return {r.section_code: r for r in matched[0]} if matched else {}
+
+
+def compile_rules(rows: Sequence[Mapping[str, Any]]) -> RuleSet:
+    """Guideline rows -> RuleSet; rows without a usable binding are skipped."""
+    rules = []
+    for g in rows:
+        metric, op, value = g.get("threshold_metric"), g.get("threshold_operator"), g.get("threshold_value")
+        if metric not in METRICS or op not in OPERATORS or value is None:
+            continue
+        rules.append(Rule(
+            section_code=g["section_code"], title=g["title"] or "", content=g["content"] or "",
+            action=g.get("action"), metric=metric, operator=op, threshold=float(value),
+            policy_number=g.get("policy_number"),
+        ))
+    return RuleSet(rules)
+
+
+# ── Cache ───────────────────────────────────────────────────────
+
+_GUIDELINE_RULES = text("""
+    SELECT section_code, title, content, action, policy_number,
+           threshold_metric, threshold_operator, threshold_value
+    FROM guidelines
+    WHERE threshold_metric IS NOT NULL
+    ORDER BY section_code, id
+""")
+
+
+class RuleEngine:
+    """Process-wide compiled RuleSet, reloaded from the guidelines table."""
+
+    _rules: Optional[RuleSet] = None
+    _loaded_at: float = 0.0
+
+    @classmethod
+    async def get(cls, db: Optional[AsyncSession] = None) -> RuleSet:
+        if cls._rules is not None and not cls._needs_refresh():
+            return cls._rules
+        if db is None:
+            from database.connection import async_session
+            async with async_session() as session:
+                return await cls._load(session)
+        return await cls._load(db)
+
+    @classmethod
+    def invalidate(cls):
+        """Mark the rules stale; the next get() recompiles."""
+        cls._loaded_at = 0.0
+
+    @classmethod
+    def _needs_refresh(cls) -> bool:
+        if cls._loaded_at == 0.0:
+            return True
+        return REFRESH_SECONDS > 0 and (time.time() - cls._loaded_at) >= REFRESH_SECONDS
+
+    @classmethod
+    async def _load(cls, db: AsyncSession) -> RuleSet:
+        rows = [dict(r._mapping) for r in (await db.execute(_GUIDELINE_RULES)).fetchall()]
+        cls._rules = compile_rules(rows)
+        cls._loaded_at = time.time()
+        return cls._rules
@@ -0,0 +1,157 @@
+"""
+Trend store — precomputed daily claim time series for DataCube trend answers.
+
+Built once per AnalyticalStore version: claims are bucketed by day per
+(industry_type, claim_type, status) combination and held as cumulative-sum
+arrays. A rebuild fills new arrays and swaps them in as one tuple, so a
+concurrent reader sees either the old series or the new one. A trend at any
+granularity (day / week / month / quarter / year) with filters is then a row
+mask, one gather at the bucket boundaries and a diff — no resample over the
+claim frame per call.
+"""
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from services.analytical_store import AnalyticalStore
+
+DIMENSIONS = ("industry_type", "claim_type", "status")
+
+# granularity -> (pandas period freq, period label format)
+GRANULARITIES = {
+    "day": ("D", "%Y-%m-%d"),
+    "week": ("W-SUN", None),       # labelled by the week's Monday
+    "month": ("M", "%Y-%m"),
+    "quarter": ("Q", "%Y-Q%q"),
+    "year": ("Y", "%Y"),
+}
+
+
+class _Series(NamedTuple):
+    origin: pd.Timestamp
+    n_days: int
+    combos: pd.DataFrame        # one row per (industry, type, status)
+    cum_count: np.ndarray       # (combos, days + 1), int64
+    cum_amount: np.ndarray      # (combos, days + 1), float64
+
+
+class TrendStore:
+    """Process-wide singleton of per-combination cumulative daily series."""
+
+    _version = -1
+    _series: Optional[_Series] = None   # None: no dated claims
+    _lock = threading.Lock()
+
+    @classmethod
+    def _ensure(cls) -> Optional[_Series]:
+        version = AnalyticalStore.version()
+        if version != cls._version:
+            with cls._lock:
+                if version != cls._version:
+                    cls._series = cls._build(AnalyticalStore.frame())
+                    cls._version = version
+                    AnalyticalStore.check_budget()
+        return cls._series
+
+    @staticmethod
+    def _build(df: pd.DataFrame) -> Optional[_Series]:
+        if df.empty or "claim_date" not in df.columns:
+            return None
+        dated = df[df["claim_date"].notna()]
+        if dated.empty:
+            return None
+
+        days = dated["claim_date"].dt.normalize()
+        origin = days.min()
+        day_idx = ((days - origin).dt.days).to_numpy()
+        n_days = int(day_idx.max()) + 1
+
+        keys = pd.DataFrame({
+            d: (dated[d].astype(object) if d in dated.columns else None) for d in DIMENSIONS
+        }).fillna("Unknown")
+        groups = keys.groupby(list(DIMENSIONS), sort=True)
+        combo_idx = groups.ngroup().to_numpy()
+        combos = groups.size().index.to_frame(index=False)
+        n_combos = len(combos)
+
+        flat = combo_idx * n_days + day_idx
+        size = n_combos * n_days
+        counts = np.bincount(flat, minlength=size).reshape(n_combos, n_days)
+        amounts = np.bincount(
+            flat, weights=np.nan_to_num(dated["claim_amount"].to_numpy(dtype=float)), minlength=size
+        ).reshape(n_combos, n_days)
+
+        cum_count = np.zeros((n_combos, n_days + 1), dtype=np.int64)
+        cum_amount = np.zeros((n_combos, n_days + 1), dtype=np.float64)
+        np.cumsum(counts, axis=1, out=cum_count[:, 1:])
+        np.cumsum(amounts, axis=1, out=cum_amount[:, 1:])
+
+        return _Series(origin, n_days, combos, cum_count, cum_amount)
+
+    @classmethod
+    def values(cls, dimension: str) -> List[str]:
+        """Distinct values of a trend dimension (for question parsing)."""
+        series = cls._ensure()
+        if series is None or dimension not in series.combos.columns:
+            return []
+        return sorted(series.combos[dimension].astype(str).unique().tolist())
+
+    @classmethod
+    def nbytes(cls) -> int:
+        series = cls._series
+        if series is None:
+            return 0
+        return int(series.cum_count.nbytes + series.cum_amount.nbytes)
+
+    @classmethod
+    def series(
+        cls,
+        granularity: str = "month",
+        filters: Optional[Dict[str, Sequence[str]]] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Claim count / amount per period, zero-filled, for the filtered combos.
+
+        filters maps a dimension to the accepted values; start / end are
+        inclusive dates clipped to the data range.
+        """
+        s = cls._ensure()
+        if s is None or granularity not in GRANULARITIES:
+            return []
+
+        mask = np.ones(len(s.combos), dtype=bool)
+        for dim, accepted in (filters or {}).items():
+            if dim in s.combos.columns and accepted:
+                mask &= s.combos[dim].astype(str).isin([str(v) for v in accepted]).to_numpy()
+
+        lo = 0
+        hi = s.n_days - 1
+        if start:
+            lo = max(lo, (pd.Timestamp(start).normalize() - s.origin).days)
+        if end:
+            hi = min(hi, (pd.Timestamp(end).normalize() - s.origin).days)
+        if lo > hi or not mask.any():
+            return []
+
+        # Period boundaries as day offsets into the cumulative arrays
+        freq, fmt = GRANULARITIES[granularity]
+        first_day = s.origin + pd.Timedelta(days=lo)
+        last_day = s.origin + pd.Timedelta(days=hi)
+        periods = pd.period_range(first_day, last_day, freq=freq)
+        period_starts = periods.start_time.normalize()
+        starts = (period_starts - s.origin).days.to_numpy()
+        bounds = np.concatenate(([lo], np.clip(np.append(starts[1:], hi + 1), lo, hi + 1)))
+        labels = periods.strftime(fmt) if fmt else period_starts.strftime("%Y-%m-%d")
+
+        count = np.diff(s.cum_count[mask][:, bounds].sum(axis=0))
+        amount = np.diff(s.cum_amount[mask][:, bounds].sum(axis=0)).round(2)
+        return [
+            {granularity: label, "claim_count": c, "total_amount": a}
+            for label, c, a in zip(labels.tolist(), count.tolist(), amount.tolist())
+        ]
+
+
+AnalyticalStore.register_derived("trend", TrendStore.nbytes)
@@ -5,7 +5,7 @@ Embedding priority: AWS Bedrock Titan > OpenAI > ChromaDB default.
 import os
 import chromadb
 from chromadb.config import Settings
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 OPENAI_KEY = os.getenv("OPENAI_API_KEY", "")
 AWS_KEY = os.getenv("AWS_ACCESS_KEY_ID", "")
@@ -15,6 +15,9 @@ _client: Optional[chromadb.ClientAPI] = None
 _collection = None
 _knowledge_collection = None
 _ef_name: Optional[str] = None  # track which embedding provider is active
+# Item count per collection, refreshed whenever this process opens or writes
+# it, so status reads (routers/data.py) never touch Chroma
+_indexed: Dict[str, int] = {}
 
 
 def _get_client():
@@ -94,9 +97,24 @@ def _ensure_clean_collection(client, name: str, ef):
     with open(marker_file, "w") as f:
         f.write(current_ef)
 
+    _refresh_count(collection)
     return collection
 
 
+def _refresh_count(collection) -> None:
+    _indexed[collection.name] = collection.count()
+
+
+def indexed_counts() -> Dict[str, int]:
+    """Cached item count per collection opened by this process (empty when
+    none has been opened); never opens Chroma."""
+    return dict(_indexed)
+
+
+def embedding_provider() -> str:
+    return _ef_name or "default"
+
+
 # Lazy singleton for the embedding function
 _ef_instance = None
 _ef_initialized = False
@@ -163,6 +181,7 @@ async def index_guidelines(db_session):
         })
 
     collection.upsert(ids=ids, documents=documents, metadatas=metadatas)
+    _refresh_count(collection)
     print(f"[Vector Store] Indexed {len(ids)} guidelines into ChromaDB.")
     return len(ids)
 
@@ -232,6 +251,7 @@ async def index_claims_and_decisions(db_session) -> tuple:
 
     if ids:
         knowledge.upsert(ids=ids, documents=docs, metadatas=metas)
+        _refresh_count(knowledge)
         print(f"[Vector Store] Indexed {len(claims)} claims + {len(decisions)} decisions into knowledge base.")
     else:
         print("[Vector Store] No claim/decision text found to index.")
@@ -315,6 +335,7 @@ async def upsert_guideline(guideline) -> None:
         "policy_number": guideline.policy_number or ""
     }
     collection.upsert(ids=[doc_id], documents=[document], metadatas=[metadata])
+    _refresh_count(collection)
 
 
 # ── Document indexing (uploaded files) ────────────────────────────────────────
@@ -341,6 +362,7 @@ def index_document(doc_id: int, filename: str, file_type: str,
         "claim_number": str(claim_number or ""),
     }
     knowledge.upsert(ids=[chroma_id], documents=[doc_text], metadatas=[metadata])
+    _refresh_count(knowledge)
 
 
 async def index_documents(db_session) -> int:
@@ -377,5 +399,6 @@ async def index_documents(db_session) -> int:
         })
 
     knowledge.upsert(ids=ids, documents=docs, metadatas=metas)
+    _refresh_count(knowledge)
     print(f"[Vector Store] Indexed {len(ids)} documents into knowledge base.")
     return len(ids)
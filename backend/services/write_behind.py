@@ -0,0 +1,182 @@
+"""
+Write-behind persistence — opt-in background writer for chat writes.
+
+Enabled with CHAT_WRITE_BEHIND=true. Routes finish a unit of work with
+WriteBehind.commit(db, session_id) instead of db.commit(): the new and
+changed ORM objects (chat messages, session title / timestamp updates,
+upload document rows) move off the request session onto an in-process
+queue, and one background task writes everything waiting in a single
+transaction, so a chat response no longer waits for a disk flush.
+
+- Back-pressure: commit() waits while WRITE_BEHIND_QUEUE_SIZE units are
+  queued, so a stalled disk slows requests down instead of growing memory.
+- Read-your-writes: settled(session_id) waits for that chat session's
+  queued units (settled() for all of them); history and session list
+  reads call it first.
+- Durability: lifespan calls stop(), which drains the queue before the
+  process exits. A batch that fails is written again unit by unit, so one
+  bad unit cannot take the others down; a unit that still fails after
+  WRITE_RETRIES attempts is logged and dropped, and its `after` never runs.
+
+Disabled (the default), commit() is a plain db.commit().
+"""
+import asyncio
+import os
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.connection import async_session
+
+ENABLED = os.getenv("CHAT_WRITE_BEHIND", "false").lower() == "true"
+QUEUE_SIZE = int(os.getenv("WRITE_BEHIND_QUEUE_SIZE", "1000"))
+# Most units written per transaction
+BATCH_SIZE = 200
+WRITE_RETRIES = 3
+
+
+class Unit(NamedTuple):
+    rows: List[Any]                          # ORM objects to insert / update
+    session_id: Optional[int]                # chat session, for settled()
+    after: Optional[Callable[[], None]]      # run once the rows are committed
+
+
+class WriteBehind:
+    """Process-wide singleton owning the queue and its writer task."""
+
+    _queue: Optional["asyncio.Queue[Unit]"] = None
+    _task: Optional[asyncio.Task] = None
+    _pending: Dict[int, int] = {}
+    _settled: Optional[asyncio.Condition] = None
+
+    # ── Lifecycle ───────────────────────────────────────────────
+
+    @classmethod
+    def start(cls):
+        """Start the writer task (no-op unless CHAT_WRITE_BEHIND=true)."""
+        if not ENABLED or cls.running():
+            return
+        cls._queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        cls._settled = asyncio.Condition()
+        cls._pending = {}
+        cls._task = asyncio.create_task(cls._run())
+        print(f"[OK] Write-behind chat persistence (queue {QUEUE_SIZE})")
+
+    @classmethod
+    async def stop(cls):
+        """Write everything queued, then stop the writer task."""
+        if not cls.running():
+            return
+        await cls._queue.join()
+        cls._task.cancel()
+        cls._task = None
+        print("[OK] Write-behind queue drained")
+
+    @classmethod
+    def running(cls) -> bool:
+        return cls._task is not None and not cls._task.done()
+
+    # ── Writes ──────────────────────────────────────────────────
+
+    @classmethod
+    async def commit(
+        cls,
+        db: AsyncSession,
+        session_id: Optional[int] = None,
+        after: Optional[Callable[[], None]] = None,
+    ):
+        """Commit db's pending work, queueing its new and changed objects for
+        the writer when write-behind is running. `after` runs once they are
+        in the database."""
+        if not cls.running():
+            await db.commit()
+            if after is not None:
+                after()
+            return
+        rows = list(db.new) + list(db.dirty)
+        for row in rows:
+            db.expunge(row)
+        await db.commit()  # rows already flushed (a new chat session) commit here
+        if not rows and after is None:
+            return
+        if session_id is not None:
+            cls._pending[session_id] = cls._pending.get(session_id, 0) + 1
+        await cls._queue.put(Unit(rows, session_id, after))
+
+    @classmethod
+    async def settled(cls, session_id: Optional[int] = None):
+        """Wait until every queued write of a chat session (of every session
+        when None) is committed."""
+        def done() -> bool:
+            return not cls._pending if session_id is None else not cls._pending.get(session_id)
+
+        if cls._settled is None or done():
+            return
+        async with cls._settled:
+            await cls._settled.wait_for(done)
+
+    # ── Task ────────────────────────────────────────────────────
+
+    @classmethod
+    async def _run(cls):
+        queue = cls._queue
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < BATCH_SIZE and not queue.empty():
+                batch.append(queue.get_nowait())
+            for unit in await cls._write(batch):
+                if unit.after is not None:
+                    try:
+                        unit.after()
+                    except Exception as e:
+                        print(f"[WARN] Write-behind callback: {e}")
+            # Dropped units settle too, or their readers would wait forever
+            async with cls._settled:
+                for unit in batch:
+                    if unit.session_id is not None:
+                        left = cls._pending.get(unit.session_id, 1) - 1
+                        if left > 0:
+                            cls._pending[unit.session_id] = left
+                        else:
+                            cls._pending.pop(unit.session_id, None)
+                cls._settled.notify_all()
+            for _ in batch:
+                queue.task_done()
+
+    @classmethod
+    async def _write(cls, batch: List[Unit]) -> List[Unit]:
+        """Commit the batch; the units whose rows are in the database."""
+        if len(batch) > 1:
+            try:
+                await cls._commit(batch)
+                return batch
+            except Exception as e:
+                print(f"[WARN] Write-behind batch of {len(batch)} units failed, writing them one by one: {e}")
+        written = []
+        for unit in batch:
+            for attempt in range(1, WRITE_RETRIES + 1):
+                try:
+                    await cls._commit([unit])
+                    written.append(unit)
+                    break
+                except Exception as e:
+                    print(f"[WARN] Write-behind unit of {len(unit.rows)} rows failed (attempt {attempt}): {e}")
+                    if attempt < WRITE_RETRIES:
+                        await asyncio.sleep(0.5 * attempt)
+            else:
+                print(f"[WARN] Write-behind dropped {len(unit.rows)} rows (session {unit.session_id})")
+        return written
+
+    @staticmethod
+    async def _commit(units: List[Unit]):
+        async with async_session() as db:
+            for unit in units:
+                for row in unit.rows:
+                    # Rows loaded by a request (a renamed session) are merged:
+                    # two units may carry copies of the same one
+                    if inspect(row).key is None:
+                        db.add(row)
+                    else:
+                        await db.merge(row)
+            await db.commit()
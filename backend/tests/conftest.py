@@ -0,0 +1,212 @@
+"""
+Backend test fixtures: every test that takes `api` (or `backend`) runs once
+per database backend.
+Run from backend/ directory: python -m pytest tests
+
+DATABASE_URL is read at import time, so each backend gets its own fresh
+database, seeded by seed_data.py and served by uvicorn in a subprocess.
+SQLite always runs. PostgreSQL runs against TEST_POSTGRES_URL (a server URL
+whose user may create databases) or, without it, a throwaway local server
+from the `pgserver` package; with neither, the PostgreSQL tests are skipped.
+
+Unit tests import backend modules into the pytest process itself. Those
+read DATABASE_URL at import too, so it is pointed at a scratch SQLite file
+here, before any test module loads; the `store` fixture seeds it.
+"""
+import asyncio
+import atexit
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+
+import httpx
+import pytest
+from sqlalchemy.engine import make_url
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+UNIT_DIR = tempfile.mkdtemp(prefix="riskmind-unit-")
+atexit.register(shutil.rmtree, UNIT_DIR, True)
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(UNIT_DIR, 'riskmind.db')}"
+
+TEST_POSTGRES_URL = os.getenv("TEST_POSTGRES_URL", "")
+STARTUP_TIMEOUT = float(os.getenv("TEST_STARTUP_TIMEOUT", "120"))
+
+
+@dataclass
+class Backend:
+    name: str
+    env: Dict[str, str]
+    base_url: str
+
+
+# ── Databases ───────────────────────────────────────────────────
+
+def _postgres_server_url(tmp_dir: str) -> Optional[str]:
+    """SQLAlchemy URL of a PostgreSQL server to create the test database on."""
+    if TEST_POSTGRES_URL:
+        return TEST_POSTGRES_URL
+    try:
+        import pgserver
+    except ImportError:
+        return None
+    server = pgserver.get_server(os.path.join(tmp_dir, "pgdata"), cleanup_mode="stop")
+    url = make_url(server.get_uri())
+    return url.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+
+def _run_admin(server_url: str, statement: str) -> None:
+    import asyncpg
+
+    dsn = make_url(server_url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+    async def _execute():
+        conn = await asyncpg.connect(dsn)
+        try:
+            await conn.execute(statement)
+        finally:
+            await conn.close()
+    asyncio.run(_execute())
+
+
+def _child_env(database_url: str, tmp_dir: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": database_url,
+        "CHROMA_DIR": os.path.join(tmp_dir, "chroma_db"),
+        "PYTHONUNBUFFERED": "1",
+    })
+    # Smart mock LLM: no provider keys reach the server
+    for key in ("GOOGLE_API_KEY", "OPENAI_API_KEY", "ANTHROPIC_API_KEY", "AWS_ACCESS_KEY_ID"):
+        env[key] = ""
+    return env
+
+
+def execute(backend: "Backend", statement: str, params: Optional[dict] = None) -> None:
+    """Write to a backend's database directly, as another process would."""
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    async def _execute():
+        engine = create_async_engine(backend.env["DATABASE_URL"])
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(text(statement), params or {})
+        finally:
+            await engine.dispose()
+    asyncio.run(_execute())
+
+
+def _seed(env: Dict[str, str]) -> None:
+    result = subprocess.run(
+        [sys.executable, "seed_data.py"], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, timeout=300,
+    )
+    assert result.returncode == 0, f"seed_data.py failed:\n{result.stdout}\n{result.stderr}"
+
+
+# ── Server ──────────────────────────────────────────────────────
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def _serve(env: Dict[str, str], log_path: str) -> Iterator[str]:
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    with open(log_path, "w") as log:
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+            cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+        try:
+            deadline = time.monotonic() + STARTUP_TIMEOUT
+            while True:
+                if proc.poll() is not None:
+                    pytest.fail(f"uvicorn exited during startup:\n{open(log_path).read()}")
+                try:
+                    if httpx.get(f"{base_url}/health", timeout=2).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline:
+                    pytest.fail(f"uvicorn not ready after {STARTUP_TIMEOUT:.0f}s:\n{open(log_path).read()}")
+                time.sleep(0.5)
+            yield base_url
+        finally:
+            proc.terminate()
+            try:
+                proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+@contextmanager
+def sqlite_server(tmp_dir: str, **env: str) -> Iterator[Backend]:
+    """A freshly seeded SQLite database served by its own uvicorn process."""
+    os.makedirs(tmp_dir, exist_ok=True)
+    child = _child_env(f"sqlite+aiosqlite:///{os.path.join(tmp_dir, 'riskmind.db')}", tmp_dir)
+    child.update(env)
+    _seed(child)
+    with _serve(child, os.path.join(tmp_dir, "uvicorn.log")) as base_url:
+        yield Backend("sqlite", child, base_url)
+
+
+# ── Fixtures ────────────────────────────────────────────────────
+
+@pytest.fixture(scope="session", params=["sqlite", "postgresql"])
+def backend(request, tmp_path_factory) -> Iterator[Backend]:
+    """A seeded database and a running server for one backend."""
+    tmp_dir = str(tmp_path_factory.mktemp(request.param))
+    if request.param == "sqlite":
+        with sqlite_server(tmp_dir) as server:
+            yield server
+        return
+
+    server_url = _postgres_server_url(tmp_dir)
+    if server_url is None:
+        pytest.skip("no PostgreSQL: set TEST_POSTGRES_URL or pip install pgserver")
+    db_name = f"riskmind_test_{os.getpid()}"
+    _run_admin(server_url, f"DROP DATABASE IF EXISTS {db_name}")
+    _run_admin(server_url, f"CREATE DATABASE {db_name}")
+    database_url = make_url(server_url).set(database=db_name).render_as_string(hide_password=False)
+    env = _child_env(database_url, tmp_dir)
+    try:
+        _seed(env)
+        with _serve(env, os.path.join(tmp_dir, "uvicorn.log")) as base_url:
+            yield Backend(request.param, env, base_url)
+    finally:
+        _run_admin(server_url, f"DROP DATABASE IF EXISTS {db_name} WITH (FORCE)")
+
+
+@pytest.fixture
+def api(backend: Backend) -> Iterator[httpx.Client]:
+    with httpx.Client(base_url=backend.base_url, timeout=60) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def unit_db() -> str:
+    """DATABASE_URL of the unit tests' database, seeded on first use."""
+    _seed(_child_env(os.environ["DATABASE_URL"], UNIT_DIR))
+    return os.environ["DATABASE_URL"]
+
+
+@pytest.fixture(scope="session")
+def store(unit_db):
+    """AnalyticalStore loaded from the unit tests' seeded SQLite database."""
+    from services.analytical_store import AnalyticalStore
+
+    AnalyticalStore.reload()
+    return AnalyticalStore
@@ -0,0 +1,68 @@
+"""AnalyticsPool: shared-memory frames and worker results match in-process runs."""
+import pandas as pd
+import pytest
+
+from services import analytics_pool
+from services.analytics_pool import AnalyticsPool, AnalyticsQueryCancelled, attach_frame, publish_frame
+from services.analytics_service import run_query
+
+QUERIES = [
+    {"dimensions": ["industry_type"], "metrics": ["claim_count", "claim_amount", "loss_ratio"]},
+    {"dimensions": ["claim_year", "claim_type"], "metrics": ["avg_claim", "max_claim", "premium"],
+     "sort_by": "claim_year", "sort_dir": "asc"},
+    {"dimensions": ["policy_number"], "metrics": ["claim_amount"],
+     "filters": [{"field": "status", "op": "not_in", "values": ["Closed"]}], "limit": 5, "offset": 2},
+    {"dimensions": ["risk_level", "decision"], "metrics": ["claim_count"], "user_email": "sarah@apexuw.com"},
+]
+
+
+@pytest.fixture(scope="module")
+def pool(store):
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(analytics_pool, "WORKERS", 2)
+        AnalyticsPool.start()
+        try:
+            yield AnalyticsPool
+        finally:
+            AnalyticsPool.shutdown()
+
+
+def test_shared_frame_round_trip(store):
+    df = store.frame()
+    shm = publish_frame(df)
+    try:
+        restored = attach_frame(shm)
+        assert list(restored.columns) == list(df.columns)
+        for name in df.columns:
+            expected = df[name].astype(object).where(df[name].notna(), None)
+            actual = restored[name].astype(object).where(restored[name].notna(), None)
+            assert actual.tolist() == expected.tolist(), name
+        del restored, actual
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_pool_matches_in_process(pool, store, query):
+    assert pool.run(**query) == run_query(store.frame(), **query)
+
+
+def test_cancel_after_result_keeps_workers_usable(pool, monkeypatch):
+    finish = AnalyticsPool._finish.__func__
+
+    def late_cancel(cls, query_id):
+        assert AnalyticsPool.cancel(query_id)  # lands once the result is in
+        return finish(cls, query_id)
+
+    monkeypatch.setattr(AnalyticsPool, "_finish", classmethod(late_cancel))
+    with pytest.raises(AnalyticsQueryCancelled):
+        pool.run(query_id="late", **QUERIES[0])
+    monkeypatch.undo()
+
+    assert not pool.cancel("late")
+    for _ in range(4):
+        assert pool.run(**QUERIES[0])["rows"]
+    stats = pool.stats()
+    assert stats["workers"] == stats["idle"] == 2
+    assert all(w.process.is_alive() for w in AnalyticsPool._workers)
@@ -0,0 +1,99 @@
+"""Context assembly: budget allocation, truncation and rolling summaries."""
+import pytest
+
+from services import context_assembler
+from services.context_assembler import (
+    SHARES, ConversationSummaries, _allocate, assemble_messages, count_tokens,
+    truncate_tokens,
+)
+
+SESSION = 424242
+
+
+@pytest.fixture(autouse=True)
+def estimated_tokens(monkeypatch):
+    """Count at CHARS_PER_TOKEN so sizes are exact and nothing is downloaded."""
+    monkeypatch.setattr(context_assembler, "_encoding", None)
+    monkeypatch.setattr(context_assembler, "_encoding_loaded", True)
+    yield
+    ConversationSummaries.forget(SESSION)
+
+
+def _lines(prefix: str, n: int) -> str:
+    return "\n".join(f"{prefix} line {i:03d} " + "x" * 40 for i in range(n))
+
+
+def test_allocate_shares_and_redistributes():
+    needs = {"data": 10, "history": 10, "guidelines": 10, "knowledge": 10}
+    assert _allocate(1000, needs) == needs
+
+    big = {k: 10_000 for k in needs}
+    assert _allocate(1000, big) == {k: int(1000 * SHARES[k]) for k in needs}
+
+    # Guidelines need little: its unused slice goes to data first
+    grants = _allocate(1000, {"data": 10_000, "history": 0, "guidelines": 50, "knowledge": 10_000})
+    assert grants == {"data": 1000 - 50 - 150, "history": 0, "guidelines": 50, "knowledge": 150}
+    assert sum(grants.values()) == 1000
+
+
+def test_truncate_tokens_cuts_at_a_line():
+    text = _lines("row", 50)
+    assert truncate_tokens(text, count_tokens(text)) == text
+
+    cut = truncate_tokens(text, 100)
+    assert count_tokens(cut) <= 100
+    assert cut.endswith("…[truncated]")
+    assert cut[:-len("\n…[truncated]")] in text
+    assert cut.split("\n")[-2].endswith("x" * 40)  # whole lines only
+    assert truncate_tokens(text, 2) == ""
+
+
+def test_fits_unchanged():
+    history = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}]
+    messages, usage = assemble_messages(
+        "SYSTEM", "next question", history, data_context="data", guideline_context="rules", budget=8000,
+    )
+    assert messages[0].content == (
+        "SYSTEM\n\nRELEVANT GUIDELINES:\nrules"
+        "\n\nDATABASE CONTEXT (use this real data in your response):\ndata"
+    )
+    assert [m.content for m in messages[1:]] == ["hi", "hello", "next question"]
+    assert usage["total"] <= 8000
+
+
+def test_over_budget_truncates_and_summarises():
+    history = [
+        {"id": i + 1, "role": "user" if i % 2 == 0 else "assistant",
+         "content": f"turn {i} about COMM-2024-{i:03d} " + "y" * 400}
+        for i in range(20)
+    ]
+    budget = 2000
+    messages, usage = assemble_messages(
+        "SYSTEM", "latest", history,
+        data_context=_lines("data", 200), guideline_context=_lines("rule", 200),
+        knowledge_context=_lines("case", 200), session_id=SESSION, budget=budget,
+    )
+    assert usage["total"] <= budget
+    system = messages[0].content
+    assert system.count("…[truncated]") == 3
+    # Newest turns verbatim, the rest folded into the summary with their entities
+    kept = [m.content for m in messages[1:-1]]
+    assert kept and kept == [m["content"] for m in history[-len(kept):]]
+    assert "EARLIER IN THIS CONVERSATION (summary):" in system
+    assert "COMM-2024-000" in system.split("Referenced: ")[1]
+    assert messages[-1].content == "latest"
+
+    # The session summary is kept and sent on the next call too
+    assert ConversationSummaries.get(SESSION).through_id == len(history) - len(kept)
+    messages, _ = assemble_messages("SYSTEM", "again", history[-2:], session_id=SESSION, budget=budget)
+    assert "EARLIER IN THIS CONVERSATION (summary):" in messages[0].content
+
+
+def test_fold_resumes_from_cached_summary():
+    older = [{"id": i, "role": "user", "content": f"ask about CLM-2024-{i:03d}"} for i in range(1, 9)]
+    ConversationSummaries.fold(SESSION, older[:5])
+    resumed = ConversationSummaries.fold(SESSION, older)
+    ConversationSummaries.forget(SESSION)
+    assert resumed == ConversationSummaries.fold(SESSION, older)
+    assert resumed.through_id == 8
+    assert resumed.entities == [f"CLM-2024-{i:03d}" for i in range(1, 9)]
@@ -0,0 +1,45 @@
+"""Every QUERY_LIBRARY statement executes on each database backend."""
+import subprocess
+import sys
+
+from conftest import BACKEND_DIR
+
+# The library renders its dialect fragments at import time, so it runs in a
+# child process with the backend's DATABASE_URL.
+_RUN_ALL = r"""
+import asyncio, re
+from sqlalchemy import text
+from database.connection import engine
+from services.query_library import QUERY_LIBRARY
+
+_PARAM = re.compile(r"(?<![:\w]):([A-Za-z_]\w*)")
+SAMPLE = {
+    "policy_number": "COMM-2024-001", "claim_number": "CLM-2024-001",
+    "industry": "Manufacturing", "industry_type": "Manufacturing", "state": "FL",
+    "email": "sarah@apexuw.com", "min_amount": 1000, "threshold": 1000,
+    "year": "2024", "days": 30, "limit": 5,
+}
+
+async def main():
+    failed = 0
+    for qid, entry in QUERY_LIBRARY.items():
+        params = {n: SAMPLE.get(n, "x") for n in _PARAM.findall(entry["sql"])}
+        async with engine.connect() as conn:
+            try:
+                await conn.execute(text(entry["sql"]), params)
+            except Exception as e:
+                failed += 1
+                print(f"{qid}: {str(getattr(e, 'orig', e)).splitlines()[0]}")
+    await engine.dispose()
+    raise SystemExit(1 if failed else 0)
+
+asyncio.run(main())
+"""
+
+
+def test_query_library_executes(backend):
+    result = subprocess.run(
+        [sys.executable, "-c", _RUN_ALL], cwd=BACKEND_DIR, env=backend.env,
+        capture_output=True, text=True, timeout=300,
+    )
+    assert result.returncode == 0, f"{result.stdout}\n{result.stderr}"
@@ -0,0 +1,186 @@
+"""
+Query-plan regression check: EXPLAIN QUERY PLAN on every SQL literal in
+routers/, services/ and database/ and on every QUERY_LIBRARY statement,
+against a freshly seeded SQLite database at the latest schema version.
+
+A query fails when a large table is read in a way that grows with the table
+on every execution:
+  - a full scan of a large table inside a nested loop or correlated subquery
+  - an AUTOMATIC (per-query temporary) index built on a large table
+  - a LIMIT query that sorts a full scan of a large table's rows in a temp
+    B-tree (top-N by a column that should be indexed)
+Outer-loop scans are allowed: whole-book aggregates read every row anyway.
+Literals that don't prepare on their own (dynamic SQL fragments, trigger
+bodies) are skipped.
+"""
+import ast
+import glob
+import json
+import os
+import re
+import sqlite3
+import subprocess
+import sys
+from typing import Dict, Iterator, List, Tuple
+
+import pytest
+
+from conftest import BACKEND_DIR, _child_env, _seed
+
+SOURCE_DIRS = ("routers", "services", "database")
+
+# Tables that grow with the book / with usage
+LARGE_TABLES = {
+    "policies", "claims", "decisions", "chat_messages", "chat_sessions", "documents",
+    "alerts", "alert_events", "row_changes",
+}
+
+_SQL_START = re.compile(r"\s*(SELECT|WITH|UPDATE|DELETE|INSERT)\b")
+_PARAM = re.compile(r"(?<![:\w]):([A-Za-z_]\w*)")
+_TABLE_REF = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+_LOOP = re.compile(r"(SCAN|SEARCH) (?:TABLE )?(\w+)(.*)")
+_KEYWORDS = {
+    "where", "on", "left", "right", "inner", "outer", "cross", "join", "group", "order",
+    "limit", "having", "union", "natural", "using", "as", "set", "window",
+}
+
+# The library renders its dialect fragments at import time, so it is read
+# in a child process with the test database's DATABASE_URL.
+_DUMP_LIBRARY = r"""
+import json
+from services.query_library import QUERY_LIBRARY
+print(json.dumps({qid: e["sql"] for qid, e in QUERY_LIBRARY.items() if e.get("sql")}))
+"""
+
+
+# ── SQL discovery ───────────────────────────────────────────────
+
+def _source_sql() -> Iterator[Tuple[str, List[str]]]:
+    """(location, candidate renderings) for each SQL literal in SOURCE_DIRS."""
+    paths = [p for d in SOURCE_DIRS for p in sorted(glob.glob(os.path.join(BACKEND_DIR, d, "*.py")))]
+    for path in paths:
+        tree = ast.parse(open(path, encoding="utf-8").read())
+        rel = os.path.relpath(path, BACKEND_DIR)
+        inside_fstring = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.JoinedStr):
+                inside_fstring.update(id(v) for v in node.values)
+                # Interpolated fragments: try bind parameters, then nothing
+                as_params, as_empty = [], []
+                for i, v in enumerate(node.values):
+                    if isinstance(v, ast.Constant):
+                        as_params.append(str(v.value))
+                        as_empty.append(str(v.value))
+                    else:
+                        as_params.append(f":_f{i}")
+                if _SQL_START.match(as_params[0] if as_params else ""):
+                    yield f"{rel}:{node.lineno}", ["".join(as_params), "".join(as_empty)]
+        for node in ast.walk(tree):
+            if (isinstance(node, ast.Constant) and isinstance(node.value, str)
+                    and id(node) not in inside_fstring and _SQL_START.match(node.value)):
+                yield f"{rel}:{node.lineno}", [node.value]
+
+
+def _library_sql(env: Dict[str, str]) -> Iterator[Tuple[str, List[str]]]:
+    result = subprocess.run(
+        [sys.executable, "-c", _DUMP_LIBRARY], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, timeout=300,
+    )
+    assert result.returncode == 0, result.stderr
+    for qid, sql in json.loads(result.stdout.strip().splitlines()[-1]).items():
+        yield f"QUERY_LIBRARY[{qid}]", [sql]
+
+
+# ── Plan analysis ───────────────────────────────────────────────
+
+def _aliases(sql: str) -> Dict[str, str]:
+    out = {}
+    for table, alias in _TABLE_REF.findall(sql):
+        out[table.lower()] = table.lower()
+        if alias and alias.lower() not in _KEYWORDS:
+            out[alias.lower()] = table.lower()
+    return out
+
+
+def _explain(conn: sqlite3.Connection, sql: str) -> List[Tuple[int, int, str]]:
+    params = {name: None for name in _PARAM.findall(sql)}
+    return [(r[0], r[1], r[3]) for r in conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()]
+
+
+def _problems(plan: List[Tuple[int, int, str]], sql: str) -> List[str]:
+    aliases = _aliases(sql)
+    details = {node: (parent, detail) for node, parent, detail in plan}
+    loops_seen = set()
+    full_scans, problems = [], []
+
+    def correlated(parent: int) -> bool:
+        while parent in details:
+            parent, detail = details[parent]
+            if detail.startswith("CORRELATED"):
+                return True
+        return False
+
+    for node, parent, detail in plan:
+        m = _LOOP.match(detail)
+        if not m:
+            continue
+        kind, name, rest = m.groups()
+        outer = parent not in loops_seen
+        loops_seen.add(parent)
+        table = aliases.get(name.lower(), name.lower())
+        if table not in LARGE_TABLES:
+            continue
+        if "AUTOMATIC" in rest:
+            problems.append(f"automatic index on {table}: {detail}")
+        elif kind == "SCAN":
+            if not outer or correlated(parent):
+                problems.append(f"nested full scan of {table}: {detail}")
+            elif "INDEX" not in rest:
+                full_scans.append(table)
+
+    sorts = any("USE TEMP B-TREE FOR ORDER BY" in d for _, _, d in plan)
+    # Sorting groups / aggregates can't use an index; sorting raw rows can
+    grouped = re.search(r"\bGROUP\s+BY\b", sql, re.IGNORECASE)
+    if sorts and full_scans and not grouped and re.search(r"\bLIMIT\b", sql, re.IGNORECASE):
+        problems.append(f"LIMIT query sorts a full scan of {', '.join(sorted(set(full_scans)))}")
+    return problems
+
+
+# ── Tests ───────────────────────────────────────────────────────
+
+@pytest.fixture(scope="module")
+def plan_db(tmp_path_factory):
+    """Seeded SQLite database: (child env, open connection)."""
+    tmp_dir = str(tmp_path_factory.mktemp("plans"))
+    env = _child_env(f"sqlite+aiosqlite:///{os.path.join(tmp_dir, 'riskmind.db')}", tmp_dir)
+    _seed(env)
+    conn = sqlite3.connect(os.path.join(tmp_dir, "riskmind.db"))
+    yield env, conn
+    conn.close()
+
+
+def _check(conn: sqlite3.Connection, statements: Iterator[Tuple[str, List[str]]]) -> Tuple[int, List[str]]:
+    """(queries planned, failure lines)."""
+    checked, failed = 0, []
+    for location, renderings in statements:
+        plan = None
+        for sql in renderings:
+            try:
+                plan = _explain(conn, sql)
+                break
+            except sqlite3.Error:
+                continue
+        if plan is None:
+            continue
+        checked += 1
+        failed += [f"{location}: {p}" for p in _problems(plan, sql)]
+    return checked, failed
+
+
+@pytest.mark.parametrize("source", ["code", "library"])
+def test_query_plans(plan_db, source):
+    env, conn = plan_db
+    statements = _source_sql() if source == "code" else _library_sql(env)
+    checked, failed = _check(conn, statements)
+    assert checked, "no SQL found to plan"
+    assert not failed, "\n".join(failed)
@@ -0,0 +1,76 @@
+"""Semantic response cache: similarity, qualifier and scope matching, TTL / LRU."""
+import pytest
+
+from services import response_cache
+from services.response_cache import ResponseCache, normalize, scope
+
+KEY = scope("sarah@apexuw.com", 7, "portfolio", {"industry": "Manufacturing"})
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    monkeypatch.setattr(response_cache, "ENABLED", True)
+    ResponseCache.clear()
+    yield ResponseCache
+    ResponseCache.clear()
+
+
+def _hit(key, message, now=0.0):
+    entry = ResponseCache.get(key, message, now=now)
+    return entry.response if entry else None
+
+
+def test_near_identical_questions_share_an_answer():
+    ResponseCache.put(KEY, "Which policies are high risk?", "answer", "mock", now=0.0)
+    assert normalize("Show me the high risk policies") == normalize("high risk policy")
+    assert _hit(KEY, "show high risk policies") == "answer"
+    assert _hit(KEY, "Which claims are open?") is None
+
+
+@pytest.mark.parametrize("stored, asked", [
+    ("top 5 policies by premium", "top 10 policies by premium"),
+    ("claims this month", "claims next month"),
+    ("policies with claims", "policies without claims"),
+    ("policies above 100000 premium", "policies below 100000 premium"),
+    ("claims in 2023", "claims in 2024"),
+])
+def test_qualifiers_and_numbers_must_match(stored, asked):
+    ResponseCache.put(KEY, stored, "stored", "mock", now=0.0)
+    assert _hit(KEY, stored) == "stored"
+    assert _hit(KEY, asked) is None
+
+
+def test_scope_is_exact():
+    ResponseCache.put(KEY, "high risk policies", "answer", "mock", now=0.0)
+    others = [
+        scope("james@apexuw.com", 7, "portfolio", {"industry": "Manufacturing"}),
+        scope("sarah@apexuw.com", 8, "portfolio", {"industry": "Manufacturing"}),   # new data version
+        scope("sarah@apexuw.com", 7, "policy", {"industry": "Manufacturing"}),
+        scope("sarah@apexuw.com", 7, "portfolio", {"industry": "Restaurant"}),
+        scope("sarah@apexuw.com", 7, "portfolio", {"industry": "Manufacturing"}, context="earlier turn"),
+    ]
+    assert all(_hit(k, "high risk policies") is None for k in others)
+    # Empty entity values and their order do not change the scope
+    same = scope("sarah@apexuw.com", 7, "portfolio", {"policy": None, "industry": "Manufacturing"})
+    assert _hit(same, "high risk policies") == "answer"
+
+
+def test_ttl_and_lru_bound(monkeypatch):
+    monkeypatch.setattr(response_cache, "MAX_ENTRIES", 3)
+    ResponseCache.put(KEY, "open claims", "old", "mock", now=0.0)
+    assert _hit(KEY, "open claims", now=response_cache.TTL_SECONDS + 1) is None
+    assert ResponseCache.stats()["expired"] == 1
+
+    for i, topic in enumerate(["premium", "loss ratio", "claim type"]):
+        ResponseCache.put(KEY, f"{topic} by industry", topic, "mock", now=float(i))
+    assert _hit(KEY, "premium by industry", now=3.0) == "premium"  # now most recent
+    ResponseCache.put(KEY, "decisions by industry", "decisions", "mock", now=4.0)
+    assert _hit(KEY, "loss ratio by industry", now=5.0) is None  # least recent, evicted
+    assert _hit(KEY, "premium by industry", now=5.0) == "premium"
+    assert ResponseCache.stats()["entries"] == 3
+
+
+def test_disabled(monkeypatch):
+    monkeypatch.setattr(response_cache, "ENABLED", False)
+    ResponseCache.put(KEY, "high risk policies", "answer", "mock", now=0.0)
+    assert _hit(KEY, "high risk policies") is None
@@ -0,0 +1,73 @@
+"""Risk ladders at their thresholds, and the vectorized book / row scoring."""
+import sqlite3
+
+import numpy as np
+import pytest
+
+from services.risk_scoring import (
+    compute_policy_risk, compute_risk, loss_ratio, policy_risk_sql, score_book, score_claim_rows,
+    score_policy_risk, score_risk,
+)
+
+
+@pytest.mark.parametrize("count, total, level", [
+    (0, 0, "low"),
+    (1, 49_999, "low"),
+    (2, 0, "medium"),
+    (1, 50_000, "medium"),
+    (4, 99_999.99, "medium"),
+    (5, 0, "high"),
+    (0, 100_000, "high"),
+])
+def test_portfolio_ladder(count, total, level):
+    assert compute_risk(count, total) == level
+
+
+@pytest.mark.parametrize("count, max_claim, lr, level", [
+    (2, 99_999, 50, "low"),         # loss ratio band is strictly greater than
+    (2, 0, 50.1, "medium"),
+    (3, 0, 0, "medium"),
+    (5, 0, 0, "high"),
+    (1, 100_000, 0, "high"),
+])
+def test_policy_ladder(count, max_claim, lr, level):
+    assert compute_policy_risk(count, max_claim, lr) == level
+
+
+def test_policy_ladder_sql_matches_python():
+    cases = [(c, m, lr) for c in (0, 2, 3, 5) for m in (0, 99_999, 100_000) for lr in (0, 50, 50.5)]
+    conn = sqlite3.connect(":memory:")
+    sql = policy_risk_sql(":count", ":max_claim", ":lr")
+    in_db = [conn.execute(f"SELECT {sql}", {"count": c, "max_claim": m, "lr": lr}).fetchone()[0]
+             for c, m, lr in cases]
+    counts, maxes, lrs = zip(*cases)
+    assert in_db == score_policy_risk(counts, maxes, lrs).tolist()
+
+
+def test_labels_and_missing_values():
+    assert score_risk([5, 2, np.nan], [0, 0, np.nan], labels=("HIGH", "MEDIUM", "LOW")).tolist() == [
+        "HIGH", "MEDIUM", "LOW",
+    ]
+    assert loss_ratio([50, 10, 10], [100, 0, np.nan]).tolist() == [50.0, 0.0, 0.0]
+
+
+def test_score_claim_rows_broadcasts_policy_level():
+    keys = ["A", "B", "A", None, "C", "A"]
+    amounts = [10_000, 60_000, 5_000, 1_000_000, 1_000, 1_000]
+    # A: 3 claims / $16K -> medium; B: $60K -> medium; C: 1 claim -> low
+    assert score_claim_rows(keys, amounts).tolist() == ["medium", "medium", "medium", None, "low", "medium"]
+
+
+def test_score_book():
+    book = score_book(
+        ["A", "B", "A", None, "B"],
+        [40_000, 120_000, 70_000, 999_999, 1_000],
+        [100_000, 200_000, 100_000, 0, 200_000],
+    )
+    assert book.index.tolist() == ["A", "B"]
+    assert book["claim_count"].tolist() == [2, 2]
+    assert book["total_claims"].tolist() == [110_000, 121_000]
+    assert book["max_claim"].tolist() == [70_000, 120_000]
+    assert book["premium"].tolist() == [100_000, 200_000]
+    assert book["loss_ratio"].tolist() == [110.0, 60.5]
+    assert book["risk_level"].tolist() == ["high", "high"]
@@ -0,0 +1,205 @@
+"""Router smoke tests, run once per database backend (see conftest.py)."""
+import time
+
+import pytest
+
+from conftest import execute
+
+POLICY = "COMM-2024-001"
+
+
+def test_health(api, backend):
+    assert api.get("/health").json()["status"] == "healthy"
+
+
+def test_data_status(api, backend):
+    r = api.get("/api/data/status")
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["status"] == "connected", body
+    assert body["database"] == {"sqlite": "SQLite", "postgresql": "PostgreSQL"}[backend.name]
+    assert all(t["rows"] > 0 for t in body["tables"] if t["table"] in ("policies", "claims"))
+
+
+def test_login(api):
+    r = api.post("/api/auth/login", json={"email": "sarah@apexuw.com", "password": "sarah123"})
+    assert r.status_code == 200, r.text
+    assert r.json()["role"] == "senior_underwriter"
+    assert api.post("/api/auth/login", json={"email": "sarah@apexuw.com", "password": "x"}).status_code == 401
+
+
+def test_dashboard(api):
+    r = api.get("/api/dashboard/data")
+    assert r.status_code == 200, r.text
+
+
+def test_policies(api):
+    r = api.get("/api/policies/")
+    assert r.status_code == 200, r.text
+    numbers = [p["policy_number"] for p in r.json()]
+    assert POLICY in numbers
+
+    r = api.get(f"/api/policies/{POLICY}")
+    assert r.status_code == 200, r.text
+    assert r.json()["policy_number"] == POLICY
+
+    r = api.post("/api/policies/batch", json={"policy_numbers": [POLICY, "NOPE-1"]})
+    assert r.status_code == 200, r.text
+    assert [p["policy_number"] for p in r.json()] == [POLICY]
+
+    assert api.get("/api/policies/NOPE-1").status_code == 404
+
+
+def test_claims(api):
+    r = api.get("/api/claims/")
+    assert r.status_code == 200, r.text
+    assert r.json()
+
+    r = api.get(f"/api/claims/policy/{POLICY}")
+    assert r.status_code == 200, r.text
+    assert len({c["policy_id"] for c in r.json()}) == 1
+
+    assert api.get(f"/api/claims/summary/{POLICY}").status_code == 200
+
+
+def test_decisions(api):
+    r = api.post("/api/decisions/", json={
+        "policy_number": POLICY, "decision": "refer", "reason": "test", "risk_level": "medium",
+    })
+    assert r.status_code == 200, r.text
+    r = api.get(f"/api/decisions/{POLICY}")
+    assert r.status_code == 200, r.text
+    assert any(d["reason"] == "test" for d in r.json())
+
+
+def test_guidelines(api):
+    r = api.get("/api/guidelines/")
+    assert r.status_code == 200, r.text
+    assert api.get("/api/guidelines/search", params={"query": "claims"}).status_code == 200
+    assert api.get("/api/guidelines/rules").status_code == 200
+
+
+def test_alerts(api):
+    r = api.get("/api/alerts/")
+    assert r.status_code == 200, r.text
+    assert api.get("/api/alerts/summary").status_code == 200
+
+
+def test_alert_stream_replay(api):
+    """Reconnecting from cursor 0 replays the events stored at startup."""
+    fields = {}
+    with api.stream("GET", "/api/alerts/stream", params={"cursor": 0}) as r:
+        assert r.status_code == 200
+        for line in r.iter_lines():
+            key, _, value = line.partition(": ")
+            fields[key] = value
+            if key == "data":
+                break
+    assert fields["event"] in ("created", "updated", "resolved", "reset")
+    assert int(fields["id"]) > 0
+
+
+def test_dashboard_etag_follows_joined_policies(api, backend):
+    r = api.get("/api/dashboard/data", params={"tables": "claims"})
+    assert r.status_code == 200, r.text
+    etag = r.headers["etag"]
+    assert api.get("/api/dashboard/data", params={"tables": "claims"},
+                   headers={"If-None-Match": etag}).status_code == 304
+
+    rename = "UPDATE policies SET policyholder_name = :name WHERE policy_number = :number"
+    execute(backend, rename, {"name": "Renamed Holder", "number": POLICY})
+    try:
+        r = api.get("/api/dashboard/data", params={"tables": "claims"}, headers={"If-None-Match": etag})
+        assert r.status_code == 200, r.text
+        names = {c["policyholder_name"] for c in r.json()["claims"] if c["policy_number"] == POLICY}
+        assert names == {"Renamed Holder"}
+    finally:
+        execute(backend, rename, {"name": "ABC Manufacturing Inc", "number": POLICY})
+
+
+def test_memo_and_analysis(api):
+    assert api.get(f"/api/memo/{POLICY}").status_code == 200
+    assert api.get(f"/api/analysis/quick/{POLICY}").status_code == 200
+
+
+def test_analytics(api):
+    meta = api.get("/api/analytics/meta")
+    assert meta.status_code == 200, meta.text
+    r = api.post("/api/analytics/query", json={
+        "dimensions": ["industry_type"], "metrics": ["claim_count"],
+    })
+    assert r.status_code == 200, r.text
+    assert r.json()["rows"]
+    assert api.get("/api/analytics/trend", params={"granularity": "year"}).status_code == 200
+
+
+def test_trend_date_range(api):
+    r = api.get("/api/analytics/trend", params={"granularity": "year", "start": "2024-01-01", "end": "2024-12-31"})
+    assert r.status_code == 200, r.text
+    assert [row["year"] for row in r.json()["analysis_object"]["dimensions"]["rows"]] == ["2024"]
+    assert api.get("/api/analytics/trend", params={"start": "nope"}).status_code == 422
+    assert api.get("/api/analytics/trend", params={"end": "2024-13-01"}).status_code == 422
+
+
+def test_analytical_store_reads_configured_database(api):
+    tables = {t["table"]: t["rows"] for t in api.get("/api/data/status").json()["tables"]}
+    store = api.get("/api/analytics/store")
+    assert store.status_code == 200, store.text
+    assert store.json()["claim_rows"] == tables["claims"]
+    assert store.json()["policies"] == tables["policies"]
+
+
+def test_analytical_store_follows_out_of_band_writes(api, backend):
+    before = api.get("/api/analytics/store").json()
+    # A write that no router sees (seed / enrich scripts, another process)
+    rename = "UPDATE policies SET policyholder_name = :name WHERE policy_number = :number"
+    execute(backend, rename, {"name": "Renamed Holder", "number": POLICY})
+    try:
+        deadline = time.time() + 15
+        while (after := api.get("/api/analytics/store").json())["version"] == before["version"]:
+            assert time.time() < deadline, "store never reloaded"
+            time.sleep(0.3)
+        assert after["change_seq"] > (before["change_seq"] or 0)
+    finally:
+        execute(backend, rename, {"name": "ABC Manufacturing Inc", "number": POLICY})
+
+
+def test_analytical_store_budget_counts_trend(api):
+    assert api.get("/api/analytics/trend", params={"granularity": "month"}).status_code == 200
+    store = api.get("/api/analytics/store").json()
+    assert "trend" in store["derived_mb"]
+    assert store["memory_mb"] >= store["frames_mb"]
+
+
+def test_canned_trend(api):
+    r = api.get("/api/analytics/canned", params={"q": "claims by year from 2023 to 2024"})
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert "2023-01-01 to 2024-12-31" in body["analysis_text"]
+    assert all("2023" <= row["year"] <= "2024" for row in body["analysis_object"]["dimensions"]["rows"])
+    # Loss ratio is not a claims series
+    assert api.get("/api/analytics/canned", params={"q": "loss ratio by year"}).status_code == 404
+
+
+@pytest.mark.parametrize("message", [
+    "How many policies do we have?",
+    f"Tell me about policy {POLICY}",
+    "Show claims by type",
+    "What is the loss ratio by industry?",
+])
+def test_chat(api, message):
+    r = api.post("/api/chat/", json={"message": message, "user_email": "sarah@apexuw.com"})
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["response"]
+
+    sessions = api.get("/api/chat/sessions", params={"user_email": "sarah@apexuw.com"})
+    assert sessions.status_code == 200, sessions.text
+    session_id = body.get("session_id") or sessions.json()[0]["id"]
+    history = api.get(f"/api/chat/sessions/{session_id}")
+    assert history.status_code == 200, history.text
+    assert any(m["content"] == message for m in history.json())
+
+
+def test_geo(api):
+    assert api.get("/api/chat/geo/policies").status_code == 200
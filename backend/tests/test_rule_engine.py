@@ -0,0 +1,95 @@
+"""RuleSet compilation and vectorized evaluation against per-row checks."""
+import operator
+
+import numpy as np
+import pytest
+
+from services.rule_engine import compile_rules
+
+_OPS = {">=": operator.ge, ">": operator.gt, "<=": operator.le, "<": operator.lt, "=": operator.eq}
+
+
+def _row(section, metric, op, value, policy_number=None, title="t"):
+    return {
+        "section_code": section, "title": title, "content": "", "action": "refer",
+        "threshold_metric": metric, "threshold_operator": op, "threshold_value": value,
+        "policy_number": policy_number,
+    }
+
+
+GUIDELINES = [
+    _row("3.1.1", "claim_count", ">=", 5, title="Claim Frequency"),
+    _row("3.1.2", "claim_count", ">=", 3),
+    _row("4.1.1", "max_claim", ">=", 100_000),
+    _row("5.1.1", "loss_ratio", "<", 40),
+    _row("5.1.3", "loss_ratio", ">", 65),
+    _row("8.4.1", "business_credit_score", "<", 600),
+    _row("9.9.9", "claim_count", "=", 2, policy_number="P2"),
+]
+
+
+@pytest.fixture
+def rules():
+    return compile_rules(GUIDELINES)
+
+
+def test_compile_skips_unbound_rows(rules):
+    rows = GUIDELINES + [
+        _row("1.0.0", None, ">=", 1),
+        _row("1.0.1", "no_such_metric", ">=", 1),
+        _row("1.0.2", "claim_count", "!=", 1),
+        _row("1.0.3", "claim_count", ">=", None),
+    ]
+    assert len(compile_rules(rows)) == len(rules) == len(GUIDELINES)
+    assert rules.get("3.1.1").citation == "Section 3.1.1: Claim Frequency"
+    assert rules.threshold("4.1.1", 0) == 100_000
+    assert rules.threshold("4.2.1", 200_000) == 200_000
+    # Policy-scoped rules are not the section's general threshold
+    assert rules.get("9.9.9") is None
+
+
+def test_evaluate_matches_scalar_checks(rules):
+    rng = np.random.default_rng(7)
+    n = 200
+    metrics = {
+        "claim_count": rng.integers(0, 8, n).astype(float),
+        "max_claim": rng.choice([0, 50_000, 100_000, 250_000], n).astype(float),
+        "loss_ratio": rng.uniform(0, 100, n),
+        "business_credit_score": rng.uniform(400, 800, n),
+    }
+    metrics["business_credit_score"][::7] = np.nan
+    keys = rng.choice(["P1", "P2", "P3"], n)
+
+    expected = []
+    for k, rule in enumerate(rules.rules):
+        for r in range(n):
+            value = metrics[rule.metric][r]
+            scoped_ok = rule.policy_number is None or keys[r] == rule.policy_number
+            if scoped_ok and not np.isnan(value) and _OPS[rule.operator](value, rule.threshold):
+                expected.append((r, k))
+
+    rows, ks = rules.evaluate(metrics, keys)
+    assert list(zip(rows.tolist(), ks.tolist())) == expected  # rule-major, rows ascending
+
+
+def test_missing_metric_nan_and_scope_never_match(rules):
+    # No loss_ratio column: the loss ratio rules cannot fire
+    matched = rules.match({"claim_count": [5, 2, 2], "business_credit_score": [np.nan, 500, 700]},
+                          ["P1", "P2", None])
+    assert [[r.section_code for r in row] for row in matched] == [
+        ["3.1.1", "3.1.2"],
+        ["8.4.1", "9.9.9"],
+        [],
+    ]
+    # Scoped rules need row-aligned policy numbers
+    rows, _ = rules.evaluate({"claim_count": [2]})
+    assert rows.tolist() == []
+
+
+def test_match_one_and_version(rules):
+    hit = rules.match_one({"claim_count": 6, "max_claim": 120_000, "loss_ratio": 70}, "P1")
+    assert sorted(hit) == ["3.1.1", "3.1.2", "4.1.1", "5.1.3"]
+
+    assert compile_rules(GUIDELINES).version == rules.version
+    changed = [dict(g, threshold_value=6) if g["section_code"] == "3.1.1" else g for g in GUIDELINES]
+    assert compile_rules(changed).version != rules.version
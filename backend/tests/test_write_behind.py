@@ -0,0 +1,138 @@
+"""Write-behind chat persistence: same rows as synchronous commits, and a
+failing unit neither drops its batch-mates nor blocks settled()."""
+import asyncio
+import os
+
+import httpx
+
+from conftest import BACKEND_DIR, sqlite_server
+from services import write_behind
+from services.write_behind import WriteBehind
+
+USER = "sarah@apexuw.com"
+PDF = os.path.join(os.path.dirname(BACKEND_DIR), "docs", "test-data", "Eagle_Transport_Inspection_Report_2024.pdf")
+
+
+# ── Against the synchronous path ────────────────────────────────
+
+def _converse(base_url: str) -> dict:
+    """Run one chat script and return everything a client can read back,
+    with database ids replaced by first-seen order."""
+    seen = {}
+
+    def local(sid):
+        return seen.setdefault(sid, len(seen))
+
+    transcript = []
+    with httpx.Client(base_url=base_url, timeout=60) as api:
+        sid = None
+        for message, new_session in [
+            ("How many policies do we have?", True),
+            ("Tell me about policy COMM-2024-001", False),
+            ("Show claims by type", True),
+            ("What is the loss ratio by industry?", False),
+        ]:
+            r = api.post("/api/chat/", json={
+                "message": message, "user_email": USER, "session_id": None if new_session else sid,
+            })
+            assert r.status_code == 200, r.text
+            sid = r.json()["session_id"]
+            # Read-your-writes: the turn is visible at once
+            history = api.get(f"/api/chat/sessions/{sid}").json()
+            transcript.append((local(sid), [(m["role"], m["content"]) for m in history]))
+
+        with open(PDF, "rb") as f:
+            r = api.post("/api/chat/upload", files={"file": ("report.pdf", f, "application/pdf")},
+                         data={"session_id": str(sid), "user_email": USER})
+        assert r.status_code == 200, r.text
+        assert r.json()["session_id"] == sid
+
+        sessions = api.get("/api/chat/sessions", params={"user_email": USER}).json()
+        tables = api.get("/api/dashboard/data",
+                         params={"tables": "chat_sessions,chat_messages,documents"}).json()
+    return {
+        "transcript": transcript,
+        "sessions": sorted((local(s["id"]), s["title"], s.get("message_count")) for s in sessions),
+        "chat_sessions": sorted((local(s["id"]), s["user_email"], s["title"]) for s in tables["chat_sessions"]),
+        "chat_messages": sorted(
+            (local(m["session_id"]), m["role"], m["content"], m["sources"])
+            for m in tables["chat_messages"]
+        ),
+        "documents": sorted(
+            (d["filename"], d["file_type"], d["file_size"], d["uploaded_by"], d["analysis_summary"] or "")
+            for d in tables["documents"]
+        ),
+    }
+
+
+def test_write_behind_matches_synchronous(tmp_path):
+    with sqlite_server(str(tmp_path / "sync"), CHAT_WRITE_BEHIND="false") as sync:
+        expected = _converse(sync.base_url)
+    with sqlite_server(str(tmp_path / "behind"), CHAT_WRITE_BEHIND="true") as behind:
+        actual = _converse(behind.base_url)
+        assert "Write-behind chat persistence" in (tmp_path / "behind" / "uvicorn.log").read_text()
+    assert len(expected["chat_messages"]) == 8
+    assert "report.pdf" in {d[0] for d in expected["documents"]}
+    assert actual == expected
+
+
+# ── Failing units ───────────────────────────────────────────────
+
+async def _failing_batch(monkeypatch) -> None:
+    from database.connection import async_session, engine
+    from models.schemas import ChatMessage, ChatSession
+
+    # The writer takes the first unit alone and waits here; the next three
+    # queue meanwhile and are written as one batch
+    gate = asyncio.Event()
+    commit = WriteBehind._commit
+
+    async def gated(units):
+        await gate.wait()
+        await commit(units)
+
+    monkeypatch.setattr(WriteBehind, "_commit", staticmethod(gated))
+
+    async with async_session() as db:
+        session = ChatSession(user_email="write-behind@test", title="t")
+        db.add(session)
+        await db.flush()
+        existing = ChatMessage(session_id=session.id, role="user", content="existing")
+        db.add(existing)
+        await db.commit()
+        sid, taken_id = session.id, existing.id
+
+    written = []
+
+    async def write(content, message_id=None):
+        async with async_session() as db:
+            db.add(ChatMessage(id=message_id, session_id=sid, role="user", content=content))
+            await WriteBehind.commit(db, sid, after=lambda: written.append(content))
+
+    WriteBehind.start()
+    try:
+        await write("first")
+        while not WriteBehind._queue.empty():
+            await asyncio.sleep(0.01)
+        await write("second")
+        await write("duplicate id", message_id=taken_id)  # fails on every attempt
+        await write("third")
+        gate.set()
+        await asyncio.wait_for(WriteBehind.settled(sid), timeout=30)
+        assert not WriteBehind._pending
+
+        async with async_session() as db:
+            rows = (await db.execute(
+                ChatMessage.__table__.select().where(ChatMessage.session_id == sid).order_by(ChatMessage.id)
+            )).fetchall()
+        assert [r.content for r in rows] == ["existing", "first", "second", "third"]
+        assert written == ["first", "second", "third"]
+    finally:
+        await WriteBehind.stop()
+        await engine.dispose()
+
+
+def test_failing_unit_keeps_batch_mates_and_settles(unit_db, monkeypatch):
+    monkeypatch.setattr(write_behind, "ENABLED", True)
+    monkeypatch.setattr(write_behind, "WRITE_RETRIES", 2)
+    asyncio.run(_failing_batch(monkeypatch))
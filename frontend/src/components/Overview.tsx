@@ -18,7 +18,7 @@ export default function Overview() {
             try {
                 const [summary, alertList, policyList, guidelineList, claimList] = await Promise.all([
                     apiService.getAlertsSummary(),
-                    apiService.getAlerts(),
+                    apiService.getAlerts(undefined, undefined, 3),
                     apiService.getPolicies(),
                     apiService.getGuidelines().catch(() => []),
                     apiService.getAllClaims().catch(() => [])
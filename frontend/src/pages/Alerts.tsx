@@ -1,6 +1,21 @@
 import { useState, useEffect } from 'react'
 import { AlertTriangle, AlertCircle, Info, Filter, RefreshCw, Shield } from 'lucide-react'
-import apiService, { AlertItem, AlertsSummary } from '../services/api'
+import apiService, { AlertEventType, AlertItem, AlertsSummary } from '../services/api'
+
+const SEVERITY_ORDER: Record<string, number> = { critical: 0, warning: 1, info: 2 }
+
+// Apply one streamed alert event to the (severity-ordered) list
+function applyAlertEvent(
+    alerts: AlertItem[], event: AlertEventType, alert: Omit<AlertItem, 'created_at'>, at: string, filter: string
+): AlertItem[] {
+    const existing = alerts.find(a => a.id === alert.id)
+    const rest = alerts.filter(a => a.id !== alert.id)
+    if (event === 'resolved' || (filter && alert.severity !== filter)) return rest
+    const item: AlertItem = { ...alert, created_at: existing?.created_at ?? at }
+    const rank = SEVERITY_ORDER[item.severity] ?? 3
+    const index = rest.findIndex(a => (SEVERITY_ORDER[a.severity] ?? 3) > rank)
+    return index === -1 ? [...rest, item] : [...rest.slice(0, index), item, ...rest.slice(index)]
+}
 
 export default function Alerts() {
     const [alerts, setAlerts] = useState<AlertItem[]>([])
@@ -10,6 +25,12 @@ export default function Alerts() {
 
     useEffect(() => {
         loadAlerts()
+        // Live updates instead of polling
+        return apiService.streamAlerts({
+            onAlert: (event, alert, at) => setAlerts(prev => applyAlertEvent(prev, event, alert, at, filter)),
+            onSummary: setSummary,
+            onReset: loadAlerts,
+        })
     }, [filter])
 
     const loadAlerts = async () => {
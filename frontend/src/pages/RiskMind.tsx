@@ -258,7 +258,7 @@ export default function RiskMind() {
         const init = async () => {
             try {
                 const [alertList, policyList] = await Promise.all([
-                    apiService.getAlerts(),
+                    apiService.getAlerts(undefined, undefined, 1),
                     apiService.getPolicies()
                 ])
                 setAlerts(alertList)
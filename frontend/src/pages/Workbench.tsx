@@ -160,13 +160,16 @@ export default function Workbench() {
     const loadPolicies = async () => {
         try {
             const data = await apiService.getPolicies(currentUser.email)
-            setPolicies(data)
-            const decisions = await Promise.all(
-                data.map((policy) => apiService.getDecisions(policy.policy_number).catch(() => []))
-            )
+            // Claims and latest decision of every policy in one batch request
+            const details = data.length
+                ? await apiService.getPoliciesBatch(data.map(policy => policy.policy_number)).catch(() => [])
+                : []
+            const byNumber = new Map(details.map(detail => [detail.policy_number, detail]))
+            setPolicies(data.map(policy => ({ ...policy, claims: byNumber.get(policy.policy_number)?.claims || [] })))
             const map: Record<string, DecisionItem[]> = {}
-            data.forEach((policy, index) => {
-                map[policy.policy_number] = decisions[index] || []
+            data.forEach((policy) => {
+                const latest = byNumber.get(policy.policy_number)?.latest_decision
+                map[policy.policy_number] = latest ? [latest] : []
             })
             setDecisionMap(map)
         } catch (err) {
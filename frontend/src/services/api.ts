@@ -32,6 +32,7 @@ export interface Claim {
 
 export interface GlassBoxEvidence {
     sql_query: string
+    sql_params?: Record<string, unknown> | null
     data_returned: ClaimsSummary
     guideline_citation: string | null
     guideline_section: string | null
@@ -111,6 +112,8 @@ export interface AlertItem {
     message: string
     guideline_ref: string | null
     created_at: string
+    last_seen_at?: string | null
+    resolved_at?: string | null
 }
 
 export interface AlertsSummary {
@@ -120,6 +123,15 @@ export interface AlertsSummary {
     info: number
 }
 
+export type AlertEventType = 'created' | 'updated' | 'resolved'
+
+export interface AlertStreamHandlers {
+    onAlert: (event: AlertEventType, alert: Omit<AlertItem, 'created_at'>, at: string) => void
+    onSummary: (summary: AlertsSummary) => void
+    // The missed events could not be replayed; reload the list
+    onReset: () => void
+}
+
 export interface PolicyItem {
     policy_number: string
     policyholder_name: string
@@ -134,6 +146,13 @@ export interface PolicyItem {
     claims: Claim[]
 }
 
+export interface PolicyDetailItem extends PolicyItem {
+    latest_decision: DecisionItem | null
+}
+
+// Largest policy_numbers list POST /policies/batch accepts
+const POLICY_BATCH_SIZE = 500
+
 export interface MemoResponse {
     policy_number: string
     policyholder: string
@@ -218,6 +237,10 @@ export interface AnalyticsQueryPayload {
     metrics: string[]
     filters?: { field: string; op: string; values: string[] }[]
     user_email?: string
+    sort_by?: string
+    sort_dir?: 'asc' | 'desc'
+    limit?: number
+    offset?: number
 }
 
 export interface AnalyticsQueryResult {
@@ -225,6 +248,9 @@ export interface AnalyticsQueryResult {
     rows: Record<string, any>[]
     totals: Record<string, number>
     row_count: number
+    total_rows?: number
+    offset?: number
+    next_offset?: number | null
 }
 
 export interface DashboardData {
@@ -235,7 +261,9 @@ export interface DashboardData {
     documents: any[]
     chat_sessions: any[]
     chat_messages: any[]
-    snapshot: string
+    cursor: number                         // pass as `since` to get only later changes
+    snapshot: 'full' | 'delta'
+    deleted?: Record<string, number[]>     // delta only: removed row ids per table
 }
 
 export interface LoginResponse {
@@ -360,10 +388,11 @@ export const apiService = {
     },
 
     // Alerts
-    async getAlerts(type?: string, severity?: string): Promise<AlertItem[]> {
+    async getAlerts(type?: string, severity?: string, limit?: number): Promise<AlertItem[]> {
         const params: any = {}
         if (type) params.type = type
         if (severity) params.severity = severity
+        if (limit) params.limit = limit
         const response = await api.get('/alerts/', { params })
         return response.data
     },
@@ -373,6 +402,20 @@ export const apiService = {
         return response.data
     },
 
+    // Server-sent alert events (EventSource resumes from the last event id
+    // on reconnect); returns a function that closes the stream
+    streamAlerts(handlers: AlertStreamHandlers): () => void {
+        const source = new EventSource('/api/alerts/stream')
+        const onAlert = (e: Event) => {
+            const data = JSON.parse((e as MessageEvent).data)
+            handlers.onAlert(e.type as AlertEventType, data.alert, data.at)
+        }
+        for (const type of ['created', 'updated', 'resolved']) source.addEventListener(type, onAlert)
+        source.addEventListener('summary', e => handlers.onSummary(JSON.parse((e as MessageEvent).data)))
+        source.addEventListener('reset', () => handlers.onReset())
+        return () => source.close()
+    },
+
     // Policies
     async getPolicies(userEmail?: string): Promise<PolicyItem[]> {
         const params: any = {}
@@ -386,6 +429,18 @@ export const apiService = {
         return response.data
     },
 
+    // Details, claims and latest decision for many policies (one request per 500)
+    async getPoliciesBatch(policyNumbers: string[]): Promise<PolicyDetailItem[]> {
+        const chunks: string[][] = []
+        for (let i = 0; i < policyNumbers.length; i += POLICY_BATCH_SIZE) {
+            chunks.push(policyNumbers.slice(i, i + POLICY_BATCH_SIZE))
+        }
+        const responses = await Promise.all(
+            chunks.map(chunk => api.post('/policies/batch', { policy_numbers: chunk }))
+        )
+        return responses.flatMap(response => response.data)
+    },
+
     // Memo
     async getMemo(policyNumber: string): Promise<MemoResponse> {
         const response = await api.get(`/memo/${policyNumber}`)
@@ -426,8 +481,11 @@ export const apiService = {
     },
 
     // Dashboard
-    async getDashboardData(): Promise<DashboardData> {
-        const response = await api.get('/dashboard/data')
+    async getDashboardData(since?: number, tables?: string[]): Promise<DashboardData> {
+        const params: any = {}
+        if (since !== undefined) params.since = since
+        if (tables?.length) params.tables = tables.join(',')
+        const response = await api.get('/dashboard/data', { params })
         return response.data
     },
 